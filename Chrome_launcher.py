@@ -10,8 +10,8 @@ import sys
 import os
 import random
 import subprocess
+import threading
 import time
-import re
 import psutil
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                            QLabel, QLineEdit, QPushButton, QGroupBox, QProgressBar,
@@ -19,7 +19,24 @@ from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QH
                            QGridLayout, QTabWidget, QToolBar, QSpinBox)
 from PyQt5.QtCore import Qt, QThread, pyqtSignal, QSettings, QSize
 from PyQt5.QtGui import QFont, QIcon
-import win32com.client
+
+from process_index import get_process_index, running_numbers
+from profile_resolver import get_profile_resolver
+from shortcut_catalog import get_shortcut_catalog
+from fleet_registry import get_fleet_registry
+from spawner import build_launch_spec
+from launch_scheduler import DEFAULT_MAX_CONCURRENCY, LaunchScheduler
+from launch_readiness import get_readiness_tracker
+from launch_pipeline import (STAGE_SPAWN, LaunchPipeline, grid_layout, place_window, primary_work_area,
+                             profile_launch_stages)
+from warm_pool import DEFAULT_MAX_MEMORY_MB, MAX_POOL_SIZE, WarmPool
+from memory_budget import DEFAULT_RESERVE_MB, get_memory_history, get_memory_sampler, plan_launch
+from shutdown import ShutdownEngine, format_timings, targets_for_all, targets_for_numbers
+from process_watcher import ProfileExited, ProfileStarted, get_process_watcher
+from profile_creator import CreationJob, ProfileCreator, clear_pending_job, load_pending_job
+from profile_template import TemplateError
+from url_fanout import open_url, running_targets
+from profile_disk import CATEGORIES, DEFAULT_PURGE_CATEGORIES, ProfileDiskAnalyzer, format_size
 
 # 导入图标管理功能
 try:
@@ -37,17 +54,22 @@ class BackgroundWorker(QThread):
     update_progress = pyqtSignal(int)  # 进度更新信号
     finished = pyqtSignal(str, str, list)  # 完成信号：消息，颜色，处理的编号列表
 
-    def __init__(self, profiles_data, folder_path, delay_time, mode="launch", url=None):
+    def __init__(self, profiles_data, folder_path, delay_time, mode="launch", url=None,
+                 icon_manager=None, tile_windows=False, prelaunched=None):
         """初始化后台工作线程
         
         Args:
             profiles_data: 数据列表。
                            对于 "launch" 和 "close" 模式, 这是要处理的编号列表 [num1, num2, ...]。
-                           对于 "open_url" 模式, 这是 (分身编号, 用户数据目录路径, chrome.exe路径) 元组的列表 [(num, path, exe_path), ...]。
+                           对于 "open_url" 模式, 这是 url_fanout.UrlTarget 列表（编号、用户数据目录、chrome.exe路径、调试端口）。
             folder_path: 快捷方式文件夹路径 (主要用于 "launch" 模式)。对于 "open_url" 和 "close" 模式可以为 None。
-            delay_time: 操作间延迟时间（秒）
-            mode: 操作模式："launch"、"close"或"open_url"
+            delay_time: 操作间延迟时间（秒）；启动模式下作为两次启动之间的最小间隔，可留空
+            mode: 操作模式："launch"、"close"、"close_all"或"open_url"
             url: 要打开的URL（仅在mode为"open_url"时使用）
+            icon_manager: 提供时在启动流水线中为每个就绪的窗口应用编号图标（仅 launch 模式）
+            tile_windows: 是否在启动流水线中按本批顺序平铺窗口（仅 launch 模式）
+            prelaunched: 已从预热池取出的分身（warm_pool.WarmProfile 列表），不再启动，
+                         只参与平铺并计入成功启动的编号（仅 launch 模式）
         """
         super().__init__()
         self.profiles_data = profiles_data
@@ -55,6 +77,10 @@ class BackgroundWorker(QThread):
         self.delay_time = delay_time
         self.mode = mode
         self.url = url
+        self.icon_manager = icon_manager
+        self.tile_windows = tile_windows
+        self.prelaunched = list(prelaunched or [])
+        self.icons_pending = []  # 启动完成后仍需补应用图标的编号
         # self.chrome_exe_path 不再需要作为全局变量，因为 open_url 模式会自带 exe 路径
 
     def _initialize_chrome_exe_path(self):
@@ -87,186 +113,190 @@ class BackgroundWorker(QThread):
         """根据模式执行相应操作"""
         if self.mode == "launch":
             self.launch_browsers()
-        elif self.mode == "close":
+        elif self.mode in ("close", "close_all"):
             self.close_browsers() 
         elif self.mode == "open_url":
             # 对于 open_url 模式，每个条目已包含 chrome.exe 路径，不需要全局初始化
             self.open_url_in_browsers()
 
     def launch_browsers(self):
-        """启动Chrome分身 (self.profiles_data 是编号列表)"""
-        success_count = 0
-        successful_numbers = []
-        
-        if not self.profiles_data: # 检查列表是否为空
+        """启动Chrome分身 (self.profiles_data 是编号列表)
+
+        解析快捷方式、启动、等待就绪、应用图标、平铺窗口按流水线重叠执行
+        """
+        if not self.profiles_data and not self.prelaunched: # 检查列表是否为空
             self.finished.emit("没有选择任何分身进行启动", "orange", [])
             return
+        if self.profiles_data and not self.folder_path: # 启动模式必须有快捷方式文件夹路径
+            self.finished.emit("错误: 未提供快捷方式文件夹路径，无法启动分身", "red", [])
+            return
             
-        total_steps = len(self.profiles_data)
-        
-        for i, n in enumerate(self.profiles_data): # self.profiles_data 是编号列表
-            progress = int((i + 1) / total_steps * 100)
-            self.update_progress.emit(progress)
-            
-            # 发送当前启动状态信息（格式化信息，用于主要日志）
-            remaining_numbers = self.profiles_data[i+1:] if i+1 < len(self.profiles_data) else []
-            self.update_status.emit(f"CURRENT_LAUNCHING:{n}|LAUNCHED:{','.join(map(str, successful_numbers))}|REMAINING:{','.join(map(str, remaining_numbers))}", "blue")
-            
-            if not self.folder_path: # 启动模式必须有快捷方式文件夹路径
-                 # 错误信息可以覆盖主要日志
-                 self.update_status.emit(f"错误: 未提供快捷方式文件夹路径，无法启动分身 {n}", "red")
-                 continue
-            shortcut_path = os.path.join(self.folder_path, f"{n}.lnk")
-            try:
-                if os.path.exists(shortcut_path):
-                    subprocess.Popen(["cmd", "/c", "start", "", shortcut_path], shell=True)
-                    success_count += 1
-                    successful_numbers.append(n)
-                    time.sleep(float(self.delay_time))
-                else:
-                    # 警告信息可以覆盖主要日志
-                    self.update_status.emit(f"警告: 找不到快捷方式 {n}.lnk", "orange")
-            except Exception as e:
+        numbers = list(self.profiles_data or [])
+        prelaunched_numbers = [p.number for p in self.prelaunched]
+        layout = grid_layout(len(self.prelaunched) + len(numbers), primary_work_area()) if self.tile_windows else None
+        if layout is not None:
+            # 预热池中取出的分身已经就绪，占用最前面的位置
+            for profile, rect in zip(self.prelaunched, layout):
+                try:
+                    if profile.hwnd:
+                        place_window(profile.hwnd, rect)
+                except Exception as e:
+                    print(f"平铺预热分身 {profile.number} 失败: {e}")
+            layout = layout[len(self.prelaunched):]
+        if not numbers:
+            self.update_progress.emit(100)
+            self.finished.emit(f"已从预热池取用{len(prelaunched_numbers)}个Chrome浏览器!\n已启动编号: {', '.join(map(str, prelaunched_numbers))}",
+                               "green", prelaunched_numbers)
+            return
+        catalog = get_shortcut_catalog(self.folder_path)
+        try:
+            registry = get_fleet_registry()
+        except Exception:
+            registry = None
+        scheduler = self._create_launch_scheduler()
+        tracker = get_readiness_tracker()
+        
+        def resolve(n):
+            shortcut_path = catalog.path_for_number(n)
+            if not os.path.exists(shortcut_path):
+                return None
+            # 直接用快捷方式中的目标与参数创建 chrome.exe，PID 立即写入运行记录
+            return build_launch_spec(catalog.get(shortcut_path), n)
+        
+        def fallback_launch(n):
+            print(f"直接启动分身 {n} 失败，改用快捷方式启动")
+            subprocess.Popen(["cmd", "/c", "start", "", catalog.path_for_number(n)], shell=True)
+        
+        prepare_icon = apply_icon = None
+        if self.icon_manager is not None:
+            prepare_icon = self.icon_manager.generate_numbered_icon
+            apply_icon = self.icon_manager.apply_icon_to_window
+        pipeline = LaunchPipeline(profile_launch_stages(
+            resolve, scheduler, tracker, registry=registry, fallback_launch=fallback_launch,
+            prepare_icon=prepare_icon, apply_icon=apply_icon, layout=layout))
+        
+        launched = []
+        
+        def on_stage(stage, item):
+            if stage == STAGE_SPAWN:
+                launched.append(item.number)
+                remaining_numbers = numbers[item.index + 1:]
+                # 发送当前启动状态信息（格式化信息，用于主要日志）
+                self.update_status.emit(f"CURRENT_LAUNCHING:{item.number}|LAUNCHED:{','.join(map(str, launched))}|REMAINING:{','.join(map(str, remaining_numbers))}", "blue")
+        
+        def on_done(item, done, total):
+            self.update_progress.emit(int(done / total * 100))
+            if item.error:
                 # 错误信息可以覆盖主要日志
-                self.update_status.emit(f"警告: 启动 {n} 失败: {str(e)}", "red")
+                self.update_status.emit(f"警告: 分身 {item.number} {item.failed_stage} 阶段失败: {item.error}", "red")
         
-        if success_count > 0:
-            status_text = f"成功启动{success_count}个Chrome浏览器!\n已启动编号: {', '.join(map(str, successful_numbers))}"
+        report = pipeline.run(numbers, progress_callback=on_done, stage_callback=on_stage)
+        
+        # 新进程已经启动，下次读取时重新扫描
+        get_process_index().invalidate()
+        
+        successful_numbers = prelaunched_numbers + report.started_numbers()
+        # 已在流水线中应用过图标的分身，启动完成后不必再补一次
+        self.icons_pending = [item.number for item in report.items if item.started and not item.icon_applied]
+        print(f"启动流水线: {report.summary()}")
+        
+        if successful_numbers:
+            status_text = f"成功启动{len(successful_numbers)}个Chrome浏览器!\n已启动编号: {', '.join(map(str, successful_numbers))}"
+            if prelaunched_numbers:
+                status_text += f"\n其中来自预热池: {', '.join(map(str, prelaunched_numbers))}"
+            timings = [item.timing for item in report.items if item.timing is not None]
+            if timings:
+                status_text += f"\n启动延迟: {tracker.summary(timings)}"
+                print(f"启动延迟（累计）: {tracker.summary()}")
             self.finished.emit(status_text, "green", successful_numbers)
         else:
             self.finished.emit("错误: 没有成功启动任何浏览器 (或未提供快捷方式路径)", "red", [])
 
+    def _create_launch_scheduler(self):
+        """启动调度器：并发上限与负载目标来自设置，界面上的延迟作为最小间隔（可留空）"""
+        try:
+            min_delay = float(self.delay_time) if self.delay_time not in (None, "") else 0.0
+        except (TypeError, ValueError):
+            min_delay = 0.0
+        settings = QSettings("ChromeLauncher", "Settings")
+        return LaunchScheduler(
+            max_concurrency=settings.value("launch_max_concurrency", 0, type=int) or DEFAULT_MAX_CONCURRENCY,
+            target_cpu=settings.value("launch_target_cpu", 75.0, type=float),
+            min_free_memory_mb=settings.value("launch_min_free_memory_mb", 1024, type=float),
+            min_delay=min_delay,
+        )
+
     def close_browsers(self):
-        """关闭指定范围的Chrome分身 (self.profiles_data 是编号列表)"""
-        closed_count = 0
-        closed_numbers_set = set() # 使用集合避免重复
+        """关闭指定范围的Chrome分身 (self.profiles_data 是编号列表；close_all 模式为 None)"""
+        close_all = self.mode == "close_all"
+        if not close_all and not self.profiles_data: # 检查列表是否为空
+            self.finished.emit("没有选择任何分身进行关闭", "orange", [])
+            return
         
-        chrome_processes = []
-        for proc in psutil.process_iter(attrs=['pid', 'name', 'cmdline'], ad_value=None):
-            try:
-                # 确保 proc.info['name'] 和 proc.info['cmdline'] 都不是 None
-                if proc.info['name'] and 'chrome.exe' in proc.info['name'].lower() and proc.info['cmdline']:
-                    chrome_processes.append(proc)
-            except (psutil.NoSuchProcess, psutil.AccessDenied, TypeError): # 添加TypeError以防info字段为None
-                continue
+        # 关闭操作需要最新的进程状态，强制刷新共享进程索引
+        process_index = get_process_index()
+        snapshot = process_index.snapshot(force=True)
+        if close_all:
+            targets = targets_for_all(snapshot)
+        else:
+            targets = targets_for_numbers(snapshot, self.profiles_data)
         
-        if not self.profiles_data: # 检查列表是否为空
-            self.finished.emit("没有选择任何分身进行关闭", "orange", [])
+        if not targets:
+            self.finished.emit("在指定范围内没有找到活动的Chrome分身窗口", "orange", [])
             return
-            
-        total_steps = len(self.profiles_data)
-
-        for i, n in enumerate(self.profiles_data): # self.profiles_data 是编号列表
-            progress = int((i + 1) / total_steps * 100)
-            self.update_progress.emit(progress)
-            
-            # 当前关闭逻辑依赖于命令行参数中包含 "chrome<N>" 的模式。
-            # 这部分可以进一步优化为使用精确的 user_data_dir (如果能从某处获取映射关系)。
-            # assumed_data_dir_fragment 用来在命令行参数中寻找与分身编号相关的部分。
-            assumed_data_dir_fragment_pattern = re.compile(fr"chrome{n}(?:[\\/\"']|$)", re.IGNORECASE)
-            
-            terminated_this_iter = False
-            for proc in list(chrome_processes): # Iterate over a copy of the list
-                try:
-                    # 确保 cmdline 不是 None
-                    if proc.info['cmdline'] is None:
-                        continue
-                    cmd_line_str = " ".join(proc.info['cmdline'])
-                    # 使用更精确的正则匹配 --user-data-dir="...\chromeN..." 或 --user-data-dir=...\chromeN...
-                    user_data_dir_arg_match = re.search(r"--user-data-dir=(?:\"([^\"]*)\"|([^ ]+(?: [^ ]+)*?(?=(?: --|$))))", cmd_line_str)
-                    if user_data_dir_arg_match:
-                        user_data_path_from_cmd = user_data_dir_arg_match.group(1) or user_data_dir_arg_match.group(2)
-                        if user_data_path_from_cmd and assumed_data_dir_fragment_pattern.search(user_data_path_from_cmd):
-                            proc.terminate()
-                            try:
-                                proc.wait(timeout=3) # 增加超时时间到3秒
-                            except psutil.TimeoutExpired:
-                                proc.kill() # 强制杀死如果超时
-                            closed_numbers_set.add(n)
-                            terminated_this_iter = True
-                            chrome_processes.remove(proc) # 从列表中移除，避免重复处理
-                            status_text = f"已尝试关闭分身: {n}"
-                            self.update_status.emit(status_text, "blue")
-                            break # 假设一个编号对应一个主要用户数据目录实例
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                    # 如果进程已经消失或无权访问，则从列表中移除
-                    if proc in chrome_processes:
-                         chrome_processes.remove(proc)
-                    continue
-                except Exception: # 其他潜在错误
-                    if proc in chrome_processes:
-                         chrome_processes.remove(proc)
-                    continue
-            
-            # 如果通过 psutil 终止成功，可以尝试 taskkill 作为补充，但需小心误杀
-            if terminated_this_iter:
-                try:
-                    # taskkill 基于窗口标题的关闭非常依赖窗口标题的命名规则
-                    # 例如，如果窗口标题包含 "Profile N" 或 "chromeN"
-                    # subprocess.run(f'taskkill /F /FI "IMAGENAME eq chrome.exe" /FI "WINDOWTITLE eq *chrome{n}*"', 
-                    #               shell=True, check=False, capture_output=True, timeout=1)
-                    pass # 暂时禁用taskkill，因为它可能不够精确，依赖psutil的终止
-                except Exception:
-                    pass 
-
-            time.sleep(float(self.delay_time) / 4 if self.delay_time else 0.02) # 减少延迟
-
-        closed_list = sorted(list(closed_numbers_set))
-        if closed_list:
-            status_text = f"成功关闭 {len(closed_list)} 个指定Chrome分身窗口!\n已关闭编号: {', '.join(map(str, closed_list))}"
+        
+        def on_result(result, done, total):
+            self.update_progress.emit(int(done / total * 100))
+            label = f"分身 {result.number}" if result.number is not None else f"PID {result.pid}"
+            if result.closed:
+                self.update_status.emit(f"已关闭{label} ({result.method}, {result.elapsed:.1f}s)", "blue")
+            else:
+                self.update_status.emit(f"未能关闭{label}", "orange")
+        
+        # 所有目标同时请求正常退出，只对超时未退出的进程升级为 terminate / kill
+        report = ShutdownEngine().shutdown(targets, progress_callback=on_result)
+        process_index.invalidate()
+
+        closed_list = report.closed_numbers()
+        print("关闭耗时明细:\n  " + "\n  ".join(format_timings(report)))
+        if report.failed():
+            failed_labels = [str(r.number) if r.number is not None else f"PID {r.pid}" for r in report.failed()]
+            self.update_status.emit(f"以下分身未能关闭: {', '.join(failed_labels)}", "orange")
+        if closed_list or (close_all and not report.failed()):
+            status_text = f"成功关闭 {len(closed_list)} 个指定Chrome分身窗口!\n已关闭编号: {', '.join(map(str, closed_list))}\n{report.summary()}"
             self.finished.emit(status_text, "green", closed_list)
         else:
             self.finished.emit("在指定范围内没有找到或未能关闭活动的Chrome分身窗口", "orange", [])
 
 
     def open_url_in_browsers(self):
-        """在指定的Chrome分身中打开URL (self.profiles_data 是 (用户数据目录路径, chrome_exe路径) 元组的列表)"""
-        success_count = 0
-        successful_instances_info = [] # 用于记录成功操作的实例信息 (udd)
+        """在指定的Chrome分身中打开URL (self.profiles_data 是 url_fanout.UrlTarget 列表)
 
+        有调试端口的分身并发调用 /json/new，其余的启动 chrome.exe 交给已运行实例
+        """
         if not self.profiles_data: # 检查列表是否为空
             self.finished.emit("没有已运行的Chrome实例来打开网址", "orange", [])
             return
             
         total_steps = len(self.profiles_data)
+        done = [0]
+        done_lock = threading.Lock()
 
-        for i, profile_entry in enumerate(self.profiles_data):
-            progress = int((i + 1) / total_steps * 100)
+        def on_result(result):
+            with done_lock:
+                done[0] += 1
+                progress = int(done[0] / total_steps * 100)
             self.update_progress.emit(progress)
-            
-            # 解包 profile_entry - 新格式: (user_data_dir, specific_chrome_exe_path)
-            if len(profile_entry) == 2:
-                user_data_dir, specific_chrome_exe_path = profile_entry
-            else:
-                self.update_status.emit(f"警告: profiles_data 条目格式不正确，跳过。数据: {profile_entry}", "red")
-                continue
-
-            try:
-                if not specific_chrome_exe_path or not os.path.exists(specific_chrome_exe_path):
-                    self.update_status.emit(f"警告: Chrome.exe 路径无效或未找到: {specific_chrome_exe_path} (UDD: {os.path.basename(user_data_dir)})", "red")
-                    continue
-
-                if not isinstance(user_data_dir, str) or not os.path.isdir(user_data_dir):
-                     # 对于"在已运行分身中打开"，user_data_dir 应该已存在且为目录。
-                     self.update_status.emit(f"警告: 用户数据目录路径无效或不是目录: {user_data_dir}", "red")
-                     continue
+            if not result.ok:
+                self.update_status.emit(f"警告: 在实例 {result.target.label} 中打开网址失败: {result.error}", "red")
 
-                cmd = [
-                    specific_chrome_exe_path, 
-                    f"--user-data-dir={user_data_dir}", 
-                    self.url
-                ]
-                subprocess.Popen(cmd)
-                success_count += 1
-                successful_instances_info.append(os.path.basename(user_data_dir)) # 记录 UDD 的 basename 作为标识
-                status_text = f"正在实例 (UDD: ...{os.path.basename(user_data_dir)}) 中打开网址: {self.url}"
-                self.update_status.emit(status_text, "blue")
-                time.sleep(float(self.delay_time))
-            except Exception as e:
-                self.update_status.emit(f"警告: 在实例 (UDD: {os.path.basename(user_data_dir)}) 中打开网址失败: {str(e)}", "red")
+        report = open_url(self.profiles_data, self.url, on_result=on_result)
+        successful_instances_info = [os.path.basename(r.target.user_data_dir) for r in report.succeeded()]
+        success_count = len(successful_instances_info)
         
         if success_count > 0:
-            status_text = f"成功在 {success_count} 个Chrome实例中打开网址!\n实例 (UDD Basenames): {', '.join(successful_instances_info)}"
+            status_text = (f"成功在 {success_count} 个Chrome实例中打开网址!\n{report.summary()}\n"
+                           f"实例 (UDD Basenames): {', '.join(successful_instances_info)}")
             self.finished.emit(status_text, "green", successful_instances_info)
         else:
             self.finished.emit("错误: 未能在任何指定Chrome实例中打开网址", "red", [])
@@ -488,7 +518,7 @@ class ProfileCreationWorker(QThread):
     update_progress = pyqtSignal(int)  # 进度更新信号
     finished = pyqtSignal(str, str, int)  # 完成信号：消息，颜色，创建数量
     
-    def __init__(self, shortcut_path, cache_path, start_num, end_num):
+    def __init__(self, shortcut_path, cache_path, start_num, end_num, job=None, template_path=""):
         """
         初始化分身创建工作线程
         
@@ -497,16 +527,20 @@ class ProfileCreationWorker(QThread):
             cache_path: 缓存数据保存路径
             start_num: 起始编号
             end_num: 结束编号
+            job: 继续上次未完成的创建任务（CreationJob），指定时忽略以上参数
+            template_path: 模板分身目录，新分身从它复制；为空时创建空目录
         """
         super().__init__()
         self.shortcut_path = shortcut_path
         self.cache_path = cache_path
         self.start_num = start_num
         self.end_num = end_num
-        self.total_count = end_num - start_num + 1
+        self.job = job
+        self.template_path = template_path
+        self.total_count = len(job.numbers) if job else end_num - start_num + 1
         
         # 查找Chrome可执行文件路径
-        self.chrome_exe_path = self._find_chrome_executable()
+        self.chrome_exe_path = job.chrome_path if job else self._find_chrome_executable()
         
     def _find_chrome_executable(self):
         """查找Chrome可执行文件路径"""
@@ -524,6 +558,11 @@ class ProfileCreationWorker(QThread):
         
         return None
     
+    def _on_progress(self, done, total):
+        """进度回调（已按时间间隔合并）"""
+        self.update_progress.emit(int(done / total * 100) if total else 100)
+        self.update_status.emit(f"正在创建分身... ({done}/{total})", "blue")
+    
     def run(self):
         """执行分身创建任务"""
         try:
@@ -531,43 +570,23 @@ class ProfileCreationWorker(QThread):
                 self.finished.emit("未找到Chrome安装路径！请确保已安装Chrome浏览器。", "red", 0)
                 return
             
+            job = self.job or CreationJob(
+                chrome_path=self.chrome_exe_path,
+                shortcut_dir=self.shortcut_path,
+                cache_dir=self.cache_path,
+                numbers=list(range(self.start_num, self.end_num + 1)),
+                description="Chrome分身 {number}",
+                template_dir=self.template_path,
+            )
             self.update_status.emit(f"开始创建编号 {self.start_num}-{self.end_num} 的Chrome分身...", "blue")
             
-            created_count = 0
-            
-            for i in range(self.start_num, self.end_num + 1):
-                try:
-                    # 更新进度
-                    progress = int(((i - self.start_num + 1) / self.total_count) * 100)
-                    self.update_progress.emit(progress)
-                    self.update_status.emit(f"正在创建分身 {i}...", "blue")
-                    
-                    # 创建缓存目录
-                    profile_cache_dir = os.path.join(self.cache_path, str(i))
-                    os.makedirs(profile_cache_dir, exist_ok=True)
-                    
-                    # 创建快捷方式
-                    shortcut_file_path = os.path.join(self.shortcut_path, f"{i}.lnk")
-                    
-                    # 创建快捷方式使用COM组件
-                    shell = win32com.client.Dispatch("WScript.Shell")
-                    shortcut = shell.CreateShortCut(shortcut_file_path)
-                    shortcut.TargetPath = self.chrome_exe_path
-                    shortcut.Arguments = f'--user-data-dir="{profile_cache_dir}"'
-                    shortcut.WorkingDirectory = os.path.dirname(self.chrome_exe_path)
-                    shortcut.IconLocation = f"{self.chrome_exe_path},0"
-                    shortcut.Description = f"Chrome分身 {i}"
-                    shortcut.save()
-                    
-                    created_count += 1
-                    self.update_status.emit(f"分身 {i} 创建成功 ({created_count}/{self.total_count})", "green")
-                    
-                    # 短暂延迟，避免系统负载过高
-                    time.sleep(0.1)
-                    
-                except Exception as e:
-                    self.update_status.emit(f"创建分身 {i} 失败: {str(e)}", "red")
-                    continue
+            try:
+                report = ProfileCreator(job).run(progress_callback=self._on_progress)
+            except TemplateError as e:
+                self.finished.emit(f"模板分身不可用: {e}", "red", 0)
+                return
+            for number, error in sorted(report.failed.items()):
+                self.update_status.emit(f"创建分身 {number} 失败: {error}", "red")
             
             # 完成后刷新系统图标缓存
             try:
@@ -577,10 +596,13 @@ class ProfileCreationWorker(QThread):
             
             self.update_progress.emit(100)
             
+            created_count = report.completed
             if created_count == self.total_count:
-                self.finished.emit(f"成功创建了编号 {self.start_num}-{self.end_num} 的 {created_count} 个Chrome分身！", "green", created_count)
+                self.finished.emit(f"成功创建了编号 {self.start_num}-{self.end_num} 的 {created_count} 个Chrome分身！"
+                                   f"（{report.summary()}）", "green", created_count)
             elif created_count > 0:
-                self.finished.emit(f"部分成功：创建了 {created_count}/{self.total_count} 个Chrome分身", "orange", created_count)
+                self.finished.emit(f"部分成功：创建了 {created_count}/{self.total_count} 个Chrome分身，"
+                                   f"再次创建同一范围可继续", "orange", created_count)
             else:
                 self.finished.emit("创建失败：没有成功创建任何分身", "red", 0)
                 
@@ -588,8 +610,40 @@ class ProfileCreationWorker(QThread):
             self.finished.emit(f"创建分身时发生严重错误: {str(e)}", "red", 0)
 
 
+class ProfileDiskWorker(QThread):
+    """分身磁盘占用统计与缓存清理工作线程"""
+    update_status = pyqtSignal(str, str)  # 状态更新信号：消息，颜色
+    finished = pyqtSignal(str, str, object)  # 完成信号：消息，颜色，DiskReport（失败时为 None）
+    
+    def __init__(self, cache_path, purge_categories=None):
+        """
+        Args:
+            cache_path: 分身缓存目录
+            purge_categories: 要清理的类别；为空时只统计
+        """
+        super().__init__()
+        self.cache_path = cache_path
+        self.purge_categories = list(purge_categories or [])
+    
+    def run(self):
+        try:
+            analyzer = ProfileDiskAnalyzer(self.cache_path)
+            self.update_status.emit("正在统计分身磁盘占用...", "blue")
+            report = analyzer.scan()
+            if not self.purge_categories:
+                self.finished.emit(report.summary(), "green", report)
+                return
+            
+            self.update_status.emit(f"正在清理已停止分身的 {', '.join(self.purge_categories)}...", "blue")
+            result = analyzer.purge(report, self.purge_categories)
+            self.finished.emit(result.summary(), "orange" if result.errors else "green", analyzer.scan())
+        except Exception as e:
+            self.finished.emit(f"分身磁盘操作失败: {str(e)}", "red", None)
+
+
 class ChromeLauncher(QMainWindow):
     """Chrome分身启动器主窗口"""
+    profile_event = pyqtSignal(object)  # 分身启动/退出事件（由进程监视线程发出）
     
     def __init__(self):
         """初始化主窗口"""
@@ -598,6 +652,11 @@ class ChromeLauncher(QMainWindow):
         # 图标管理器初始化
         self.icon_manager = None
         self.auto_apply_icons = True
+        self.auto_tile_windows = False
+        # 随机启动用的预热池（池大小为 0 时不创建）
+        self.warm_pool = None
+        # 超出内存预算、等待内存释放后启动的编号
+        self._memory_queue = []
         
         if ICON_MANAGEMENT_AVAILABLE:
             try:
@@ -625,14 +684,17 @@ class ChromeLauncher(QMainWindow):
         self.sequential_launch_current_index = 0 # 指向下一个待启动分身的索引
         self._currently_attempting_sequential_profile = None # 临时存储当前尝试启动的分身号
 
-        # 定义用于从命令行提取分身编号的正则表达式模式
-        self.profile_num_patterns = [
-            re.compile(r"chrome[\\/]?(\d+)", re.IGNORECASE),
-            re.compile(r"profile[\\/]?(\d+)", re.IGNORECASE),
-            re.compile(r"--user-data-dir(?:\"|\'|=|\s)+.*?chrome(\d+)", re.IGNORECASE),
-            re.compile(r"--profile-directory=(?:\"Profile\s+(\d+)\"?|Default)", re.IGNORECASE)
-        ]
-        self.user_data_dir_pattern = re.compile(r'--user-data-dir=(?:\"(?P<path>[^"]+)\"|(?P<path_unquoted>[^\s]+(?:\s+[^\s]+)*?(?=\s*--|\s*$)))')
+        # 分身编号统一由共享解析器识别（目录名 / 快捷方式反查 / 路径 / Profile N）
+        self.profile_resolver = get_profile_resolver()
+        self._bind_shortcut_catalog(self.settings.value("folder_path", ""))
+        # 共享的Chrome进程索引，启动同步、打开网址等功能都从这里读取进程表
+        self.process_index = get_process_index()
+        # 分身运行记录：启动时据此恢复 launched_numbers，跳过完整进程扫描
+        try:
+            self.fleet_registry = get_fleet_registry()
+        except Exception as e:
+            print(f"打开分身运行记录失败: {e}")
+            self.fleet_registry = None
         
         # 设置窗口属性
         self.setWindowTitle("Chrome分身启动器 V3.0")
@@ -648,6 +710,22 @@ class ChromeLauncher(QMainWindow):
         # 同步/刷新 launched_numbers 以匹配当前实际运行的Chrome分身
         self._sync_launched_numbers_with_running_processes()
         
+        # 之后由进程监视器增量维护 launched_numbers
+        self.process_watcher = get_process_watcher()
+        if self.fleet_registry is not None:
+            self.process_watcher.set_registry(self.fleet_registry)
+        self.profile_event.connect(self._on_profile_event)
+        self._profile_event_subscriber = self.process_watcher.subscribe(self.profile_event.emit)
+        self.process_watcher.start()
+        
+        # 后台记录各分身的稳态内存，供启动前估算
+        try:
+            self.memory_sampler = get_memory_sampler()
+            self.memory_sampler.start()
+        except Exception as e:
+            print(f"启动内存采样失败: {e}")
+            self.memory_sampler = None
+        
         # 应用浅色主题样式
         self.apply_light_theme()
         
@@ -670,6 +748,8 @@ class ChromeLauncher(QMainWindow):
             
         self.set_status(initial_status_message, "blue")
         self.statusBar.showMessage(f"就绪。已记录编号分身: {len(self.launched_numbers)} 个。")
+        
+        self._configure_warm_pool()
     
     def init_ui(self):
         """初始化用户界面"""
@@ -724,11 +804,20 @@ class ChromeLauncher(QMainWindow):
         
         params_layout.addWidget(QLabel("  延迟:"))
         self.delay_time = QLineEdit("0.5")
+        self.delay_time.setToolTip("两次启动之间的最小间隔（秒），可留空；实际节奏由系统负载决定")
         self.delay_time.setFixedWidth(40)
         self.delay_time.setFixedHeight(24)
         params_layout.addWidget(self.delay_time)
         params_layout.addWidget(QLabel("秒"))
         
+        params_layout.addWidget(QLabel("  预热:"))
+        self.warm_pool_size = QSpinBox()
+        self.warm_pool_size.setRange(0, MAX_POOL_SIZE)
+        self.warm_pool_size.setToolTip("在后台最小化预先启动的随机分身数，随机启动时直接取用；0 表示关闭")
+        self.warm_pool_size.setFixedWidth(40)
+        self.warm_pool_size.setFixedHeight(24)
+        params_layout.addWidget(self.warm_pool_size)
+        
         params_layout.addWidget(QLabel("  指定范围:"))
         self.specific_range = QLineEdit("1-10")
         self.specific_range.setFixedWidth(100)  # 设置合适的固定宽度
@@ -824,6 +913,11 @@ class ChromeLauncher(QMainWindow):
             self.auto_apply_checkbox.stateChanged.connect(self.on_auto_apply_icons_changed)
             self.auto_apply_checkbox.setFont(QFont("Microsoft YaHei", 7))
             auto_icon_layout.addWidget(self.auto_apply_checkbox)
+            self.auto_tile_checkbox = QCheckBox("启动后按编号平铺窗口")
+            self.auto_tile_checkbox.setChecked(self.auto_tile_windows)
+            self.auto_tile_checkbox.stateChanged.connect(self.on_auto_tile_windows_changed)
+            self.auto_tile_checkbox.setFont(QFont("Microsoft YaHei", 7))
+            auto_icon_layout.addWidget(self.auto_tile_checkbox)
             auto_icon_layout.addStretch()
             icon_layout.addLayout(auto_icon_layout)
             
@@ -882,6 +976,21 @@ class ChromeLauncher(QMainWindow):
         cache_path_layout.addWidget(cache_browse_button)
         profile_layout.addLayout(cache_path_layout)
         
+        # 模板分身设置（可选）
+        template_path_layout = QHBoxLayout()
+        template_path_layout.addWidget(QLabel("模板分身目录:"))
+        self.template_path_entry = QLineEdit()
+        self.template_path_entry.setFixedHeight(24)
+        self.template_path_entry.setPlaceholderText("可选：已初始化的用户数据目录，新分身从它复制")
+        template_path_layout.addWidget(self.template_path_entry)
+        
+        template_browse_button = QPushButton("浏览")
+        template_browse_button.clicked.connect(self.browse_template_path)
+        template_browse_button.setFixedWidth(50)
+        template_browse_button.setFixedHeight(24)
+        template_path_layout.addWidget(template_browse_button)
+        profile_layout.addLayout(template_path_layout)
+        
         # 数量设置和创建按钮
         create_layout = QHBoxLayout()
         create_layout.addWidget(QLabel("创建编号:"))
@@ -912,6 +1021,29 @@ class ChromeLauncher(QMainWindow):
         
         profile_layout.addLayout(create_layout)
         
+        # 分身磁盘占用：统计与清理已停止分身的缓存
+        disk_layout = QHBoxLayout()
+        disk_layout.addWidget(QLabel("磁盘占用:"))
+        self.disk_category_checkboxes = {}
+        for category in CATEGORIES:
+            checkbox = QCheckBox(category)
+            checkbox.setChecked(category in DEFAULT_PURGE_CATEGORIES)
+            checkbox.setToolTip("清理时删除该类目录（Service Worker、IndexedDB 含网站数据）")
+            self.disk_category_checkboxes[category] = checkbox
+            disk_layout.addWidget(checkbox)
+        disk_layout.addStretch()
+        
+        disk_scan_button = QPushButton("统计")
+        disk_scan_button.clicked.connect(self.scan_profile_disk)
+        disk_scan_button.setFixedHeight(24)
+        disk_layout.addWidget(disk_scan_button)
+        
+        disk_purge_button = QPushButton("清理已停止分身")
+        disk_purge_button.clicked.connect(self.purge_profile_disk)
+        disk_purge_button.setFixedHeight(24)
+        disk_layout.addWidget(disk_purge_button)
+        profile_layout.addLayout(disk_layout)
+        
         tab_widget.addTab(profile_tab, "创建分身")
         
         main_layout.addWidget(tab_widget)
@@ -1137,6 +1269,66 @@ class ChromeLauncher(QMainWindow):
         formatted_message = "\n".join(status_lines)
         self.set_status(formatted_message, main_color)
     
+    def _create_launch_worker(self, numbers, folder_path):
+        """启动任务：按设置在流水线中同时完成图标应用与窗口平铺
+
+        已在预热池中的编号直接取出显示，不再启动
+        """
+        prelaunched = self.warm_pool.take(len(numbers), numbers) if self.warm_pool is not None else []
+        prelaunched_numbers = {p.number for p in prelaunched}
+        numbers = self._apply_memory_budget([n for n in numbers if n not in prelaunched_numbers])
+        apply_icons = ICON_MANAGEMENT_AVAILABLE and self.icon_manager is not None and self.auto_apply_icons
+        return BackgroundWorker(numbers, folder_path, self.delay_time.text(),
+                                icon_manager=self.icon_manager if apply_icons else None,
+                                tile_windows=self.auto_tile_windows, prelaunched=prelaunched)
+    
+    def _apply_memory_budget(self, numbers):
+        """按各分身的历史内存估算本批占用，返回预算内可以启动的编号
+
+        超出预算的编号按设置排队（内存释放后自动启动）或直接放弃
+        """
+        if not numbers:
+            return numbers
+        try:
+            plan = plan_launch(numbers, get_memory_history(),
+                               budget_mb=self.settings.value("memory_budget_mb", 0, type=float),
+                               reserve_mb=self.settings.value("memory_reserve_mb", DEFAULT_RESERVE_MB, type=float))
+        except Exception as e:
+            print(f"内存预算估算失败，不限制本批启动: {e}")
+            return numbers
+        print(f"内存预算: {plan.summary()}")
+        if plan.deferred:
+            if self.settings.value("memory_budget_queue", True, type=bool):
+                self._memory_queue.extend(n for n in plan.deferred if n not in self._memory_queue)
+                self.statusBar.showMessage(f"内存预算不足，{len(plan.deferred)} 个分身排队等待: {', '.join(map(str, plan.deferred))}")
+            else:
+                self.set_status(f"内存预算不足，未启动: {', '.join(map(str, plan.deferred))}", "orange")
+        return plan.admitted
+    
+    def _launch_memory_queue(self):
+        """有分身退出、内存释放后，启动排队中的分身"""
+        if not self._memory_queue:
+            return
+        if hasattr(self, 'worker') and self.worker.isRunning():
+            return
+        folder_path = self.folder_path.text().strip()
+        queued = [n for n in self._memory_queue if n not in self.launched_numbers]
+        self._memory_queue = []
+        if not queued or not os.path.isdir(folder_path):
+            return
+        # 按最新的进程表估算；仍装不下的分身会被重新放回队列
+        self.process_index.invalidate()
+        self.worker = self._create_launch_worker(queued, folder_path)
+        if not self.worker.profiles_data and not self.worker.prelaunched:
+            return
+        self.statusBar.showMessage(f"内存已释放，启动排队中的分身: {', '.join(map(str, self.worker.profiles_data))}")
+        self.progress_bar.setValue(0)
+        self.progress_bar.setVisible(True)
+        self.worker.update_status.connect(self.on_launch_status_update)
+        self.worker.update_progress.connect(self.progress_bar.setValue)
+        self.worker.finished.connect(self.on_launch_finished)
+        self.worker.start()
+    
     def launch_random_browsers(self):
         """随机启动指定数量的Chrome分身"""
         try:
@@ -1161,22 +1353,28 @@ class ChromeLauncher(QMainWindow):
             # 过滤范围内的编号
             in_range_numbers = [n for n in available_numbers if start <= n <= end]
             
-            # 从已有编号中排除已启动的编号
-            available_to_select_from = [n for n in in_range_numbers if n not in self.launched_numbers]
+            # 从已有编号中排除已启动的编号，以及预热池正在预热（尚不能取用）的编号
+            ready_numbers = self._warm_pool_ready_numbers()
+            warming_numbers = self._warm_pool_numbers() - ready_numbers
+            available_to_select_from = [n for n in in_range_numbers
+                                        if n not in self.launched_numbers and n not in warming_numbers]
             
             # 记录本次操作的完整目标范围（去重前，有效快捷方式）
             self._last_operation_scope_profiles = list(in_range_numbers) # 应该是 in_range_numbers，代表范围内的所有有效快捷方式
 
             if not available_to_select_from:
-                self.set_status("没有可用的分身编号，所有分身可能已经启动", "orange")
+                self.set_status("没有可用的分身编号，所有分身可能已经启动或正在预热", "orange")
                 self.statusBar.showMessage("没有可用的分身编号")
                 return
             
             # 如果可用数量少于请求的数量，调整数量
             count = min(count, len(available_to_select_from))
             
-            # 随机选择指定数量的编号
-            selected_numbers = random.sample(available_to_select_from, count)
+            # 随机选择指定数量的编号：预热池中已就绪的分身可立即显示，优先选中
+            pooled = [n for n in available_to_select_from if n in ready_numbers]
+            selected_numbers = random.sample(pooled, min(count, len(pooled)))
+            rest = [n for n in available_to_select_from if n not in ready_numbers]
+            selected_numbers += random.sample(rest, count - len(selected_numbers))
             selected_numbers.sort()  # 排序以便按顺序启动
             
             # 计算未启动的分身（范围内的所有可用分身减去已启动的）
@@ -1195,7 +1393,7 @@ class ChromeLauncher(QMainWindow):
             self.progress_bar.setVisible(True)
             
             # 创建并启动工作线程
-            self.worker = BackgroundWorker(selected_numbers, folder_path, self.delay_time.text())
+            self.worker = self._create_launch_worker(selected_numbers, folder_path)
             self.worker.update_status.connect(self.on_launch_status_update)
             self.worker.update_progress.connect(self.progress_bar.setValue)
             self.worker.finished.connect(self.on_launch_finished)
@@ -1301,10 +1499,12 @@ class ChromeLauncher(QMainWindow):
             self.statusBar.showMessage("❌ 未成功启动任何新分身")
         
         self._last_operation_scope_profiles = [] # 清理
+        # 取用后在后台补足预热池
+        self._refresh_warm_pool()
         
-        # 自动应用图标（如果启用且有成功启动的分身）
+        # 自动应用图标：启动流水线已为就绪的窗口应用过，这里只补上未能应用的分身
         if successful_numbers and ICON_MANAGEMENT_AVAILABLE and self.icon_manager and self.auto_apply_icons:
-            self.apply_icons_for_numbers(successful_numbers)
+            self.apply_icons_for_numbers(getattr(self.sender(), "icons_pending", successful_numbers))
     
     def launch_specific_range(self):
         """启动指定范围的Chrome分身"""
@@ -1388,7 +1588,7 @@ class ChromeLauncher(QMainWindow):
             self.progress_bar.setVisible(True)
             
             # 创建并启动工作线程
-            self.worker = BackgroundWorker(numbers_to_launch, folder_path, self.delay_time.text())
+            self.worker = self._create_launch_worker(numbers_to_launch, folder_path)
             self.worker.update_status.connect(self.on_launch_status_update)
             self.worker.update_progress.connect(self.progress_bar.setValue)
             self.worker.finished.connect(self.on_launch_finished)
@@ -1410,14 +1610,17 @@ class ChromeLauncher(QMainWindow):
                                       QMessageBox.No)
             
             if reply == QMessageBox.Yes:
-                # 尝试先进行优雅关闭，去掉 /F 参数
-                os.system('taskkill /IM chrome.exe')
-                # 可以选择性地在这里加一个短暂的 sleep，给进程响应时间，例如 time.sleep(3)
-                self.set_status("已发送关闭所有Chrome窗口的请求", "green")
-                self.statusBar.showMessage("已发送关闭所有Chrome窗口的请求")
-                # 清空已启动编号集合
-                self.launched_numbers.clear()
-                self.save_settings() # 保存清空后的状态
+                # 由关闭引擎在后台线程中完成：先正常关闭，超时再 terminate / kill
+                self.set_status("正在关闭所有Chrome窗口...", "blue")
+                self.statusBar.showMessage("正在关闭所有Chrome窗口...")
+                self.progress_bar.setValue(0)
+                self.progress_bar.setVisible(True)
+                
+                self.worker = BackgroundWorker(None, None, self.delay_time.text(), mode="close_all")
+                self.worker.update_status.connect(lambda msg, color: self.set_status(msg, color))
+                self.worker.update_progress.connect(self.progress_bar.setValue)
+                self.worker.finished.connect(self.on_close_all_finished)
+                self.worker.start()
                 
         except Exception as e:
             self.set_status(f"关闭Chrome失败: {str(e)}", "red")
@@ -1505,6 +1708,9 @@ class ChromeLauncher(QMainWindow):
                 self.launched_numbers.remove(num)
         if closed_numbers: # 只有成功关闭了才保存
             self.save_settings()
+        # 已关闭的编号重新成为预热候选；释放的内存先用于排队中的分身
+        self._refresh_warm_pool()
+        self._launch_memory_queue()
 
         # 关闭操作的结果消息在状态栏显示，主要状态区域显示当前已启动分身状态
         if closed_numbers:
@@ -1529,6 +1735,72 @@ class ChromeLauncher(QMainWindow):
             )
             self.statusBar.showMessage("❌ 未成功关闭任何指定分身")
     
+    def _warm_pool_numbers(self):
+        """预热池中（含正在预热）的编号"""
+        return self.warm_pool.numbers() if self.warm_pool is not None else set()
+    
+    def _warm_pool_ready_numbers(self):
+        """预热池中已就绪、可立即取用的编号"""
+        return {p.number for p in self.warm_pool.profiles()} if self.warm_pool is not None else set()
+    
+    def _configure_warm_pool(self):
+        """按设置创建、调整或关闭预热池"""
+        size = self.settings.value("warm_pool_size", 0, type=int)
+        folder_path = self.folder_path.text().strip() if hasattr(self, 'folder_path') else ""
+        old_pool = self.warm_pool
+        if size <= 0 or not os.path.isdir(folder_path):
+            self.warm_pool = None
+        elif old_pool is not None and old_pool.folder_path == folder_path:
+            # 缩小时需要关闭多出的分身，放到后台线程
+            threading.Thread(target=old_pool.set_size, args=(size,), daemon=True).start()
+            old_pool = None
+        else:
+            self.warm_pool = WarmPool(
+                folder_path, size=size,
+                max_memory_mb=self.settings.value("warm_pool_max_memory_mb", DEFAULT_MAX_MEMORY_MB, type=float),
+                registry=self.fleet_registry,
+                on_warmed=self._on_profile_warmed,
+            )
+        if old_pool is not None:
+            threading.Thread(target=old_pool.drain, daemon=True).start()
+        self._refresh_warm_pool()
+    
+    def _refresh_warm_pool(self):
+        """把随机启动范围内未启动的编号设为预热候选，并在后台补足"""
+        if self.warm_pool is None:
+            return
+        try:
+            start = int(self.start_num.text().strip())
+            end = int(self.end_num.text().strip())
+            shortcut_names = os.listdir(self.warm_pool.folder_path)
+        except (ValueError, OSError):
+            return
+        candidates = [int(f[:-4]) for f in shortcut_names if f.endswith('.lnk') and f[:-4].isdigit()]
+        self.warm_pool.set_candidates(n for n in candidates if start <= n <= end and n not in self.launched_numbers)
+        self.warm_pool.refill()
+    
+    def _on_profile_warmed(self, profile):
+        """预热完成的分身提前应用编号图标，取用时只需显示窗口（在预热线程中调用）"""
+        if ICON_MANAGEMENT_AVAILABLE and self.icon_manager and self.auto_apply_icons and profile.hwnd:
+            icon_path = self.icon_manager.generate_numbered_icon(profile.number)
+            if icon_path:
+                self.icon_manager.apply_icon_to_window(profile.hwnd, icon_path)
+    
+    def on_warm_pool_size_changed(self, value):
+        """预热池大小改变时的回调"""
+        self.settings.setValue("warm_pool_size", value)
+        self._configure_warm_pool()
+        status_text = f"预热池: 保持 {value} 个分身" if value else "已关闭预热池"
+        self.statusBar.showMessage(status_text)
+    
+    def on_close_all_finished(self, status_text, color, closed_numbers):
+        """关闭所有Chrome完成后的回调"""
+        self.on_close_finished(status_text, color, closed_numbers)
+        if color == "green":
+            # 清空已启动编号集合
+            self.launched_numbers.clear()
+            self.save_settings() # 保存清空后的状态
+    
     def on_open_url_finished(self, status_text, color, successful_instances_info):
         """打开URL完成后的回调
         
@@ -1638,7 +1910,7 @@ class ChromeLauncher(QMainWindow):
             self.progress_bar.setValue(0) # 重置进度条以用于单次启动
             self.progress_bar.setVisible(True)
 
-            self.worker = BackgroundWorker([profile_to_launch], folder_path, self.delay_time.text())
+            self.worker = self._create_launch_worker([profile_to_launch], folder_path)
             self.worker.update_status.connect(lambda msg, color: self.set_status(msg, color)) # 可以简化或移除，因为主要状态由 on_sequential_launch_item_finished 控制
             self.worker.update_progress.connect(self.progress_bar.setValue)
             self.worker.finished.connect(self.on_sequential_launch_item_finished)
@@ -1677,6 +1949,7 @@ class ChromeLauncher(QMainWindow):
             self.launched_numbers.add(profile_launched_attempt)
             self.sequential_launch_current_index += 1
             self.save_settings() # 保存状态
+            self._refresh_warm_pool()
             
             remaining_in_seq = 0
             next_profile_to_show = None
@@ -1722,9 +1995,9 @@ class ChromeLauncher(QMainWindow):
                 self.statusBar.showMessage(f"✅ 成功启动 {profile_launched_attempt}，序列完成")
                 self.sequential_launch_range_active = False # 确保重置
             
-            # 自动应用图标（如果启用）
+            # 自动应用图标（如果启用；启动流水线中已应用的不再重复）
             if ICON_MANAGEMENT_AVAILABLE and self.icon_manager and self.auto_apply_icons:
-                self.apply_icons_for_numbers([profile_launched_attempt])
+                self.apply_icons_for_numbers(getattr(self.sender(), "icons_pending", [profile_launched_attempt]))
 
         else: # 启动失败
             remaining_on_fail = 0
@@ -1765,77 +2038,11 @@ class ChromeLauncher(QMainWindow):
             if not url.startswith(('http://', 'https://')):
                 url = 'https://' + url
             
-            # target_profiles_info 将存储 (用户数据目录路径, 该实例的chrome.exe路径) 元组
-            # 使用字典以 user_data_dir 作为键来自动去重，值为 chrome_exe_path
-            unique_running_instances = {}
-            
-            user_data_dir_pattern = self.user_data_dir_pattern # 使用在 __init__ 中定义的模式
-            processed_pids = set()
-
-            print("DEBUG_OPEN_URL_NEW: Starting to scan running Chrome processes...")
-
-            for proc in psutil.process_iter(attrs=['pid', 'name', 'cmdline', 'exe'], ad_value=None):
-                try:
-                    if proc.pid in processed_pids:
-                        continue
-                    
-                    proc_info = proc.info
-                    if not proc_info or \
-                       not proc_info.get('name') or \
-                       'chrome.exe' not in proc_info['name'].lower() or \
-                       not proc_info.get('cmdline') or \
-                       not proc_info.get('exe'):
-                        continue
-                    
-                    cmd_line_list = proc_info['cmdline']
-                    cmd_line_str = " ".join(cmd_line_list)
-                    proc_exe_path = proc_info['exe']
-
-                    print(f"DEBUG_OPEN_URL_NEW: PID={proc.pid}, EXE='{proc_exe_path}', CMD_LINE='{cmd_line_str}'")
-
-                    actual_user_data_dir = None
-                    match_ud_dir = user_data_dir_pattern.search(cmd_line_str)
-
-                    if match_ud_dir:
-                        # 提取路径，优先尝试带引号的路径组，然后尝试不带引号的路径组
-                        raw_udd = match_ud_dir.group('path') or match_ud_dir.group('path_unquoted')
-                        if raw_udd:
-                            actual_user_data_dir = os.path.normpath(raw_udd.strip())
-                            print(f"DEBUG_OPEN_URL_NEW: PID={proc.pid}, Extracted UDD: '{actual_user_data_dir}'")
-                            
-                            # 确保提取到的 user_data_dir 是一个有效的目录，并且 proc_exe_path 存在
-                            if actual_user_data_dir and os.path.isdir(actual_user_data_dir) and \
-                               proc_exe_path and os.path.exists(proc_exe_path):
-                                # 以 user_data_dir 为键，如果已存在，则不更新（保留第一个遇到的exe_path）
-                                # 或者可以更新为最新的，或者基于某种逻辑选择，这里简单保留第一个
-                                if actual_user_data_dir not in unique_running_instances:
-                                    unique_running_instances[actual_user_data_dir] = proc_exe_path
-                                    print(f"DEBUG_OPEN_URL_NEW: PID={proc.pid}, ADDED instance: UDD='{actual_user_data_dir}', EXE='{proc_exe_path}'")
-                                else:
-                                    print(f"DEBUG_OPEN_URL_NEW: PID={proc.pid}, Instance already recorded for UDD: '{actual_user_data_dir}'")
-                            else:
-                                print(f"DEBUG_OPEN_URL_NEW: PID={proc.pid}, SKIPPED - Invalid UDD ('{actual_user_data_dir}', is_dir={os.path.isdir(actual_user_data_dir) if actual_user_data_dir else 'N/A'}) or EXE path ('{proc_exe_path}', exists={os.path.exists(proc_exe_path) if proc_exe_path else 'N/A'}).")
-                        else:
-                            print(f"DEBUG_OPEN_URL_NEW: PID={proc.pid}, SKIPPED - Could not extract UDD string from regex match.")
-                    else:
-                        print(f"DEBUG_OPEN_URL_NEW: PID={proc.pid}, SKIPPED - user_data_dir_pattern did not match.")
-
-                    processed_pids.add(proc.pid)
-
-                except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-                    continue 
-                except (TypeError, ValueError, AttributeError) as e_data_handling:
-                    print(f"DEBUG_OPEN_URL_NEW_DATA_HANDLING_ERROR: PID (approx {proc.pid if proc and hasattr(proc, 'pid') else 'N/A'}): {str(e_data_handling)}")
-                    continue 
-                except Exception as e_general_proc:
-                    print(f"DEBUG_OPEN_URL_NEW_GENERAL_ERROR: PID (approx {proc.pid if proc and hasattr(proc, 'pid') else 'N/A'}): {str(e_general_proc)}")
-                    continue
-            
-            final_target_instances = list(unique_running_instances.items()) # 转换为 [(udd, exe_path), ...] 列表
-            # Sort by UDD path for consistent ordering, though not strictly necessary for functionality
-            final_target_instances.sort(key=lambda x: x[0]) 
-            
-            print(f"DEBUG_OPEN_URL_NEW: FINAL target instances for URL opening: {final_target_instances}")
+            # 每个用户数据目录一个目标，带上主进程命令行中的调试端口
+            # 预热池中的分身对用户不可见，不在其中打开
+            pooled = self._warm_pool_numbers()
+            final_target_instances = [t for t in running_targets(self.process_index.snapshot())
+                                      if os.path.isdir(t.user_data_dir) and t.number not in pooled]
 
             if not final_target_instances:
                 self.set_status("没有找到正在运行的、可操作的Chrome实例", "orange")
@@ -1848,7 +2055,7 @@ class ChromeLauncher(QMainWindow):
             self.progress_bar.setValue(0)
             self.progress_bar.setVisible(True)
             
-            # BackgroundWorker 的 profiles_data 现在是 [(user_data_dir, exe_path), ...]
+            # BackgroundWorker 的 profiles_data 现在是 [UrlTarget, ...]
             self.worker = BackgroundWorker(profiles_data=final_target_instances, 
                                          folder_path=None, 
                                          delay_time=self.delay_time.text(), 
@@ -1874,8 +2081,10 @@ class ChromeLauncher(QMainWindow):
                                                 current_path)
         if folder:
             self.folder_path.setText(folder)
+            self._bind_shortcut_catalog(folder)
             # 保存设置
             self.save_settings()
+            self._configure_warm_pool()
             
     def save_settings(self):
         """保存设置到配置文件"""
@@ -1891,6 +2100,8 @@ class ChromeLauncher(QMainWindow):
                 self.settings.setValue("num_browsers", self.num_browsers.text())
             if hasattr(self, 'delay_time') and self.delay_time:
                 self.settings.setValue("delay_time", self.delay_time.text())
+            if hasattr(self, 'warm_pool_size') and self.warm_pool_size:
+                self.settings.setValue("warm_pool_size", self.warm_pool_size.value())
             if hasattr(self, 'specific_range') and self.specific_range:
                 self.settings.setValue("specific_range", self.specific_range.text())
             if hasattr(self, 'url_entry') and self.url_entry:
@@ -1907,12 +2118,16 @@ class ChromeLauncher(QMainWindow):
             # 保存图标设置
             if hasattr(self, 'auto_apply_checkbox') and self.auto_apply_checkbox:
                 self.settings.setValue("auto_apply_icons", self.auto_apply_checkbox.isChecked())
+            if hasattr(self, 'auto_tile_checkbox') and self.auto_tile_checkbox:
+                self.settings.setValue("auto_tile_windows", self.auto_tile_checkbox.isChecked())
             
             # 保存创建分身的路径设置
             if hasattr(self, 'shortcut_path_entry') and self.shortcut_path_entry:
                 self.settings.setValue("shortcut_creation_path", self.shortcut_path_entry.text())
             if hasattr(self, 'cache_path_entry') and self.cache_path_entry:
                 self.settings.setValue("cache_creation_path", self.cache_path_entry.text())
+            if hasattr(self, 'template_path_entry') and self.template_path_entry:
+                self.settings.setValue("template_profile_path", self.template_path_entry.text())
             if hasattr(self, 'create_start_entry') and self.create_start_entry:
                 self.settings.setValue("create_start", self.create_start_entry.text())
             if hasattr(self, 'create_end_entry') and self.create_end_entry:
@@ -1932,6 +2147,8 @@ class ChromeLauncher(QMainWindow):
                 self.end_num.setText(self.settings.value("end_num", "100"))
                 self.num_browsers.setText(self.settings.value("num_browsers", "5"))
                 self.delay_time.setText(self.settings.value("delay_time", "0.5"))
+                self.warm_pool_size.setValue(self.settings.value("warm_pool_size", 0, type=int))
+                self.warm_pool_size.valueChanged.connect(self.on_warm_pool_size_changed)
                 self.specific_range.setText(self.settings.value("specific_range", "1-10"))
                 self.url_entry.setText(self.settings.value("url_entry", "https://www.example.com"))
                 
@@ -1944,6 +2161,9 @@ class ChromeLauncher(QMainWindow):
                 if hasattr(self, 'auto_apply_checkbox'):
                     self.auto_apply_icons = self.settings.value("auto_apply_icons", True, type=bool)
                     self.auto_apply_checkbox.setChecked(self.auto_apply_icons)
+                if hasattr(self, 'auto_tile_checkbox'):
+                    self.auto_tile_windows = self.settings.value("auto_tile_windows", False, type=bool)
+                    self.auto_tile_checkbox.setChecked(self.auto_tile_windows)
                 
                 # 加载创建分身的路径设置
                 if hasattr(self, 'shortcut_path_entry'):
@@ -1956,6 +2176,9 @@ class ChromeLauncher(QMainWindow):
                     self.cache_path_entry.setText(saved_cache_path)
                     self.cache_creation_path = saved_cache_path
                 
+                if hasattr(self, 'template_path_entry'):
+                    self.template_path_entry.setText(self.settings.value("template_profile_path", ""))
+                
                 if hasattr(self, 'create_start_entry'):
                     self.create_start_entry.setText(self.settings.value("create_start", "1"))
                 
@@ -1971,6 +2194,17 @@ class ChromeLauncher(QMainWindow):
         # 保存设置
         self.save_settings()
         
+        # 关闭预热池中未取用的分身（它们对用户不可见）
+        if self.warm_pool is not None:
+            self.warm_pool.drain()
+        
+        # 停止进程监视
+        if hasattr(self, 'process_watcher'):
+            self.process_watcher.unsubscribe(self._profile_event_subscriber)
+            self.process_watcher.stop(timeout=0.5)
+        if getattr(self, 'memory_sampler', None) is not None:
+            self.memory_sampler.stop(timeout=0.5)
+        
         # 停止所有正在运行的工作线程
         if hasattr(self, 'worker') and self.worker.isRunning():
             self.worker.terminate()
@@ -1986,114 +2220,44 @@ class ChromeLauncher(QMainWindow):
         
         event.accept()
 
+    def _bind_shortcut_catalog(self, folder_path):
+        """让编号解析器通过快捷方式目录反查自定义用户数据目录，并识别缓存目录下的编号目录"""
+        if folder_path and os.path.isdir(folder_path):
+            self.profile_resolver.set_catalog(get_shortcut_catalog(folder_path))
+        else:
+            self.profile_resolver.set_catalog(None)
+        self.profile_resolver.set_cache_dir(self.settings.value("cache_creation_path", ""))
+
+    def _on_profile_event(self, event):
+        """进程监视器事件（已切换到界面线程）：增量更新 launched_numbers"""
+        if isinstance(event, ProfileStarted):
+            if event.number in self.launched_numbers or event.number in self._warm_pool_numbers():
+                return
+            self.launched_numbers.add(event.number)
+        else:
+            # 先移除编号再补位，否则补位队列会认为该编号仍在运行
+            recorded = event.number in self.launched_numbers
+            self.launched_numbers.discard(event.number)
+            if isinstance(event, ProfileExited):
+                self._launch_memory_queue()
+            if not recorded:
+                return
+        self.statusBar.showMessage(f"就绪。已记录编号分身: {len(self.launched_numbers)} 个。")
+
     def _sync_launched_numbers_with_running_processes(self):
         """
-        扫描当前运行的Chrome进程，并用实际运行的分身编号更新 self.launched_numbers。
+        用当前实际运行的分身编号更新 self.launched_numbers。
         这确保了程序状态与系统实际状态的一致性，特别是在手动关闭分身或程序异常退出后。
+        有运行记录时只按 (pid, 创建时间) 校验记录的进程，记录之外启动的分身由进程监视器随后补报；
+        没有运行记录时从共享进程索引完整扫描。
         """
         print("DEBUG: Synchronizing launched_numbers with running processes...")
-        actually_running_profiles = set()
         try:
-            user_data_dir_pattern = self.user_data_dir_pattern # 使用实例属性
-            profile_num_patterns = self.profile_num_patterns   # 使用实例属性
-            processed_pids_sync = set() # 避免重复处理同一进程
-
-            for proc in psutil.process_iter(attrs=['pid', 'name', 'cmdline', 'exe'], ad_value=None):
-                try:
-                    # 在每次迭代开始时初始化这些变量
-                    actual_user_data_dir_sync = None
-                    extracted_profile_num_sync = None
-
-                    if proc.pid in processed_pids_sync:
-                        continue
-                    
-                    proc_info = proc.info
-                    if not proc_info or \
-                       not proc_info.get('name') or \
-                       'chrome.exe' not in proc_info['name'].lower() or \
-                       not proc_info.get('cmdline'):
-                        continue
-                    
-                    cmd_line_list = proc_info['cmdline']
-                    cmd_line_str = " ".join(cmd_line_list)
-                    
-                    # 尝试从 user-data-dir 路径中提取编号 (更可靠)
-                    # actual_user_data_dir_sync # 已在循环顶部初始化为None
-                    # extracted_profile_num_sync # 已在循环顶部初始化为None
-                    match_ud_dir_sync = user_data_dir_pattern.search(cmd_line_str)
-                    if match_ud_dir_sync:
-                        print(f"DEBUG_SYNC_UDD_PARSE: PID={proc.pid}, user_data_dir_pattern matched. Groups: {match_ud_dir_sync.groups()}")
-                        # 提取路径，优先尝试带引号的路径组，然后尝试不带引号的路径组
-                        raw_udd_sync = match_ud_dir_sync.group('path') or match_ud_dir_sync.group('path_unquoted')
-                        
-                        if raw_udd_sync:
-                            print(f"DEBUG_SYNC_UDD_PARSE: PID={proc.pid}, Raw UDD extracted: '{raw_udd_sync}', type: {type(raw_udd_sync)}")
-                            # 不需要再手动去除引号，因为 (?P<path>[^"]+) 组已不包含引号
-                            actual_user_data_dir_sync = os.path.normpath(raw_udd_sync.strip())
-                            print(f"DEBUG_SYNC_UDD_PARSE: PID={proc.pid}, Normalized actual_user_data_dir: '{actual_user_data_dir_sync}', type: {type(actual_user_data_dir_sync)}")
-                            
-                            if actual_user_data_dir_sync: # Ensure actual_user_data_dir_sync is not None or empty
-                                path_basename_sync = os.path.basename(actual_user_data_dir_sync)
-                                # 尝试从当前目录名提取，例如 "chrome123" 或 "profile123"
-                                match_name_num_sync = re.search(r"^(?:chrome|profile)(\\d+)$", path_basename_sync, re.IGNORECASE)
-                                if match_name_num_sync:
-                                    extracted_profile_num_sync = int(match_name_num_sync.group(1))
-                                    print(f"DEBUG_SYNC_UDD_EXTRACT: PID={proc.pid}, Extracted {extracted_profile_num_sync} from basename '{path_basename_sync}' using (chrome|profile)N pattern.")
-                                else:
-                                    # 如果目录名本身就是数字 (例如，父目录是 "chrome_profiles", 子目录是 "1", "2", "3")
-                                    if path_basename_sync.isdigit():
-                                        parent_dir_name_sync = os.path.basename(os.path.dirname(actual_user_data_dir_sync)).lower()
-                                        if "chrome" in parent_dir_name_sync or "profile" in parent_dir_name_sync:
-                                             extracted_profile_num_sync = int(path_basename_sync)
-                                             print(f"DEBUG_SYNC_UDD_EXTRACT: PID={proc.pid}, Extracted {extracted_profile_num_sync} from numeric basename '{path_basename_sync}' with parent '{parent_dir_name_sync}'")
-
-                                    # 如果还没找到，尝试从父目录名提取，例如路径是 ".../chrome123/Default"
-                                    if extracted_profile_num_sync is None:
-                                        parent_basename_sync = os.path.basename(os.path.dirname(actual_user_data_dir_sync))
-                                        match_parent_name_num_sync = re.search(r"^(?:chrome|profile)(\\d+)$", parent_basename_sync, re.IGNORECASE)
-                                        if match_parent_name_num_sync:
-                                             extracted_profile_num_sync = int(match_parent_name_num_sync.group(1))
-                                             print(f"DEBUG_SYNC_UDD_EXTRACT: PID={proc.pid}, Extracted {extracted_profile_num_sync} from parent basename '{parent_basename_sync}'")
-                        # No explicit else here, if raw_udd_sync is None, actual_user_data_dir_sync remains None
-                    # No specific error caught here for match_ud_dir_sync being None or regex failing early for user-data-dir
-
-                    # If extracted_profile_num_sync is still None after UDD parsing, try other patterns
-                    if extracted_profile_num_sync is None:
-                        for p_pattern_sync in profile_num_patterns:
-                            match_profile_sync = p_pattern_sync.search(cmd_line_str)
-                            if match_profile_sync:
-                                try:
-                                    num_str_sync = match_profile_sync.group(1)
-                                    if p_pattern_sync.pattern == r"--profile-directory=(?:\\\"?Profile\\s+(\\\d+)\\\"?|Default)":
-                                        print(f"DEBUG_SYNC_PROFILE_DIR_MATCH: PID={proc.pid}, Pattern='{p_pattern_sync.pattern}', FullMatch='{match_profile_sync.group(0)}', Group1='{num_str_sync}', AllGroups={match_profile_sync.groups()}")
-                                    if num_str_sync:
-                                        extracted_profile_num_sync = int(num_str_sync)
-                                        print(f"DEBUG_SYNC_PROFILE_ASSIGNED: PID={proc.pid}, extracted_profile_num_sync assigned: {extracted_profile_num_sync}")
-                                        break
-                                    elif "Default" in match_profile_sync.group(0) and "Profile" not in match_profile_sync.group(0) and p_pattern_sync.pattern == r"--profile-directory=(?:\\\"?Profile\\s+(\\\d+)\\\"?|Default)":
-                                        print(f"DEBUG_SYNC_PROFILE_DIR_MATCH: PID={proc.pid}, Matched Default profile.")
-                                        pass # Default usually not counted or handled as a numbered profile here
-                                except (IndexError, ValueError, AttributeError) as e_parse_group: # Added AttributeError
-                                    print(f"DEBUG_SYNC_PROFILE_DIR_MATCH_ERROR: PID={proc.pid}, Pattern='{p_pattern_sync.pattern}', Error: {e_parse_group} for match '{match_profile_sync.group(0) if match_profile_sync else 'NO MATCH'}'")
-                                    continue # Error in group extraction or int conversion
-
-                    if extracted_profile_num_sync is not None:
-                        actually_running_profiles.add(extracted_profile_num_sync)
-                    # No "NOT ADDED" print here in sync function, only in open_url
-                    
-                    processed_pids_sync.add(proc.pid)
-
-                except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-                    continue
-                except (TypeError, ValueError, AttributeError) as e_data_handling_sync: # Added AttributeError here too
-                    print(f"DEBUG_SYNC_DATA_HANDLING_ERROR: PID (approx {proc.pid if proc and hasattr(proc, 'pid') else 'N/A'}): {str(e_data_handling_sync)}")
-                    continue
-                except Exception as e_general_proc_sync:
-                    print(f"DEBUG_SYNC_GENERAL_ERROR: PID (approx {proc.pid if proc and hasattr(proc, 'pid') else 'N/A'}): {str(e_general_proc_sync)}")
-                    # traceback.print_exc() # Optionally re-enable for very deep debugging
-                    continue
-            
-            self.launched_numbers = actually_running_profiles
+            # 索引记录中的编号已由共享解析器按全部约定识别
+            actually_running_profiles = running_numbers(self.process_index, self.fleet_registry)
+            
+            # 预热池中的分身不算已启动
+            self.launched_numbers = actually_running_profiles - self._warm_pool_numbers()
             print(f"DEBUG: Synchronized. self.launched_numbers is now: {self.launched_numbers}")
             # 保存同步后的状态
             self.save_settings()
@@ -2176,6 +2340,13 @@ class ChromeLauncher(QMainWindow):
         status_text = "已启用自动应用图标" if self.auto_apply_icons else "已禁用自动应用图标"
         self.set_status(status_text, "green")
     
+    def on_auto_tile_windows_changed(self, state):
+        """启动后平铺窗口选项状态改变时的回调"""
+        self.auto_tile_windows = state == Qt.Checked
+        self.settings.setValue("auto_tile_windows", self.auto_tile_windows)
+        status_text = "已启用启动后平铺窗口" if self.auto_tile_windows else "已禁用启动后平铺窗口"
+        self.set_status(status_text, "green")
+    
     def generate_all_icons(self):
         """生成所有图标"""
         if not self.icon_manager:
@@ -2376,17 +2547,12 @@ class ChromeLauncher(QMainWindow):
         # 图标应用进度只在状态栏显示，不覆盖主要日志
         self.statusBar.showMessage(f"🎨 正在为 {len(numbers)} 个分身自动应用图标...")
         
-        # 延迟一下，确保Chrome窗口已经创建
-        def delayed_apply():
-            self.icon_worker = IconManagementWorker("apply_icons", numbers)
-            # 图标应用的过程信息只在状态栏显示
-            self.icon_worker.update_status.connect(lambda msg, color: self.statusBar.showMessage(f"🎨 {msg}"))
-            self.icon_worker.finished.connect(lambda msg, color: self.statusBar.showMessage(f"🎨 自动图标应用完成: {msg}"))
-            self.icon_worker.start()
-        
-        # 等待2秒让Chrome窗口完全加载
-        from PyQt5.QtCore import QTimer
-        QTimer.singleShot(2000, delayed_apply)
+        # 启动任务已等待窗口就绪后才结束，这里直接应用
+        self.icon_worker = IconManagementWorker("apply_icons", numbers)
+        # 图标应用的过程信息只在状态栏显示
+        self.icon_worker.update_status.connect(lambda msg, color: self.statusBar.showMessage(f"🎨 {msg}"))
+        self.icon_worker.finished.connect(lambda msg, color: self.statusBar.showMessage(f"🎨 自动图标应用完成: {msg}"))
+        self.icon_worker.start()
     
     def create_compact_button(self, text, callback, layout):
         """创建紧凑的按钮
@@ -2432,18 +2598,34 @@ class ChromeLauncher(QMainWindow):
             )
             if folder_path:
                 self.cache_path_entry.setText(folder_path)
+                self.profile_resolver.set_cache_dir(folder_path)
                 # 路径选择信息只在状态栏显示，不覆盖主要日志
                 self.statusBar.showMessage(f"📁 已选择缓存路径: {os.path.basename(folder_path)}")
         except Exception as e:
             # 错误信息可以覆盖主要日志
             self.set_status(f"选择缓存路径失败: {str(e)}", "red")
     
+    def browse_template_path(self):
+        """浏览选择模板分身目录"""
+        try:
+            folder_path = QFileDialog.getExistingDirectory(
+                self,
+                "选择模板分身的用户数据目录",
+                self.template_path_entry.text() or self.cache_path_entry.text()
+            )
+            if folder_path:
+                self.template_path_entry.setText(folder_path)
+                self.statusBar.showMessage(f"📁 已选择模板分身: {os.path.basename(folder_path)}")
+        except Exception as e:
+            self.set_status(f"选择模板分身失败: {str(e)}", "red")
+    
     def create_chrome_profiles(self):
         """创建Chrome分身"""
         try:
             # 获取输入参数
             shortcut_path = self.shortcut_path_entry.text().strip()
             cache_path = self.cache_path_entry.text().strip()
+            template_path = self.template_path_entry.text().strip()
             start_text = self.create_start_entry.text().strip()
             end_text = self.create_end_entry.text().strip()
             
@@ -2485,13 +2667,32 @@ class ChromeLauncher(QMainWindow):
                     QMessageBox.warning(self, "错误", f"创建缓存目录失败: {str(e)}")
                     return
             
+            if template_path and not os.path.isdir(template_path):
+                QMessageBox.warning(self, "警告", "模板分身目录不存在！")
+                return
+            
+            # 上次创建被中断时询问是否继续
+            job = None
+            pending = load_pending_job(shortcut_path)
+            if pending is not None and pending.numbers:
+                reply = QMessageBox.question(
+                    self, "继续创建",
+                    f"上次创建编号 {min(pending.numbers)}-{max(pending.numbers)} 的分身未完成，是否继续？\n"
+                    f"选择“否”将按当前输入重新创建。",
+                    QMessageBox.Yes | QMessageBox.No, QMessageBox.Yes)
+                if reply == QMessageBox.Yes:
+                    job = pending
+                    start, end = min(pending.numbers), max(pending.numbers)
+                else:
+                    clear_pending_job(shortcut_path)
+            
             # 启动创建任务
             self.set_status("开始创建Chrome分身...", "blue")
             self.progress_bar.setVisible(True)
             self.progress_bar.setValue(0)
             
             # 创建工作线程
-            self.profile_worker = ProfileCreationWorker(shortcut_path, cache_path, start, end)
+            self.profile_worker = ProfileCreationWorker(shortcut_path, cache_path, start, end, job, template_path)
             self.profile_worker.update_status.connect(lambda msg, color: self.set_status(msg, color))
             self.profile_worker.update_progress.connect(self.progress_bar.setValue)
             self.profile_worker.finished.connect(self.on_profile_creation_finished)
@@ -2501,6 +2702,46 @@ class ChromeLauncher(QMainWindow):
             self.set_status(f"创建分身失败: {str(e)}", "red")
             QMessageBox.critical(self, "错误", f"创建分身时发生错误: {str(e)}")
     
+    def _start_profile_disk_worker(self, purge_categories=None):
+        cache_path = self.cache_path_entry.text().strip()
+        if not cache_path or not os.path.isdir(cache_path):
+            QMessageBox.warning(self, "警告", "请先选择存在的缓存储存路径！")
+            return
+        if getattr(self, 'disk_worker', None) is not None and self.disk_worker.isRunning():
+            return
+        self.disk_worker = ProfileDiskWorker(cache_path, purge_categories)
+        self.disk_worker.update_status.connect(lambda msg, color: self.set_status(msg, color))
+        self.disk_worker.finished.connect(self.on_profile_disk_finished)
+        self.disk_worker.start()
+    
+    def scan_profile_disk(self):
+        """统计缓存目录下各分身的磁盘占用"""
+        self._start_profile_disk_worker()
+    
+    def purge_profile_disk(self):
+        """清理已停止分身的选中类别"""
+        categories = [c for c, checkbox in self.disk_category_checkboxes.items() if checkbox.isChecked()]
+        if not categories:
+            QMessageBox.warning(self, "警告", "请至少勾选一个要清理的类别！")
+            return
+        reply = QMessageBox.question(self, '确认清理',
+                                     f"将删除所有已停止分身的 {', '.join(categories)} 目录，运行中的分身会被跳过。\n\n"
+                                     f"是否继续？",
+                                     QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        if reply == QMessageBox.Yes:
+            self._start_profile_disk_worker(categories)
+    
+    def on_profile_disk_finished(self, status_text, color, report):
+        """磁盘统计/清理完成回调"""
+        self.set_status(status_text, color)
+        if report is None:
+            return
+        lines = [report.summary(), "", "占用最大的分身:"]
+        for usage in report.largest(10):
+            detail = "，".join(f"{name} {format_size(size)}" for name, size in usage.categories.items() if size)
+            lines.append(f"  分身 {usage.number}: {format_size(usage.total)}（{detail}）")
+        QMessageBox.information(self, "分身磁盘占用", "\n".join(lines))
+    
     def on_profile_creation_finished(self, status_text, color, created_count):
         """分身创建完成回调"""
         self.set_status(status_text, color)
@@ -6,7 +6,7 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=[('icons', 'icons'), ('ico.ico', '.')],
-    hiddenimports=['PyQt5.QtCore', 'PyQt5.QtGui', 'PyQt5.QtWidgets', 'win32com.client', 'win32gui', 'win32process', 'win32con', 'win32api', 'psutil', 'chrome_icon_manager', 'utils'],
+    hiddenimports=['PyQt5.QtCore', 'PyQt5.QtGui', 'PyQt5.QtWidgets', 'win32com.client', 'win32gui', 'win32process', 'win32con', 'win32api', 'psutil', 'chrome_icon_manager', 'utils', 'process_index', 'lnk_file', 'shortcut_catalog', 'process_watcher', 'profile_resolver', 'devtools', 'shutdown', 'fleet_registry', 'spawner', 'launch_scheduler', 'launch_readiness', 'launch_pipeline', 'warm_pool', 'memory_budget', 'profile_creator', 'profile_template', 'profile_disk', 'url_fanout', 'cdp_client', 'tab_ops', 'cdp_session', 'tab_inventory', 'port_allocator'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
@@ -0,0 +1,189 @@
+"""
+DevTools 操作基准测试 - 在模拟调试端口（fake_devtools）上测量批量标签页与浏览器操作
+
+场景（默认 500 个分身，每个 5 个标签页）：
+- keep_only_current  旧实现：20 线程，每个请求新建 HTTP 连接（GET /json + GET /json/close/<id>）
+                     现实现：tab_ops.keep_only_current 经会话池与共享事件循环（含端口归属校验）
+- url_fanout         url_fanout.open_url，分别带与不带端口归属校验；不监听端口的分身走回退路径
+- close_all          shutdown.ShutdownEngine 的 CDP 阶段（经共享事件循环并发发送 Browser.close）
+
+每项报告中位耗时、最后一次的 TCP 连接 / HTTP 请求 / WebSocket 命令数，以及结果是否符合预期。
+每次运行前恢复模拟分身的初始标签页并重新启动已关闭的分身。
+
+用法：
+    python benchmarks/bench_cdp.py
+    python benchmarks/bench_cdp.py --profiles 500 --tabs 8 --latency 2 --jitter 3 --fail-rate 0.01
+    python benchmarks/bench_cdp.py --profiles 100 --skip-legacy --repeat 5
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import statistics
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Tuple
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import port_allocator  # noqa: E402
+from cdp_session import get_session_pool  # noqa: E402
+from fake_devtools import DEFAULT_BASE_PORT, FakeDevToolsServer  # noqa: E402
+from shutdown import ShutdownEngine, ShutdownTarget  # noqa: E402
+from tab_ops import keep_only_current, run_for_ports  # noqa: E402
+from url_fanout import UrlTarget, open_url  # noqa: E402
+
+LEGACY_WORKERS = 20  # 旧版 keep_only_current_tab 的线程数
+LEGACY_TIMEOUT = 2.0
+
+
+def raise_fd_limit():
+    """500 个分身的监听端口与两端连接需要数千个文件描述符"""
+    try:
+        import resource
+    except ImportError:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+# ---- 旧实现 ----
+
+def _http(port: int, path: str, method: str = "GET") -> Tuple[int, bytes]:
+    request = urllib.request.Request(f"http://127.0.0.1:{port}{path}", method=method)
+    try:
+        with urllib.request.urlopen(request, timeout=LEGACY_TIMEOUT) as response:
+            return response.status, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, b""
+    except OSError:
+        return 0, b""
+
+
+def legacy_keep_only_current(ports: Dict[int, int]) -> int:
+    """复现最初的实现：线程池查询 /json，再在线程池中逐个关闭其余页面，每个请求一条新连接"""
+    def get_tabs(port):
+        status, body = _http(port, "/json")
+        if status != 200:
+            return port, []
+        pages = [t for t in json.loads(body) if t.get("type") == "page"]
+        return port, pages if len(pages) > 1 else []
+
+    with ThreadPoolExecutor(max_workers=LEGACY_WORKERS) as executor:
+        listed = list(executor.map(get_tabs, ports.values()))
+        closes = [(port, tab["id"]) for port, pages in listed for tab in pages[1:]]
+        results = list(executor.map(lambda item: _http(item[0], f"/json/close/{item[1]}")[0], closes))
+    return sum(1 for status in results if status == 200)
+
+
+# ---- 场景 ----
+
+def measure(server: FakeDevToolsServer, repeat: int, run: Callable[[], object]) -> Tuple[float, object, Dict[str, int]]:
+    times = []
+    result = None
+    for _ in range(repeat):
+        server.reset()
+        started = time.perf_counter()
+        result = run()
+        times.append(time.perf_counter() - started)
+    return statistics.median(times), result, server.stats.as_dict()
+
+
+def report(label: str, elapsed: float, stats: Dict[str, int], check: str):
+    print(f"  {label:<34} {elapsed * 1000:9.1f} ms  连接 {stats['connections']:5d}  HTTP {stats['http_requests']:5d}  "
+          f"WS命令 {stats['ws_commands']:5d}  注入失败 {stats['injected_failures']:4d}  {check}")
+
+
+def bench_keep_only_current(server, pool, repeat: int, skip_legacy: bool):
+    ports = server.ports()
+    udds = {n: server.user_data_dirs()[n] for n in ports}
+    expected_closed = sum(max(0, count - 1) for n, count in server.tab_counts().items() if n in ports)
+    print(f"keep_only_current（{len(ports)} 个分身，应关闭 {expected_closed} 个标签页）")
+    if not skip_legacy:
+        elapsed, closed, stats = measure(server, repeat, lambda: legacy_keep_only_current(ports))
+        report("旧实现（线程池 + 短连接）", elapsed, stats, f"关闭 {closed}")
+
+    def run():
+        return pool.client.run(run_for_ports(keep_only_current, ports, pool, udds))
+
+    elapsed, results, stats = measure(server, repeat, run)
+    errors = sum(1 for r in results if r.error)
+    report("会话池 + 共享事件循环", elapsed, stats, f"关闭 {sum(r.closed for r in results)}，出错 {errors}")
+
+
+def bench_url_fanout(server, repeat: int):
+    all_ports = server.all_ports()
+    udds = server.user_data_dirs()
+    targets = [UrlTarget(n, udds[n], None, port) for n, port in all_ports.items()]
+    print(f"url_fanout（{len(targets)} 个分身，其中 {len(server.dead)} 个未监听端口）")
+    for verify in (False, True):
+        fallbacks: List[int] = []
+
+        def run():
+            fallbacks.clear()
+            return open_url(targets, "https://example.com/fanout",
+                            fallback=lambda target, url: fallbacks.append(target.number), verify_owner=verify)
+
+        elapsed, fanout, stats = measure(server, repeat, run)
+        by_cdp = sum(1 for r in fanout.results if r.ok and r.method == "cdp")
+        report("校验端口归属" if verify else "不校验端口归属", elapsed, stats,
+               f"调试端口 {by_cdp}，回退 {len(fallbacks)}")
+
+
+def bench_close_all(server, repeat: int):
+    ports = server.ports()
+    print(f"close_all（{len(ports)} 个分身）")
+    engine = ShutdownEngine(use_wm_close=False)
+    # pid 只用作结果的键；模拟分身没有真实进程可等待，只测量第一阶段（并发请求 Browser.close）
+    targets = [ShutdownTarget(pid=n, number=n, debug_port=port) for n, port in ports.items()]
+
+    def run_engine():
+        method_by_pid: Dict[int, str] = {}
+        engine._request_graceful_close(targets, method_by_pid)
+        return method_by_pid
+
+    elapsed, requested, stats = measure(server, repeat, run_engine)
+    closed = sum(1 for b in server.browsers.values() if b.closed)
+    report("ShutdownEngine（共享事件循环）", elapsed, stats, f"已请求 {len(requested)}，已关闭 {closed}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DevTools 批量操作基准测试（模拟调试端口）")
+    parser.add_argument("--profiles", type=int, default=500, help="分身数量")
+    parser.add_argument("--tabs", type=int, default=5, help="每个分身的标签页数")
+    parser.add_argument("--base-port", type=int, default=DEFAULT_BASE_PORT, help="模拟端口 = 基准端口 + 编号")
+    parser.add_argument("--latency", type=float, default=1.0, help="每个请求的延迟（毫秒）")
+    parser.add_argument("--jitter", type=float, default=1.0, help="延迟随机抖动上限（毫秒）")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="请求失败的概率")
+    parser.add_argument("--dead-ratio", type=float, default=0.05, help="不监听端口的分身比例")
+    parser.add_argument("--repeat", type=int, default=3, help="每项重复次数（取中位数）")
+    parser.add_argument("--skip-legacy", action="store_true", help="不运行旧实现")
+    args = parser.parse_args()
+
+    raise_fd_limit()
+    # 注入的失败与关闭过程中的断线会产生大量警告日志，只显示错误
+    logging.basicConfig(level=logging.ERROR)
+    server = FakeDevToolsServer(args.profiles, args.tabs, args.base_port, args.latency, args.jitter,
+                                args.fail_rate, args.dead_ratio)
+    with server:
+        # 端口归属校验使用临时分配表，不在仓库目录下创建 fleet.db
+        port_allocator._shared_allocator = port_allocator.PortAllocator(os.path.join(server.root_dir, "ports.db"))
+        pool = get_session_pool()
+        print(f"{args.profiles} 个模拟分身 × {args.tabs} 个标签页，延迟 {args.latency:g}+{args.jitter:g}ms，"
+              f"失败率 {args.fail_rate:g}，重复 {args.repeat} 次取中位数")
+        bench_keep_only_current(server, pool, args.repeat, args.skip_legacy)
+        bench_url_fanout(server, args.repeat)
+        bench_close_all(server, args.repeat)
+        pool.client.run(pool.close_all())
+        pool.client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+"""
+进程发现基准测试 - 在模拟分身集群上测量各功能的进程识别开销
+
+直接调用各功能使用的识别函数（界面与窗口操作部分依赖 Windows，不在此测量）：
+- import_windows        强制刷新快照 → 补充识别无编号目录 → 按进程树根建立候选
+- sync_launched         启动时同步 launched_numbers
+- open_url_in_running   每个用户数据目录取一个主进程及其 chrome.exe 路径与调试端口
+- find_chrome_windows   每个窗口按 PID 查询编号
+- close_browsers        按编号生成关闭目标（含调试端口解析）
+- cold_start            全新索引与解析器缓存的第一次扫描
+
+每项报告：中位耗时、内存分配峰值与分配块数（tracemalloc）、正则调用次数、进程属性读取次数，
+并与保存的基线对比。
+
+用法：
+    python benchmarks/bench_discovery.py                      # 10 / 100 / 1000 个分身，与基线对比
+    python benchmarks/bench_discovery.py --profiles 100 --children 8 --repeat 20
+    python benchmarks/bench_discovery.py --save-baseline      # 用本次结果覆盖基线
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import statistics
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import devtools  # noqa: E402
+import profile_resolver  # noqa: E402
+from fake_fleet import FakeProcess, build_fleet, make_process_iter  # noqa: E402
+from process_index import ProcessIndex, browser_candidates, number_for_process, running_numbers  # noqa: E402
+from profile_resolver import get_profile_resolver  # noqa: E402
+from shutdown import targets_for_numbers  # noqa: E402
+from url_fanout import running_targets  # noqa: E402
+
+BASELINE_FILE = os.path.join(BENCH_DIR, "baseline_discovery.json")
+DEFAULT_FLEETS = (10, 100, 1000)
+
+
+# ---- 正则调用计数 ----
+
+class CountingPattern:
+    """包装预编译正则，统计匹配方法的调用次数"""
+
+    METHODS = ("search", "match", "fullmatch", "finditer", "findall", "sub", "split")
+
+    def __init__(self, pattern, counter):
+        self._pattern = pattern
+        self._counter = counter
+
+    def __getattr__(self, name):
+        attr = getattr(self._pattern, name)
+        if name not in self.METHODS:
+            return attr
+
+        def counted(*args, **kwargs):
+            self._counter[0] += 1
+            return attr(*args, **kwargs)
+        return counted
+
+
+class RegexCounter:
+    """测量期间替换模块级正则与 re 模块函数"""
+
+    PATTERNS = (
+        (profile_resolver, "PROFILE_ARGS_PATTERN"),
+        (profile_resolver, "USER_DATA_DIR_PATTERN"),
+        (profile_resolver, "PROFILE_DIR_NAME_PATTERN"),
+        (devtools, "REMOTE_DEBUGGING_PORT_PATTERN"),
+    )
+    RE_FUNCTIONS = ("search", "match", "fullmatch", "finditer", "findall", "sub", "split")
+
+    def __init__(self):
+        self.counter = [0]
+        self._saved = []
+
+    def __enter__(self):
+        for module, name in self.PATTERNS:
+            original = getattr(module, name)
+            self._saved.append((module, name, original))
+            setattr(module, name, CountingPattern(original, self.counter))
+        for name in self.RE_FUNCTIONS:
+            original = getattr(re, name)
+            self._saved.append((re, name, original))
+            setattr(re, name, self._wrap(original))
+        return self
+
+    def _wrap(self, func):
+        def counted(*args, **kwargs):
+            self.counter[0] += 1
+            return func(*args, **kwargs)
+        return counted
+
+    def __exit__(self, *exc):
+        for module, name, original in reversed(self._saved):
+            setattr(module, name, original)
+        self._saved.clear()
+
+    @property
+    def calls(self) -> int:
+        return self.counter[0]
+
+
+# ---- 场景 ----
+# 每个场景调用正式代码中的识别函数；窗口枚举、界面更新等依赖 Windows 的部分不在此测量。
+# 基准用的索引有效期为 0，正式代码中的 index.snapshot() 每次都会重新扫描模拟进程表
+
+def scenario_import_windows(index, resolver):
+    # ChromeManager.import_windows
+    return len(browser_candidates(index.snapshot(), resolver))
+
+
+def scenario_sync_launched(index, resolver):
+    # ChromeLauncher._sync_launched_numbers_with_running_processes 没有运行记录时的完整扫描
+    return len(running_numbers(index))
+
+
+def scenario_open_url_in_running(index, resolver):
+    # ChromeLauncher.open_url_in_running
+    return len(running_targets(index.snapshot()))
+
+
+def scenario_find_chrome_windows(index, resolver):
+    # ChromeIconManager.find_chrome_windows：每个分身一个可见主窗口，窗口所属进程即主进程
+    snapshot = index.snapshot()
+    numbers = [number_for_process(snapshot, pid, resolver) for pid in snapshot.browser_by_user_data_dir.values()]
+    return sum(1 for number in numbers if number)
+
+
+def scenario_close_browsers(index, resolver):
+    # BackgroundWorker.close_browsers（按编号关闭）
+    snapshot = index.snapshot(force=True)
+    return len(targets_for_numbers(snapshot, snapshot.numbers()))
+
+
+def scenario_cold_start(index, resolver):
+    resolver.clear_cache()
+    fresh = ProcessIndex(max_age=0, two_phase=index.two_phase, process_iter=index.process_iter)
+    return len(fresh.snapshot().numbers())
+
+
+SCENARIOS = (
+    ("import_windows", scenario_import_windows),
+    ("sync_launched", scenario_sync_launched),
+    ("open_url_in_running", scenario_open_url_in_running),
+    ("find_chrome_windows", scenario_find_chrome_windows),
+    ("close_browsers", scenario_close_browsers),
+    ("cold_start", scenario_cold_start),
+)
+
+
+# ---- 测量 ----
+
+def measure(func, index, resolver, repeat: int):
+    func(index, resolver)  # 预热：建立 (pid, 创建时间) 缓存与命令行缓存
+
+    timings = []
+    FakeProcess.reset_calls()
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(index, resolver)
+        timings.append((time.perf_counter() - started) * 1000)
+    attr_reads = sum(FakeProcess.calls.values()) / repeat
+
+    with RegexCounter() as counter:
+        func(index, resolver)
+    regex_calls = counter.calls
+
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        func(index, resolver)
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename") if stat.count_diff > 0)
+
+    return {
+        "median_ms": round(statistics.median(timings), 3),
+        "peak_kib": round(peak / 1024, 1),
+        "alloc_blocks": blocks,
+        "regex_calls": regex_calls,
+        "attr_reads": round(attr_reads),
+        "result": result,
+    }
+
+
+def run_fleet(profiles: int, children: int, unrelated: int, repeat: int):
+    table = build_fleet(profiles, children=children, unrelated=unrelated)
+    index = ProcessIndex(max_age=0, process_iter=make_process_iter(table))
+    resolver = get_profile_resolver()
+    results = {}
+    for name, func in SCENARIOS:
+        results[f"{profiles}/{name}"] = measure(func, index, resolver, repeat)
+    return len(table), results
+
+
+def load_baseline(path: str):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _ratio(current: float, base: float) -> str:
+    if not base:
+        return "    -"
+    return f"{current / base:5.2f}x"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="进程发现基准测试")
+    parser.add_argument("--profiles", type=int, nargs="+", default=list(DEFAULT_FLEETS), help="模拟的分身数量（可多个）")
+    parser.add_argument("--children", type=int, default=5, help="每个分身的子进程数")
+    parser.add_argument("--unrelated", type=int, default=300, help="无关进程数量")
+    parser.add_argument("--repeat", type=int, default=10, help="每个场景的计时次数")
+    parser.add_argument("--cost-scale", type=float, default=1.0, help="模拟属性读取耗时的倍数，0 表示只测Python开销")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="基线文件路径")
+    parser.add_argument("--save-baseline", action="store_true", help="用本次结果覆盖基线")
+    parser.add_argument("--max-slowdown", type=float, default=0.0,
+                        help="耗时超过基线的倍数上限，超出时以非零状态退出（0 表示只报告）")
+    args = parser.parse_args()
+
+    FakeProcess.cost_scale = args.cost_scale
+    config = {"children": args.children, "unrelated": args.unrelated, "cost_scale": args.cost_scale}
+    baseline = load_baseline(args.baseline)
+    base_results = {}
+    if baseline and baseline.get("config") == config:
+        base_results = baseline.get("results", {})
+    elif baseline:
+        print("基线的模拟参数与本次不同，不做对比")
+
+    all_results = {}
+    regressions = []
+    for profiles in args.profiles:
+        process_count, results = run_fleet(profiles, args.children, args.unrelated, args.repeat)
+        print(f"\n== {profiles} 个分身 × {args.children} 个子进程 + {args.unrelated} 个无关进程（共 {process_count} 个进程） ==")
+        print(f"{'场景':<22}{'中位耗时':>10}{'对比基线':>9}{'分配峰值':>11}{'分配块数':>9}{'正则调用':>9}{'属性读取':>9}")
+        for key, r in results.items():
+            base = base_results.get(key, {})
+            print(f"{key.split('/', 1)[1]:<22}{r['median_ms']:>8.2f}ms{_ratio(r['median_ms'], base.get('median_ms')):>9}"
+                  f"{r['peak_kib']:>9.1f}KiB{r['alloc_blocks']:>9}{r['regex_calls']:>9}{r['attr_reads']:>9}")
+            if base:
+                if args.max_slowdown and r["median_ms"] > base["median_ms"] * args.max_slowdown:
+                    regressions.append(f"{key}: 耗时 {base['median_ms']:.2f}ms → {r['median_ms']:.2f}ms")
+                if r["regex_calls"] > base.get("regex_calls", r["regex_calls"]):
+                    regressions.append(f"{key}: 正则调用 {base['regex_calls']} → {r['regex_calls']}")
+        all_results.update(results)
+
+    if args.save_baseline:
+        merged = dict(base_results)
+        merged.update(all_results)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"config": config, "results": merged}, f, ensure_ascii=False, indent=2, sort_keys=True)
+        print(f"\n基线已保存: {args.baseline}")
+
+    if regressions:
+        print("\n相对基线退化:")
+        for line in regressions:
+            print(f"  {line}")
+        if args.max_slowdown:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
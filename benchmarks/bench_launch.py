@@ -0,0 +1,151 @@
+"""
+分身启动吞吐基准测试 - 对比旧的 temp_N.lnk 启动方式与直接创建进程
+
+旧方式（ChromeManager.open_windows 原实现）每个分身：
+    写入 temp_N.lnk → 通过 shell 启动该文件 → 固定等待 0.1s → 2 秒后在线程中删除
+新方式：由快捷方式缓存在内存中组装参数，spawner.spawn 直接创建进程
+
+目标程序为立即退出的桩脚本，因此测得的是启动路径本身的开销。
+非Windows环境下旧方式的 shell 跳转用 sh -c 近似，临时快捷方式用等长的文件写入近似。
+
+用法：
+    python benchmarks/bench_launch.py --profiles 100
+    python benchmarks/bench_launch.py --profiles 100 --old-pacing 0   # 旧方式不计固定等待
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+import subprocess
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from shortcut_catalog import ShortcutInfo  # noqa: E402
+from spawner import build_launch_spec, spawn  # noqa: E402
+
+try:
+    import win32com.client
+except ImportError:
+    win32com = None
+
+STUB_SOURCE = "import sys\nsys.exit(0)\n"
+# 典型分身快捷方式文件大小（字节），用于近似写入临时快捷方式的开销
+LNK_SIZE = 1500
+
+
+def make_shortcut_info(stub_path: str, number: int, cache_root: str) -> ShortcutInfo:
+    arguments = f'"{stub_path}" --user-data-dir="{os.path.join(cache_root, str(number))}"'
+    return ShortcutInfo(
+        path=os.path.join(cache_root, f"{number}.lnk"),
+        number=number,
+        target_path=sys.executable,
+        arguments=arguments,
+        working_dir=cache_root,
+        icon_location="",
+        user_data_dir=os.path.join(cache_root, str(number)),
+    )
+
+
+def _write_temp_shortcut(path: str, info: ShortcutInfo, arguments: str):
+    if win32com is not None and os.name == "nt":
+        shortcut = win32com.client.Dispatch("WScript.Shell").CreateShortCut(path)
+        shortcut.TargetPath = info.target_path
+        shortcut.Arguments = arguments
+        shortcut.WorkingDirectory = info.working_dir
+        shortcut.Save()
+    else:
+        with open(path, "wb") as f:
+            f.write(os.urandom(LNK_SIZE))
+
+
+def launch_legacy(infos, work_dir: str, pacing: float):
+    """旧方式：写临时快捷方式 → shell 启动 → 等待 → 延迟删除"""
+    procs = []
+    temp_files = []
+    for info in infos:
+        debug_port = 9222 + info.number
+        arguments = f"{info.arguments} --remote-debugging-port={debug_port}"
+        temp_path = os.path.join(work_dir, f"temp_{info.number}.lnk")
+        _write_temp_shortcut(temp_path, info, arguments)
+        temp_files.append(temp_path)
+        if os.name == "nt" and win32com is not None:
+            procs.append(subprocess.Popen(["start", "", temp_path], shell=True))
+        else:
+            procs.append(subprocess.Popen(f'"{info.target_path}" {arguments}', shell=True))
+        if pacing:
+            time.sleep(pacing)
+
+    def cleanup():
+        for path in temp_files:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+    cleaner = threading.Thread(target=cleanup)
+    cleaner.start()
+    return procs, cleaner
+
+
+def launch_direct(infos):
+    """新方式：内存中组装参数，直接创建进程"""
+    pids = []
+    for info in infos:
+        pids.append(spawn(build_launch_spec(info, info.number, debug_port=9222 + info.number)).pid)
+    return pids
+
+
+def _wait_pids(pids, timeout: float = 30.0):
+    import psutil
+    procs = []
+    for pid in pids:
+        try:
+            procs.append(psutil.Process(pid))
+        except psutil.NoSuchProcess:
+            pass
+    psutil.wait_procs(procs, timeout=timeout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="分身启动吞吐基准测试")
+    parser.add_argument("--profiles", type=int, default=100, help="启动的分身数量")
+    parser.add_argument("--old-pacing", type=float, default=0.1, help="旧方式每个分身之间的固定等待（原实现为 0.1s）")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="bench_launch_")
+    try:
+        stub_path = os.path.join(work_dir, "stub_chrome.py")
+        with open(stub_path, "w", encoding="utf-8") as f:
+            f.write(STUB_SOURCE)
+        infos = [make_shortcut_info(stub_path, n, work_dir) for n in range(1, args.profiles + 1)]
+
+        started = time.perf_counter()
+        procs, cleaner = launch_legacy(infos, work_dir, args.old_pacing)
+        legacy_issue = time.perf_counter() - started
+        for proc in procs:
+            proc.wait()
+        legacy_total = time.perf_counter() - started
+        cleaner.join()
+
+        started = time.perf_counter()
+        pids = launch_direct(infos)
+        direct_issue = time.perf_counter() - started
+        _wait_pids(pids)
+        direct_total = time.perf_counter() - started
+
+        print(f"{args.profiles} 个分身（桩程序: {sys.executable}）")
+        print(f"旧方式 temp_N.lnk + shell (等待 {args.old_pacing}s/个): 发起 {legacy_issue * 1000:8.1f}ms  "
+              f"全部结束 {legacy_total * 1000:8.1f}ms  吞吐 {args.profiles / legacy_issue:8.1f} 个/秒")
+        print(f"新方式 直接创建进程:                  发起 {direct_issue * 1000:8.1f}ms  "
+              f"全部结束 {direct_total * 1000:8.1f}ms  吞吐 {args.profiles / direct_issue:8.1f} 个/秒")
+        print(f"发起阶段加速比: {legacy_issue / direct_issue:.1f}x")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+启动流水线基准测试 - 对比"启动 → 应用图标 → 平铺"分步执行与流水线执行的总耗时
+
+各阶段用固定耗时模拟（毫秒，可通过参数调整）：
+- resolve  读取快捷方式、组装参数、生成图标文件
+- spawn    创建进程（单线程，按顺序放行）
+- ready    等待窗口出现与调试端口可用（纯等待，可并行）
+- icon     WM_SETICON
+- arrange  SetWindowPos（单线程）
+
+分步执行：整批启动并等待就绪 → 整批应用图标 → 整批平铺（原来三个独立操作）
+流水线：  launch_pipeline.LaunchPipeline，各阶段重叠执行
+理想情况下流水线总耗时接近最慢阶段的 累计耗时/线程数，而不是各阶段之和。
+
+用法：
+    python benchmarks/bench_pipeline.py --profiles 200
+    python benchmarks/bench_pipeline.py --profiles 200 --ready 2000 --ready-workers 16
+"""
+
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from launch_pipeline import LaunchPipeline, Stage  # noqa: E402
+
+
+def make_stages(costs, ready_workers: int, resolve_workers: int, icon_workers: int):
+    def sleeper(seconds):
+        def func(item):
+            time.sleep(seconds)
+        return func
+
+    def spawn(item):
+        time.sleep(costs["spawn"])
+        item.spawned_at = time.monotonic()
+
+    return [
+        Stage("resolve", sleeper(costs["resolve"]), resolve_workers),
+        Stage("spawn", spawn, 1),
+        Stage("ready", sleeper(costs["ready"]), ready_workers, max(16, ready_workers)),
+        Stage("icon", sleeper(costs["icon"]), icon_workers),
+        Stage("arrange", sleeper(costs["arrange"]), 1),
+    ]
+
+
+def run_phased(profiles: int, costs, ready_workers: int):
+    """原流程：启动任务结束（全部就绪）后才开始应用图标，图标全部完成后才平铺"""
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=ready_workers) as waiters:
+        futures = []
+        for _ in range(profiles):
+            time.sleep(costs["resolve"] + costs["spawn"])
+            futures.append(waiters.submit(time.sleep, costs["ready"]))
+        for future in futures:
+            future.result()
+    for _ in range(profiles):
+        time.sleep(costs["icon"])
+    for _ in range(profiles):
+        time.sleep(costs["arrange"])
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="启动流水线基准测试")
+    parser.add_argument("--profiles", type=int, default=200, help="分身数量")
+    parser.add_argument("--resolve", type=float, default=4, help="解析阶段耗时（毫秒）")
+    parser.add_argument("--spawn", type=float, default=10, help="启动阶段耗时（毫秒）")
+    parser.add_argument("--ready", type=float, default=800, help="启动到就绪的等待时间（毫秒）")
+    parser.add_argument("--icon", type=float, default=8, help="应用图标耗时（毫秒）")
+    parser.add_argument("--arrange", type=float, default=3, help="摆放窗口耗时（毫秒）")
+    parser.add_argument("--ready-workers", type=int, default=16, help="就绪阶段线程数（调度器并发上限）")
+    parser.add_argument("--resolve-workers", type=int, default=2, help="解析阶段线程数")
+    parser.add_argument("--icon-workers", type=int, default=2, help="图标阶段线程数")
+    args = parser.parse_args()
+
+    costs = {name: getattr(args, name) / 1000 for name in ("resolve", "spawn", "ready", "icon", "arrange")}
+    stages = make_stages(costs, args.ready_workers, args.resolve_workers, args.icon_workers)
+    slowest = max(stages, key=lambda s: costs[s.name] / s.workers)
+    ideal = args.profiles * costs[slowest.name] / slowest.workers
+
+    phased = run_phased(args.profiles, costs, args.ready_workers)
+    report = LaunchPipeline(stages).run(range(1, args.profiles + 1))
+
+    print(f"{args.profiles} 个分身，阶段耗时(ms): " +
+          ", ".join(f"{s.name}={costs[s.name] * 1000:g}×{s.workers}线程" for s in stages))
+    print(f"分步执行（启动 → 图标 → 平铺）: {phased:8.2f}s")
+    print(f"流水线:                        {report.elapsed:8.2f}s  ({report.summary()})")
+    print(f"最慢阶段下限（{slowest.name}）:          {ideal:8.2f}s")
+    print(f"加速比: {phased / report.elapsed:.2f}x，流水线 / 最慢阶段: {report.elapsed / ideal:.2f}")
+
+
+if __name__ == "__main__":
+    main()
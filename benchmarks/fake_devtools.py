@@ -0,0 +1,576 @@
+"""
+模拟 DevTools 调试端口 - 不启动 Chrome 就能测试和压测所有 CDP 相关功能
+
+核心设计思想：
+- 一个端口一个浏览器：N 个分身各监听一个端口，每个分身 M 个标签页，在独立线程的事件循环中运行，
+  不与被测的 DevTools 客户端共用事件循环
+- 协议够用：HTTP 端点（/json/version、/json/list、PUT /json/new、/json/close、/json/activate，长连接）
+  与浏览器级 WebSocket（Target/Page/Runtime/Browser 中本项目用到的命令及目标事件）
+- 贴近真实：/json/list 按最近激活排序，GET /json/new 返回 405，未知目标返回 404，
+  并在用户数据目录写入 DevToolsActivePort，端口归属校验与真实 Chrome 一致
+- 可注入：固定延迟 + 随机抖动、按比例返回错误、按比例不监听端口（模拟未开调试端口的分身）、
+  响应发到一半时重置连接、按命令单独设置延迟（让应答乱序）、断开连接但继续监听
+- 可计数：统计 TCP 连接、HTTP 请求、WebSocket 命令与注入的失败次数
+
+用法：
+    with FakeDevToolsServer(profiles=500, tabs=5, latency_ms=2) as server:
+        ports = server.ports()            # 编号 → 端口（只含正在监听的分身）
+        ...
+    FakeDevToolsServer(profiles=2, base_port=0)                  # 测试：由系统分配空闲端口，启动后才确定
+    python benchmarks/fake_devtools.py --profiles 5 --tabs 3   # 手动调试：持续运行直到 Ctrl+C
+"""
+
+import os
+import ast
+import json
+import time
+import uuid
+import base64
+import random
+import shutil
+import struct
+import asyncio
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set
+from urllib.parse import unquote
+
+DEFAULT_BASE_PORT = 39222
+WS_GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36"
+
+
+class FakeStats:
+    """计数器（只在服务端事件循环中写入）"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.connections = 0
+        self.http_requests = 0
+        self.ws_connections = 0
+        self.ws_commands = 0
+        self.injected_failures = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return dict(self.__dict__)
+
+
+class _WsPeer:
+    """一条浏览器级 WebSocket 连接"""
+    __slots__ = ("writer", "discover", "sessions")
+
+    def __init__(self, writer: asyncio.StreamWriter):
+        self.writer = writer
+        self.discover = False
+        self.sessions: Dict[str, str] = {}  # sessionId → targetId
+
+    def send(self, message: Dict[str, Any]):
+        if not self.writer.is_closing():
+            self.writer.write(_server_frame(json.dumps(message).encode("utf-8")))
+
+
+def _server_frame(payload: bytes, opcode: int = 0x1) -> bytes:
+    """服务端帧（不加掩码）"""
+    length = len(payload)
+    if length < 126:
+        header = bytes([0x80 | opcode, length])
+    elif length < 1 << 16:
+        header = bytes([0x80 | opcode, 126]) + struct.pack("!H", length)
+    else:
+        header = bytes([0x80 | opcode, 127]) + struct.pack("!Q", length)
+    return header + payload
+
+
+class FakeBrowser:
+    """一个分身：调试端口、用户数据目录与标签页"""
+
+    def __init__(self, number: int, port: int, user_data_dir: str, tabs: int):
+        self.number = number
+        self.port = port
+        self.user_data_dir = user_data_dir
+        self.initial_tabs = tabs
+        self.browser_id = str(uuid.uuid4())
+        self.targets: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()  # 最近激活的在前
+        self.peers: Set[_WsPeer] = set()
+        self.writers: Set[asyncio.StreamWriter] = set()
+        self.server: Optional[asyncio.AbstractServer] = None
+        self.closed = False
+        self._next_target = 0
+        self._next_session = 0
+        self.reset_tabs()
+
+    @property
+    def ws_path(self) -> str:
+        return f"/devtools/browser/{self.browser_id}"
+
+    def reset_tabs(self):
+        self.targets.clear()
+        for i in range(self.initial_tabs):
+            self.add_target(f"https://example.com/{self.number}/{i}", activate=False)
+
+    def add_target(self, url: str, activate: bool = True) -> Dict[str, Any]:
+        self._next_target += 1
+        target_id = uuid.UUID(int=(self.number << 64) | self._next_target).hex.upper()
+        target = {"targetId": target_id, "type": "page", "url": url, "title": url, "attached": False}
+        self.targets[target_id] = target
+        if activate:
+            self.targets.move_to_end(target_id, last=False)
+        self.emit("Target.targetCreated", {"targetInfo": dict(target)})
+        return target
+
+    def remove_target(self, target_id: str) -> bool:
+        if self.targets.pop(target_id, None) is None:
+            return False
+        for peer in self.peers:
+            for session_id, attached in list(peer.sessions.items()):
+                if attached == target_id:
+                    del peer.sessions[session_id]
+                    peer.send({"method": "Target.detachedFromTarget",
+                               "params": {"sessionId": session_id, "targetId": target_id}})
+        self.emit("Target.targetDestroyed", {"targetId": target_id})
+        return True
+
+    def emit(self, method: str, params: Dict[str, Any]):
+        for peer in self.peers:
+            if peer.discover:
+                peer.send({"method": method, "params": params})
+
+    def json_target(self, target: Dict[str, Any]) -> Dict[str, Any]:
+        target_id = target["targetId"]
+        return {
+            "description": "",
+            "devtoolsFrontendUrl": f"/devtools/inspector.html?ws=127.0.0.1:{self.port}/devtools/page/{target_id}",
+            "id": target_id,
+            "title": target["title"],
+            "type": target["type"],
+            "url": target["url"],
+            "webSocketDebuggerUrl": f"ws://127.0.0.1:{self.port}/devtools/page/{target_id}",
+        }
+
+    def version(self) -> Dict[str, Any]:
+        return {
+            "Browser": "Chrome/124.0.0.0",
+            "Protocol-Version": "1.3",
+            "User-Agent": USER_AGENT,
+            "V8-Version": "12.4.254.14",
+            "WebKit-Version": "537.36",
+            "webSocketDebuggerUrl": f"ws://127.0.0.1:{self.port}{self.ws_path}",
+        }
+
+    def write_active_port(self):
+        os.makedirs(self.user_data_dir, exist_ok=True)
+        with open(os.path.join(self.user_data_dir, "DevToolsActivePort"), "w", encoding="utf-8") as f:
+            f.write(f"{self.port}\n{self.ws_path}")
+
+    # ---- CDP 命令 ----
+
+    def handle_command(self, peer: _WsPeer, method: str, params: Dict[str, Any],
+                       session_id: Optional[str]) -> Dict[str, Any]:
+        """返回 result；命令无效时抛出 LookupError / ValueError（转换为协议错误）"""
+        if session_id is not None:
+            target_id = peer.sessions.get(session_id)
+            if target_id is None or target_id not in self.targets:
+                raise LookupError("Session with given id not found.")
+            return self._page_command(target_id, method, params)
+
+        if method == "Target.getTargets":
+            return {"targetInfos": [dict(t) for t in self.targets.values()]}
+        if method == "Target.setDiscoverTargets":
+            peer.discover = bool(params.get("discover"))
+            if peer.discover:
+                for target in self.targets.values():
+                    peer.send({"method": "Target.targetCreated", "params": {"targetInfo": dict(target)}})
+            return {}
+        if method == "Target.createTarget":
+            return {"targetId": self.add_target(params.get("url") or "about:blank",
+                                                activate=not params.get("background"))["targetId"]}
+        if method == "Target.closeTarget":
+            if not self.remove_target(params.get("targetId", "")):
+                raise LookupError("No target with given id found")
+            return {"success": True}
+        if method == "Target.activateTarget":
+            target_id = params.get("targetId", "")
+            if target_id not in self.targets:
+                raise LookupError("No target with given id found")
+            self.targets.move_to_end(target_id, last=False)
+            return {}
+        if method == "Target.attachToTarget":
+            target_id = params.get("targetId", "")
+            if target_id not in self.targets:
+                raise LookupError("No target with given id found")
+            self._next_session += 1
+            new_session = uuid.UUID(int=(self.number << 64) | self._next_session).hex.upper()
+            peer.sessions[new_session] = target_id
+            return {"sessionId": new_session}
+        if method == "Browser.getVersion":
+            info = self.version()
+            return {"protocolVersion": info["Protocol-Version"], "product": info["Browser"],
+                    "userAgent": info["User-Agent"], "jsVersion": info["V8-Version"]}
+        if method == "Browser.getWindowForTarget":
+            if params.get("targetId") and params["targetId"] not in self.targets:
+                raise LookupError("No target with given id found")
+            return {"windowId": self.number, "bounds": {"left": 0, "top": 0, "width": 1280, "height": 800,
+                                                        "windowState": "normal"}}
+        if method == "Browser.setWindowBounds":
+            return {}
+        if method == "Browser.close":
+            return {}
+        raise ValueError(f"'{method}' wasn't found")
+
+    def _page_command(self, target_id: str, method: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        target = self.targets[target_id]
+        if method == "Page.navigate":
+            target["url"] = target["title"] = params.get("url", "")
+            self.emit("Target.targetInfoChanged", {"targetInfo": dict(target)})
+            return {"frameId": target_id, "loaderId": uuid.uuid4().hex.upper()}
+        if method == "Page.enable":
+            return {}
+        if method == "Runtime.evaluate":
+            try:
+                value = ast.literal_eval(params.get("expression", ""))
+            except (ValueError, SyntaxError):
+                return {"result": {"type": "undefined"}}
+            return {"result": {"type": type(value).__name__, "value": value}}
+        raise ValueError(f"'{method}' wasn't found")
+
+
+class FakeDevToolsServer:
+    """N 个模拟分身的调试端口
+
+    Args:
+        profiles: 分身数量（编号 1..N，端口 base_port + 编号；base_port 为 0 时由系统分配，不监听的分身端口为 0）
+        tabs: 每个分身初始的标签页数
+        latency_ms / jitter_ms: 每个 HTTP 请求与 WebSocket 命令的固定延迟与随机抖动上限
+        method_latency_ms: 按 CDP 方法名额外增加的延迟，例如 {"Browser.getVersion": 200}
+        fail_rate: 请求返回错误的概率（HTTP 500 / CDP 协议错误）
+        dead_ratio: 不监听端口的分身比例（模拟没有开启调试端口）
+        root_dir: 用户数据目录的上级目录，默认创建临时目录并在 stop() 时删除
+    """
+
+    def __init__(self, profiles: int = 10, tabs: int = 3, base_port: int = DEFAULT_BASE_PORT,
+                 latency_ms: float = 0.0, jitter_ms: float = 0.0, fail_rate: float = 0.0,
+                 dead_ratio: float = 0.0, seed: int = 0, root_dir: Optional[str] = None,
+                 host: str = "127.0.0.1", method_latency_ms: Optional[Dict[str, float]] = None):
+        self.host = host
+        self.latency = latency_ms / 1000
+        self.method_latency = {method: ms / 1000 for method, ms in (method_latency_ms or {}).items()}
+        self.jitter = jitter_ms / 1000
+        self.fail_rate = fail_rate
+        self.stats = FakeStats()
+        self._random = random.Random(seed)
+        self._owns_root = root_dir is None
+        self.root_dir = root_dir or tempfile.mkdtemp(prefix="fake_devtools_")
+        dead_every = round(1 / dead_ratio) if dead_ratio > 0 else 0
+        self.browsers: Dict[int, FakeBrowser] = {}
+        self.dead: Set[int] = set()
+        for number in range(1, profiles + 1):
+            self.browsers[number] = FakeBrowser(number, base_port + number if base_port else 0,
+                                                os.path.join(self.root_dir, str(number)), tabs)
+            if dead_every and number % dead_every == 0:
+                self.dead.add(number)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._tasks: Set[asyncio.Task] = set()  # 处理中的命令（事件循环只保留弱引用）
+        self._truncate = 0  # 接下来要在中途重置连接的 HTTP 响应数（只在服务端事件循环中访问）
+
+    # ---- 生命周期 ----
+
+    def start(self) -> "FakeDevToolsServer":
+        loop = asyncio.new_event_loop()
+        ready = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(loop)
+            loop.call_soon(ready.set)
+            loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name="FakeDevTools", daemon=True)
+        self._thread.start()
+        ready.wait()
+        self._loop = loop
+        self._call(self._start_all())
+        return self
+
+    def stop(self):
+        if self._loop is None:
+            return
+        self._call(self._stop_all())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(2.0)
+        self._loop = None
+        if self._owns_root:
+            shutil.rmtree(self.root_dir, ignore_errors=True)
+
+    def __enter__(self) -> "FakeDevToolsServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _call(self, coro, timeout: float = 60.0):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result(timeout)
+
+    async def _start_all(self):
+        for number, browser in self.browsers.items():
+            if number not in self.dead:
+                await self._start_browser(browser)
+
+    async def _start_browser(self, browser: FakeBrowser):
+        browser.closed = False
+        browser.server = await asyncio.start_server(
+            lambda r, w, b=browser: self._handle_connection(b, r, w), self.host, browser.port, backlog=512)
+        # 系统分配的端口在第一次启动后固定下来，reset() 重新启动时沿用
+        browser.port = browser.server.sockets[0].getsockname()[1]
+        browser.write_active_port()
+
+    async def _stop_all(self):
+        for task in list(self._tasks):
+            task.cancel()
+        for browser in self.browsers.values():
+            await self._close_browser(browser)
+
+    async def _close_browser(self, browser: FakeBrowser):
+        browser.closed = True
+        if browser.server is not None:
+            browser.server.close()
+            browser.server = None
+        for writer in list(browser.writers):
+            writer.close()
+        browser.writers.clear()
+        browser.peers.clear()
+
+    def reset(self):
+        """恢复初始标签页，重新启动被 Browser.close 关闭的分身，清零计数"""
+        async def reset_all():
+            for number, browser in self.browsers.items():
+                browser.reset_tabs()
+                if browser.closed and number not in self.dead:
+                    await self._start_browser(browser)
+            self.stats.reset()
+        self._call(reset_all())
+
+    # ---- 查询（任意线程） ----
+
+    def ports(self) -> Dict[int, int]:
+        """正在监听的分身：编号 → 端口"""
+        return {n: b.port for n, b in self.browsers.items() if n not in self.dead and not b.closed}
+
+    def all_ports(self) -> Dict[int, int]:
+        """包括不监听的分身"""
+        return {n: b.port for n, b in self.browsers.items()}
+
+    def user_data_dirs(self) -> Dict[int, str]:
+        return {n: b.user_data_dir for n, b in self.browsers.items()}
+
+    def tab_counts(self) -> Dict[int, int]:
+        async def counts():
+            return {n: sum(1 for t in b.targets.values() if t["type"] == "page") for n, b in self.browsers.items()}
+        return self._call(counts())
+
+    # ---- 注入 ----
+
+    def truncate_responses(self, count: int = 1):
+        """接下来的 count 个 HTTP 响应只发送一半就重置连接（模拟浏览器在应答途中崩溃或退出）"""
+        async def set_count():
+            self._truncate = count
+        self._call(set_count())
+
+    def disconnect(self, number: int):
+        """断开分身的所有 HTTP 与 WebSocket 连接但继续监听（模拟连接被中断，客户端可以重连）"""
+        async def drop():
+            browser = self.browsers[number]
+            for writer in list(browser.writers):
+                writer.transport.abort()
+        self._call(drop())
+
+    async def _delay(self, method: Optional[str] = None):
+        extra = self.method_latency.get(method, 0.0) if method else 0.0
+        if self.latency or self.jitter or extra:
+            await asyncio.sleep(self.latency + extra + self._random.uniform(0, self.jitter))
+
+    def _should_fail(self) -> bool:
+        if self.fail_rate and self._random.random() < self.fail_rate:
+            self.stats.injected_failures += 1
+            return True
+        return False
+
+    # ---- HTTP ----
+
+    async def _handle_connection(self, browser: FakeBrowser, reader: asyncio.StreamReader,
+                                 writer: asyncio.StreamWriter):
+        self.stats.connections += 1
+        browser.writers.add(writer)
+        try:
+            while not browser.closed:
+                head = await reader.readuntil(b"\r\n\r\n")
+                lines = head.decode("latin-1").split("\r\n")
+                method, path = lines[0].split(" ")[:2]
+                headers = {}
+                for line in lines[1:]:
+                    name, _, value = line.partition(":")
+                    if name:
+                        headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", "0") or 0)
+                if length:
+                    await reader.readexactly(length)
+                if headers.get("upgrade", "").lower() == "websocket":
+                    await self._handle_websocket(browser, path, headers, reader, writer)
+                    return
+                self.stats.http_requests += 1
+                await self._delay()
+                status, body = self._http_response(browser, method, path)
+                payload = body if isinstance(body, bytes) else json.dumps(body, indent=3).encode("utf-8")
+                content_type = "text/plain" if isinstance(body, bytes) else "application/json"
+                response = (
+                    f"HTTP/1.1 {status} {'OK' if status < 400 else 'Error'}\r\n"
+                    f"Content-Type: {content_type}; charset=UTF-8\r\n"
+                    f"Content-Length: {len(payload)}\r\n\r\n".encode("latin-1") + payload)
+                if self._truncate > 0:
+                    self._truncate -= 1
+                    self.stats.injected_failures += 1
+                    writer.write(response[:len(response) - len(payload) // 2])
+                    await writer.drain()
+                    writer.transport.abort()
+                    return
+                writer.write(response)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError, ValueError):
+            pass
+        finally:
+            browser.writers.discard(writer)
+            writer.close()
+
+    def _http_response(self, browser: FakeBrowser, method: str, path: str):
+        if self._should_fail():
+            return 500, b"Injected failure"
+        route, _, query = path.partition("?")
+        if route == "/json/version":
+            return 200, browser.version()
+        if route in ("/json", "/json/list"):
+            return 200, [browser.json_target(t) for t in browser.targets.values()]
+        if route == "/json/new":
+            if method != "PUT":
+                return 405, (f"Using unsafe HTTP verb {method} to invoke /json/new. "
+                             "This action supports only PUT verb.").encode("utf-8")
+            return 200, browser.json_target(browser.add_target(unquote(query) or "about:blank"))
+        if route.startswith("/json/close/"):
+            target_id = route.rsplit("/", 1)[1]
+            if browser.remove_target(target_id):
+                return 200, b"Target is closing"
+            return 404, f"No such target id: {target_id}".encode("utf-8")
+        if route.startswith("/json/activate/"):
+            target_id = route.rsplit("/", 1)[1]
+            if target_id in browser.targets:
+                browser.targets.move_to_end(target_id, last=False)
+                return 200, b"Target activated"
+            return 404, f"No such target id: {target_id}".encode("utf-8")
+        return 404, f"Unknown command: {route.lstrip('/')}".encode("utf-8")
+
+    # ---- WebSocket ----
+
+    async def _handle_websocket(self, browser: FakeBrowser, path: str, headers: Dict[str, str],
+                                reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        if path != browser.ws_path:
+            writer.write(b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\n\r\n")
+            return
+        accept = base64.b64encode(hashlib.sha1(headers.get("sec-websocket-key", "").encode() + WS_GUID).digest())
+        writer.write(b"HTTP/1.1 101 WebSocket Protocol Handshake\r\nUpgrade: WebSocket\r\n"
+                     b"Connection: Upgrade\r\nSec-WebSocket-Accept: " + accept + b"\r\n\r\n")
+        self.stats.ws_connections += 1
+        peer = _WsPeer(writer)
+        browser.peers.add(peer)
+        try:
+            while True:
+                opcode, payload = await self._read_frame(reader)
+                if opcode == 0x8:
+                    writer.write(_server_frame(b"", 0x8))
+                    return
+                if opcode == 0x9:
+                    writer.write(_server_frame(payload, 0xA))
+                    continue
+                if opcode != 0x1:
+                    continue
+                message = json.loads(payload.decode("utf-8"))
+                self.stats.ws_commands += 1
+                if self.latency or self.jitter or self.method_latency:
+                    # 有延迟时命令并发处理，与 Chrome 一样应答可能乱序
+                    task = asyncio.ensure_future(self._answer(browser, peer, message))
+                    self._tasks.add(task)
+                    task.add_done_callback(self._tasks.discard)
+                else:
+                    await self._answer(browser, peer, message)
+        finally:
+            browser.peers.discard(peer)
+
+    async def _answer(self, browser: FakeBrowser, peer: _WsPeer, message: Dict[str, Any]):
+        await self._delay(message.get("method"))
+        reply: Dict[str, Any] = {"id": message.get("id")}
+        session_id = message.get("sessionId")
+        if session_id:
+            reply["sessionId"] = session_id
+        if self._should_fail():
+            reply["error"] = {"code": -32000, "message": "Injected failure"}
+        else:
+            try:
+                reply["result"] = browser.handle_command(peer, message.get("method", ""),
+                                                         message.get("params") or {}, session_id)
+            except (LookupError, ValueError) as e:
+                reply["error"] = {"code": -32601 if isinstance(e, ValueError) else -32602,
+                                  "message": str(e).strip("'\"")}
+        closing = message.get("method") == "Browser.close" and "result" in reply
+        if closing:
+            # 先标记为已关闭，客户端收到应答时状态已经可见
+            browser.closed = True
+        peer.send(reply)
+        if closing:
+            await self._close_browser(browser)
+
+    @staticmethod
+    async def _read_frame(reader: asyncio.StreamReader):
+        first, second = await reader.readexactly(2)
+        length = second & 0x7F
+        if length == 126:
+            length = struct.unpack("!H", await reader.readexactly(2))[0]
+        elif length == 127:
+            length = struct.unpack("!Q", await reader.readexactly(8))[0]
+        mask = await reader.readexactly(4) if second & 0x80 else None
+        payload = await reader.readexactly(length) if length else b""
+        if mask:
+            # 整段按大整数异或，避免逐字节循环
+            key = int.from_bytes((mask * (length // 4 + 1))[:length], "big")
+            payload = (int.from_bytes(payload, "big") ^ key).to_bytes(length, "big")
+        return first & 0x0F, payload
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="模拟多个分身的 DevTools 调试端口")
+    parser.add_argument("--profiles", type=int, default=5, help="分身数量")
+    parser.add_argument("--tabs", type=int, default=3, help="每个分身的标签页数")
+    parser.add_argument("--base-port", type=int, default=DEFAULT_BASE_PORT, help="端口 = 基准端口 + 编号")
+    parser.add_argument("--latency", type=float, default=0.0, help="每个请求的延迟（毫秒）")
+    parser.add_argument("--jitter", type=float, default=0.0, help="延迟随机抖动上限（毫秒）")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="请求失败的概率")
+    parser.add_argument("--dead-ratio", type=float, default=0.0, help="不监听端口的分身比例")
+    args = parser.parse_args()
+
+    server = FakeDevToolsServer(args.profiles, args.tabs, args.base_port, args.latency, args.jitter,
+                                args.fail_rate, args.dead_ratio)
+    with server:
+        ports = server.ports()
+        print(f"{len(ports)} 个分身监听端口 {min(ports.values())}-{max(ports.values())}，"
+              f"用户数据目录在 {server.root_dir}，Ctrl+C 退出")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
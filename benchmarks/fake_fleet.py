@@ -0,0 +1,145 @@
+"""
+基准测试用的模拟进程表 - 代替 psutil.process_iter，在任何平台上运行
+
+核心设计思想：
+- 可配置规模：分身数 × 每个分身的子进程数 + 无关进程
+- 贴近真实：--user-data-dir 混合带引号、不带引号、带空格路径，以及 chromeN / 上层目录编号 / Profile N 等命名
+- 可计数：每次属性读取都带固定耗时并记录次数，近似 Windows 上 OpenProcess/ReadProcessMemory 的开销
+"""
+
+import os
+import time
+from typing import List
+
+import psutil
+
+# 模拟的单次属性读取耗时（秒）
+NAME_COST = 2e-6
+DETAIL_COST = 40e-6
+
+CHROME_EXE = "C:\\Program Files\\Google\\Chrome\\Application\\chrome.exe"
+CHILD_TYPES = ("--type=gpu-process", "--type=utility", "--type=renderer", "--type=crashpad-handler")
+
+
+def _spin(seconds: float):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+class FakeProcess:
+    """模拟 psutil.Process：记录各属性的读取次数"""
+
+    calls = {"name": 0, "cmdline": 0, "exe": 0}
+    cost_scale = 1.0
+
+    def __init__(self, pid, name, cmdline, exe, protected=False, ppid=0):
+        self.pid = pid
+        self._ppid = ppid
+        self._name = name
+        self._cmdline = cmdline
+        self._exe = exe
+        self._protected = protected
+        self._create_time = 1000.0 + pid
+        self.info = {}
+
+    @classmethod
+    def reset_calls(cls):
+        cls.calls = {"name": 0, "cmdline": 0, "exe": 0}
+
+    def name(self):
+        FakeProcess.calls["name"] += 1
+        _spin(NAME_COST * FakeProcess.cost_scale)
+        return self._name
+
+    def cmdline(self):
+        FakeProcess.calls["cmdline"] += 1
+        _spin(DETAIL_COST * FakeProcess.cost_scale)
+        if self._protected:
+            raise psutil.AccessDenied(self.pid)
+        return list(self._cmdline)
+
+    def exe(self):
+        FakeProcess.calls["exe"] += 1
+        _spin(DETAIL_COST * FakeProcess.cost_scale)
+        if self._protected:
+            raise psutil.AccessDenied(self.pid)
+        return self._exe
+
+    def ppid(self):
+        return self._ppid
+
+    def create_time(self):
+        return self._create_time
+
+
+def profile_user_data_dir(number: int) -> str:
+    """分身 N 的用户数据目录，按编号轮换几种常见命名"""
+    variant = number % 4
+    if variant == 0:
+        return os.path.join("D:\\ChromeCache", str(number))
+    if variant == 1:
+        return os.path.join("D:\\Chrome Cache", f"chrome{number}")  # 路径带空格
+    if variant == 2:
+        return os.path.join("E:\\Profiles", f"profile{number}")
+    return os.path.join("D:\\Fleet", f"chrome{number}", "Data")  # 编号在上层目录
+
+
+def profile_args(number: int, port_base: int = 9222) -> List[str]:
+    """分身 N 的浏览器参数，按编号轮换带引号 / 不带引号的写法"""
+    udd = profile_user_data_dir(number)
+    if number % 3 == 0:
+        udd_arg = f'--user-data-dir="{udd}"'  # 从快捷方式继承的字面引号
+    else:
+        udd_arg = f"--user-data-dir={udd}"  # psutil 拆分后的参数（路径中可能有空格）
+    args = [udd_arg, f"--remote-debugging-port={port_base + number}"]
+    if number % 5 == 0:
+        args.append("--profile-directory=Default")
+    return args
+
+
+def build_fleet(profiles: int, children: int = 5, unrelated: int = 300, protected_ratio: float = 0.5):
+    """生成模拟进程表
+
+    Args:
+        profiles: 分身数量
+        children: 每个分身主进程之外的子进程数
+        unrelated: 无关进程数量（按 protected_ratio 比例拒绝读取详情）
+    """
+    table = []
+    pid = 4
+    protected_every = int(1 / protected_ratio) if protected_ratio > 0 else 0
+    for i in range(unrelated):
+        protected = bool(protected_every) and i % protected_every == 0
+        table.append(FakeProcess(pid, f"svc{i}.exe", [f"C:\\Windows\\svc{i}.exe"],
+                                 f"C:\\Windows\\svc{i}.exe", protected=protected))
+        pid += 4
+    for number in range(1, profiles + 1):
+        args = profile_args(number)
+        browser_pid = pid
+        table.append(FakeProcess(pid, "chrome.exe", [CHROME_EXE] + args, CHROME_EXE, ppid=4))
+        pid += 4
+        for c in range(children):
+            table.append(FakeProcess(pid, "chrome.exe", [CHROME_EXE, CHILD_TYPES[c % len(CHILD_TYPES)]] + args,
+                                     CHROME_EXE, ppid=browser_pid))
+            pid += 4
+    # 一个未指定 --user-data-dir 的默认Chrome
+    table.append(FakeProcess(pid, "chrome.exe", [CHROME_EXE], CHROME_EXE, ppid=4))
+    return table
+
+
+def make_process_iter(table):
+    """与 psutil.process_iter(attrs, ad_value) 行为一致的枚举函数"""
+    def process_iter(attrs=None, ad_value=None):
+        for proc in table:
+            info = {"pid": proc.pid}
+            for attr in attrs or ():
+                if attr == "pid":
+                    continue
+                try:
+                    info[attr] = getattr(proc, attr)()
+                except psutil.AccessDenied:
+                    info[attr] = ad_value
+            proc.info = info
+            yield proc
+    return process_iter
@@ -80,6 +80,29 @@ def build_application():
             # 包含本地模块
             "--hidden-import=chrome_icon_manager",
             "--hidden-import=utils",
+            "--hidden-import=process_index",
+            "--hidden-import=lnk_file",
+            "--hidden-import=shortcut_catalog",
+            "--hidden-import=process_watcher",
+            "--hidden-import=profile_resolver",
+            "--hidden-import=devtools",
+            "--hidden-import=shutdown",
+            "--hidden-import=fleet_registry",
+            "--hidden-import=spawner",
+            "--hidden-import=launch_scheduler",
+            "--hidden-import=launch_readiness",
+            "--hidden-import=launch_pipeline",
+            "--hidden-import=warm_pool",
+            "--hidden-import=memory_budget",
+            "--hidden-import=profile_creator",
+            "--hidden-import=profile_template",
+            "--hidden-import=profile_disk",
+            "--hidden-import=url_fanout",
+            "--hidden-import=cdp_client",
+            "--hidden-import=tab_ops",
+            "--hidden-import=cdp_session",
+            "--hidden-import=tab_inventory",
+            "--hidden-import=port_allocator",
             
             # 排除不需要的模块以减小文件大小
             "--exclude-module=matplotlib",
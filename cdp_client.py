@@ -0,0 +1,295 @@
+"""
+共享的异步 DevTools 客户端 - 一个事件循环线程承载所有分身调试端口的 HTTP 请求
+
+核心设计思想：
+- 单一事件循环：客户端在专用线程中运行 asyncio 事件循环，几百个分身的标签页操作是几百个协程而不是几百个线程
+- 连接复用：按端口保留 HTTP/1.1 长连接（keep-alive），同一分身的连续请求不再重复建立 TCP 连接
+- 双重限流：全局并发上限保护本机，每个端口的连接数上限保护单个浏览器
+- 同步桥接：界面与工作线程通过 run()/submit() 把协程交给事件循环，拿到结果或 Future
+- 只依赖标准库：手写最小的 HTTP/1.1 客户端（Content-Length 与 chunked 两种响应体）
+"""
+
+import json
+import time
+import asyncio
+import threading
+import logging
+import concurrent.futures
+from typing import Any, Awaitable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import quote
+
+from devtools import DEFAULT_HOST, DevToolsError
+
+DEFAULT_TIMEOUT = 2.0
+DEFAULT_MAX_CONCURRENCY = 64  # 所有端口合计同时进行的请求数
+DEFAULT_MAX_CONNECTIONS_PER_PORT = 4
+IDLE_CONNECTION_TIMEOUT = 30.0  # 空闲连接保留时间（秒）
+MAX_HEADER_BYTES = 64 * 1024
+
+
+class _Connection:
+    __slots__ = ("reader", "writer", "last_used")
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.last_used = time.monotonic()
+
+    def usable(self) -> bool:
+        return (not self.writer.is_closing() and not self.reader.at_eof()
+                and time.monotonic() - self.last_used < IDLE_CONNECTION_TIMEOUT)
+
+    def close(self):
+        try:
+            self.writer.close()
+        except Exception:
+            pass
+
+
+class CdpClient:
+    """调试端口 HTTP 端点的异步客户端（线程安全的同步入口 + 事件循环内的协程接口）
+
+    用法：
+        client = get_cdp_client()
+        tabs = client.run(client.list_targets(9223))
+        results = client.run(client.gather(client.new_tab(p, url) for p in ports))
+    """
+
+    def __init__(self, host: str = DEFAULT_HOST, timeout: float = DEFAULT_TIMEOUT,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 max_connections_per_port: int = DEFAULT_MAX_CONNECTIONS_PER_PORT):
+        self.host = host
+        self.timeout = timeout
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_connections_per_port = max(1, max_connections_per_port)
+        self.logger = logging.getLogger('CdpClient')
+
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        # 以下只在事件循环线程中访问
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._port_limits: Dict[int, asyncio.Semaphore] = {}
+        self._idle: Dict[int, List[_Connection]] = {}
+
+    # ---- 事件循环线程 ----
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None or self._thread is None or not self._thread.is_alive():
+                loop = asyncio.new_event_loop()
+                ready = threading.Event()
+
+                def run():
+                    asyncio.set_event_loop(loop)
+                    self._semaphore = asyncio.Semaphore(self.max_concurrency)
+                    self._port_limits = {}
+                    self._idle = {}
+                    loop.call_soon(ready.set)
+                    loop.run_forever()
+
+                self._thread = threading.Thread(target=run, name="CdpClient", daemon=True)
+                self._thread.start()
+                ready.wait()
+                self._loop = loop
+            return self._loop
+
+    def in_loop(self) -> bool:
+        return self._thread is not None and threading.current_thread() is self._thread
+
+    def submit(self, coro: Awaitable) -> concurrent.futures.Future:
+        """把协程交给事件循环，立即返回 Future（不阻塞调用线程）"""
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+
+    def run(self, coro: Awaitable, timeout: Optional[float] = None) -> Any:
+        """在事件循环中执行协程并等待结果（不能在事件循环线程中调用）"""
+        if self.in_loop():
+            raise RuntimeError("不能在事件循环线程中同步等待")
+        return self.submit(coro).result(timeout)
+
+    @staticmethod
+    async def gather(coros: Iterable[Awaitable]) -> List[Any]:
+        """并发执行，异常作为结果返回而不是中断其他请求"""
+        return await asyncio.gather(*coros, return_exceptions=True)
+
+    def close(self):
+        """关闭所有空闲连接并停止事件循环"""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = None
+            self._thread = None
+        if loop is None:
+            return
+
+        async def shutdown():
+            for connections in self._idle.values():
+                for conn in connections:
+                    conn.close()
+            self._idle.clear()
+
+        try:
+            asyncio.run_coroutine_threadsafe(shutdown(), loop).result(1.0)
+        except Exception:
+            pass
+        loop.call_soon_threadsafe(loop.stop)
+        if thread is not None:
+            thread.join(1.0)
+
+    # ---- HTTP ----
+
+    async def request(self, port: int, path: str, method: str = "GET",
+                      timeout: Optional[float] = None) -> Tuple[int, bytes]:
+        """发送一个请求，返回 (状态码, 响应体)；连接失败或超时抛出 DevToolsError"""
+        timeout = self.timeout if timeout is None else timeout
+        limit = self._port_limits.get(port)
+        if limit is None:
+            limit = self._port_limits[port] = asyncio.Semaphore(self.max_connections_per_port)
+        url = f"http://{self.host}:{port}{path}"
+        try:
+            async with self._semaphore, limit:
+                return await asyncio.wait_for(self._request(port, path, method), timeout)
+        except asyncio.TimeoutError as e:
+            raise DevToolsError(f"{url}: 超时") from e
+        except (OSError, ValueError, asyncio.IncompleteReadError) as e:
+            raise DevToolsError(f"{url}: {e}") from e
+
+    async def _request(self, port: int, path: str, method: str) -> Tuple[int, bytes]:
+        conn, reused = await self._acquire(port)
+        try:
+            try:
+                result, keep_alive = await self._exchange(conn, port, path, method)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                if not reused:
+                    raise
+                # 复用的连接已被浏览器关闭，换新连接重试一次
+                conn.close()
+                conn, reused = await self._connect(port), False
+                result, keep_alive = await self._exchange(conn, port, path, method)
+        except BaseException:
+            conn.close()
+            raise
+        if keep_alive:
+            conn.last_used = time.monotonic()
+            self._idle.setdefault(port, []).append(conn)
+        else:
+            conn.close()
+        return result
+
+    async def _acquire(self, port: int) -> Tuple[_Connection, bool]:
+        idle = self._idle.get(port)
+        while idle:
+            conn = idle.pop()
+            if conn.usable():
+                return conn, True
+            conn.close()
+        return await self._connect(port), False
+
+    async def _connect(self, port: int) -> _Connection:
+        reader, writer = await asyncio.open_connection(self.host, port, limit=MAX_HEADER_BYTES)
+        return _Connection(reader, writer)
+
+    async def _exchange(self, conn: _Connection, port: int, path: str, method: str) -> Tuple[Tuple[int, bytes], bool]:
+        request = (
+            f"{method} {path} HTTP/1.1\r\n"
+            f"Host: {self.host}:{port}\r\n"
+            "Connection: keep-alive\r\n"
+            "Content-Length: 0\r\n\r\n"
+        )
+        conn.writer.write(request.encode("ascii"))
+        await conn.writer.drain()
+
+        status_line = await conn.reader.readline()
+        if not status_line:
+            raise ConnectionError("连接已关闭")
+        parts = status_line.decode("latin-1").split(None, 2)
+        if len(parts) < 2 or not parts[1].isdigit():
+            raise ValueError(f"无效的响应: {status_line!r}")
+        status = int(parts[1])
+        http10 = parts[0] == "HTTP/1.0"
+
+        headers = {}
+        while True:
+            line = await conn.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        connection = headers.get("connection", "").lower()
+        keep_alive = connection == "keep-alive" if http10 else connection != "close"
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            body = await self._read_chunked(conn.reader)
+        elif "content-length" in headers:
+            body = await conn.reader.readexactly(int(headers["content-length"]))
+        else:
+            body = await conn.reader.read()
+            keep_alive = False
+        return (status, body), keep_alive
+
+    @staticmethod
+    async def _read_chunked(reader: asyncio.StreamReader) -> bytes:
+        chunks = []
+        while True:
+            size_line = await reader.readline()
+            size = int(size_line.split(b";", 1)[0].strip() or b"0", 16)
+            if size == 0:
+                # 跳过 trailer 直到空行
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                return b"".join(chunks)
+            chunks.append(await reader.readexactly(size))
+            await reader.readexactly(2)
+
+    async def request_json(self, port: int, path: str, method: str = "GET",
+                           timeout: Optional[float] = None) -> Any:
+        status, body = await self.request(port, path, method, timeout)
+        if status >= 400:
+            raise DevToolsError(f"{path}: HTTP {status} {body[:200].decode('utf-8', 'replace')}")
+        try:
+            return json.loads(body.decode("utf-8"))
+        except ValueError as e:
+            raise DevToolsError(f"{path}: 响应不是JSON") from e
+
+    # ---- DevTools HTTP 端点 ----
+
+    async def version(self, port: int, timeout: Optional[float] = None) -> Dict[str, Any]:
+        return await self.request_json(port, "/json/version", timeout=timeout)
+
+    async def list_targets(self, port: int, timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        targets = await self.request_json(port, "/json/list", timeout=timeout)
+        return targets if isinstance(targets, list) else []
+
+    async def new_tab(self, port: int, url: str = "about:blank", timeout: Optional[float] = None) -> Dict[str, Any]:
+        """新建标签页（新版 Chrome 要求 PUT）"""
+        target = await self.request_json(port, f"/json/new?{quote(url, safe='')}", method="PUT", timeout=timeout)
+        return target if isinstance(target, dict) else {}
+
+    async def close_target(self, port: int, target_id: str, timeout: Optional[float] = None):
+        status, body = await self.request(port, f"/json/close/{quote(target_id, safe='')}", timeout=timeout)
+        if status >= 400:
+            raise DevToolsError(f"关闭 {target_id} 失败: HTTP {status} {body[:200].decode('utf-8', 'replace')}")
+
+    async def activate_target(self, port: int, target_id: str, timeout: Optional[float] = None):
+        status, body = await self.request(port, f"/json/activate/{quote(target_id, safe='')}", timeout=timeout)
+        if status >= 400:
+            raise DevToolsError(f"激活 {target_id} 失败: HTTP {status} {body[:200].decode('utf-8', 'replace')}")
+
+    async def is_alive(self, port: int, timeout: Optional[float] = None) -> bool:
+        try:
+            await self.version(port, timeout)
+            return True
+        except DevToolsError:
+            return False
+
+
+_shared_client: Optional[CdpClient] = None
+_shared_client_lock = threading.Lock()
+
+
+def get_cdp_client() -> CdpClient:
+    """获取进程内共享的 DevTools 客户端"""
+    global _shared_client
+    with _shared_client_lock:
+        if _shared_client is None:
+            _shared_client = CdpClient()
+        return _shared_client
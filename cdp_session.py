@@ -0,0 +1,435 @@
+"""
+分身的持久 DevTools 会话 - 每个运行中的分身保持一条浏览器级 WebSocket，多条命令复用
+
+核心设计思想：
+- 按需连接：第一次发送命令时才通过 /json/version 找到 webSocketDebuggerUrl 并握手，之后一直复用
+- 多路复用：每条命令带递增的 id 直接写出（流水线），读取任务按 id 把应答交给对应的 Future，
+  不带 id 的消息作为事件分发给监听者
+- 断线重连：连接断开时所有未完成的命令立即失败，下一条命令自动重新连接；连接前后通知状态监听者
+- 扁平会话：页面级命令通过 Target.attachToTarget(flatten=True) 得到的 sessionId 在同一条连接上发送，
+  每个页面只附加一次
+- 运行在共享 DevTools 客户端的事件循环中，与 HTTP 请求共用同一个线程
+"""
+
+import os
+import json
+import time
+import base64
+import struct
+import asyncio
+import threading
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from cdp_client import CdpClient, get_cdp_client
+from devtools import DEFAULT_HOST, DevToolsError
+
+DEFAULT_COMMAND_TIMEOUT = 5.0
+CONNECT_TIMEOUT = 3.0
+BROWSER_CLOSE_TIMEOUT = 0.5  # Browser.close 只短暂等待应答，浏览器常常来不及应答就断开
+MAX_MESSAGE_BYTES = 64 * 1024 * 1024
+
+OPCODE_TEXT = 0x1
+OPCODE_CLOSE = 0x8
+OPCODE_PING = 0x9
+OPCODE_PONG = 0xA
+
+# 事件监听者：(方法名, 参数, sessionId)
+EventListener = Callable[[str, Dict[str, Any], Optional[str]], None]
+# 状态监听者：(是否已连接)
+StateListener = Callable[[bool], None]
+# 每次（重新）连接成功后执行，例如重新订阅事件
+ConnectHook = Callable[["CdpSession"], Awaitable[None]]
+
+
+def _encode_frame(payload: bytes, opcode: int = OPCODE_TEXT) -> bytes:
+    """客户端帧（必须加掩码）"""
+    header = bytearray([0x80 | opcode])
+    length = len(payload)
+    if length < 126:
+        header.append(0x80 | length)
+    elif length < 1 << 16:
+        header.append(0x80 | 126)
+        header += struct.pack("!H", length)
+    else:
+        header.append(0x80 | 127)
+        header += struct.pack("!Q", length)
+    mask = os.urandom(4)
+    # 按 4 字节整数异或，避免逐字节循环
+    padded = payload + b"\0" * (-length % 4)
+    key = struct.unpack("!I", mask)[0]
+    words = struct.unpack(f"!{len(padded) // 4}I", padded)
+    masked = struct.pack(f"!{len(words)}I", *(w ^ key for w in words))[:length]
+    return bytes(header) + mask + masked
+
+
+class CdpSession:
+    """一个分身（调试端口）的浏览器级 WebSocket 会话，所有方法都在客户端事件循环中调用"""
+
+    def __init__(self, port: int, client: CdpClient, host: str = DEFAULT_HOST):
+        self.port = port
+        self.client = client
+        self.host = host
+        self.logger = logging.getLogger('CdpSession')
+
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._read_task: Optional[asyncio.Task] = None
+        self._connect_lock = asyncio.Lock()
+        self._next_id = 0
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._page_sessions: Dict[str, str] = {}  # targetId → sessionId
+
+        self._event_listeners: List[EventListener] = []
+        self._state_listeners: List[StateListener] = []
+        self._connect_hooks: List[ConnectHook] = []
+
+        self.connected_at: Optional[float] = None  # time.monotonic()
+        self.disconnected_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.closed = False  # close() 后不再重连
+
+    # ---- 状态 ----
+
+    @property
+    def connected(self) -> bool:
+        return self._writer is not None and not self._writer.is_closing()
+
+    def add_event_listener(self, listener: EventListener):
+        self._event_listeners.append(listener)
+
+    def add_state_listener(self, listener: StateListener):
+        self._state_listeners.append(listener)
+
+    def add_connect_hook(self, hook: ConnectHook):
+        self._connect_hooks.append(hook)
+
+    # ---- 连接 ----
+
+    async def connect(self):
+        """建立连接（已连接时直接返回）"""
+        if self.connected:
+            return
+        if self.closed:
+            raise DevToolsError(f"端口 {self.port} 的会话已关闭")
+        async with self._connect_lock:
+            if self.connected:
+                return
+            try:
+                await asyncio.wait_for(self._open(), CONNECT_TIMEOUT)
+            except asyncio.TimeoutError as e:
+                self.last_error = "连接超时"
+                raise DevToolsError(f"端口 {self.port} WebSocket 连接超时") from e
+            except (OSError, ValueError, asyncio.IncompleteReadError) as e:
+                self.last_error = str(e)
+                raise DevToolsError(f"端口 {self.port} WebSocket 连接失败: {e}") from e
+            self.connected_at = time.monotonic()
+            self.last_error = None
+            self._read_task = asyncio.ensure_future(self._read_loop())
+            self._notify_state(True)
+        for hook in self._connect_hooks:
+            try:
+                await hook(self)
+            except Exception as e:
+                self.logger.warning(f"端口 {self.port} 连接回调失败: {e}")
+
+    async def _open(self):
+        info = await self.client.version(self.port)
+        ws_url = info.get("webSocketDebuggerUrl") if isinstance(info, dict) else None
+        if not ws_url:
+            raise ValueError("未返回 webSocketDebuggerUrl")
+        parsed = urlparse(ws_url)
+        reader, writer = await asyncio.open_connection(parsed.hostname or self.host, parsed.port or self.port,
+                                                       limit=MAX_MESSAGE_BYTES)
+        try:
+            key = base64.b64encode(os.urandom(16)).decode("ascii")
+            writer.write((
+                f"GET {parsed.path or '/'} HTTP/1.1\r\n"
+                f"Host: {parsed.hostname}:{parsed.port}\r\n"
+                "Upgrade: websocket\r\n"
+                "Connection: Upgrade\r\n"
+                f"Sec-WebSocket-Key: {key}\r\n"
+                "Sec-WebSocket-Version: 13\r\n\r\n"
+            ).encode("ascii"))
+            await writer.drain()
+            response = await reader.readuntil(b"\r\n\r\n")
+            status_line = response.split(b"\r\n", 1)[0]
+            if status_line.split()[1:2] != [b"101"]:
+                raise ValueError(f"WebSocket 握手失败: {status_line.decode('latin-1')}")
+        except BaseException:
+            writer.close()
+            raise
+        self._reader, self._writer = reader, writer
+        self._page_sessions.clear()
+
+    async def _read_frame(self) -> Tuple[int, bytes]:
+        """读取一个完整消息（自动拼接分片，处理 ping）"""
+        message = b""
+        message_opcode = None
+        while True:
+            first, second = await self._reader.readexactly(2)
+            fin = first & 0x80
+            opcode = first & 0x0F
+            length = second & 0x7F
+            if length == 126:
+                length = struct.unpack("!H", await self._reader.readexactly(2))[0]
+            elif length == 127:
+                length = struct.unpack("!Q", await self._reader.readexactly(8))[0]
+            if length > MAX_MESSAGE_BYTES:
+                raise ValueError(f"消息过大: {length}")
+            mask = await self._reader.readexactly(4) if second & 0x80 else None
+            payload = await self._reader.readexactly(length) if length else b""
+            if mask:
+                payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+            if opcode == OPCODE_PING:
+                self._writer.write(_encode_frame(payload, OPCODE_PONG))
+                continue
+            if opcode == OPCODE_PONG:
+                continue
+            if opcode != 0x0:
+                message_opcode = opcode
+            message += payload
+            if fin:
+                return message_opcode, message
+
+    async def _read_loop(self):
+        error = "连接已关闭"
+        try:
+            while True:
+                opcode, payload = await self._read_frame()
+                if opcode == OPCODE_CLOSE:
+                    break
+                if opcode != OPCODE_TEXT:
+                    continue
+                try:
+                    message = json.loads(payload.decode("utf-8"))
+                except ValueError:
+                    continue
+                self._dispatch(message)
+        except (OSError, ValueError, asyncio.IncompleteReadError) as e:
+            error = str(e) or error
+        except asyncio.CancelledError:
+            error = "会话已关闭"
+        finally:
+            self._drop_connection(error)
+
+    def _dispatch(self, message: Dict[str, Any]):
+        message_id = message.get("id")
+        if message_id is not None:
+            future = self._pending.pop(message_id, None)
+            if future is not None and not future.done():
+                if "error" in message:
+                    future.set_exception(DevToolsError(f"{message['error'].get('message', message['error'])}"))
+                else:
+                    future.set_result(message.get("result", {}))
+            return
+        method = message.get("method")
+        if not method:
+            return
+        params = message.get("params", {})
+        if method == "Target.detachedFromTarget":
+            session_id = params.get("sessionId")
+            for target_id, sid in list(self._page_sessions.items()):
+                if sid == session_id:
+                    del self._page_sessions[target_id]
+        for listener in list(self._event_listeners):
+            try:
+                listener(method, params, message.get("sessionId"))
+            except Exception as e:
+                self.logger.error(f"事件回调失败: {method} - {e}")
+
+    def _drop_connection(self, error: str):
+        writer = self._writer
+        if writer is None:
+            return
+        self._reader = self._writer = None
+        self._read_task = None
+        try:
+            writer.close()
+        except Exception:
+            pass
+        self.disconnected_at = time.monotonic()
+        self.last_error = error
+        self._page_sessions.clear()
+        pending, self._pending = self._pending, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(DevToolsError(f"端口 {self.port} 连接断开: {error}"))
+        self._notify_state(False)
+
+    def _notify_state(self, connected: bool):
+        for listener in list(self._state_listeners):
+            try:
+                listener(connected)
+            except Exception as e:
+                self.logger.error(f"状态回调失败: {e}")
+
+    async def close(self):
+        """关闭连接，之后不再自动重连"""
+        self.closed = True
+        if self._writer is not None:
+            try:
+                self._writer.write(_encode_frame(b"", OPCODE_CLOSE))
+            except Exception:
+                pass
+        task = self._read_task
+        if task is not None:
+            task.cancel()
+        self._drop_connection("会话已关闭")
+
+    # ---- 命令 ----
+
+    async def send(self, method: str, params: Optional[Dict[str, Any]] = None,
+                   session_id: Optional[str] = None, timeout: float = DEFAULT_COMMAND_TIMEOUT) -> Dict[str, Any]:
+        """发送一条命令并等待应答；未连接时先（重新）连接。多个调用可以同时进行"""
+        await self.connect()
+        self._next_id += 1
+        message_id = self._next_id
+        command: Dict[str, Any] = {"id": message_id, "method": method}
+        if params:
+            command["params"] = params
+        if session_id:
+            command["sessionId"] = session_id
+        future = asyncio.get_running_loop().create_future()
+        self._pending[message_id] = future
+        try:
+            self._writer.write(_encode_frame(json.dumps(command).encode("utf-8")))
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError as e:
+            raise DevToolsError(f"{method} 超时") from e
+        except (OSError, AttributeError) as e:
+            # 写入时连接已断开（_writer 被置空）
+            self._drop_connection(str(e))
+            raise DevToolsError(f"{method} 发送失败: {e}") from e
+        finally:
+            self._pending.pop(message_id, None)
+
+    async def page_session(self, target_id: str) -> str:
+        """附加到页面并返回 sessionId（同一连接上每个页面只附加一次）"""
+        session_id = self._page_sessions.get(target_id)
+        if session_id is None:
+            result = await self.send("Target.attachToTarget", {"targetId": target_id, "flatten": True})
+            session_id = result["sessionId"]
+            self._page_sessions[target_id] = session_id
+        return session_id
+
+    # ---- 常用操作 ----
+
+    async def get_targets(self) -> List[Dict[str, Any]]:
+        """所有目标（字段为 targetId/type/title/url/attached 等，与 /json/list 不同）"""
+        return (await self.send("Target.getTargets")).get("targetInfos", [])
+
+    async def create_target(self, url: str = "about:blank", background: bool = False) -> str:
+        result = await self.send("Target.createTarget", {"url": url, "background": background})
+        return result["targetId"]
+
+    async def close_target(self, target_id: str) -> bool:
+        return bool((await self.send("Target.closeTarget", {"targetId": target_id})).get("success", True))
+
+    async def activate_target(self, target_id: str):
+        await self.send("Target.activateTarget", {"targetId": target_id})
+
+    async def navigate(self, target_id: str, url: str) -> Dict[str, Any]:
+        return await self.send("Page.navigate", {"url": url}, session_id=await self.page_session(target_id))
+
+    async def evaluate(self, target_id: str, expression: str, await_promise: bool = False) -> Any:
+        """在页面中执行表达式，返回值（按值返回）；脚本抛出异常时抛出 DevToolsError"""
+        result = await self.send("Runtime.evaluate", {
+            "expression": expression,
+            "returnByValue": True,
+            "awaitPromise": await_promise,
+        }, session_id=await self.page_session(target_id))
+        if "exceptionDetails" in result:
+            details = result["exceptionDetails"]
+            raise DevToolsError(f"脚本异常: {details.get('exception', {}).get('description') or details.get('text')}")
+        return result.get("result", {}).get("value")
+
+    async def window_for_target(self, target_id: str) -> Tuple[int, Dict[str, Any]]:
+        """(windowId, bounds)"""
+        result = await self.send("Browser.getWindowForTarget", {"targetId": target_id})
+        return result["windowId"], result.get("bounds", {})
+
+    async def set_window_bounds(self, window_id: int, **bounds):
+        """bounds: left/top/width/height/windowState"""
+        await self.send("Browser.setWindowBounds", {"windowId": window_id, "bounds": bounds})
+
+    async def close_browser(self, timeout: float = BROWSER_CLOSE_TIMEOUT):
+        """请求浏览器通过 Browser.close 正常退出（与用户关闭所有窗口的效果相同）
+
+        连接失败时抛出 DevToolsError；命令发出后没有应答或连接断开都视为已请求
+        """
+        await self.connect()
+        try:
+            await self.send("Browser.close", timeout=timeout)
+        except DevToolsError as e:
+            self.logger.debug(f"端口 {self.port} Browser.close 未收到应答: {e}")
+
+
+class SessionPool:
+    """每个调试端口一个会话，按需创建；会话对象只在客户端事件循环中使用
+
+    用法（任意线程）：
+        pool = get_session_pool()
+        pool.run(lambda s: s.navigate(target_id, url), port)
+    """
+
+    def __init__(self, client: Optional[CdpClient] = None):
+        self.client = client or get_cdp_client()
+        self._sessions: Dict[int, CdpSession] = {}  # 只在事件循环中访问
+        self._created_listeners: List[Callable[[CdpSession], None]] = []
+
+    def add_created_listener(self, listener: Callable[[CdpSession], None]):
+        """新会话创建时（在事件循环中）调用，用于挂接事件监听"""
+        self._created_listeners.append(listener)
+
+    def get(self, port: int) -> CdpSession:
+        """获取端口的会话（必须在事件循环中调用）；不会立即连接"""
+        session = self._sessions.get(port)
+        if session is None or session.closed:
+            session = CdpSession(port, self.client, self.client.host)
+            self._sessions[port] = session
+            for listener in list(self._created_listeners):
+                listener(session)
+        return session
+
+    def sessions(self) -> Dict[int, CdpSession]:
+        return dict(self._sessions)
+
+    async def drop(self, port: int):
+        """关闭端口的会话（例如分身已退出）"""
+        session = self._sessions.pop(port, None)
+        if session is not None:
+            await session.close()
+
+    async def close_all(self):
+        for port in list(self._sessions):
+            await self.drop(port)
+
+    def run(self, operation: Callable[[CdpSession], Awaitable[Any]], port: int,
+            timeout: Optional[float] = None) -> Any:
+        """在事件循环中对端口的会话执行 operation(session) 并等待结果（不能在事件循环线程中调用）"""
+        async def call():
+            return await operation(self.get(port))
+        return self.client.run(call(), timeout)
+
+    def run_many(self, operation: Callable[[CdpSession], Awaitable[Any]], ports: List[int],
+                 timeout: Optional[float] = None) -> Dict[int, Any]:
+        """对多个端口并发执行，返回 端口 → 结果或异常"""
+        async def call():
+            results = await self.client.gather(operation(self.get(port)) for port in ports)
+            return dict(zip(ports, results))
+        return self.client.run(call(), timeout)
+
+
+_shared_pool: Optional[SessionPool] = None
+_shared_pool_lock = threading.Lock()
+
+
+def get_session_pool() -> SessionPool:
+    """获取进程内共享的会话池"""
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is None:
+            _shared_pool = SessionPool()
+        return _shared_pool
@@ -25,6 +25,9 @@ import logging
 import json
 import traceback
 
+from process_index import ProcessSnapshot, get_process_index, number_for_process
+from shortcut_catalog import get_shortcut_catalog
+
 class ChromeIconManager:
     """Chrome图标管理器 - 整合所有图标相关功能"""
     
@@ -555,12 +558,14 @@ class ChromeIconManager:
             return {}
         
         results = {}
+        catalog = get_shortcut_catalog(shortcut_dir)
         
         for number, icon_path in number_icon_map.items():
             try:
-                shortcut_path = os.path.join(shortcut_dir, f"{number}.lnk")
+                shortcut_path = catalog.path_for_number(number)
+                shortcut_info = catalog.get(shortcut_path)
                 
-                if not os.path.exists(shortcut_path):
+                if shortcut_info is None:
                     self.logger.warning(f"快捷方式不存在: {shortcut_path}")
                     results[number] = False
                     continue
@@ -570,17 +575,16 @@ class ChromeIconManager:
                     results[number] = False
                     continue
                 
-                # 更新快捷方式图标
-                shortcut = self.shell.CreateShortCut(shortcut_path)
-                
-                # 检查当前图标是否已经是目标图标
-                current_icon = getattr(shortcut, 'IconLocation', '')
-                if icon_path in current_icon:
+                # 检查当前图标是否已经是目标图标（读缓存，不创建COM对象）
+                if icon_path in shortcut_info.icon_location:
                     results[number] = True
                     continue
                 
+                # 更新快捷方式图标
+                shortcut = self.shell.CreateShortCut(shortcut_path)
                 shortcut.IconLocation = icon_path
                 shortcut.save()
+                catalog.invalidate(shortcut_path)
                 
                 results[number] = True
                 self.logger.info(f"更新快捷方式图标成功: {shortcut_path} -> {icon_path}")
@@ -805,6 +809,9 @@ class ChromeIconManager:
         """
         chrome_windows = {}
         
+        # 整个枚举过程共用一份进程快照，避免每个窗口单独查询进程命令行
+        snapshot = get_process_index().snapshot()
+        
         def enum_windows_callback(hwnd, _):
             if not win32gui.IsWindowVisible(hwnd):
                 return True
@@ -818,7 +825,7 @@ class ChromeIconManager:
                 _, pid = win32process.GetWindowThreadProcessId(hwnd)
                 
                 # 尝试从进程命令行提取编号
-                number = self._extract_number_from_process(pid)
+                number = self._extract_number_from_process(pid, snapshot)
                 if number:
                     chrome_windows[hwnd] = number
                 
@@ -835,25 +842,12 @@ class ChromeIconManager:
         
         return chrome_windows
     
-    def _extract_number_from_process(self, pid: int) -> Optional[int]:
-        """从进程命令行参数中提取编号"""
+    def _extract_number_from_process(self, pid: int, snapshot: Optional[ProcessSnapshot] = None) -> Optional[int]:
+        """从进程索引中查询编号（编号由共享的 ProfileResolver 识别）"""
         try:
-            import psutil
-            process = psutil.Process(pid)
-            cmdline = ' '.join(process.cmdline())
-            
-            # 查找 --user-data-dir 参数
-            import re
-            pattern = r'--user-data-dir=(?:\"([^"]+)\"|([^\s]+))'
-            match = re.search(pattern, cmdline)
-            
-            if match:
-                data_dir = match.group(1) or match.group(2)
-                # 从路径中提取数字
-                path_parts = data_dir.replace('\\', '/').split('/')
-                for part in reversed(path_parts):
-                    if part.isdigit():
-                        return int(part)
+            if snapshot is None:
+                snapshot = get_process_index().snapshot()
+            return number_for_process(snapshot, pid)
             
         except Exception as e:
             self.logger.debug(f"提取进程 {pid} 编号失败: {str(e)}")
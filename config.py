@@ -52,6 +52,7 @@ STYLES = {
 }
 
 SETTINGS_FILE = os.path.join(BASE_DIR, "settings.json")
+FLEET_DB_FILE = os.path.join(BASE_DIR, "fleet.db")
 
 DEFAULT_SETTINGS: Dict[str, Any] = {
     "shortcut_path": "",
@@ -63,5 +64,10 @@ DEFAULT_SETTINGS: Dict[str, Any] = {
     "show_chrome_tip": True,
     "sync_shortcut": None,
     "window_position": None,
-    "screen_arrange_config": []
+    "screen_arrange_config": [],
+    "process_index_max_age": 1.0,
+    "process_watch_interval": 1.0,
+    "launch_max_concurrency": 0,
+    "launch_target_cpu": 75.0,
+    "launch_min_free_memory_mb": 1024
 }
\ No newline at end of file
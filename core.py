@@ -29,10 +29,29 @@ from utils import (
     show_notification
 )
 from config import ICON_DIR
+from process_index import DEFAULT_MAX_AGE, browser_candidates, get_process_index
+from process_watcher import (
+    DEFAULT_INTERVAL as DEFAULT_WATCH_INTERVAL,
+    ProfileStarted,
+    get_process_watcher
+)
+from profile_resolver import get_profile_resolver
+from shortcut_catalog import get_shortcut_catalog
+from devtools import debug_port_from_cmdline
+from fleet_registry import FleetRegistry, get_fleet_registry
+from shutdown import ShutdownEngine, ShutdownTarget, format_timings
+from spawner import build_launch_spec, spawn
+from launch_scheduler import DEFAULT_MAX_CONCURRENCY, LaunchScheduler
+from launch_readiness import get_readiness_tracker
+from launch_pipeline import LaunchPipeline, profile_launch_stages
+from profile_creator import create_profiles
+from url_fanout import UrlTarget, open_url
+from cdp_session import get_session_pool
+from tab_inventory import get_tab_inventory
+from port_allocator import get_port_allocator
+from tab_ops import keep_only_current, keep_only_new, run_for_ports
 import random
 
-# Regex for parsing --user-data-dir, adopted from Chrome_launcher.py for robustness
-USER_DATA_DIR_PATTERN = re.compile(r'--user-data-dir=(?:\"(?P<path>[^"]+)\"|(?P<path_unquoted>[^\s]+(?:\s+[^\s]+)*?(?=\s*--|\s*$)))')
 # Regex for parsing --remote-debugging-port
 REMOTE_DEBUGGING_PORT_PATTERN = re.compile(r'--remote-debugging-port=(\d+)')
 
@@ -80,6 +99,29 @@ class ChromeManager:
         self.shortcut_to_pid = {}
         self.pid_to_number = {}
         
+        self.profile_resolver = get_profile_resolver()
+        self.bind_shortcut_catalog()
+        self.process_index = get_process_index()
+        self.process_index.max_age = self.settings.get("process_index_max_age", DEFAULT_MAX_AGE)
+        
+        # 后台监视分身启动/退出，增量维护 self.windows 与 pid_to_number
+        self.profile_event_callback = None
+        self.session_pool = get_session_pool()
+        self.tab_inventory = get_tab_inventory()
+        self.port_allocator = get_port_allocator()
+        self.port_allocator.base = self.settings.get("BASE_DEBUG_PORT", self.port_allocator.base)
+        self.process_watcher = get_process_watcher()
+        self.process_watcher.interval = self.settings.get("process_watch_interval", DEFAULT_WATCH_INTERVAL)
+        self.process_watcher.subscribe(self.on_profile_event)
+        # 运行记录：启动时只校验上次记录的分身进程，不做完整扫描
+        try:
+            self.fleet_registry = get_fleet_registry()
+            self.process_watcher.set_registry(self.fleet_registry)
+        except Exception as e:
+            log_error("打开分身运行记录失败", e)
+            self.fleet_registry = None
+        self.process_watcher.start()
+        
         self.screens = []
         self.screen_names = []
         
@@ -248,7 +290,16 @@ class ChromeManager:
             
             if hasattr(self, 'memory_monitor_thread') and self.memory_monitor_thread.is_alive():
                 self.memory_monitor_thread.join(timeout=0.5)
+            
+            if hasattr(self, 'process_watcher'):
+                self.process_watcher.unsubscribe(self.on_profile_event)
+                self.process_watcher.stop(timeout=0.5)
                 
+            try:
+                self.session_pool.client.run(self.session_pool.close_all(), timeout=1.0)
+            except Exception as e:
+                log_error("关闭DevTools会话失败", e)
+            
             self.clean_temp_files()
             
             gc.collect()
@@ -256,6 +307,81 @@ class ChromeManager:
         except Exception as e:
             log_error("退出清理异常", e)
     
+    def bind_shortcut_catalog(self):
+        """让编号解析器通过当前快捷方式目录反查自定义用户数据目录，并识别缓存目录下的编号目录（目录设置变化后调用）"""
+        if self.shortcut_path and os.path.exists(self.shortcut_path):
+            self.profile_resolver.set_catalog(get_shortcut_catalog(self.shortcut_path))
+        else:
+            self.profile_resolver.set_catalog(None)
+        self.profile_resolver.set_cache_dir(self.cache_dir)
+    
+    def on_profile_event(self, event):
+        """进程监视器回调（监视线程中执行），有界面时切换到界面线程处理"""
+        if hasattr(self, "ui_manager") and self.ui_manager and hasattr(self.ui_manager, "root"):
+            try:
+                self.ui_manager.root.after(0, self.apply_profile_event, event)
+                return
+            except Exception as e:
+                log_error("投递分身事件失败", e)
+        self.apply_profile_event(event)
+    
+    def apply_profile_event(self, event):
+        """根据分身启动/退出事件增量更新 self.windows，不再整体重建"""
+        num = event.number
+        try:
+            if isinstance(event, ProfileStarted):
+                expected_cdp_port = self.port_allocator.port_for(num)
+                # 运行记录中保存的窗口句柄仍属于该进程时直接复用
+                entry = self.fleet_registry.get(num) if self.fleet_registry else None
+                recorded_hwnd = None
+                if entry and entry.pid == event.pid:
+                    if entry.debug_port:
+                        expected_cdp_port = entry.debug_port
+                    if entry.hwnd and win32gui.IsWindow(entry.hwnd):
+                        recorded_hwnd = entry.hwnd
+                win_info = self.windows.get(num)
+                if win_info is None:
+                    self.windows[num] = {
+                        'number': num,
+                        'pid': event.pid,
+                        'user_data_dir': event.user_data_dir,
+                        'debug_port': expected_cdp_port,
+                        'status': 'identified_by_watcher',
+                        'hwnd_debug': recorded_hwnd,
+                        'title_debug': None,
+                        'tabs': []
+                    }
+                elif win_info.get('pid') != event.pid:
+                    win_info['pid'] = event.pid
+                    win_info['user_data_dir'] = event.user_data_dir
+                    win_info['hwnd_debug'] = recorded_hwnd
+                    win_info['title_debug'] = None
+                for old_pid, old_num in list(self.pid_to_number.items()):
+                    if old_num == num and old_pid != event.pid:
+                        del self.pid_to_number[old_pid]
+                self.pid_to_number[event.pid] = num
+                self.debug_ports[num] = expected_cdp_port
+                self.watch_tabs(expected_cdp_port, event.user_data_dir)
+            else:
+                self.windows.pop(num, None)
+                for old_pid, old_num in list(self.pid_to_number.items()):
+                    if old_num == num:
+                        del self.pid_to_number[old_pid]
+                port = self.debug_ports.pop(num, None)
+                if port is not None:
+                    # 分身已退出，停止维护标签页清单并关闭其持久 DevTools 会话
+                    self.session_pool.client.submit(self.tab_inventory.unwatch(port))
+                    self.session_pool.client.submit(self.session_pool.drop(port))
+        except Exception as e:
+            log_error(f"处理分身事件失败: {event}", e)
+            return
+        
+        if self.profile_event_callback:
+            try:
+                self.profile_event_callback(event)
+            except Exception as e:
+                log_error("分身事件界面回调失败", e)
+    
     def open_windows(self, numbers_str: str) -> bool:
         self.update_activity_timestamp()
         
@@ -273,70 +399,23 @@ class ChromeManager:
         
         self.debug_ports.clear()
         
-        temp_files = []
+        catalog = get_shortcut_catalog(shortcut_dir)
+        self.remove_stale_temp_shortcuts(shortcut_dir)
         
         try:
+            # 启动参数在内存中由快捷方式缓存组装，直接创建 chrome.exe，不再写临时快捷方式
+            launches = []
             for num in window_numbers:
-                shortcut = os.path.join(shortcut_dir, f"{num}.lnk")
-                if not os.path.exists(shortcut):
+                shortcut = catalog.path_for_number(num)
+                shortcut_info = catalog.get(shortcut)
+                if shortcut_info is None:
                     log_error(f"快捷方式不存在: {shortcut}")
                     continue
                 
-                shortcut_obj = self.shell.CreateShortCut(shortcut)
-                target = shortcut_obj.TargetPath
-                args = shortcut_obj.Arguments
-                working_dir = shortcut_obj.WorkingDirectory
-                
-                debug_port = 9222 + int(num)
-                
-                self.debug_ports[num] = debug_port
-                
-                if "--remote-debugging-port=" in args:
-                    new_args = re.sub(
-                        r"--remote-debugging-port=\d+",
-                        f"--remote-debugging-port={debug_port}",
-                        args,
-                    )
-                else:
-                    new_args = f"{args} --remote-debugging-port={debug_port}"
-                
-                temp_shortcut = os.path.join(shortcut_dir, f"temp_{num}.lnk")
-                temp_obj = self.shell.CreateShortCut(temp_shortcut)
-                temp_obj.TargetPath = target
-                temp_obj.Arguments = new_args
-                temp_obj.WorkingDirectory = working_dir
-                temp_obj.IconLocation = shortcut_obj.IconLocation
-                temp_obj.Save()
-                
-                temp_files.append(temp_shortcut)
-                self.temp_files.append(temp_shortcut)
-                
-                if os.path.exists(temp_shortcut):
-                    try:
-                        subprocess.Popen(["start", "", temp_shortcut], shell=True)
-                        time.sleep(0.1)
-                    except Exception as e:
-                        log_error(f"启动窗口 {num} 失败", e)
-                else:
-                    try:
-                        subprocess.Popen(["start", "", shortcut], shell=True)
-                        time.sleep(0.1)
-                    except Exception as e:
-                        log_error(f"启动窗口 {num} 失败", e)
-            
-            def cleanup_temp_files():
-                time.sleep(2)
-                for temp_file in temp_files:
-                    try:
-                        if os.path.exists(temp_file):
-                            os.remove(temp_file)
-                    except Exception as e:
-                        log_error(f"删除临时文件失败: {temp_file}", e)
-                
-                if hasattr(self, "perform_light_cleanup"):
-                    self.perform_light_cleanup()
+                launches.append((num, shortcut_info))
             
-            threading.Thread(target=cleanup_temp_files).start()
+            # 调度与就绪等待可能持续数秒，放到后台线程，不阻塞界面
+            threading.Thread(target=self._launch_profiles, args=(launches,), daemon=True).start()
             
             self.settings["last_window_numbers"] = numbers_str
             save_settings(self.settings)
@@ -347,129 +426,96 @@ class ChromeManager:
             log_error("打开窗口失败", e)
             return False
     
+    def _launch_profiles(self, launches: List[Tuple[int, Any]]):
+        """解析、启动、等待就绪按流水线重叠执行；调度器按系统负载放行，就绪后释放名额并记录延迟"""
+        by_number = dict(launches)
+        tracker = get_readiness_tracker()
+        
+        def resolve(num):
+            shortcut_info = by_number[num]
+            # 端口被其他进程占用时分配新端口，避免启动后调试端口不可用
+            debug_port = self.port_allocator.prepare_launch(num, shortcut_info.user_data_dir)
+            self.debug_ports[num] = debug_port
+            return build_launch_spec(shortcut_info, num, debug_port=debug_port)
+        
+        pipeline = LaunchPipeline(profile_launch_stages(
+            resolve, self.create_launch_scheduler(), tracker, registry=self.fleet_registry))
+        report = pipeline.run([num for num, _ in launches])
+        
+        self.process_index.invalidate()
+        for item in report.failed():
+            log_error(f"启动窗口 {item.number} 失败 ({item.failed_stage}): {item.error}")
+        timings = [item.timing for item in report.items if item.timing is not None]
+        if timings:
+            print(f"启动完成: {tracker.summary(timings)}")
+        print(f"启动流水线: {report.summary()}")
+    
+    def create_launch_scheduler(self, min_delay: float = 0.0) -> LaunchScheduler:
+        """按设置创建启动调度器（launch_max_concurrency 为 0 时按CPU核数自动确定）"""
+        return LaunchScheduler(
+            max_concurrency=self.settings.get("launch_max_concurrency") or DEFAULT_MAX_CONCURRENCY,
+            target_cpu=self.settings.get("launch_target_cpu", 75.0),
+            min_free_memory_mb=self.settings.get("launch_min_free_memory_mb", 1024),
+            min_delay=min_delay,
+        )
+    
+    def remove_stale_temp_shortcuts(self, shortcut_dir: str):
+        """删除旧版本启动时遗留的 temp_N.lnk"""
+        if getattr(self, "_temp_shortcuts_checked", None) == shortcut_dir:
+            return
+        self._temp_shortcuts_checked = shortcut_dir
+        try:
+            with os.scandir(shortcut_dir) as it:
+                stale = [entry.path for entry in it
+                         if entry.name.lower().startswith("temp_") and entry.name.lower().endswith(".lnk")]
+        except OSError as e:
+            log_error(f"扫描快捷方式目录失败: {shortcut_dir}", e)
+            return
+        for path in stale:
+            try:
+                os.remove(path)
+            except OSError as e:
+                log_error(f"删除临时文件失败: {path}", e)
+    
     def import_windows(self, update_ui=True) -> List[Dict]:
         if hasattr(self, 'logger'): 
             self.logger.info("进入 import_windows 方法")
         else:
             print("INFO: 进入 import_windows 方法")
 
-        try:
-            pythoncom.CoInitialize()
-            shell = win32com.client.Dispatch("WScript.Shell")
-            if hasattr(self, 'logger'): self.logger.debug("WScript.Shell COM对象初始化成功")
-            else: print("DEBUG: WScript.Shell COM对象初始化成功")
-        except Exception as e:
-            log_error("导入窗口时初始化COM组件失败", e)
-            shell = None
-            if hasattr(self, 'logger'): self.logger.error("WScript.Shell COM对象初始化失败")
-            else: print("ERROR: WScript.Shell COM对象初始化失败")
-
         profile_candidate_pids = {}
-        processed_proc_count = 0
 
-        if hasattr(self, 'logger'): self.logger.debug("准备开始遍历 psutil.process_iter")
-        else: print("DEBUG: 准备开始遍历 psutil.process_iter")
+        if hasattr(self, 'logger'): self.logger.debug("准备读取共享进程索引")
+        else: print("DEBUG: 准备读取共享进程索引")
 
         try:
-            for proc in psutil.process_iter(['pid', 'name', 'cmdline', 'exe']):
-                processed_proc_count += 1
-                try:
-                    proc_info = proc.info
-                    if not proc_info['name'] or 'chrome.exe' not in proc_info['name'].lower() or not proc_info['cmdline']:
-                        continue
-
-                    pid = proc_info['pid']
-                    cmdline_list = proc_info['cmdline'] 
-                    cmdline_str = " ".join(cmdline_list) 
-                    
-                    actual_user_data_dir = None
-                    profile_number = None
-
-                    match_ud_dir = USER_DATA_DIR_PATTERN.search(cmdline_str)
-                    if match_ud_dir:
-                        raw_udd = match_ud_dir.group('path') or match_ud_dir.group('path_unquoted')
-                        if raw_udd:
-                            actual_user_data_dir = os.path.normpath(raw_udd.strip())
-                    
-                    if actual_user_data_dir:
-                        udd_basename = os.path.basename(actual_user_data_dir)
-                        if udd_basename.isdigit():
-                            profile_number = int(udd_basename)
-
-                    if profile_number is None and actual_user_data_dir and self.shortcut_path and os.path.exists(self.shortcut_path) and shell:
-                        try:
-                            for f_name in os.listdir(self.shortcut_path):
-                                if f_name.lower().endswith(".lnk"):
-                                    num_part = f_name[:-4]
-                                    if num_part.isdigit():
-                                        potential_num = int(num_part)
-                                        shortcut_file_path = os.path.join(self.shortcut_path, f_name)
-                                        try:
-                                            shortcut_obj = shell.CreateShortCut(shortcut_file_path)
-                                            shortcut_args_str = shortcut_obj.Arguments
-                                            shortcut_match_ud_dir = USER_DATA_DIR_PATTERN.search(shortcut_args_str)
-                                            if shortcut_match_ud_dir:
-                                                raw_shortcut_udd = shortcut_match_ud_dir.group('path') or shortcut_match_ud_dir.group('path_unquoted')
-                                                if raw_shortcut_udd:
-                                                    normalized_shortcut_udd = os.path.normpath(raw_shortcut_udd.strip())
-                                                    if normalized_shortcut_udd == actual_user_data_dir:
-                                                        profile_number = potential_num
-                                                        if hasattr(self, 'logger'):
-                                                            self.logger.info(f"    策略4: PID {pid} shortcut '{f_name}' -> num {profile_number} (UDD: {actual_user_data_dir})")
-                                                        break 
-                                        except Exception: pass 
-                        except Exception: pass
-                    
-                    if profile_number is not None:
-                        is_likely_main_process = True
-                        for arg in cmdline_list: 
-                            if arg.startswith("--type="):
-                                if arg.split("=")[1].lower() in ["renderer", "gpu-process", "utility", "crashpad-handler", "broker", "service", "extension", "ppapi", "plugin"]:
-                                    is_likely_main_process = False
-                                    break
-                    
-                        current_candidate = profile_candidate_pids.get(profile_number)
-                        should_update_candidate = False
-
-                        if current_candidate is None: 
-                            should_update_candidate = True
-                        elif is_likely_main_process and not current_candidate.get('is_likely_main', False):
-                            should_update_candidate = True
-
-                        if should_update_candidate:
-                            profile_candidate_pids[profile_number] = {
-                                'pid': pid,
-                                'user_data_dir': actual_user_data_dir,
-                                'is_likely_main': is_likely_main_process,
-                            }
-                            if hasattr(self, 'logger'):
-                                self.logger.info(f"更新候选: PID {pid} (主: {is_likely_main_process}) 成为编号 {profile_number} 的候选。旧候选主: {current_candidate.get('is_likely_main') if current_candidate else 'N/A'}.")
-                
-                except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-                    continue
-                except AttributeError as e_attr: 
-                    if hasattr(self, 'logger') and proc: 
-                        self.logger.debug(f"AttributeError accessing proc.info for PID (likely already exited): {proc.pid if hasattr(proc, 'pid') else 'Unknown PID'}. Error: {e_attr}")
-                    continue
-                except Exception as e_inner_loop: 
-                    if hasattr(self, 'logger'): self.logger.error(f"psutil循环内部异常 (PID: {pid if 'pid' in locals() else 'Unknown'}): {e_inner_loop}", exc_info=True)
-                    else: print(f"ERROR: psutil循环内部异常 (PID: {pid if 'pid' in locals() else 'Unknown'}): {e_inner_loop}")
-                    continue 
-
+            snapshot = self.process_index.snapshot()
         except Exception as e_outer_psutil: 
-            if hasattr(self, 'logger'): self.logger.critical(f"psutil.process_iter 遍历时发生严重错误: {e_outer_psutil}", exc_info=True)
-            else: print(f"CRITICAL: psutil.process_iter 遍历时发生严重错误: {e_outer_psutil}")
+            if hasattr(self, 'logger'): self.logger.critical(f"读取进程索引时发生严重错误: {e_outer_psutil}", exc_info=True)
+            else: print(f"CRITICAL: 读取进程索引时发生严重错误: {e_outer_psutil}")
             return []
+        processed_proc_count = snapshot.scanned_count
+
+        # 每个用户数据目录的主进程由进程树确定（子树的根），与进程枚举顺序无关；
+        # 索引记录中仍无编号的用户数据目录（例如快捷方式目录是在扫描之后才设置的）会再解析一次
+        for profile_number, proc in browser_candidates(snapshot, self.profile_resolver).items():
+            profile_candidate_pids[profile_number] = {
+                'pid': proc.pid,
+                'user_data_dir': proc.user_data_dir,
+                'is_likely_main': True,
+            }
+            if hasattr(self, 'logger'):
+                self.logger.info(f"候选: PID {proc.pid} (进程树根, 子进程 {snapshot.child_count(proc.user_data_dir)} 个) 为编号 {profile_number} 的主进程。")
 
 
         if hasattr(self, 'logger'): 
-            self.logger.info(f"psutil.process_iter 遍历完成，共检查 {processed_proc_count} 个进程。")
+            self.logger.info(f"进程索引读取完成，本次快照共检查 {processed_proc_count} 个进程。")
             self.logger.info("所有候选PID处理完成。最终候选者列表 (profile_candidate_pids):")
             if not profile_candidate_pids: self.logger.warning("  profile_candidate_pids 为空!")
             for pn, cand_info in profile_candidate_pids.items():
                 self.logger.info(f"  编号 {pn}: PID={cand_info['pid']}, 主进程标志={cand_info['is_likely_main']}")
         else:
-            print(f"INFO: psutil.process_iter 遍历完成，共检查 {processed_proc_count} 个进程。")
+            print(f"INFO: 进程索引读取完成，本次快照共检查 {processed_proc_count} 个进程。")
             print("INFO: 所有候选PID处理完成。最终候选者列表 (profile_candidate_pids):")
             if not profile_candidate_pids: print("WARNING:   profile_candidate_pids 为空!")
             for pn, cand_info in profile_candidate_pids.items():
@@ -535,7 +581,7 @@ class ChromeManager:
                             self.logger.debug(f"编号 {num} 的候选PID {pid} 不是主进程，且该编号无现有记录。跳过初步添加。")
                          continue
                 
-                expected_cdp_port = self.settings.get("BASE_DEBUG_PORT", 9222) + num
+                expected_cdp_port = self.port_allocator.port_for(num)
                 user_data_dir_cand = candidate_info.get('user_data_dir') 
 
                 if num not in self.windows:
@@ -563,6 +609,7 @@ class ChromeManager:
                     self.windows[num]['status'] = 'reconfirmed_by_pid'
 
                 self.debug_ports[num] = expected_cdp_port
+                self.watch_tabs(expected_cdp_port, user_data_dir_cand)
                 for p_iter, n_map_iter in list(self.pid_to_number.items()): 
                     if n_map_iter == num and p_iter != pid:
                         if hasattr(self, 'logger'): self.logger.debug(f"  清理旧 pid_to_number: del self.pid_to_number[{p_iter}] (原指向编号 {n_map_iter})")
@@ -681,6 +728,8 @@ class ChromeManager:
                     if hasattr(self, 'logger'):
                         self.logger.warning(f"  PID Mismatch for number {num}: psutil_pid={self.windows[num].get('pid')}, hwnd_pid={details.get('pid')}. Consider updating or trust hwnd_pid.")
                 self.windows[num]['status'] = 'imported_with_hwnd'
+                if self.fleet_registry:
+                    self.fleet_registry.set_hwnd(num, details['hwnd'])
                 if hasattr(self, 'logger'):
                     self.logger.info(f"  编号 {num}: HWND={details['hwnd']}, Title='{details['title'][:50]}' 已关联.")
             else:
@@ -743,11 +792,32 @@ class ChromeManager:
             if self.is_syncing:
                 self.stop_sync()
             
+            # 窗口句柄 → 浏览器主进程，交给关闭引擎并行处理
+            snapshot = self.process_index.snapshot(force=True)
+            targets = {}
             for hwnd in window_handles:
                 try:
-                    win32gui.PostMessage(hwnd, win32con.WM_CLOSE, 0, 0)
+                    _, pid = win32process.GetWindowThreadProcessId(hwnd)
                 except Exception as e:
-                    log_error(f"关闭窗口失败: {hwnd}", e)
+                    log_error(f"获取窗口进程失败: {hwnd}", e)
+                    continue
+                number = self.pid_to_number.get(pid)
+                proc = snapshot.get(pid)
+                if number is None and proc is not None:
+                    number = proc.number
+                if number is not None and snapshot.browser_pid(number) is not None:
+                    pid = snapshot.browser_pid(number)
+                    proc = snapshot.get(pid)
+                if pid in targets:
+                    continue
+                port = debug_port_from_cmdline(proc.cmdline) if proc else None
+                if port is None and number is not None:
+                    port = self.debug_ports.get(number)
+                targets[pid] = ShutdownTarget(pid=pid, number=number, debug_port=port)
+            
+            if targets:
+                threading.Thread(target=self._shutdown_targets, args=(list(targets.values()),),
+                                 daemon=True).start()
             
             return True
         
@@ -755,6 +825,19 @@ class ChromeManager:
             log_error("关闭窗口失败", e)
             return False
     
+    def _shutdown_targets(self, targets: List[ShutdownTarget]):
+        """后台线程中执行批量关闭并记录每个分身的耗时"""
+        try:
+            report = ShutdownEngine().shutdown(targets)
+            self.process_index.invalidate()
+            print(f"关闭完成: {report.summary()}")
+            for line in format_timings(report):
+                print(f"  {line}")
+            for result in report.failed():
+                log_error(f"未能关闭进程: {result.pid} (分身 {result.number})")
+        except Exception as e:
+            log_error("批量关闭窗口失败", e)
+    
     def batch_open_urls(self, url: str, numbers_str: str) -> bool:
         try:
             if not url.startswith(("http://", "https://")):
@@ -769,56 +852,61 @@ class ChromeManager:
             if not chrome_path:
                 return False
             
-            if not hasattr(self, "shell") or self.shell is None:
-                self.shell = win32com.client.Dispatch("WScript.Shell")
+            catalog = get_shortcut_catalog(self.shortcut_path)
+            scheduler = self.create_launch_scheduler()
+            tracker = get_readiness_tracker()
+            snapshot = get_process_index().snapshot()
             
-            success_count = 0
+            targets = []
+            shortcut_infos = {}
             for window_num in window_numbers:
-                try:
-                    shortcut_path = os.path.join(self.shortcut_path, f"{window_num}.lnk")
-                    
-                    if not os.path.exists(shortcut_path):
+                shortcut_info = catalog.get_number(window_num)
+                
+                if shortcut_info is None:
+                    continue
+                
+                if "--user-data-dir=" in shortcut_info.arguments:
+                    user_data_dir = shortcut_info.user_data_dir
+                    if not user_data_dir:
                         continue
-                    
-                    try:
-                        shortcut_obj = self.shell.CreateShortCut(shortcut_path)
-                        cmd_line = shortcut_obj.Arguments
-                        
-                        if "--user-data-dir=" in cmd_line:
-                            user_data_dir = re.search(
-                                r'--user-data-dir="?([^"]+)"?', cmd_line
-                            )
-                            if user_data_dir:
-                                user_data_dir = user_data_dir.group(1)
-                            else:
-                                continue
-                        else:
-                            user_data_dir = os.path.join(
-                                self.cache_dir, str(window_num)
-                            )
-                            if not os.path.exists(user_data_dir):
-                                continue
-                    except Exception as e:
+                else:
+                    user_data_dir = os.path.join(
+                        self.cache_dir, str(window_num)
+                    )
+                    if not os.path.exists(user_data_dir):
                         continue
-                    
-                    cmd_list = [
-                        chrome_path,
-                        f"--user-data-dir={user_data_dir}",
-                    ]
-                    
-                    debug_port = 9222 + window_num
-                    cmd_list.insert(1, f"--remote-debugging-port={debug_port}")
-                    
-                    cmd_list.append(url)
-                    
-                    subprocess.Popen(cmd_list)
-                    
-                    success_count += 1
-                    
-                    time.sleep(0.1)
-                    
-                except Exception as e:
-                    log_error(f"打开URL失败 (窗口 {window_num}): {str(e)}")
+                
+                # 已运行的分身使用其命令行中的调试端口新建标签页
+                debug_port = None
+                browser_pid = snapshot.browser_pid(window_num)
+                if browser_pid is not None:
+                    debug_port = debug_port_from_cmdline(snapshot.get(browser_pid).cmdline)
+                targets.append(UrlTarget(window_num, user_data_dir, chrome_path, debug_port))
+                shortcut_infos[window_num] = shortcut_info
+            
+            def launch_with_url(target: UrlTarget, target_url: str):
+                """未运行或没有调试端口的分身：按快捷方式启动并附加网址（已运行时由同目录实例接收网址）"""
+                debug_port = self.port_allocator.prepare_launch(target.number, target.user_data_dir)
+                spec = build_launch_spec(shortcut_infos[target.number], target.number, debug_port=debug_port)
+                args = list(spec.args)
+                if not spec.user_data_dir:
+                    # 快捷方式不带 --user-data-dir 的分身使用缓存目录下的用户数据
+                    args.append(f"--user-data-dir={target.user_data_dir}")
+                spec = spec._replace(args=args + [target_url], user_data_dir=target.user_data_dir)
+                scheduler.admit(target.number)
+                try:
+                    launched = spawn(spec, self.fleet_registry)
+                except Exception:
+                    scheduler.mark_failed(target.number)
+                    raise
+                tracker.track(target.number, launched.pid, debug_port,
+                              callback=lambda timing: scheduler.mark_ready(timing.number))
+            
+            report = open_url(targets, url, fallback=launch_with_url)
+            print(f"批量打开网页: {report.summary()}")
+            for result in report.failed():
+                log_error(f"打开URL失败 (窗口 {result.target.number}): {result.error}")
+            success_count = len(report.succeeded())
             
             return success_count > 0
         
@@ -864,7 +952,20 @@ class ChromeManager:
             log_error("停止同步失败", e)
             return False
     
-    def apply_icons_to_chrome_windows(self, pid_to_number: Dict[int, int]):
+    def apply_icons_to_chrome_windows(self, pid_to_number: Dict[int, int], progress_callback=None, wait: bool = False):
+        """为分身窗口与快捷方式应用编号图标
+
+        Args:
+            progress_callback: 每完成一步调用 (百分比, 说明)，在执行线程中调用
+            wait: True 时在当前线程同步执行（供后台线程调用），否则延后异步执行
+        """
+        def report(percent, text):
+            if progress_callback:
+                try:
+                    progress_callback(percent, text)
+                except Exception as e:
+                    log_error("图标进度回调失败", e)
+        
         is_auto_modify_shortcut = hasattr(self, "auto_modify_shortcut_icon") and self.auto_modify_shortcut_icon
         
         hwnd_map = {}
@@ -908,18 +1009,20 @@ class ChromeManager:
             if not self.shortcut_path or not os.path.exists(self.shortcut_path):
                 return
             
+            catalog = get_shortcut_catalog(self.shortcut_path)
             try:
                 for number, icon_path in icon_paths.items():
-                    shortcut_path = os.path.join(self.shortcut_path, f"{number}.lnk")
-                    if os.path.exists(shortcut_path):
-                        try:
-                            shortcut = self.shell.CreateShortCut(shortcut_path)
-                            current_icon = shortcut.IconLocation
-                            if icon_path not in current_icon:
-                                shortcut.IconLocation = icon_path
-                                shortcut.save()
-                        except Exception as e:
-                            log_error(f"为快捷方式 {number} 设置图标失败: {str(e)}")
+                    shortcut_info = catalog.get_number(number)
+                    # 图标已经是目标图标时不需要创建COM对象
+                    if shortcut_info is None or icon_path in shortcut_info.icon_location:
+                        continue
+                    try:
+                        shortcut = self.shell.CreateShortCut(shortcut_info.path)
+                        shortcut.IconLocation = icon_path
+                        shortcut.save()
+                        catalog.invalidate(shortcut_info.path)
+                    except Exception as e:
+                        log_error(f"为快捷方式 {number} 设置图标失败: {str(e)}")
             except Exception as e:
                 log_error("更新快捷方式图标失败", e)
         
@@ -948,14 +1051,19 @@ class ChromeManager:
         find_chrome_windows()
         
         if not hwnd_map:
+            report(100, "没有找到需要替换图标的窗口")
             return
         
         def execute_icon_process():
+            report(25, "正在生成图标...")
             generate_all_icons()
             
+            report(50, "正在更新快捷方式图标..." if is_auto_modify_shortcut else "已跳过快捷方式图标更新...")
             update_shortcut_icons()
             
+            report(75, "正在替换任务栏图标...")
             set_all_window_icons()
+            report(100, "图标替换完成!")
             
             if hasattr(self, "perform_medium_cleanup"):
                 if hasattr(self, "ui_manager") and self.ui_manager:
@@ -963,7 +1071,9 @@ class ChromeManager:
                 else:
                     threading.Timer(0.5, self.perform_medium_cleanup).start()
         
-        if hasattr(self, "ui_manager") and self.ui_manager and hasattr(self.ui_manager, "root"):
+        if wait:
+            execute_icon_process()
+        elif hasattr(self, "ui_manager") and self.ui_manager and hasattr(self.ui_manager, "root"):
             self.ui_manager.root.after(100, execute_icon_process)
         else:
             threading.Timer(0.1, execute_icon_process).start()
@@ -1156,7 +1266,7 @@ class ChromeManager:
             log_error(f"CORE: Overall failure in reset_master_window for HWND {hwnd}: {e}")
             return False
     
-    def create_environments(self, numbers_str: str) -> bool:
+    def create_environments(self, numbers_str: str, template_dir: str = "") -> bool:
         try:
             cache_dir = self.cache_dir
             shortcut_dir = self.shortcut_path
@@ -1180,37 +1290,18 @@ class ChromeManager:
             except Exception as e:
                 return False
 
-            shell = win32com.client.Dispatch("WScript.Shell")
-
             window_numbers = parse_window_numbers(numbers_str)
             
             if not window_numbers:
                 return False
 
-            created_count = 0
-            for i in window_numbers:
-                data_dir_name = str(i)
-                data_dir = os.path.join(cache_dir, data_dir_name)
-                data_dir = data_dir.replace("\\", "/")
-
-                os.makedirs(data_dir, exist_ok=True)
+            report = create_profiles(chrome_path, shortcut_dir, cache_dir, window_numbers,
+                                     forward_slashes=True, template_dir=template_dir)
+            print(f"创建环境: {report.summary()}")
+            for number, error in sorted(report.failed.items()):
+                log_error(f"创建环境 {number} 失败", error)
 
-                shortcut_path = os.path.join(shortcut_dir, f"{i}.lnk")
-                shortcut = shell.CreateShortCut(shortcut_path)
-                shortcut.TargetPath = chrome_path
-                shortcut.Arguments = (
-                    f'--user-data-dir="{data_dir}"'
-                )
-                shortcut.WorkingDirectory = os.path.dirname(chrome_path)
-                shortcut.WindowStyle = 1
-                shortcut.IconLocation = f"{chrome_path},0"
-                shortcut.save()
-                created_count += 1
-
-            if created_count > 0:
-                return True
-            else:
-                return False
+            return report.completed > 0
 
         except Exception as e:
             return False
@@ -1269,6 +1360,44 @@ class ChromeManager:
         except Exception as e:
             return ""
     
+    def watch_tabs(self, port: int, user_data_dir: Optional[str] = None):
+        """保持分身的 DevTools 会话并订阅目标事件，标签页清单随事件实时更新"""
+        try:
+            self.session_pool.client.submit(self.tab_inventory.watch(port, user_data_dir))
+        except Exception as e:
+            log_error(f"关注端口 {port} 的标签页失败", e)
+    
+    def tab_status(self, number: int) -> str:
+        """分身标签页数量（读取事件维护的清单，不发起请求）；清单过期时附加标记"""
+        port = self.debug_ports.get(number)
+        tabs = self.tab_inventory.snapshot(port) if port else None
+        return tabs.describe() if tabs else ""
+    
+    def _submit_tab_operation(self, operation, ports: Dict[int, int], label: str):
+        """在共享 DevTools 客户端的事件循环中对所有分身并发执行标签页操作，不阻塞调用线程"""
+        client = self.session_pool.client
+        started = time.perf_counter()
+        
+        def on_done(future):
+            try:
+                results = future.result()
+            except Exception as e:
+                log_error(f"{label}失败", e)
+                return
+            for result in results:
+                if result.error:
+                    log_error(f"{label}: 窗口{result.number}出错: {result.error}")
+            closed = sum(r.closed for r in results)
+            print(f"{label}: {len(results)} 个窗口，关闭 {closed} 个标签页，"
+                  f"用时 {time.perf_counter() - started:.2f}s")
+        
+        # 连接前确认端口属于对应分身，其他程序占用的端口不发送任何命令
+        user_data_dirs = {
+            num: self.windows[num].get('user_data_dir')
+            for num in ports if num in self.windows
+        }
+        client.submit(run_for_ports(operation, ports, self.session_pool, user_data_dirs)).add_done_callback(on_done)
+    
     def keep_only_current_tab(self, window_items) -> bool:
         try:
             selected = []
@@ -1284,88 +1413,15 @@ class ChromeManager:
             if not hasattr(self, "debug_ports") or not self.debug_ports:
                 log_error("未找到调试端口映射，尝试重建...")
                 self.debug_ports = {
-                    window_num: 9222 + window_num for window_num, _ in selected
+                    window_num: self.port_allocator.port_for(window_num) for window_num, _ in selected
                 }
             
-            import requests
-            import concurrent.futures
-            
-            def process_tabs():
-                try:
-                    import traceback
-                    
-                    port_to_tabs = {}
-                    
-                    def get_tabs(window_data):
-                        window_num, _ = window_data
-                        if window_num in self.debug_ports:
-                            port = self.debug_ports[window_num]
-                            try:
-                                response = requests.get(
-                                    f"http://localhost:{port}/json", timeout=0.5
-                                )
-                                if response.status_code == 200:
-                                    tabs = response.json()
-                                    page_tabs = [
-                                        tab for tab in tabs if tab.get("type") == "page"
-                                    ]
-                                    if len(page_tabs) > 1:
-                                        return port, page_tabs, window_num
-                            except Exception as e:
-                                log_error(f"获取窗口{window_num}的标签页失败: {str(e)}")
-                        return None
-                    
-                    with concurrent.futures.ThreadPoolExecutor(max_workers=20) as executor:
-                        futures = []
-                        for window_data in selected:
-                            futures.append(executor.submit(get_tabs, window_data))
-                        
-                        for future in concurrent.futures.as_completed(futures):
-                            result = future.result()
-                            if result:
-                                port, tabs, window_num = result
-                                port_to_tabs[port] = (tabs, window_num)
-                    
-                    if not port_to_tabs:
-                        return
-                    
-                    close_requests = []
-                    
-                    for port, (tabs, window_num) in port_to_tabs.items():
-                        keep_tab = tabs[0]
-                        to_close = []
-                        for tab in tabs:
-                            if tab.get("id") != keep_tab.get("id"):
-                                to_close.append((port, tab.get("id")))
-                        close_requests.extend(to_close)
-                    
-                    def close_tab(request):
-                        port, tab_id = request
-                        try:
-                            requests.get(
-                                f"http://localhost:{port}/json/close/{tab_id}", timeout=0.5
-                            )
-                            return True
-                        except Exception as e:
-                            log_error(f"关闭标签页失败: {str(e)}")
-                            return False
-                    
-                    with concurrent.futures.ThreadPoolExecutor(max_workers=30) as executor:
-                        futures = [
-                            executor.submit(close_tab, req) for req in close_requests
-                        ]
-                        for future in concurrent.futures.as_completed(futures):
-                            future.result()
-                
-                except Exception as e:
-                    log_error(f"处理标签页时出错: {str(e)}")
-                    traceback.print_exc()
-                    return False
-                
-                return True
-            
-            thread = threading.Thread(target=process_tabs, daemon=True)
-            thread.start()
+            ports = {
+                window_num: self.debug_ports[window_num]
+                for window_num, _ in selected
+                if window_num in self.debug_ports
+            }
+            self._submit_tab_operation(keep_only_current, ports, "仅保留当前标签页")
             return True
             
         except Exception as e:
@@ -1387,113 +1443,15 @@ class ChromeManager:
             if not hasattr(self, "debug_ports") or not self.debug_ports:
                 log_error("未找到调试端口映射，尝试重建...")
                 self.debug_ports = {
-                    window_num: 9222 + window_num for window_num, _ in selected
+                    window_num: self.port_allocator.port_for(window_num) for window_num, _ in selected
                 }
             
-            import requests
-            import concurrent.futures
-            
-            def process_tabs():
-                try:
-                    import traceback
-                    
-                    window_tabs = {}
-                    
-                    def get_tabs(window_data):
-                        window_num, _ = window_data
-                        if window_num in self.debug_ports:
-                            port = self.debug_ports[window_num]
-                            try:
-                                response = requests.get(
-                                    f"http://localhost:{port}/json", timeout=0.5
-                                )
-                                if response.status_code == 200:
-                                    tabs = response.json()
-                                    page_tabs = [
-                                        tab.get("id")
-                                        for tab in tabs
-                                        if tab.get("type") == "page"
-                                    ]
-                                    if page_tabs:
-                                        return port, page_tabs, window_num
-                            except Exception as e:
-                                log_error(f"获取窗口{window_num}的标签页失败: {str(e)}")
-                        return None
-                    
-                    valid_ports = []
-                    with concurrent.futures.ThreadPoolExecutor(max_workers=20) as executor:
-                        futures = []
-                        for window_data in selected:
-                            futures.append(executor.submit(get_tabs, window_data))
-                        
-                        for future in concurrent.futures.as_completed(futures):
-                            result = future.result()
-                            if result:
-                                port, tabs, window_num = result
-                                window_tabs[port] = (tabs, window_num)
-                                valid_ports.append(port)
-                    
-                    if not valid_ports:
-                        return
-                    
-                    created_tabs = {}
-                    
-                    def create_new_tab(port_data):
-                        port, window_num = port_data
-                        try:
-                            requests.put(
-                                f"http://localhost:{port}/json/new?chrome://newtab/",
-                                timeout=0.5,
-                            )
-                            return port, window_num, True
-                        except Exception as e:
-                            log_error(f"为窗口 {window_num} 创建新标签页失败: {str(e)}")
-                            return port, window_num, False
-                    
-                    port_to_window = {
-                        port: window_num for port, (_, window_num) in window_tabs.items()
-                    }
-                    with concurrent.futures.ThreadPoolExecutor(max_workers=20) as executor:
-                        futures = [
-                            executor.submit(create_new_tab, (port, port_to_window[port]))
-                            for port in valid_ports
-                        ]
-                        for future in concurrent.futures.as_completed(futures):
-                            port, window_num, success = future.result()
-                            if success:
-                                created_tabs[window_num] = port
-                    
-                    def close_old_tabs(port_data):
-                        port, tabs, window_num = port_data
-                        for tab_id in tabs:
-                            try:
-                                requests.get(
-                                    f"http://localhost:{port}/json/close/{tab_id}",
-                                    timeout=0.5,
-                                )
-                            except Exception as e:
-                                log_error(f"关闭窗口 {window_num} 的标签页失败: {str(e)}")
-                    
-                    with concurrent.futures.ThreadPoolExecutor(max_workers=20) as executor:
-                        futures = []
-                        for window_num, port in created_tabs.items():
-                            tabs, _ = window_tabs[port]
-                            futures.append(
-                                executor.submit(close_old_tabs, (port, tabs, window_num))
-                            )
-                        
-                        for future in concurrent.futures.as_completed(futures):
-                            future.result()
-                    
-                    return True
-                    
-                except Exception as e:
-                    log_error(f"处理标签页时出错: {str(e)}")
-                    traceback.print_exc()
-                    return False
-            
-            thread = threading.Thread(target=process_tabs, daemon=True)
-            thread.start()
+            ports = {
+                window_num: self.debug_ports[window_num]
+                for window_num, _ in selected
+                if window_num in self.debug_ports
+            }
+            self._submit_tab_operation(keep_only_new, ports, "仅保留新标签页")
             return True
             
         except Exception as e:
@@ -2184,19 +2142,23 @@ class ChromeManager:
             return False
 
     def is_profile_running(self, profile_number: int) -> bool:
-        """检查具有给定编号的配置文件当前是否被认为正在运行 (基于 self.windows)。"""
+        """检查具有给定编号的配置文件当前是否被认为正在运行 (窗口句柄、监视器状态、PID、运行记录依次判断)。"""
         # self.windows 的键是 profile_number (int)
-        win_info = self.windows.get(profile_number)
-        if win_info and win_info.get('hwnd_debug'): # 或者 win_info.get('pid') 存在且psutil.pid_exists
-            # 更严格的检查可以是hwnd_debug存在且有效
+        win_info = self.windows.get(profile_number) or {}
+        if win_info.get('hwnd_debug'):
             try:
                 if win32gui.IsWindow(win_info['hwnd_debug']):
                     return True
-            except: # win32gui.IsWindow 可能会在句柄无效时抛出pywintypes.error
-                return False
-        elif win_info and win_info.get('pid') and psutil.pid_exists(win_info.get('pid')):
+            except Exception: # win32gui.IsWindow 可能会在句柄无效时抛出pywintypes.error
+                pass
+        # 监视器运行时先读取其维护的状态，不逐个探测PID
+        if self.process_watcher.is_alive() and self.process_watcher.is_running(profile_number):
+            return True
+        if win_info.get('pid') and psutil.pid_exists(win_info['pid']):
             return True # 如果只有PID，也认为它在某种程度上是"活动的"
-        return False
+        # 刚启动、监视器还没轮询到（或还没解析出PID）的分身只在运行记录中，不能当作未运行而重复启动
+        entry = self.fleet_registry.get(profile_number) if self.fleet_registry else None
+        return entry is not None and FleetRegistry.is_alive(entry)
 
     def get_valid_profiles_for_sequential_launch(self, numbers_range_str: str) -> List[int]:
         """
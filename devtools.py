@@ -0,0 +1,30 @@
+"""
+Chrome DevTools 协议的公共定义 - 调试端口默认值、错误类型与命令行解析
+
+核心设计思想：
+- 不含网络代码：HTTP 端点由 cdp_client 的共享事件循环访问，浏览器级命令经 cdp_session 的持久会话发送，
+  所有模块共用这里的错误类型与默认值
+- 只依赖标准库，可以在任何线程、任何平台上导入
+"""
+
+import re
+from typing import List, Optional, Union
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_TIMEOUT = 2.0
+
+REMOTE_DEBUGGING_PORT_PATTERN = re.compile(r'--remote-debugging-port=(\d+)')
+
+
+class DevToolsError(Exception):
+    """调试端口不可用或协议交互失败"""
+
+
+def debug_port_from_cmdline(cmdline: Union[str, List[str]]) -> Optional[int]:
+    """从命令行中读取 --remote-debugging-port"""
+    cmdline_str = cmdline if isinstance(cmdline, str) else " ".join(cmdline)
+    match = REMOTE_DEBUGGING_PORT_PATTERN.search(cmdline_str)
+    if match:
+        port = int(match.group(1))
+        return port if port > 0 else None
+    return None
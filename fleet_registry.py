@@ -0,0 +1,181 @@
+"""
+分身运行记录 - 把 分身编号 → 进程 → 调试端口 → 窗口 持久化到本地 SQLite
+
+核心设计思想：
+- 事件写入：订阅进程监视器，分身启动/退出时各写一条记录，不再依赖全量扫描重建状态
+- 廉价校验：重启后只用 (pid, 创建时间) 判断记录的进程是否仍是原来那个，PID复用不会误判
+- 单一来源：launched_numbers、windows/pid_to_number/debug_ports 都可以从这里恢复
+- 线程安全：监视线程写入、界面线程读取共用一个连接，由锁串行化
+"""
+
+import time
+import sqlite3
+import threading
+import logging
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import psutil
+
+from config import FLEET_DB_FILE
+from devtools import debug_port_from_cmdline
+from process_watcher import ProfileStarted
+
+# 创建时间比较容差（秒）：psutil 在不同调用间返回的浮点值可能有微小差异
+CREATE_TIME_TOLERANCE = 0.01
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS profiles (
+    number INTEGER PRIMARY KEY,
+    pid INTEGER NOT NULL,
+    create_time REAL NOT NULL,
+    user_data_dir TEXT,
+    debug_port INTEGER,
+    hwnd INTEGER,
+    updated_at REAL NOT NULL
+)
+"""
+
+
+class FleetEntry(NamedTuple):
+    """一个正在运行的分身的记录"""
+    number: int
+    pid: int  # 浏览器主进程PID
+    create_time: float  # 主进程创建时间，与 pid 一起唯一确定进程
+    user_data_dir: Optional[str]
+    debug_port: Optional[int]
+    hwnd: Optional[int]  # 最近一次关联到的主窗口句柄
+    updated_at: float
+
+
+class FleetRegistry:
+    """分身运行记录（SQLite，WAL 模式）"""
+
+    def __init__(self, path: str = FLEET_DB_FILE):
+        self.path = path
+        self.logger = logging.getLogger('FleetRegistry')
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        try:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        except sqlite3.DatabaseError as e:
+            self.logger.debug(f"设置数据库参数失败: {e}")
+        self._conn.execute(_SCHEMA)
+
+    # ---- 写入 ----
+
+    def record_launch(self, number: int, pid: int, create_time: Optional[float] = None,
+                      user_data_dir: Optional[str] = None, debug_port: Optional[int] = None,
+                      hwnd: Optional[int] = None) -> Optional[FleetEntry]:
+        """记录分身的浏览器主进程；未提供的创建时间与调试端口从进程本身读取
+
+        Returns:
+            写入的记录；进程已经退出时返回 None
+        """
+        if create_time is None or debug_port is None:
+            try:
+                proc = psutil.Process(pid)
+                if create_time is None:
+                    create_time = proc.create_time()
+                if debug_port is None:
+                    debug_port = debug_port_from_cmdline(proc.cmdline())
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                if create_time is None:
+                    return None
+
+        entry = FleetEntry(number, pid, create_time, user_data_dir, debug_port, hwnd, time.time())
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO profiles VALUES (?, ?, ?, ?, ?, ?, ?)", entry)
+        return entry
+
+    def record_exit(self, number: int, pid: Optional[int] = None):
+        """删除分身记录；指定 pid 时只在记录的仍是该进程时删除"""
+        with self._lock:
+            if pid is None:
+                self._conn.execute("DELETE FROM profiles WHERE number = ?", (number,))
+            else:
+                self._conn.execute("DELETE FROM profiles WHERE number = ? AND pid = ?", (number, pid))
+
+    def set_hwnd(self, number: int, hwnd: Optional[int]):
+        with self._lock:
+            self._conn.execute("UPDATE profiles SET hwnd = ?, updated_at = ? WHERE number = ?",
+                               (hwnd, time.time(), number))
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM profiles")
+
+    def on_profile_event(self, event: Any):
+        """进程监视器回调：启动写入、退出删除"""
+        try:
+            if isinstance(event, ProfileStarted):
+                self.record_launch(event.number, event.pid, user_data_dir=event.user_data_dir)
+            else:
+                self.record_exit(event.number)
+        except sqlite3.Error as e:
+            self.logger.error(f"写入分身运行记录失败: {event} - {e}")
+
+    # ---- 读取 ----
+
+    def get(self, number: int) -> Optional[FleetEntry]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM profiles WHERE number = ?", (number,)).fetchone()
+        return FleetEntry(*row) if row else None
+
+    def entries(self) -> List[FleetEntry]:
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM profiles ORDER BY number").fetchall()
+        return [FleetEntry(*row) for row in rows]
+
+    def debug_ports(self) -> Dict[int, int]:
+        return {e.number: e.debug_port for e in self.entries() if e.debug_port}
+
+    def verify(self) -> List[FleetEntry]:
+        """校验所有记录，删除进程已退出或PID已被复用的条目，返回仍然有效的记录
+
+        每条记录只需一次 OpenProcess 读取创建时间，不枚举系统进程。
+        """
+        alive = []
+        stale = []
+        for entry in self.entries():
+            if self.is_alive(entry):
+                alive.append(entry)
+            else:
+                stale.append((entry.number, entry.pid))
+        if stale:
+            with self._lock:
+                self._conn.executemany("DELETE FROM profiles WHERE number = ? AND pid = ?", stale)
+            self.logger.info(f"移除 {len(stale)} 条已失效的分身运行记录")
+        return alive
+
+    @staticmethod
+    def is_alive(entry: FleetEntry) -> bool:
+        """记录的进程是否仍在运行（PID被复用时创建时间不同）"""
+        try:
+            return abs(psutil.Process(entry.pid).create_time() - entry.create_time) <= CREATE_TIME_TOLERANCE
+        except (psutil.NoSuchProcess, psutil.ZombieProcess):
+            return False
+        except psutil.AccessDenied:
+            # 无法读取创建时间时只能按PID存在与否判断
+            return psutil.pid_exists(entry.pid)
+
+    def close(self):
+        with self._lock:
+            try:
+                self._conn.close()
+            except sqlite3.Error:
+                pass
+
+
+_shared_registry: Optional[FleetRegistry] = None
+_shared_registry_lock = threading.Lock()
+
+
+def get_fleet_registry() -> FleetRegistry:
+    """获取进程内共享的运行记录实例"""
+    global _shared_registry
+    with _shared_registry_lock:
+        if _shared_registry is None:
+            _shared_registry = FleetRegistry()
+        return _shared_registry
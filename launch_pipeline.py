@@ -0,0 +1,357 @@
+"""
+分身启动流水线 - 解析、启动、就绪、图标、排列五个阶段重叠执行
+
+核心设计思想：
+- 阶段重叠：分身 K 在应用图标、摆放窗口时，K+1 正在启动，K+2 正在解析快捷方式
+- 有界队列：每个阶段一个有界输入队列，下游处理不过来时上游自然停下（背压）
+- 独立并发：每个阶段有自己的工作线程数，等待型阶段（就绪）多线程，有顺序要求的阶段（启动、排列）单线程
+- 错误隔离：某个分身在某阶段失败只让它提前离开流水线，不影响其他分身
+- 总耗时≈最慢阶段：各阶段的累计耗时与线程数一并报告，便于找出瓶颈
+"""
+
+import math
+import time
+import queue
+import threading
+import logging
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from spawner import LaunchSpec, SpawnError, spawn
+
+try:
+    import win32api
+    import win32con
+    import win32gui
+except ImportError:  # 非Windows环境下不摆放窗口
+    win32api = None
+    win32con = None
+    win32gui = None
+
+DEFAULT_QUEUE_SIZE = 16
+DEFAULT_RESOLVE_WORKERS = 2
+DEFAULT_ICON_WORKERS = 2
+# 无法读取屏幕工作区时使用的默认区域 (left, top, right, bottom)
+DEFAULT_WORK_AREA = (0, 0, 1920, 1080)
+
+# 标准阶段名称
+STAGE_RESOLVE = "resolve"
+STAGE_SPAWN = "spawn"
+STAGE_READY = "ready"
+STAGE_ICON = "icon"
+STAGE_ARRANGE = "arrange"
+
+_STOP = object()
+
+
+class Stage(NamedTuple):
+    """流水线的一个阶段
+
+    func(item) 就地更新 LaunchItem；抛出异常表示该分身在此阶段失败，不再进入后续阶段
+    """
+    name: str
+    func: Callable[["LaunchItem"], None]
+    workers: int = 1
+    queue_size: int = DEFAULT_QUEUE_SIZE
+
+
+class LaunchItem:
+    """流水线中的一个分身，各阶段依次填写"""
+    __slots__ = ("number", "index", "spec", "launched", "spawned_at", "timing", "icon_path",
+                 "icon_applied", "hwnd", "rect", "error", "failed_stage", "stage_times")
+
+    def __init__(self, number: int, index: int):
+        self.number = number
+        self.index = index  # 在本批中的序号，决定平铺位置
+        self.spec: Optional[LaunchSpec] = None
+        self.launched = None  # spawner.LaunchedProfile；改用快捷方式启动时为 None
+        self.spawned_at: Optional[float] = None
+        self.timing = None  # launch_readiness.LaunchTiming
+        self.icon_path: Optional[str] = None
+        self.icon_applied = False
+        self.hwnd: Optional[int] = None
+        self.rect: Optional[Tuple[int, int, int, int]] = None
+        self.error: Optional[str] = None
+        self.failed_stage: Optional[str] = None
+        self.stage_times: Dict[str, float] = {}
+
+    @property
+    def started(self) -> bool:
+        """进程已创建（直接启动或改用快捷方式启动）"""
+        return self.spawned_at is not None
+
+    def __repr__(self):
+        state = f"失败于 {self.failed_stage}: {self.error}" if self.error else "完成"
+        return f"LaunchItem(#{self.number}, {state})"
+
+
+class PipelineReport:
+    """一次流水线运行的结果汇总"""
+
+    def __init__(self, items: List[LaunchItem], elapsed: float,
+                 stage_busy: Dict[str, float], stage_workers: Dict[str, int]):
+        self.items = items
+        self.elapsed = elapsed
+        self.stage_busy = stage_busy  # 阶段名 → 所有分身在该阶段的累计耗时
+        self.stage_workers = stage_workers
+
+    def started_numbers(self) -> List[int]:
+        return [item.number for item in self.items if item.started]
+
+    def failed(self) -> List[LaunchItem]:
+        return [item for item in self.items if item.error is not None]
+
+    def bottleneck(self) -> Optional[Tuple[str, float]]:
+        """按 累计耗时 / 线程数 估算的最慢阶段"""
+        if not self.stage_busy:
+            return None
+        name = max(self.stage_busy, key=lambda n: self.stage_busy[n] / max(1, self.stage_workers.get(n, 1)))
+        return name, self.stage_busy[name] / max(1, self.stage_workers.get(name, 1))
+
+    def summary(self) -> str:
+        parts = [f"共 {len(self.items)} 个, 已启动 {len(self.started_numbers())} 个, 总耗时 {self.elapsed:.1f}s"]
+        stages = ", ".join(f"{name} {busy:.1f}s/{self.stage_workers.get(name, 1)}线程"
+                           for name, busy in self.stage_busy.items())
+        if stages:
+            parts.append(f"阶段累计 {stages}")
+        slowest = self.bottleneck()
+        if slowest:
+            parts.append(f"瓶颈 {slowest[0]} ≈{slowest[1]:.1f}s")
+        return "; ".join(parts)
+
+
+class LaunchPipeline:
+    """按阶段顺序处理一批分身，各阶段在自己的线程中并行推进"""
+
+    def __init__(self, stages: Sequence[Stage]):
+        if not stages:
+            raise ValueError("流水线至少需要一个阶段")
+        self.stages = list(stages)
+        self.logger = logging.getLogger('LaunchPipeline')
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        """尚未进入下一阶段的分身不再继续（正在执行的阶段不会被打断）"""
+        self._cancelled.set()
+
+    def run(self, numbers: Sequence[int],
+            progress_callback: Optional[Callable[[LaunchItem, int, int], None]] = None,
+            stage_callback: Optional[Callable[[str, LaunchItem], None]] = None) -> PipelineReport:
+        """阻塞直到所有分身离开流水线
+
+        Args:
+            progress_callback: 每个分身离开流水线（完成或失败）时调用 (item, 已完成数, 总数)
+            stage_callback: 每个分身完成一个阶段时调用 (阶段名, item)
+            两个回调都在工作线程中调用
+        """
+        started = time.perf_counter()
+        items = [LaunchItem(number, index) for index, number in enumerate(numbers)]
+        total = len(items)
+        queues = [queue.Queue(maxsize=max(1, stage.queue_size)) for stage in self.stages]
+        remaining_workers = [max(1, stage.workers) for stage in self.stages]
+        stage_busy = {stage.name: 0.0 for stage in self.stages}
+        lock = threading.Lock()
+        done_count = [0]
+        last = len(self.stages) - 1
+
+        def finish(item: LaunchItem):
+            with lock:
+                done_count[0] += 1
+                done = done_count[0]
+            if progress_callback:
+                try:
+                    progress_callback(item, done, total)
+                except Exception as e:
+                    self.logger.error(f"进度回调失败: {item} - {e}")
+
+        def work(i: int):
+            stage = self.stages[i]
+            while True:
+                item = queues[i].get()
+                if item is _STOP:
+                    with lock:
+                        remaining_workers[i] -= 1
+                        last_worker = remaining_workers[i] == 0
+                    # 本阶段最后一个线程退出时，通知下一阶段的所有线程
+                    if last_worker and i < last:
+                        for _ in range(remaining_workers[i + 1]):
+                            queues[i + 1].put(_STOP)
+                    return
+
+                if self._cancelled.is_set():
+                    item.error = "已取消"
+                    item.failed_stage = stage.name
+                else:
+                    stage_started = time.perf_counter()
+                    try:
+                        stage.func(item)
+                    except Exception as e:
+                        item.error = str(e) or type(e).__name__
+                        item.failed_stage = stage.name
+                    elapsed = time.perf_counter() - stage_started
+                    item.stage_times[stage.name] = elapsed
+                    with lock:
+                        stage_busy[stage.name] += elapsed
+                    if item.error is None and stage_callback:
+                        try:
+                            stage_callback(stage.name, item)
+                        except Exception as e:
+                            self.logger.error(f"阶段回调失败: {stage.name} {item} - {e}")
+
+                if item.error is not None or i == last:
+                    finish(item)
+                else:
+                    queues[i + 1].put(item)
+
+        threads = []
+        for i, stage in enumerate(self.stages):
+            for w in range(remaining_workers[i]):
+                thread = threading.Thread(target=work, args=(i,), name=f"LaunchPipeline-{stage.name}-{w}", daemon=True)
+                thread.start()
+                threads.append(thread)
+
+        # 第一阶段的队列满时这里阻塞，解析不会跑到启动前面太远
+        for item in items:
+            queues[0].put(item)
+        for _ in range(remaining_workers[0]):
+            queues[0].put(_STOP)
+        for thread in threads:
+            thread.join()
+
+        return PipelineReport(items, time.perf_counter() - started, stage_busy,
+                              {stage.name: max(1, stage.workers) for stage in self.stages})
+
+
+# ---- 平铺布局 ----
+
+def grid_layout(count: int, work_area: Tuple[int, int, int, int] = DEFAULT_WORK_AREA,
+                cols: Optional[int] = None) -> List[Tuple[int, int, int, int]]:
+    """把工作区均分为网格，返回每个位置的 (x, y, width, height)，按行从左到右排列
+
+    Args:
+        work_area: (left, top, right, bottom)
+        cols: 列数，默认取 ceil(sqrt(count))
+    """
+    if count <= 0:
+        return []
+    if not cols:
+        cols = max(1, math.ceil(math.sqrt(count)))
+    rows = max(1, (count + cols - 1) // cols)
+    left, top, right, bottom = work_area
+    width = max(1, (right - left) // cols)
+    height = max(1, (bottom - top) // rows)
+    return [(left + (i % cols) * width, top + (i // cols) * height, width, height) for i in range(count)]
+
+
+def primary_work_area() -> Tuple[int, int, int, int]:
+    """主屏幕工作区（不含任务栏）"""
+    if win32api is None:
+        return DEFAULT_WORK_AREA
+    try:
+        monitor = win32api.MonitorFromPoint((0, 0), win32con.MONITOR_DEFAULTTOPRIMARY)
+        return tuple(win32api.GetMonitorInfo(monitor)["Work"])
+    except Exception:
+        return DEFAULT_WORK_AREA
+
+
+def place_window(hwnd: int, rect: Tuple[int, int, int, int]) -> bool:
+    """把窗口移动到指定位置与大小，不抢占焦点"""
+    if win32gui is None:
+        return False
+    if not win32gui.IsWindow(hwnd):
+        return False
+    if win32gui.IsIconic(hwnd):
+        win32gui.ShowWindow(hwnd, win32con.SW_RESTORE)
+    x, y, width, height = rect
+    win32gui.SetWindowPos(hwnd, win32con.HWND_TOP, x, y, width, height, win32con.SWP_NOACTIVATE)
+    return True
+
+
+# ---- 标准的五个阶段 ----
+
+def profile_launch_stages(resolve: Callable[[int], Optional[LaunchSpec]],
+                          scheduler, tracker, registry=None,
+                          fallback_launch: Optional[Callable[[int], None]] = None,
+                          prepare_icon: Optional[Callable[[int], Optional[str]]] = None,
+                          apply_icon: Optional[Callable[[int, str], bool]] = None,
+                          layout: Optional[Sequence[Tuple[int, int, int, int]]] = None,
+                          ready_timeout: Optional[float] = None,
+                          resolve_workers: int = DEFAULT_RESOLVE_WORKERS,
+                          icon_workers: int = DEFAULT_ICON_WORKERS,
+                          queue_size: int = DEFAULT_QUEUE_SIZE) -> List[Stage]:
+    """组装 解析 → 启动 → 就绪 → 图标 → 排列 五个阶段
+
+    Args:
+        resolve: 编号 → 启动参数（spawner.LaunchSpec），没有快捷方式时返回 None
+        scheduler: launch_scheduler.LaunchScheduler，决定何时放行下一个启动
+        tracker: launch_readiness.ReadinessTracker，检测窗口出现与调试端口可用
+        registry: 分身运行记录，写入新进程与窗口句柄
+        fallback_launch: 直接启动失败时改用的启动方式（此后不跟踪就绪、不应用图标与排列）
+        prepare_icon: 编号 → 图标文件路径，在解析阶段提前生成，不提供时跳过图标阶段
+        apply_icon: (窗口句柄, 图标路径) → 是否成功
+        layout: 每个序号的目标位置 (x, y, width, height)，不提供时跳过排列阶段
+        ready_timeout: 单个分身等待就绪的上限，默认取 tracker.ready_timeout
+    """
+    ready_timeout = tracker.ready_timeout if ready_timeout is None else ready_timeout
+
+    def on_ready(timing):
+        # 窗口出现且调试端口可用后释放调度名额，并记录窗口句柄
+        scheduler.mark_ready(timing.number)
+        if registry is not None and timing.hwnd:
+            try:
+                registry.set_hwnd(timing.number, timing.hwnd)
+            except Exception:
+                pass
+
+    def resolve_stage(item: LaunchItem):
+        item.spec = resolve(item.number)
+        if item.spec is None:
+            raise SpawnError(f"找不到分身 {item.number} 的快捷方式")
+        if prepare_icon is not None:
+            item.icon_path = prepare_icon(item.number)
+
+    def spawn_stage(item: LaunchItem):
+        # 按系统负载与启动中的分身数放行
+        if not scheduler.admit(item.number):
+            raise SpawnError("启动已取消")
+        try:
+            item.spawned_at = time.monotonic()
+            item.launched = spawn(item.spec, registry)
+        except SpawnError:
+            scheduler.mark_failed(item.number)
+            if fallback_launch is None:
+                item.spawned_at = None
+                raise
+            fallback_launch(item.number)
+            return
+        tracker.track(item.number, item.launched.pid, item.launched.debug_port,
+                      spawned_at=item.spawned_at, callback=on_ready)
+
+    def ready_stage(item: LaunchItem):
+        if item.launched is None:
+            return
+        item.timing = tracker.wait([item.number], timeout=ready_timeout).get(item.number)
+        if item.timing is None or not item.timing.ready:
+            raise TimeoutError(f"分身 {item.number} 未在 {ready_timeout:.0f}s 内就绪")
+        item.hwnd = item.timing.hwnd
+
+    def icon_stage(item: LaunchItem):
+        if item.hwnd and item.icon_path:
+            item.icon_applied = bool(apply_icon(item.hwnd, item.icon_path))
+
+    def arrange_stage(item: LaunchItem):
+        if item.hwnd and item.index < len(layout):
+            item.rect = layout[item.index]
+            place_window(item.hwnd, item.rect)
+
+    stages = [
+        Stage(STAGE_RESOLVE, resolve_stage, resolve_workers, queue_size),
+        # 启动节奏由调度器控制，单线程保证按编号顺序放行
+        Stage(STAGE_SPAWN, spawn_stage, 1, queue_size),
+        # 就绪阶段只是等待，线程数与调度器的并发上限一致
+        Stage(STAGE_READY, ready_stage, scheduler.max_concurrency, max(queue_size, scheduler.max_concurrency)),
+    ]
+    if prepare_icon is not None and apply_icon is not None:
+        stages.append(Stage(STAGE_ICON, icon_stage, icon_workers, queue_size))
+    if layout is not None:
+        stages.append(Stage(STAGE_ARRANGE, arrange_stage, 1, queue_size))
+    return stages
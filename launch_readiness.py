@@ -0,0 +1,278 @@
+"""
+分身启动就绪检测 - 跟踪每个新启动的分身直到窗口出现且调试端口可用
+
+核心设计思想：
+- 真实信号：就绪 = 出现可见的顶层 Chrome_WidgetWin_1 窗口，并且调试端口响应 /json/version
+- 批量探测：每个周期只枚举一次顶层窗口、并发探测一次所有调试端口，所有待检测分身共用结果
+- 逐个记录：每个分身记录 启动→窗口、启动→CDP 两段延迟，汇总为百分位数
+- 取代猜测的定时器：图标应用、窗口列表刷新等后续步骤等待就绪信号，而不是固定延时
+"""
+
+import math
+import time
+import threading
+import logging
+from collections import deque
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence
+
+import psutil
+
+from cdp_client import get_cdp_client
+
+try:
+    import win32gui
+    import win32process
+except ImportError:  # 非Windows环境下只检测调试端口
+    win32gui = None
+    win32process = None
+
+DEFAULT_POLL_INTERVAL = 0.05
+DEFAULT_READY_TIMEOUT = 30.0
+CDP_PROBE_TIMEOUT = 0.3
+# 保留最近多少次启动的计时用于百分位统计
+HISTORY_SIZE = 2000
+
+WINDOW_CLASS = "Chrome_WidgetWin_1"
+
+
+class LaunchTiming(NamedTuple):
+    """一次分身启动的就绪结果"""
+    number: int
+    pid: int
+    window_latency: Optional[float]  # 启动→出现窗口（秒），未检测到时为 None
+    cdp_latency: Optional[float]  # 启动→调试端口可用（秒），未指定端口或未响应时为 None
+    hwnd: Optional[int]
+    ready: bool
+    elapsed: float  # 启动→检测结束（秒）
+
+
+class _Pending:
+    __slots__ = ("number", "pid", "debug_port", "spawned_at", "window_at", "cdp_at", "hwnd", "callback")
+
+    def __init__(self, number, pid, debug_port, spawned_at, callback):
+        self.number = number
+        self.pid = pid
+        self.debug_port = debug_port
+        self.spawned_at = spawned_at
+        self.window_at = None
+        self.cdp_at = None
+        self.hwnd = None
+        self.callback = callback
+
+
+def percentile(values: Sequence[float], pct: float) -> Optional[float]:
+    """最近秩法百分位数"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class ReadinessTracker:
+    """后台检测启动中的分身，就绪或超时后回调并记录延迟"""
+
+    def __init__(self, poll_interval: float = DEFAULT_POLL_INTERVAL,
+                 ready_timeout: float = DEFAULT_READY_TIMEOUT,
+                 check_window: bool = True):
+        """
+        Args:
+            poll_interval: 检测周期（秒）
+            ready_timeout: 超过该时间仍未就绪则放弃并以 ready=False 结束
+            check_window: 是否要求出现顶层窗口（非Windows环境下自动关闭）
+        """
+        self.poll_interval = poll_interval
+        self.ready_timeout = ready_timeout
+        self.check_window = check_window and win32gui is not None
+        self.logger = logging.getLogger('ReadinessTracker')
+
+        self._pending: Dict[int, _Pending] = {}
+        self._results: Dict[int, LaunchTiming] = {}
+        self._history: deque = deque(maxlen=HISTORY_SIZE)
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    # ---- 登记与等待 ----
+
+    def track(self, number: int, pid: int, debug_port: Optional[int] = None,
+              spawned_at: Optional[float] = None,
+              callback: Optional[Callable[[LaunchTiming], None]] = None):
+        """登记一个刚启动的分身
+
+        Args:
+            spawned_at: 启动时刻（time.monotonic()），默认为登记时刻
+            callback: 就绪或超时后在检测线程中调用
+        """
+        with self._cond:
+            self._results.pop(number, None)
+            self._pending[number] = _Pending(number, pid, debug_port,
+                                             spawned_at if spawned_at is not None else time.monotonic(),
+                                             callback)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="ReadinessTracker", daemon=True)
+                self._thread.start()
+
+    def is_pending(self, number: int) -> bool:
+        with self._cond:
+            return number in self._pending
+
+    def wait(self, numbers: Iterable[int], timeout: Optional[float] = None) -> Dict[int, LaunchTiming]:
+        """等待指定分身结束检测，返回已有结果（未登记过的编号直接忽略）"""
+        numbers = list(numbers)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while any(n in self._pending for n in numbers):
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            return {n: self._results[n] for n in numbers if n in self._results}
+
+    def result(self, number: int) -> Optional[LaunchTiming]:
+        with self._cond:
+            return self._results.get(number)
+
+    # ---- 统计 ----
+
+    def latencies(self, kind: str = "window") -> List[float]:
+        """最近启动的延迟列表；kind 为 "window" 或 "cdp\""""
+        attr = "window_latency" if kind == "window" else "cdp_latency"
+        with self._cond:
+            return [getattr(t, attr) for t in self._history if getattr(t, attr) is not None]
+
+    def latency_percentiles(self, kind: str = "window", pcts: Sequence[float] = (50, 90, 99)) -> Dict[float, float]:
+        values = self.latencies(kind)
+        return {p: percentile(values, p) for p in pcts} if values else {}
+
+    def summary(self, timings: Optional[Iterable[LaunchTiming]] = None) -> str:
+        """延迟百分位摘要；指定 timings 时只统计这些结果"""
+        if timings is None:
+            with self._cond:
+                timings = list(self._history)
+        else:
+            timings = list(timings)
+        if not timings:
+            return "无启动计时"
+        parts = [f"就绪 {sum(1 for t in timings if t.ready)}/{len(timings)}"]
+        for label, attr in (("窗口", "window_latency"), ("CDP", "cdp_latency")):
+            values = [getattr(t, attr) for t in timings if getattr(t, attr) is not None]
+            if values:
+                parts.append(f"{label} p50 {percentile(values, 50):.2f}s p90 {percentile(values, 90):.2f}s "
+                             f"p99 {percentile(values, 99):.2f}s")
+        return "; ".join(parts)
+
+    # ---- 检测线程 ----
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._pending:
+                    self._thread = None
+                    return
+                pending = list(self._pending.values())
+            finished = self._check(pending)
+            if finished:
+                self._finish(finished)
+            time.sleep(self.poll_interval)
+
+    def _check(self, pending: List[_Pending]) -> List[LaunchTiming]:
+        now = time.monotonic()
+        if self.check_window and any(p.window_at is None for p in pending):
+            windows = self._top_level_windows({p.pid for p in pending if p.window_at is None})
+            for p in pending:
+                if p.window_at is None and p.pid in windows:
+                    p.window_at = now
+                    p.hwnd = windows[p.pid]
+
+        probing = [p for p in pending if p.debug_port and p.cdp_at is None]
+        if probing:
+            # 所有待检测端口在共享客户端的事件循环中并发探测，一个周期最多等待一次探测超时
+            client = get_cdp_client()
+            try:
+                alive = client.run(client.gather(client.is_alive(p.debug_port, CDP_PROBE_TIMEOUT) for p in probing))
+            except Exception as e:
+                self.logger.debug(f"探测调试端口失败: {e}")
+                alive = []
+            probed_at = time.monotonic()
+            for p, ok in zip(probing, alive):
+                if ok is True:
+                    p.cdp_at = probed_at
+
+        now = time.monotonic()
+        finished = []
+        for p in pending:
+            window_ok = not self.check_window or p.window_at is not None
+            cdp_ok = not p.debug_port or p.cdp_at is not None
+            timed_out = now - p.spawned_at > self.ready_timeout
+            if window_ok and cdp_ok:
+                if not self.check_window and not p.debug_port and not psutil.pid_exists(p.pid):
+                    finished.append(self._timing(p, ready=False, now=now))
+                else:
+                    finished.append(self._timing(p, ready=True, now=now))
+            elif timed_out or not psutil.pid_exists(p.pid):
+                # 超时，或进程已退出（例如把请求转交给已运行的同目录实例）
+                finished.append(self._timing(p, ready=False, now=now))
+        return finished
+
+    @staticmethod
+    def _timing(p: _Pending, ready: bool, now: float) -> LaunchTiming:
+        return LaunchTiming(
+            number=p.number,
+            pid=p.pid,
+            window_latency=p.window_at - p.spawned_at if p.window_at is not None else None,
+            cdp_latency=p.cdp_at - p.spawned_at if p.cdp_at is not None else None,
+            hwnd=p.hwnd,
+            ready=ready,
+            elapsed=now - p.spawned_at,
+        )
+
+    def _finish(self, finished: List[LaunchTiming]):
+        callbacks = []
+        with self._cond:
+            for timing in finished:
+                p = self._pending.pop(timing.number, None)
+                if p is None:
+                    continue
+                self._results[timing.number] = timing
+                self._history.append(timing)
+                if p.callback:
+                    callbacks.append((p.callback, timing))
+            self._cond.notify_all()
+        for callback, timing in callbacks:
+            try:
+                callback(timing)
+            except Exception as e:
+                self.logger.error(f"就绪回调失败: {timing} - {e}")
+
+    def _top_level_windows(self, pids) -> Dict[int, int]:
+        """一次枚举得到目标进程的第一个可见顶层Chrome窗口"""
+        result: Dict[int, int] = {}
+
+        def callback(hwnd, _):
+            try:
+                if win32gui.IsWindowVisible(hwnd) and win32gui.GetClassName(hwnd) == WINDOW_CLASS:
+                    _, pid = win32process.GetWindowThreadProcessId(hwnd)
+                    if pid in pids and pid not in result:
+                        result[pid] = hwnd
+            except Exception:
+                pass
+            return True
+
+        try:
+            win32gui.EnumWindows(callback, None)
+        except Exception as e:
+            self.logger.debug(f"枚举窗口失败: {e}")
+        return result
+
+
+_shared_tracker: Optional[ReadinessTracker] = None
+_shared_tracker_lock = threading.Lock()
+
+
+def get_readiness_tracker() -> ReadinessTracker:
+    """获取进程内共享的就绪检测实例"""
+    global _shared_tracker
+    with _shared_tracker_lock:
+        if _shared_tracker is None:
+            _shared_tracker = ReadinessTracker()
+        return _shared_tracker
@@ -0,0 +1,193 @@
+"""
+分身启动调度器 - 按系统负载决定何时放行下一个分身启动
+
+核心设计思想：
+- 负载准入：CPU 占用、可用内存、磁盘繁忙度都低于目标值时才放行新的启动
+- 并发上限：正在启动（尚未就绪）的分身数不超过 max_concurrency
+- 始终前进：没有分身正在启动时，即使系统繁忙也放行一个，避免永久等待
+- 最小间隔：原来的"延迟"设置变为两次启动之间的下限，而不是唯一的控制手段
+- 就绪释放：调用方在分身就绪（或失败）时 mark_ready 释放名额，超时未报告的自动释放
+"""
+
+import os
+import time
+import threading
+import logging
+from typing import Dict, NamedTuple, Optional
+
+import psutil
+
+DEFAULT_MAX_CONCURRENCY = max(2, min(16, os.cpu_count() or 2))
+DEFAULT_TARGET_CPU = 75.0  # CPU 总占用百分比
+DEFAULT_MIN_FREE_MEMORY_MB = 1024
+DEFAULT_TARGET_DISK_BUSY = 80.0  # 磁盘读写耗时占采样间隔的百分比
+DEFAULT_STARTING_TIMEOUT = 5.0  # 未报告就绪的启动在多少秒后自动释放名额（约为一次冷启动到出现窗口的时间）
+SAMPLE_INTERVAL = 0.25  # 负载采样的最短间隔（秒）
+
+
+class LoadSample(NamedTuple):
+    """一次系统负载采样"""
+    cpu_percent: float
+    available_memory_mb: float
+    disk_busy_percent: float
+    timestamp: float
+
+
+class LaunchScheduler:
+    """自适应启动调度器
+
+    用法：
+        scheduler = LaunchScheduler(min_delay=0.5)
+        for number in numbers:
+            scheduler.admit(number)        # 阻塞直到允许启动
+            spawn(...)
+            ...
+            scheduler.mark_ready(number)   # 就绪后（可在其他线程）释放名额
+    """
+
+    def __init__(self, max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 target_cpu: float = DEFAULT_TARGET_CPU,
+                 min_free_memory_mb: float = DEFAULT_MIN_FREE_MEMORY_MB,
+                 target_disk_busy: float = DEFAULT_TARGET_DISK_BUSY,
+                 min_delay: float = 0.0,
+                 starting_timeout: float = DEFAULT_STARTING_TIMEOUT):
+        """
+        Args:
+            max_concurrency: 同时处于启动中的分身上限
+            target_cpu: CPU 占用高于此值时暂停放行
+            min_free_memory_mb: 可用内存低于此值时暂停放行
+            target_disk_busy: 磁盘繁忙度高于此值时暂停放行
+            min_delay: 两次放行之间的最小间隔（秒），0 表示完全由负载决定
+            starting_timeout: 启动后未报告就绪时自动释放名额的时间（秒）
+        """
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.target_cpu = target_cpu
+        self.min_free_memory_mb = min_free_memory_mb
+        self.target_disk_busy = target_disk_busy
+        self.min_delay = max(0.0, min_delay)
+        self.starting_timeout = starting_timeout
+        self.logger = logging.getLogger('LaunchScheduler')
+
+        self._cond = threading.Condition()
+        self._starting: Dict[int, float] = {}  # 编号 → 放行时间
+        self._last_admit = 0.0
+        self._cancelled = False
+        self._last_sample: Optional[LoadSample] = None
+        self._last_disk = self._disk_time()
+        self._last_disk_at = time.monotonic()
+        psutil.cpu_percent(interval=None)  # 建立 CPU 占用的计算起点
+
+    # ---- 负载 ----
+
+    @staticmethod
+    def _disk_time() -> Optional[float]:
+        """所有磁盘累计读写耗时（毫秒）；平台不支持时为 None"""
+        try:
+            counters = psutil.disk_io_counters()
+        except Exception:
+            return None
+        if counters is None:
+            return None
+        busy = getattr(counters, "busy_time", None)
+        if busy is not None:
+            return float(busy)
+        return float(counters.read_time + counters.write_time)
+
+    def sample(self) -> LoadSample:
+        """读取当前负载（采样间隔内重复调用返回上次结果）"""
+        now = time.monotonic()
+        last = self._last_sample
+        if last is not None and now - last.timestamp < SAMPLE_INTERVAL:
+            return last
+
+        cpu = psutil.cpu_percent(interval=None)
+        available_mb = psutil.virtual_memory().available / (1024 * 1024)
+        disk_busy = 0.0
+        disk_time = self._disk_time()
+        elapsed_ms = (now - self._last_disk_at) * 1000
+        if disk_time is not None and self._last_disk is not None and elapsed_ms > 0:
+            # 多块磁盘的耗时会累加，超过100%时按100%计
+            disk_busy = min(100.0, max(0.0, (disk_time - self._last_disk) / elapsed_ms * 100))
+        self._last_disk = disk_time
+        self._last_disk_at = now
+
+        self._last_sample = LoadSample(cpu, available_mb, disk_busy, now)
+        return self._last_sample
+
+    def _overloaded(self, load: LoadSample) -> Optional[str]:
+        if load.cpu_percent > self.target_cpu:
+            return f"CPU {load.cpu_percent:.0f}%"
+        if load.available_memory_mb < self.min_free_memory_mb:
+            return f"可用内存 {load.available_memory_mb:.0f}MB"
+        if load.disk_busy_percent > self.target_disk_busy:
+            return f"磁盘繁忙 {load.disk_busy_percent:.0f}%"
+        return None
+
+    # ---- 放行与释放 ----
+
+    def admit(self, number: int, timeout: Optional[float] = None) -> bool:
+        """阻塞直到允许启动该分身
+
+        Returns:
+            True 表示已放行；超时或调度已取消时返回 False
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                if self._cancelled:
+                    return False
+                self._expire_stale()
+                now = time.monotonic()
+                wait = self._admission_wait(now)
+                if wait <= 0:
+                    self._starting[number] = now
+                    self._last_admit = now
+                    return True
+                if deadline is not None:
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        return False
+                    wait = min(wait, remaining)
+                self._cond.wait(wait)
+
+    def _admission_wait(self, now: float) -> float:
+        """距离可以放行还需等待的秒数（调用方持有锁）"""
+        floor_wait = self._last_admit + self.min_delay - now
+        if floor_wait > 0:
+            return floor_wait
+        starting = len(self._starting)
+        if starting >= self.max_concurrency:
+            return SAMPLE_INTERVAL
+        if starting == 0:
+            return 0.0
+        reason = self._overloaded(self.sample())
+        if reason:
+            self.logger.debug(f"暂缓启动: {reason}, 启动中 {starting} 个")
+            return SAMPLE_INTERVAL
+        return 0.0
+
+    def _expire_stale(self):
+        now = time.monotonic()
+        for number, admitted_at in list(self._starting.items()):
+            if now - admitted_at > self.starting_timeout:
+                self.logger.debug(f"分身 {number} 未在 {self.starting_timeout}s 内报告就绪，释放名额")
+                del self._starting[number]
+
+    def mark_ready(self, number: int):
+        """分身已就绪（或启动失败），释放其名额"""
+        with self._cond:
+            if self._starting.pop(number, None) is not None:
+                self._cond.notify_all()
+
+    mark_failed = mark_ready
+
+    def cancel(self):
+        """取消所有等待中的 admit 调用"""
+        with self._cond:
+            self._cancelled = True
+            self._cond.notify_all()
+
+    def starting_count(self) -> int:
+        with self._cond:
+            self._expire_stale()
+            return len(self._starting)
@@ -0,0 +1,348 @@
+"""
+Windows快捷方式(.lnk)文件读写 - 纯Python实现的 MS-SHLLINK 二进制格式读取与生成
+
+核心设计思想：
+- 无COM依赖：直接读写文件字节，不需要 WScript.Shell，也可以在Linux上测试
+- 线程安全：生成快捷方式只是拼接字节，可在多个线程中并行写入
+- 字段对齐：返回值与 WScript.Shell 快捷方式对象的 TargetPath/Arguments/
+  WorkingDirectory/IconLocation 保持一致
+- 多重来源：目标路径依次尝试 LinkInfo、环境变量数据块、IDList、相对路径
+"""
+
+import os
+import struct
+import locale
+from typing import NamedTuple, Optional, Tuple
+
+LNK_HEADER_SIZE = 0x4C
+LNK_CLSID = bytes.fromhex("0114020000000000c000000000000046")
+
+# LinkFlags
+HAS_LINK_TARGET_ID_LIST = 0x00000001
+HAS_LINK_INFO = 0x00000002
+HAS_NAME = 0x00000004
+HAS_RELATIVE_PATH = 0x00000008
+HAS_WORKING_DIR = 0x00000010
+HAS_ARGUMENTS = 0x00000020
+HAS_ICON_LOCATION = 0x00000040
+IS_UNICODE = 0x00000080
+FORCE_NO_LINK_INFO = 0x00000100
+HAS_EXP_STRING = 0x00000200
+
+# LinkInfoFlags
+VOLUME_ID_AND_LOCAL_BASE_PATH = 0x00000001
+COMMON_NETWORK_RELATIVE_LINK_AND_PATH_SUFFIX = 0x00000002
+
+# ExtraData 数据块签名
+ENVIRONMENT_VARIABLE_DATA_BLOCK = 0xA0000001
+ICON_ENVIRONMENT_DATA_BLOCK = 0xA0000007
+
+SW_SHOWNORMAL = 1
+
+# 生成快捷方式时使用的常量
+FILE_ATTRIBUTE_ARCHIVE = 0x00000020
+DRIVE_FIXED = 3
+LINK_INFO_HEADER_SIZE_UNICODE = 0x24
+VOLUME_ID_HEADER_SIZE = 0x10
+
+
+class LnkParseError(ValueError):
+    """.lnk 文件格式不合法"""
+
+
+class LnkData(NamedTuple):
+    """解析后的快捷方式字段"""
+    target_path: str
+    arguments: str
+    working_dir: str
+    icon_location: str  # 与 WScript.Shell 相同的 "路径,索引" 形式
+    description: str
+    relative_path: str
+    show_command: int
+
+
+def _ansi_encoding() -> str:
+    if os.name == "nt":
+        return "mbcs"
+    return locale.getpreferredencoding(False) or "latin-1"
+
+
+def _read_c_string(data: bytes, offset: int, unicode: bool = False) -> str:
+    """读取以空字符结尾的字符串"""
+    if offset < 0 or offset >= len(data):
+        return ""
+    if unicode:
+        end = offset
+        while end + 1 < len(data) and data[end:end + 2] != b"\x00\x00":
+            end += 2
+        return data[offset:end].decode("utf-16-le", errors="replace")
+    end = data.find(b"\x00", offset)
+    if end == -1:
+        end = len(data)
+    return data[offset:end].decode(_ansi_encoding(), errors="replace")
+
+
+def _read_string_data(data: bytes, offset: int, unicode: bool) -> Tuple[str, int]:
+    """读取 StringData 结构：2字节字符数 + 字符内容"""
+    if offset + 2 > len(data):
+        raise LnkParseError("StringData 越界")
+    count = struct.unpack_from("<H", data, offset)[0]
+    offset += 2
+    size = count * 2 if unicode else count
+    if offset + size > len(data):
+        raise LnkParseError("StringData 内容越界")
+    raw = data[offset:offset + size]
+    text = raw.decode("utf-16-le" if unicode else _ansi_encoding(), errors="replace")
+    return text, offset + size
+
+
+def _parse_link_info(block: bytes) -> str:
+    """从 LinkInfo 结构中拼出目标路径"""
+    if len(block) < 0x1C:
+        return ""
+    header_size, flags, _volume_offset, base_offset, network_offset, suffix_offset = \
+        struct.unpack_from("<6I", block, 4)
+
+    base_path = ""
+    suffix = ""
+    if header_size >= 0x24 and len(block) >= 0x24:
+        base_offset_unicode, suffix_offset_unicode = struct.unpack_from("<2I", block, 0x1C)
+        if flags & VOLUME_ID_AND_LOCAL_BASE_PATH and base_offset_unicode:
+            base_path = _read_c_string(block, base_offset_unicode, unicode=True)
+        if suffix_offset_unicode:
+            suffix = _read_c_string(block, suffix_offset_unicode, unicode=True)
+
+    if not base_path and flags & VOLUME_ID_AND_LOCAL_BASE_PATH and base_offset:
+        base_path = _read_c_string(block, base_offset)
+    if not suffix and suffix_offset:
+        suffix = _read_c_string(block, suffix_offset)
+
+    if not base_path and flags & COMMON_NETWORK_RELATIVE_LINK_AND_PATH_SUFFIX and network_offset:
+        # CommonNetworkRelativeLink: NetNameOffset 位于结构内偏移 8 处
+        if network_offset + 12 <= len(block):
+            net_name_offset = struct.unpack_from("<I", block, network_offset + 8)[0]
+            net_name = _read_c_string(block, network_offset + net_name_offset)
+            if net_name:
+                base_path = net_name if not suffix else net_name.rstrip("\\") + "\\"
+
+    if base_path and suffix:
+        return base_path + suffix
+    return base_path
+
+
+def _parse_id_list(id_list: bytes) -> str:
+    """尽力从 IDList 中还原文件系统路径（只处理盘符和文件/目录项）"""
+    parts = []
+    offset = 0
+    while offset + 2 <= len(id_list):
+        item_size = struct.unpack_from("<H", id_list, offset)[0]
+        if item_size == 0:
+            break
+        item = id_list[offset:offset + item_size]
+        offset += item_size
+        if len(item) < 3:
+            continue
+        item_type = item[2]
+        if item_type & 0x70 == 0x20:
+            # 卷(盘符)项："C:\"
+            drive = _read_c_string(item, 3)
+            if drive:
+                parts = [drive.rstrip("\\")]
+        elif item_type & 0x70 == 0x30 and len(item) > 14:
+            # 文件/目录项：偏移14为8.3短文件名，扩展块 0xBEEF0004 中保存长文件名
+            name = _read_c_string(item, 14)
+            long_name = _read_beef0004_name(item)
+            parts.append(long_name or name)
+    if not parts:
+        return ""
+    if len(parts) == 1:
+        return parts[0] + "\\"
+    return "\\".join(parts)
+
+
+def _read_beef0004_name(item: bytes) -> str:
+    signature = b"\x04\x00\xef\xbe"
+    pos = item.find(signature)
+    if pos < 4:
+        return ""
+    ext_start = pos - 4
+    ext_size, ext_version = struct.unpack_from("<HH", item, ext_start)
+    # 扩展块版本不同，长文件名的起始偏移也不同
+    name_offset = ext_start + (0x2E if ext_version >= 9 else 0x2A if ext_version >= 8 else 0x26 if ext_version >= 7 else 0x14)
+    if name_offset >= ext_start + ext_size:
+        return ""
+    return _read_c_string(item, name_offset, unicode=True)
+
+
+def _parse_env_block(block: bytes) -> str:
+    """EnvironmentVariableDataBlock / IconEnvironmentDataBlock：260字节ANSI + 520字节Unicode"""
+    if len(block) < 8 + 260:
+        return ""
+    target = ""
+    if len(block) >= 8 + 260 + 520:
+        target = _read_c_string(block[8 + 260:8 + 260 + 520] + b"\x00\x00", 0, unicode=True)
+    if not target:
+        target = _read_c_string(block[8:8 + 260] + b"\x00", 0)
+    return os.path.expandvars(target) if target else ""
+
+
+def parse_lnk_bytes(data: bytes, lnk_path: Optional[str] = None) -> LnkData:
+    """解析 .lnk 文件内容
+
+    Args:
+        data: 文件全部字节
+        lnk_path: 文件路径，仅用于解析相对路径
+    """
+    if len(data) < LNK_HEADER_SIZE:
+        raise LnkParseError("文件长度不足")
+    header_size = struct.unpack_from("<I", data, 0)[0]
+    if header_size != LNK_HEADER_SIZE or data[4:20] != LNK_CLSID:
+        raise LnkParseError("不是有效的快捷方式文件")
+
+    flags = struct.unpack_from("<I", data, 20)[0]
+    icon_index = struct.unpack_from("<i", data, 56)[0]
+    show_command = struct.unpack_from("<I", data, 60)[0]
+    unicode = bool(flags & IS_UNICODE)
+    offset = LNK_HEADER_SIZE
+
+    id_list_path = ""
+    if flags & HAS_LINK_TARGET_ID_LIST:
+        if offset + 2 > len(data):
+            raise LnkParseError("IDList 越界")
+        id_list_size = struct.unpack_from("<H", data, offset)[0]
+        offset += 2
+        id_list_path = _parse_id_list(data[offset:offset + id_list_size])
+        offset += id_list_size
+
+    link_info_path = ""
+    if flags & HAS_LINK_INFO and not flags & FORCE_NO_LINK_INFO:
+        if offset + 4 > len(data):
+            raise LnkParseError("LinkInfo 越界")
+        link_info_size = struct.unpack_from("<I", data, offset)[0]
+        link_info_path = _parse_link_info(data[offset:offset + link_info_size])
+        offset += link_info_size
+
+    strings = {}
+    for flag, key in ((HAS_NAME, "description"), (HAS_RELATIVE_PATH, "relative_path"),
+                      (HAS_WORKING_DIR, "working_dir"), (HAS_ARGUMENTS, "arguments"),
+                      (HAS_ICON_LOCATION, "icon_location")):
+        if flags & flag:
+            strings[key], offset = _read_string_data(data, offset, unicode)
+
+    env_target = ""
+    icon_env = ""
+    while offset + 4 <= len(data):
+        block_size = struct.unpack_from("<I", data, offset)[0]
+        if block_size < 8 or offset + block_size > len(data):
+            break
+        signature = struct.unpack_from("<I", data, offset + 4)[0]
+        block = data[offset:offset + block_size]
+        if signature == ENVIRONMENT_VARIABLE_DATA_BLOCK:
+            env_target = _parse_env_block(block)
+        elif signature == ICON_ENVIRONMENT_DATA_BLOCK:
+            icon_env = _parse_env_block(block)
+        offset += block_size
+
+    relative_path = strings.get("relative_path", "")
+    target_path = link_info_path or env_target or id_list_path
+    if not target_path and relative_path and lnk_path:
+        target_path = os.path.normpath(os.path.join(os.path.dirname(lnk_path), relative_path))
+
+    icon_file = icon_env or strings.get("icon_location", "")
+    if icon_file:
+        icon_file = os.path.expandvars(icon_file)
+
+    return LnkData(
+        target_path=target_path,
+        arguments=strings.get("arguments", ""),
+        working_dir=strings.get("working_dir", ""),
+        icon_location=f"{icon_file},{icon_index}",
+        description=strings.get("description", ""),
+        relative_path=relative_path,
+        show_command=show_command,
+    )
+
+
+def read_lnk(path: str) -> LnkData:
+    """读取并解析 .lnk 文件"""
+    with open(path, "rb") as f:
+        data = f.read()
+    return parse_lnk_bytes(data, path)
+
+
+# ---- 生成 ----
+
+def _string_data(text: str) -> bytes:
+    """StringData 结构（Unicode）：2字节字符数 + UTF-16LE 内容"""
+    raw = text.encode("utf-16-le")
+    return struct.pack("<H", len(raw) // 2) + raw
+
+
+def _build_link_info(target_path: str) -> bytes:
+    """只含本地路径的 LinkInfo（VolumeID + LocalBasePath，同时写入 ANSI 与 Unicode 两种形式）"""
+    volume_id = struct.pack("<4I", VOLUME_ID_HEADER_SIZE + 1, DRIVE_FIXED, 0, VOLUME_ID_HEADER_SIZE) + b"\x00"
+    base_ansi = target_path.encode(_ansi_encoding(), errors="replace") + b"\x00"
+    suffix_ansi = b"\x00"
+    base_unicode = target_path.encode("utf-16-le") + b"\x00\x00"
+    suffix_unicode = b"\x00\x00"
+
+    volume_offset = LINK_INFO_HEADER_SIZE_UNICODE
+    base_offset = volume_offset + len(volume_id)
+    suffix_offset = base_offset + len(base_ansi)
+    base_offset_unicode = suffix_offset + len(suffix_ansi)
+    suffix_offset_unicode = base_offset_unicode + len(base_unicode)
+    size = suffix_offset_unicode + len(suffix_unicode)
+
+    header = struct.pack(
+        "<9I", size, LINK_INFO_HEADER_SIZE_UNICODE, VOLUME_ID_AND_LOCAL_BASE_PATH,
+        volume_offset, base_offset, 0, suffix_offset, base_offset_unicode, suffix_offset_unicode,
+    )
+    return header + volume_id + base_ansi + suffix_ansi + base_unicode + suffix_unicode
+
+
+def _split_icon_location(icon_location: str) -> Tuple[str, int]:
+    """"路径,索引" → (路径, 索引)，与 WScript.Shell 的 IconLocation 写法一致"""
+    path, sep, index = icon_location.rpartition(",")
+    if sep and index.strip().lstrip("-").isdigit():
+        return path, int(index)
+    return icon_location, 0
+
+
+def build_lnk_bytes(target_path: str, arguments: str = "", working_dir: str = "",
+                    icon_location: str = "", description: str = "",
+                    show_command: int = SW_SHOWNORMAL) -> bytes:
+    """生成指向本地文件的快捷方式内容，字段含义与 WScript.Shell 快捷方式对象相同"""
+    icon_path, icon_index = _split_icon_location(icon_location) if icon_location else ("", 0)
+
+    flags = HAS_LINK_INFO | IS_UNICODE
+    strings = b""
+    for flag, value in ((HAS_NAME, description), (HAS_WORKING_DIR, working_dir),
+                        (HAS_ARGUMENTS, arguments), (HAS_ICON_LOCATION, icon_path)):
+        if value:
+            flags |= flag
+            strings += _string_data(value)
+
+    header = struct.pack(
+        "<I16sII3QIiIHHII", LNK_HEADER_SIZE, LNK_CLSID, flags, FILE_ATTRIBUTE_ARCHIVE,
+        0, 0, 0, 0, icon_index, show_command, 0, 0, 0, 0,
+    )
+    # 末尾 4 字节 0 为 TerminalBlock
+    return header + _build_link_info(target_path) + strings + b"\x00\x00\x00\x00"
+
+
+def write_lnk(path: str, target_path: str, arguments: str = "", working_dir: str = "",
+              icon_location: str = "", description: str = "",
+              show_command: int = SW_SHOWNORMAL):
+    """写入快捷方式文件：先写临时文件再替换，中途中断不会留下损坏的快捷方式"""
+    data = build_lnk_bytes(target_path, arguments, working_dir, icon_location, description, show_command)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
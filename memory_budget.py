@@ -0,0 +1,250 @@
+"""
+内存预算 - 按每个分身的历史常驻内存估算一批启动的总占用，只放行装得下的部分
+
+核心设计思想：
+- 稳态采样：后台定期读取共享进程索引的按目录汇总（整棵进程树的 RSS），只记录已运行一段时间的分身
+- 历史平滑：每个分身保存指数平滑后的平均值与峰值，存放在分身运行记录同一个 SQLite 文件中
+- 先估算再启动：一批启动前按编号估算总占用，没有历史的分身用已知分身的中位数
+- 预算 = 配置上限与系统可用内存的较小者：配置上限扣除正在运行的分身的占用，可用内存扣除保留量
+- 始终前进：没有任何分身在运行时至少放行一个，其余由调用方排队或放弃
+"""
+
+import time
+import sqlite3
+import statistics
+import threading
+import logging
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence
+
+import psutil
+
+from config import FLEET_DB_FILE
+from process_index import get_process_index
+
+DEFAULT_PROFILE_MB = 400.0  # 没有任何历史时单个分身的估算值
+DEFAULT_RESERVE_MB = 2048.0  # 自动预算时为系统和其他程序保留的可用内存
+STEADY_STATE_AFTER = 60.0  # 分身运行多久后的占用才算稳态（秒）
+SAMPLE_INTERVAL = 30.0  # 后台采样间隔（秒）
+SMOOTHING = 0.2  # 指数平滑系数：新样本的权重
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS profile_memory (
+    number INTEGER PRIMARY KEY,
+    samples INTEGER NOT NULL,
+    avg_rss_mb REAL NOT NULL,
+    peak_rss_mb REAL NOT NULL,
+    updated_at REAL NOT NULL
+)
+"""
+
+
+class MemoryRecord(NamedTuple):
+    """一个分身的历史内存占用"""
+    number: int
+    samples: int
+    avg_rss_mb: float  # 稳态进程树 RSS 的平滑平均值
+    peak_rss_mb: float
+    updated_at: float
+
+
+class BudgetPlan(NamedTuple):
+    """一批启动的内存预算结果"""
+    admitted: List[int]  # 预算内可以启动的编号（保持原顺序）
+    deferred: List[int]  # 超出预算的编号
+    estimates: Dict[int, float]  # 编号 → 估算占用（MB）
+    budget_mb: float  # 本批可用的预算
+    running_mb: float  # 正在运行的分身当前合计占用
+
+    @property
+    def admitted_mb(self) -> float:
+        return sum(self.estimates[n] for n in self.admitted)
+
+    def summary(self) -> str:
+        text = f"预计占用 {self.admitted_mb:.0f}MB / 预算 {self.budget_mb:.0f}MB"
+        if self.deferred:
+            text += f"，暂缓 {len(self.deferred)} 个: {', '.join(map(str, self.deferred))}"
+        return text
+
+
+class MemoryHistory:
+    """每个分身的稳态内存历史（SQLite，与分身运行记录同一个文件）"""
+
+    def __init__(self, path: str = FLEET_DB_FILE):
+        self.path = path
+        self.logger = logging.getLogger('MemoryHistory')
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        try:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        except sqlite3.DatabaseError as e:
+            self.logger.debug(f"设置数据库参数失败: {e}")
+        self._conn.execute(_SCHEMA)
+
+    def record(self, number: int, rss_mb: float):
+        """加入一个稳态样本"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT samples, avg_rss_mb, peak_rss_mb FROM profile_memory WHERE number = ?", (number,)
+            ).fetchone()
+            if row is None:
+                samples, avg, peak = 1, rss_mb, rss_mb
+            else:
+                samples = row[0] + 1
+                avg = row[1] + SMOOTHING * (rss_mb - row[1])
+                peak = max(row[2], rss_mb)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO profile_memory (number, samples, avg_rss_mb, peak_rss_mb, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (number, samples, avg, peak, now),
+            )
+
+    def get(self, number: int) -> Optional[MemoryRecord]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM profile_memory WHERE number = ?", (number,)).fetchone()
+        return MemoryRecord(*row) if row else None
+
+    def records(self) -> Dict[int, MemoryRecord]:
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM profile_memory").fetchall()
+        return {row[0]: MemoryRecord(*row) for row in rows}
+
+    def estimates(self, numbers: Iterable[int]) -> Dict[int, float]:
+        """编号 → 估算占用（MB）；没有历史的编号使用已知分身的中位数"""
+        records = self.records()
+        fallback = statistics.median(r.avg_rss_mb for r in records.values()) if records else DEFAULT_PROFILE_MB
+        return {n: records[n].avg_rss_mb if n in records else fallback for n in numbers}
+
+    def close(self):
+        with self._lock:
+            try:
+                self._conn.close()
+            except sqlite3.Error:
+                pass
+
+
+class MemorySampler:
+    """后台定期记录正在运行的分身的稳态内存"""
+
+    def __init__(self, history: MemoryHistory, interval: float = SAMPLE_INTERVAL,
+                 steady_after: float = STEADY_STATE_AFTER):
+        self.history = history
+        self.interval = interval
+        self.steady_after = steady_after
+        self.logger = logging.getLogger('MemorySampler')
+        self._create_times: Dict[int, float] = {}  # 主进程PID → 创建时间
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="MemorySampler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.sample()
+            except Exception as e:
+                self.logger.warning(f"内存采样失败: {e}")
+
+    def sample(self) -> int:
+        """记录一次所有稳态分身的占用，返回记录的分身数"""
+        index = get_process_index()
+        stats = index.profile_stats(index.snapshot())
+        now = time.time()
+        recorded = 0
+        alive = set()
+        for s in stats.values():
+            alive.add(s.browser_pid)
+            if s.number is None or not s.rss:
+                continue
+            started = self._create_times.get(s.browser_pid)
+            if started is None:
+                try:
+                    started = psutil.Process(s.browser_pid).create_time()
+                except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                    continue
+                self._create_times[s.browser_pid] = started
+            # 刚启动的分身还在加载页面与扩展，占用不具代表性
+            if now - started < self.steady_after:
+                continue
+            self.history.record(s.number, s.rss / (1024 * 1024))
+            recorded += 1
+        for pid in list(self._create_times):
+            if pid not in alive:
+                del self._create_times[pid]
+        return recorded
+
+
+def running_profiles_mb(numbers: Optional[Iterable[int]] = None) -> float:
+    """正在运行的分身当前的进程树 RSS 合计（MB）；指定 numbers 时只统计这些编号"""
+    index = get_process_index()
+    wanted = set(numbers) if numbers is not None else None
+    total = 0
+    for s in index.profile_stats(index.snapshot()).values():
+        if s.number is None:
+            continue
+        if wanted is None or s.number in wanted:
+            total += s.rss
+    return total / (1024 * 1024)
+
+
+def plan_launch(numbers: Sequence[int], history: MemoryHistory, budget_mb: float = 0.0,
+                reserve_mb: float = DEFAULT_RESERVE_MB) -> BudgetPlan:
+    """按内存预算把一批编号分为 放行 / 暂缓
+
+    Args:
+        budget_mb: 所有分身合计的内存上限；0 表示只按系统可用内存（扣除 reserve_mb）决定
+        reserve_mb: 无论预算多少，都为系统保留的可用内存
+    """
+    estimates = history.estimates(numbers)
+    running_mb = running_profiles_mb()
+    available_mb = psutil.virtual_memory().available / (1024 * 1024)
+    budget = available_mb - reserve_mb
+    if budget_mb > 0:
+        budget = min(budget, budget_mb - running_mb)
+    budget = max(0.0, budget)
+
+    admitted, deferred = [], []
+    used = 0.0
+    for number in numbers:
+        cost = estimates[number]
+        # 没有任何分身在运行时至少放行一个，避免永远无法启动
+        if used + cost <= budget or (not admitted and running_mb == 0):
+            admitted.append(number)
+            used += cost
+        else:
+            deferred.append(number)
+    return BudgetPlan(admitted, deferred, estimates, budget, running_mb)
+
+
+_shared_history: Optional[MemoryHistory] = None
+_shared_sampler: Optional[MemorySampler] = None
+_shared_lock = threading.Lock()
+
+
+def get_memory_history() -> MemoryHistory:
+    """获取进程内共享的内存历史"""
+    global _shared_history
+    with _shared_lock:
+        if _shared_history is None:
+            _shared_history = MemoryHistory()
+        return _shared_history
+
+
+def get_memory_sampler() -> MemorySampler:
+    """获取进程内共享的内存采样器（需调用 start() 启动）"""
+    global _shared_sampler
+    history = get_memory_history()
+    with _shared_lock:
+        if _shared_sampler is None:
+            _shared_sampler = MemorySampler(history)
+        return _shared_sampler
@@ -0,0 +1,249 @@
+"""
+调试端口分配 - 持久化 分身编号 → 调试端口，启动前探测冲突，连接前确认端口属于该分身
+
+核心设计思想：
+- 分配表：首选 基准端口 + 编号，超出端口范围或已被占用时顺序查找空闲端口；分配结果写入运行记录数据库，重启后不变
+- 启动前探测：尝试绑定 127.0.0.1:端口，能绑定即空闲；绑定失败说明有进程在监听，
+  不是该分身自己的浏览器时重新分配端口，避免启动后调试端口失效
+- 归属校验：Chrome 启用调试端口时在用户数据目录写入 DevToolsActivePort（端口 + 浏览器 WebSocket 路径），
+  与 /json/version 返回的 webSocketDebuggerUrl 一致才是该分身的浏览器；其他程序或其他分身占用的端口拒绝连接
+- 内存缓存：分配表在内存中保留一份，查询不访问数据库，写入时同步落盘
+"""
+
+import os
+import sys
+import time
+import socket
+import sqlite3
+import threading
+import logging
+from typing import Dict, Iterable, NamedTuple, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+from cdp_client import get_cdp_client
+from devtools import DEFAULT_HOST, DevToolsError
+
+try:
+    from config import BASE_DEBUG_PORT, FLEET_DB_FILE
+except ImportError:  # config 依赖 pywin32，非Windows环境（基准测试）下使用相同的默认值
+    BASE_DEBUG_PORT = 9222
+    FLEET_DB_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fleet.db")
+
+MIN_PORT = 1024
+MAX_PORT = 65535
+PROBE_TIMEOUT = 1.0
+# 一次分配最多探测的候选端口数
+MAX_PROBES = 256
+ACTIVE_PORT_FILE = "DevToolsActivePort"
+
+PORT_FREE = "free"  # 没有进程监听
+PORT_OWNED = "owned"  # 该分身自己的浏览器正在监听
+PORT_FOREIGN = "foreign"  # 其他程序或其他分身占用
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS debug_ports (
+    number INTEGER PRIMARY KEY,
+    port INTEGER NOT NULL UNIQUE,
+    assigned_at REAL NOT NULL
+)
+"""
+
+
+class PortAllocationError(Exception):
+    """没有可分配的调试端口"""
+
+
+class PortCheck(NamedTuple):
+    """一次端口探测的结果"""
+    port: int
+    status: str  # PORT_FREE / PORT_OWNED / PORT_FOREIGN
+    detail: Optional[str]
+
+    @property
+    def usable(self) -> bool:
+        return self.status != PORT_FOREIGN
+
+
+def is_bindable(port: int, host: str = DEFAULT_HOST) -> bool:
+    """端口能否绑定（没有进程在监听）；不连接端口，Windows 上也不会因连接被拒而等待"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+        if sys.platform != "win32":
+            # 与 Chrome 一致，TIME_WAIT 状态的端口视为空闲（Windows 上该选项含义是抢占端口，不能设置）
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((host, port))
+        return True
+    except OSError:
+        return False
+    finally:
+        sock.close()
+
+
+def read_active_port(user_data_dir: str) -> Optional[Tuple[int, str]]:
+    """读取用户数据目录下的 DevToolsActivePort：(端口, 浏览器 WebSocket 路径)"""
+    try:
+        with open(os.path.join(user_data_dir, ACTIVE_PORT_FILE), "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        return int(lines[0].strip()), lines[1].strip() if len(lines) > 1 else ""
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def match_owner(port: int, version: Optional[dict], user_data_dir: Optional[str]) -> PortCheck:
+    """根据 /json/version 的结果判断正在监听的是不是该用户数据目录的浏览器"""
+    ws_url = version.get("webSocketDebuggerUrl") if isinstance(version, dict) else None
+    if not ws_url:
+        return PortCheck(port, PORT_FOREIGN, "端口被非 DevTools 程序占用")
+    if not user_data_dir:
+        return PortCheck(port, PORT_FOREIGN, "未知用户数据目录，无法确认端口归属")
+    active = read_active_port(user_data_dir)
+    if active is None:
+        return PortCheck(port, PORT_FOREIGN, f"{ACTIVE_PORT_FILE} 不存在，端口属于其他浏览器")
+    if active != (port, urlparse(ws_url).path):
+        return PortCheck(port, PORT_FOREIGN, f"端口属于其他浏览器（{version.get('Browser', '未知')}）")
+    return PortCheck(port, PORT_OWNED, None)
+
+
+class PortAllocator:
+    """调试端口分配表
+
+    用法：
+        allocator = get_port_allocator()
+        port = allocator.prepare_launch(number, user_data_dir)  # 启动前：探测冲突，必要时重新分配
+        check = allocator.check(port, user_data_dir)            # 连接前：确认端口属于该分身
+    """
+
+    def __init__(self, path: str = FLEET_DB_FILE, base: int = BASE_DEBUG_PORT, host: str = DEFAULT_HOST):
+        self.path = path
+        self.base = base
+        self.host = host
+        self.logger = logging.getLogger('PortAllocator')
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        try:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        except sqlite3.DatabaseError as e:
+            self.logger.debug(f"设置数据库参数失败: {e}")
+        self._conn.execute(_SCHEMA)
+        self._ports: Dict[int, int] = dict(self._conn.execute("SELECT number, port FROM debug_ports").fetchall())
+
+    # ---- 分配表 ----
+
+    def assigned(self, number: int) -> Optional[int]:
+        with self._lock:
+            return self._ports.get(number)
+
+    def assignments(self) -> Dict[int, int]:
+        with self._lock:
+            return dict(self._ports)
+
+    def preferred_port(self, number: int) -> int:
+        """基准端口 + 编号，超出端口范围时为 0（由 port_for 另行分配）"""
+        port = self.base + number
+        return port if MIN_PORT <= port <= MAX_PORT else 0
+
+    def port_for(self, number: int) -> int:
+        """分身的端口，未分配时分配一个（只排除分配表中的端口，不探测）"""
+        with self._lock:
+            port = self._ports.get(number)
+            if port is None:
+                port = self._pick(number, exclude=set())
+                self._store(number, port)
+            return port
+
+    def release(self, number: int):
+        with self._lock:
+            if self._ports.pop(number, None) is not None:
+                self._conn.execute("DELETE FROM debug_ports WHERE number = ?", (number,))
+
+    def _store(self, number: int, port: int):
+        self._ports[number] = port
+        self._conn.execute("INSERT OR REPLACE INTO debug_ports VALUES (?, ?, ?)", (number, port, time.time()))
+
+    def _candidates(self, number: int) -> Iterable[int]:
+        preferred = self.preferred_port(number)
+        if preferred:
+            yield preferred
+        # 从基准端口向上查找，到达上限后从最小端口回绕
+        yield from range(max(self.base, MIN_PORT), MAX_PORT + 1)
+        yield from range(MIN_PORT, max(self.base, MIN_PORT))
+
+    def _pick(self, number: int, exclude: Set[int], probe: bool = False) -> int:
+        """选择一个未分配给其他分身的端口；probe 为 True 时同时要求端口能绑定（必须持有锁）"""
+        taken = set(self._ports.values()) | exclude
+        probes = 0
+        for port in self._candidates(number):
+            if port in taken:
+                continue
+            if not probe:
+                return port
+            if is_bindable(port, self.host):
+                return port
+            probes += 1
+            if probes >= MAX_PROBES:
+                break
+        raise PortAllocationError(f"没有可分配给分身 {number} 的调试端口")
+
+    def reassign(self, number: int, avoid: Iterable[int] = ()) -> int:
+        """为分身重新分配一个当前能绑定的端口"""
+        with self._lock:
+            old = self._ports.pop(number, None)
+            try:
+                port = self._pick(number, exclude=set(avoid) | ({old} if old else set()), probe=True)
+            except PortAllocationError:
+                if old is not None:
+                    self._ports[number] = old
+                raise
+            self._store(number, port)
+        self.logger.info(f"分身 {number} 的调试端口由 {old} 改为 {port}")
+        return port
+
+    # ---- 探测 ----
+
+    def check(self, port: int, user_data_dir: Optional[str], timeout: float = PROBE_TIMEOUT) -> PortCheck:
+        """端口是否空闲、属于该分身还是被其他进程占用（同步，用于启动前；不能在客户端事件循环中调用）"""
+        if is_bindable(port, self.host):
+            return PortCheck(port, PORT_FREE, None)
+        client = get_cdp_client()
+        try:
+            version = client.run(client.version(port, timeout))
+        except DevToolsError:
+            version = None
+        return match_owner(port, version, user_data_dir)
+
+    async def check_async(self, port: int, user_data_dir: Optional[str], client, timeout: float = PROBE_TIMEOUT) -> PortCheck:
+        """连接前的归属校验（在 DevTools 客户端事件循环中执行）；端口无响应时视为空闲，由后续请求报告连接失败"""
+        try:
+            version = await client.version(port, timeout)
+        except DevToolsError:
+            return PortCheck(port, PORT_FREE, None)
+        return match_owner(port, version, user_data_dir)
+
+    def prepare_launch(self, number: int, user_data_dir: Optional[str]) -> int:
+        """启动前确定端口：空闲或已被该分身自己占用时沿用，被其他进程占用时重新分配"""
+        port = self.port_for(number)
+        result = self.check(port, user_data_dir)
+        if result.usable:
+            return port
+        self.logger.warning(f"分身 {number} 的调试端口 {port} 冲突: {result.detail}")
+        return self.reassign(number, avoid=[port])
+
+    def close(self):
+        with self._lock:
+            try:
+                self._conn.close()
+            except sqlite3.Error:
+                pass
+
+
+_shared_allocator: Optional[PortAllocator] = None
+_shared_allocator_lock = threading.Lock()
+
+
+def get_port_allocator() -> PortAllocator:
+    """获取进程内共享的端口分配表"""
+    global _shared_allocator
+    with _shared_allocator_lock:
+        if _shared_allocator is None:
+            _shared_allocator = PortAllocator()
+        return _shared_allocator
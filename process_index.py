@@ -0,0 +1,367 @@
+"""
+Chrome进程索引 - 所有需要识别分身进程的功能共享同一份扫描结果
+
+核心设计思想：
+- 一次扫描：每个刷新周期只遍历一次 psutil.process_iter
+- 统一视图：pid → 分身编号 → 用户数据目录 → 浏览器主进程
+- 进程树：每个用户数据目录子树的根即浏览器主进程，与枚举顺序无关
+- 时效控制：在可配置的有效期内直接复用上一次的快照
+- 两阶段扫描：先按进程名筛选，只为Chrome进程读取命令行，并按 (pid, 创建时间) 缓存
+- 线程安全：后台线程与UI线程可以同时读取
+"""
+
+import time
+import threading
+import logging
+from typing import Any, Callable, Dict, Iterable, List, Optional, NamedTuple, Set, Tuple
+
+import psutil
+
+from profile_resolver import get_profile_resolver, normalize_user_data_dir
+
+# 快照默认有效期（秒）
+DEFAULT_MAX_AGE = 1.0
+
+
+class ChromeProcess(NamedTuple):
+    """单个Chrome进程的索引记录"""
+    pid: int
+    name: str
+    exe: Optional[str]
+    cmdline: List[str]
+    user_data_dir: Optional[str]
+    number: Optional[int]
+    is_browser: bool  # 没有 --type= 参数（仅作参考，主进程以进程树为准）
+    ppid: Optional[int] = None
+
+
+class ProfileStats(NamedTuple):
+    """单个分身（用户数据目录）的进程汇总"""
+    user_data_dir: str
+    number: Optional[int]
+    browser_pid: int
+    child_count: int  # 主进程之外的进程数
+    rss: int  # 所有进程的常驻内存合计（字节）
+    cpu_percent: float  # 所有进程的CPU占用合计
+
+
+def build_chrome_process(pid: int, name: str, exe: Optional[str], cmdline: List[str],
+                         ppid: Optional[int] = None) -> ChromeProcess:
+    """由进程基本信息构造索引记录"""
+    identity = get_profile_resolver().resolve(cmdline)
+    is_browser = not any(arg.startswith("--type=") for arg in cmdline)
+    return ChromeProcess(
+        pid=pid,
+        name=name,
+        exe=exe,
+        cmdline=list(cmdline),
+        user_data_dir=identity.user_data_dir,
+        number=identity.number,
+        is_browser=is_browser,
+        ppid=ppid,
+    )
+
+
+class ProcessSnapshot:
+    """某一时刻的Chrome进程表（只读）"""
+
+    def __init__(self, processes: List[ChromeProcess], taken_at: float, scanned_count: int = 0):
+        self.taken_at = taken_at
+        self.scanned_count = scanned_count
+        self.by_pid: Dict[int, ChromeProcess] = {}
+        self.pids_by_number: Dict[int, List[int]] = {}
+        self.pids_by_user_data_dir: Dict[str, List[int]] = {}
+        self.browser_by_number: Dict[int, int] = {}
+        self.browser_by_user_data_dir: Dict[str, int] = {}
+
+        for proc in processes:
+            self.by_pid[proc.pid] = proc
+            if proc.user_data_dir:
+                udd_key = normalize_user_data_dir(proc.user_data_dir)
+                self.pids_by_user_data_dir.setdefault(udd_key, []).append(proc.pid)
+            if proc.number is not None:
+                self.pids_by_number.setdefault(proc.number, []).append(proc.pid)
+
+        # 主进程 = 同一用户数据目录子树的根：其父进程不属于该目录
+        for udd_key, pids in self.pids_by_user_data_dir.items():
+            root = self._find_root(pids)
+            self.browser_by_user_data_dir[udd_key] = root
+            number = self.by_pid[root].number
+            if number is not None:
+                self.browser_by_number.setdefault(number, root)
+
+    def _find_root(self, pids: List[int]) -> int:
+        members = set(pids)
+        roots = [pid for pid in pids if self.by_pid[pid].ppid not in members]
+        # 正常情况下只有一个根；出现多个时（例如父进程信息缺失）优先无 --type= 的进程，再取最小PID，保证结果确定
+        return min(roots or pids, key=lambda pid: (not self.by_pid[pid].is_browser, pid))
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.taken_at
+
+    def __len__(self) -> int:
+        return len(self.by_pid)
+
+    def processes(self) -> List[ChromeProcess]:
+        return list(self.by_pid.values())
+
+    def numbers(self) -> List[int]:
+        """所有能识别出编号的正在运行的分身"""
+        return sorted(self.pids_by_number.keys())
+
+    def get(self, pid: int) -> Optional[ChromeProcess]:
+        return self.by_pid.get(pid)
+
+    def number_for_pid(self, pid: int) -> Optional[int]:
+        proc = self.by_pid.get(pid)
+        return proc.number if proc else None
+
+    def pids_for_number(self, number: int) -> List[int]:
+        return list(self.pids_by_number.get(number, []))
+
+    def browser_pid(self, number: int) -> Optional[int]:
+        """编号对应的浏览器主进程PID（进程树的根）"""
+        return self.browser_by_number.get(number)
+
+    def user_data_dir_for_number(self, number: int) -> Optional[str]:
+        pid = self.browser_pid(number)
+        proc = self.by_pid.get(pid) if pid is not None else None
+        return proc.user_data_dir if proc else None
+
+    def browsers(self) -> List[ChromeProcess]:
+        """每个用户数据目录一个浏览器主进程"""
+        return [self.by_pid[pid] for pid in self.browser_by_user_data_dir.values()]
+
+    def child_count(self, user_data_dir: str) -> int:
+        """用户数据目录下主进程之外的进程数"""
+        pids = self.pids_by_user_data_dir.get(normalize_user_data_dir(user_data_dir), [])
+        return max(len(pids) - 1, 0)
+
+    def unnumbered(self) -> List[ChromeProcess]:
+        """有用户数据目录但目录名无法推断编号的进程"""
+        return [p for p in self.by_pid.values() if p.number is None and p.user_data_dir]
+
+
+class ProcessIndex:
+    """Chrome进程索引服务
+
+    所有调用方通过 snapshot() 读取进程表。快照在 max_age 秒内被复用，
+    过期后由第一个读取者负责重新扫描，其他并发读取者等待同一次扫描结果。
+    """
+
+    def __init__(self, max_age: float = DEFAULT_MAX_AGE, two_phase: bool = True,
+                 process_iter: Optional[Callable[..., Iterable[Any]]] = None):
+        """
+        Args:
+            max_age: 快照有效期（秒）
+            two_phase: 先只取进程名筛选Chrome，再读取候选进程的命令行/路径；
+                False 时对所有进程一次性读取 cmdline/exe（旧的扫描方式）
+            process_iter: 进程枚举函数，默认 psutil.process_iter（基准测试时替换为模拟进程表）
+        """
+        self.max_age = max_age
+        self.two_phase = two_phase
+        self.process_iter = process_iter or psutil.process_iter
+        self._snapshot: Optional[ProcessSnapshot] = None
+        self._lock = threading.Lock()
+        # (pid, create_time) → 索引记录；进程的命令行在其生命周期内不会改变
+        self._detail_cache: Dict[Tuple[int, float], ChromeProcess] = {}
+        # pid → psutil.Process，复用同一对象使 cpu_percent 能计算两次调用间的增量
+        self._proc_handles: Dict[int, Any] = {}
+        self.logger = logging.getLogger('ProcessIndex')
+
+    def snapshot(self, max_age: Optional[float] = None, force: bool = False) -> ProcessSnapshot:
+        """获取进程快照
+
+        Args:
+            max_age: 本次调用允许的最大快照年龄，None 表示使用默认值
+            force: 忽略有效期，强制重新扫描
+        """
+        limit = self.max_age if max_age is None else max_age
+        with self._lock:
+            current = self._snapshot
+            if not force and current is not None and current.age <= limit:
+                return current
+            self._snapshot = self._scan()
+            return self._snapshot
+
+    def invalidate(self):
+        """使当前快照失效（例如启动或关闭分身之后）"""
+        with self._lock:
+            self._snapshot = None
+
+    def _scan(self) -> ProcessSnapshot:
+        started = time.perf_counter()
+        if self.two_phase:
+            processes, scanned_count = self._scan_two_phase()
+        else:
+            processes, scanned_count = self._scan_full()
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.logger.debug(f"进程扫描完成: 共检查 {scanned_count} 个进程, Chrome进程 {len(processes)} 个, 耗时 {elapsed_ms:.1f}ms")
+        return ProcessSnapshot(processes, time.time(), scanned_count)
+
+    def _scan_two_phase(self) -> Tuple[List[ChromeProcess], int]:
+        """第一阶段只取 pid/name；第二阶段只为Chrome进程读取 cmdline/exe（按 pid+创建时间缓存）"""
+        processes = []
+        scanned_count = 0
+        live_keys = set()
+        try:
+            for proc in self.process_iter(['pid', 'name', 'ppid'], ad_value=None):
+                scanned_count += 1
+                try:
+                    name = proc.info.get('name')
+                    if not name or 'chrome.exe' not in name.lower():
+                        continue
+                    pid = proc.info['pid']
+                    key = (pid, proc.create_time())
+                    live_keys.add(key)
+                    record = self._detail_cache.get(key)
+                    if record is None:
+                        cmdline = proc.cmdline()
+                        if not cmdline:
+                            continue
+                        try:
+                            exe = proc.exe()
+                        except (psutil.AccessDenied, psutil.ZombieProcess):
+                            exe = None
+                        record = self._build_record(pid, name, exe, cmdline, proc.info.get('ppid'))
+                        self._detail_cache[key] = record
+                    self._proc_handles[pid] = proc
+                    processes.append(record)
+                except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                    continue
+                except (TypeError, ValueError, AttributeError) as e:
+                    self.logger.debug(f"解析进程信息失败: {e}")
+                    continue
+        except Exception as e:
+            self.logger.error(f"遍历进程列表失败: {e}")
+            return processes, scanned_count
+
+        # 丢弃已退出进程的缓存
+        for key in [k for k in self._detail_cache if k not in live_keys]:
+            del self._detail_cache[key]
+        live_pids = {pid for pid, _ in live_keys}
+        for pid in [p for p in self._proc_handles if p not in live_pids]:
+            del self._proc_handles[pid]
+        return processes, scanned_count
+
+    def _scan_full(self) -> Tuple[List[ChromeProcess], int]:
+        processes = []
+        scanned_count = 0
+        try:
+            for proc in self.process_iter(['pid', 'name', 'cmdline', 'exe', 'ppid'], ad_value=None):
+                scanned_count += 1
+                try:
+                    info = proc.info
+                    name = info.get('name')
+                    cmdline = info.get('cmdline')
+                    if not name or 'chrome.exe' not in name.lower() or not cmdline:
+                        continue
+                    processes.append(self._build_record(info['pid'], name, info.get('exe'), cmdline, info.get('ppid')))
+                    self._proc_handles[info['pid']] = proc
+                except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                    continue
+                except (TypeError, ValueError, AttributeError) as e:
+                    self.logger.debug(f"解析进程信息失败: {e}")
+                    continue
+        except Exception as e:
+            self.logger.error(f"遍历进程列表失败: {e}")
+        return processes, scanned_count
+
+    def _build_record(self, pid: int, name: str, exe: Optional[str], cmdline: List[str],
+                      ppid: Optional[int] = None) -> ChromeProcess:
+        return build_chrome_process(pid, name, exe, cmdline, ppid)
+
+    def profile_stats(self, snapshot: Optional[ProcessSnapshot] = None) -> Dict[str, ProfileStats]:
+        """按用户数据目录汇总进程数、内存与CPU
+
+        CPU占用为两次调用之间的增量，第一次调用时各进程的值为0。
+        """
+        snapshot = snapshot or self.snapshot()
+        with self._lock:
+            return self._collect_stats(snapshot)
+
+    def _collect_stats(self, snapshot: ProcessSnapshot) -> Dict[str, ProfileStats]:
+        stats = {}
+        for udd_key, pids in snapshot.pids_by_user_data_dir.items():
+            rss = 0
+            cpu = 0.0
+            for pid in pids:
+                handle = self._proc_handles.get(pid)
+                try:
+                    if handle is None:
+                        handle = psutil.Process(pid)
+                        self._proc_handles[pid] = handle
+                    rss += handle.memory_info().rss
+                    cpu += handle.cpu_percent(interval=None)
+                except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                    continue
+            browser_pid = snapshot.browser_by_user_data_dir[udd_key]
+            browser = snapshot.by_pid[browser_pid]
+            stats[udd_key] = ProfileStats(
+                user_data_dir=browser.user_data_dir,
+                number=browser.number,
+                browser_pid=browser_pid,
+                child_count=len(pids) - 1,
+                rss=rss,
+                cpu_percent=cpu,
+            )
+        return stats
+
+
+# ---- 各功能共用的识别逻辑（只读快照，不涉及窗口与界面） ----
+
+def number_for_process(snapshot: ProcessSnapshot, pid: int, resolver=None) -> Optional[int]:
+    """进程所属的分身编号；快捷方式目录在记录建立之后才绑定时，按用户数据目录再识别一次"""
+    proc = snapshot.get(pid)
+    if proc is None:
+        return None
+    if proc.number is not None:
+        return proc.number
+    return (resolver or get_profile_resolver()).number_for_user_data_dir(proc.user_data_dir)
+
+
+def browser_candidates(snapshot: ProcessSnapshot, resolver=None) -> Dict[int, ChromeProcess]:
+    """每个分身编号一个浏览器主进程（用户数据目录子树的根，与枚举顺序无关）
+
+    索引记录中仍无编号的用户数据目录再解析一次；同一编号有多个目录时保留先出现的一个
+    """
+    resolver = resolver or get_profile_resolver()
+    udd_to_number = {}
+    for udd_key in {normalize_user_data_dir(p.user_data_dir) for p in snapshot.unnumbered()}:
+        number = resolver.number_for_user_data_dir(udd_key)
+        if number is not None:
+            udd_to_number[udd_key] = number
+    candidates: Dict[int, ChromeProcess] = {}
+    for udd_key, pid in snapshot.browser_by_user_data_dir.items():
+        proc = snapshot.get(pid)
+        number = proc.number if proc.number is not None else udd_to_number.get(udd_key)
+        if number is not None and number not in candidates:
+            candidates[number] = proc
+    return candidates
+
+
+def running_numbers(index: Optional["ProcessIndex"] = None, registry: Any = None) -> Set[int]:
+    """正在运行的分身编号
+
+    Args:
+        registry: 分身运行记录（fleet_registry.FleetRegistry），提供时只按 (pid, 创建时间) 校验记录的进程，
+            记录之外启动的分身由进程监视器随后补报；否则从进程索引完整扫描
+    """
+    if registry is not None:
+        return {entry.number for entry in registry.verify()}
+    return set((index or get_process_index()).snapshot().numbers())
+
+
+_shared_index: Optional[ProcessIndex] = None
+_shared_index_lock = threading.Lock()
+
+
+def get_process_index() -> ProcessIndex:
+    """获取进程内共享的索引实例"""
+    global _shared_index
+    with _shared_index_lock:
+        if _shared_index is None:
+            _shared_index = ProcessIndex()
+        return _shared_index
@@ -0,0 +1,362 @@
+"""
+Chrome分身进程监视器 - 对比相邻两次PID快照，推送分身启动/退出事件
+
+核心设计思想：
+- 廉价轮询：每个周期只调用 psutil.pids()，不读取任何进程详情
+- 增量解析：只对新出现的PID读取名称和命令行，已知PID不再重复解析
+- 事件驱动：分身的第一个进程出现时发布 ProfileStarted，最后一个进程消失时发布 ProfileExited
+- 与索引联动：Chrome进程集合变化时让共享进程索引失效，下次读取自动重新扫描
+- 快速恢复：绑定运行记录后，启动时只校验记录中的主进程，完整扫描推迟到后台第二次轮询
+"""
+
+import time
+import threading
+import logging
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Set, Union
+
+import psutil
+
+from process_index import ChromeProcess, ProcessIndex, build_chrome_process, get_process_index
+from profile_resolver import ProfileResolver, get_profile_resolver
+
+# 默认轮询间隔（秒）
+DEFAULT_INTERVAL = 1.0
+
+
+class ProfileStarted(NamedTuple):
+    """分身启动事件"""
+    number: int
+    pid: int  # 浏览器主进程PID（尚未识别出主进程时为该分身的第一个进程）
+    user_data_dir: Optional[str]
+    timestamp: float
+
+
+class ProfileExited(NamedTuple):
+    """分身退出事件"""
+    number: int
+    pid: int  # 最后记录的浏览器主进程PID
+    user_data_dir: Optional[str]
+    timestamp: float
+
+
+ProfileEvent = Union[ProfileStarted, ProfileExited]
+
+
+class ProcessWatcher:
+    """后台监视分身进程的启动与退出
+
+    订阅者回调在监视线程中执行，需要更新界面时由调用方自行切换到界面线程
+    （Qt 使用信号，tkinter 使用 root.after）。
+    """
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL,
+                 process_index: Optional[ProcessIndex] = None,
+                 profile_resolver: Optional[ProfileResolver] = None):
+        """
+        Args:
+            interval: 轮询间隔（秒）
+            process_index: 用于初始化状态的进程索引，默认使用共享实例
+            profile_resolver: 记录中没有编号时用于补充识别的解析器，默认使用共享实例
+        """
+        self.interval = interval
+        self.process_index = process_index or get_process_index()
+        self.profile_resolver = profile_resolver or get_profile_resolver()
+        self.logger = logging.getLogger('ProcessWatcher')
+
+        self._subscribers: List[Callable[[ProfileEvent], None]] = []
+        self._lock = threading.RLock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+        self.registry: Any = None
+        self._registry_subscriber: Optional[Callable[[ProfileEvent], None]] = None
+
+        self._seeded = False
+        self._reconcile_pending = False
+        self._known_pids: Set[int] = set()
+        self._chrome: Dict[int, ChromeProcess] = {}
+        self._number_by_pid: Dict[int, int] = {}
+        self._pids_by_number: Dict[int, Set[int]] = {}
+        self._browser_by_number: Dict[int, int] = {}
+
+    # ---- 订阅 ----
+
+    def subscribe(self, callback: Callable[[ProfileEvent], None]) -> Callable[[ProfileEvent], None]:
+        with self._lock:
+            if callback not in self._subscribers:
+                self._subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback: Callable[[ProfileEvent], None]):
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def set_registry(self, registry: Any):
+        """绑定分身运行记录（fleet_registry.FleetRegistry），None 表示解除绑定
+
+        绑定后首次轮询从记录恢复状态，之后的启动/退出事件写回记录。
+        需要在 start() 之前调用才能跳过启动时的完整扫描。
+        """
+        with self._lock:
+            if self._registry_subscriber is not None:
+                self.unsubscribe(self._registry_subscriber)
+                self._registry_subscriber = None
+            self.registry = registry
+            if registry is not None:
+                self._registry_subscriber = self.subscribe(registry.on_profile_event)
+
+    # ---- 生命周期 ----
+
+    def start(self):
+        """启动后台线程（重复调用无副作用）"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="ProcessWatcher", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 2.0):
+        self._stop_event.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+        self._thread = None
+
+    def is_alive(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        self.poll()
+        while not self._stop_event.wait(self.interval):
+            self.poll()
+
+    # ---- 查询 ----
+
+    def running_numbers(self) -> List[int]:
+        with self._lock:
+            return sorted(self._pids_by_number.keys())
+
+    def is_running(self, number: int) -> bool:
+        with self._lock:
+            return number in self._pids_by_number
+
+    def browser_pid(self, number: int) -> Optional[int]:
+        with self._lock:
+            return self._browser_by_number.get(number)
+
+    # ---- 轮询 ----
+
+    def poll(self) -> List[ProfileEvent]:
+        """执行一次对比并发布事件，返回本次产生的事件"""
+        try:
+            if not self._seeded:
+                events = self._seed_from_registry() if self.registry is not None else self._seed()
+            elif self._reconcile_pending:
+                events = self._reconcile()
+            else:
+                events = self._diff()
+        except Exception as e:
+            self.logger.error(f"进程监视轮询失败: {e}")
+            return []
+
+        for event in events:
+            self._publish(event)
+        return events
+
+    def _seed(self) -> List[ProfileEvent]:
+        """首次轮询：从完整的索引快照建立初始状态"""
+        current_pids = set(psutil.pids())
+        snapshot = self.process_index.snapshot(force=True)
+        now = time.time()
+        events = []
+        with self._lock:
+            self._known_pids = current_pids
+            for proc in snapshot.processes():
+                if proc.pid in current_pids:
+                    self._add_process(proc)
+            for number in sorted(self._pids_by_number):
+                events.append(self._started_event(number, now))
+            self._seeded = True
+        self.logger.debug(f"进程监视初始化完成: {len(self._chrome)} 个Chrome进程, {len(events)} 个分身")
+        return events
+
+    def _seed_from_registry(self) -> List[ProfileEvent]:
+        """首次轮询（已绑定运行记录）：只校验记录中的主进程，不枚举系统进程
+
+        子进程与记录之外启动的分身由下一次轮询的 _reconcile() 补齐。
+        """
+        current_pids = set(psutil.pids())
+        entries = self.registry.verify()
+        now = time.time()
+        events = []
+        with self._lock:
+            self._known_pids = current_pids
+            for entry in entries:
+                if entry.pid not in current_pids:
+                    continue
+                self._add_process(ChromeProcess(
+                    pid=entry.pid, name="chrome.exe", exe=None, cmdline=[],
+                    user_data_dir=entry.user_data_dir, number=entry.number, is_browser=True))
+            for number in sorted(self._pids_by_number):
+                events.append(self._started_event(number, now))
+            self._seeded = True
+            self._reconcile_pending = True
+        self.logger.debug(f"进程监视从运行记录恢复: {len(events)} 个分身")
+        return events
+
+    def _reconcile(self) -> List[ProfileEvent]:
+        """用一次完整快照校正从运行记录恢复的状态"""
+        snapshot = self.process_index.snapshot(force=True)
+        current_pids = set(psutil.pids())
+        now = time.time()
+        events = []
+        with self._lock:
+            before = set(self._pids_by_number)
+            exited = {number: (self._browser_by_number[number], self._chrome[self._browser_by_number[number]].user_data_dir)
+                      for number in before}
+            self._known_pids = current_pids
+            self._chrome.clear()
+            self._number_by_pid.clear()
+            self._pids_by_number.clear()
+            self._browser_by_number.clear()
+            for proc in snapshot.processes():
+                if proc.pid in current_pids:
+                    self._add_process(proc)
+            after = set(self._pids_by_number)
+            for number in sorted(before - after):
+                pid, user_data_dir = exited[number]
+                events.append(ProfileExited(number, pid, user_data_dir, now))
+            for number in sorted(after - before):
+                events.append(self._started_event(number, now))
+            self._reconcile_pending = False
+        if events:
+            self.logger.info(f"运行记录校正: {len(events)} 个分身状态变化")
+        return events
+
+    def _diff(self) -> List[ProfileEvent]:
+        current_pids = set(psutil.pids())
+        with self._lock:
+            new_pids = current_pids - self._known_pids
+            gone_pids = [pid for pid in self._known_pids - current_pids if pid in self._chrome]
+            self._known_pids = current_pids
+
+        # 只为新PID读取进程详情（锁外执行，避免阻塞查询方）
+        new_records = [record for record in map(self._resolve, new_pids) if record is not None]
+
+        if not new_records and not gone_pids:
+            return []
+
+        now = time.time()
+        events = []
+        with self._lock:
+            before = set(self._pids_by_number)
+            exited = {}
+            for pid in gone_pids:
+                proc = self._chrome.get(pid)
+                if proc is None:
+                    continue
+                number = self._number_by_pid.get(pid)
+                if number is not None:
+                    exited.setdefault(number, (self._browser_by_number.get(number, pid), proc.user_data_dir))
+                self._remove_process(pid)
+            for record in new_records:
+                self._add_process(record)
+
+            after = set(self._pids_by_number)
+            for number in sorted(before - after):
+                pid, user_data_dir = exited.get(number, (0, None))
+                events.append(ProfileExited(number, pid, user_data_dir, now))
+            for number in sorted(after - before):
+                events.append(self._started_event(number, now))
+
+        self.process_index.invalidate()
+        return events
+
+    def _resolve(self, pid: int) -> Optional[ChromeProcess]:
+        try:
+            proc = psutil.Process(pid)
+            name = proc.name()
+            if not name or 'chrome.exe' not in name.lower():
+                return None
+            cmdline = proc.cmdline()
+            if not cmdline:
+                return None
+            try:
+                exe = proc.exe()
+            except (psutil.AccessDenied, psutil.ZombieProcess):
+                exe = None
+            return build_chrome_process(pid, name, exe, cmdline, proc.ppid())
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            return None
+        except Exception as e:
+            self.logger.debug(f"读取进程 {pid} 信息失败: {e}")
+            return None
+
+    # ---- 内部状态维护（调用方持有锁） ----
+
+    def _number_for(self, proc: ChromeProcess) -> Optional[int]:
+        if proc.number is not None:
+            return proc.number
+        if proc.user_data_dir:
+            return self.profile_resolver.number_for_user_data_dir(proc.user_data_dir)
+        return None
+
+    def _add_process(self, proc: ChromeProcess):
+        self._chrome[proc.pid] = proc
+        number = self._number_for(proc)
+        if number is None:
+            return
+        self._number_by_pid[proc.pid] = number
+        self._pids_by_number.setdefault(number, set()).add(proc.pid)
+        self._update_browser(number)
+
+    def _remove_process(self, pid: int):
+        self._chrome.pop(pid, None)
+        number = self._number_by_pid.pop(pid, None)
+        if number is None:
+            return
+        pids = self._pids_by_number.get(number)
+        if pids is not None:
+            pids.discard(pid)
+            if not pids:
+                del self._pids_by_number[number]
+                self._browser_by_number.pop(number, None)
+                return
+        if self._browser_by_number.get(number) == pid:
+            # 主进程退出但子进程还在：在剩余进程中重新找根
+            self._update_browser(number)
+
+    def _update_browser(self, number: int):
+        """主进程 = 该分身进程子树的根（父进程不属于该分身）"""
+        pids = self._pids_by_number[number]
+        roots = [pid for pid in pids if self._chrome[pid].ppid not in pids]
+        self._browser_by_number[number] = min(
+            roots or pids, key=lambda pid: (not self._chrome[pid].is_browser, pid))
+
+    def _started_event(self, number: int, timestamp: float) -> ProfileStarted:
+        pid = self._browser_by_number[number]
+        return ProfileStarted(number, pid, self._chrome[pid].user_data_dir, timestamp)
+
+    def _publish(self, event: ProfileEvent):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            try:
+                callback(event)
+            except Exception as e:
+                self.logger.error(f"处理分身事件失败: {event} - {e}")
+
+
+_shared_watcher: Optional[ProcessWatcher] = None
+_shared_watcher_lock = threading.Lock()
+
+
+def get_process_watcher() -> ProcessWatcher:
+    """获取进程内共享的监视器实例（需要调用 start() 才会开始轮询）"""
+    global _shared_watcher
+    with _shared_watcher_lock:
+        if _shared_watcher is None:
+            _shared_watcher = ProcessWatcher()
+        return _shared_watcher
@@ -0,0 +1,242 @@
+"""
+批量创建分身 - 并行创建缓存目录并直接写入快捷方式，中断后可以继续
+
+核心设计思想：
+- 不用COM：快捷方式由 lnk_file.write_lnk 生成字节写入，不再为每个分身创建 WScript.Shell
+- 并行：目录创建与快捷方式写入分给线程池，去掉逐个分身的固定延时
+- 批量进度：进度回调按时间间隔合并，创建几千个分身时界面不会被逐条状态消息拖慢
+- 可继续：开始前在快捷方式目录写入任务记录，全部成功后删除；
+  已存在且内容一致的分身直接跳过，重新运行同一任务只补齐缺少的部分
+- 模板分身：指定模板目录时，新分身的缓存目录由 profile_template 从模板复制，而不是空目录
+"""
+
+import os
+import json
+import time
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence
+
+from lnk_file import LnkParseError, read_lnk, write_lnk
+from profile_template import ProfileTemplate, has_content
+
+DEFAULT_WORKERS = 8
+PROGRESS_INTERVAL = 0.2  # 进度回调的最小间隔（秒）
+JOB_FILE_NAME = ".profile_creation.json"  # 未完成任务记录，保存在快捷方式目录
+
+
+class CreationJob(NamedTuple):
+    """一次批量创建任务"""
+    chrome_path: str
+    shortcut_dir: str
+    cache_dir: str
+    numbers: List[int]
+    description: str = ""  # 快捷方式备注，{number} 替换为编号
+    forward_slashes: bool = False  # --user-data-dir 路径是否使用正斜杠
+    template_dir: str = ""  # 模板用户数据目录，为空时创建空目录
+
+    def user_data_dir(self, number: int) -> str:
+        path = os.path.join(self.cache_dir, str(number))
+        return path.replace("\\", "/") if self.forward_slashes else path
+
+    def shortcut_path(self, number: int) -> str:
+        return os.path.join(self.shortcut_dir, f"{number}.lnk")
+
+    def arguments(self, number: int) -> str:
+        return f'--user-data-dir="{self.user_data_dir(number)}"'
+
+
+class CreationReport(NamedTuple):
+    """批量创建结果"""
+    created: List[int]
+    skipped: List[int]  # 已存在且内容一致
+    failed: Dict[int, str]  # 编号 → 错误信息
+    elapsed: float
+    cancelled: bool
+
+    @property
+    def completed(self) -> int:
+        """已就绪（新建或已存在）的分身数"""
+        return len(self.created) + len(self.skipped)
+
+    def summary(self) -> str:
+        text = f"新建 {len(self.created)} 个，已存在 {len(self.skipped)} 个"
+        if self.failed:
+            text += f"，失败 {len(self.failed)} 个"
+        if self.cancelled:
+            text += "，已取消"
+        return text + f"，用时 {self.elapsed:.2f}s"
+
+
+# ---- 任务记录 ----
+
+def _job_file(shortcut_dir: str) -> str:
+    return os.path.join(shortcut_dir, JOB_FILE_NAME)
+
+
+def load_pending_job(shortcut_dir: str) -> Optional[CreationJob]:
+    """读取上次未完成的创建任务；没有或记录损坏时返回 None"""
+    try:
+        with open(_job_file(shortcut_dir), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return CreationJob(
+            chrome_path=data["chrome_path"],
+            shortcut_dir=shortcut_dir,
+            cache_dir=data["cache_dir"],
+            numbers=[int(n) for n in data["numbers"]],
+            description=data.get("description", ""),
+            forward_slashes=bool(data.get("forward_slashes", False)),
+            template_dir=data.get("template_dir", ""),
+        )
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def _save_job(job: CreationJob):
+    path = _job_file(job.shortcut_dir)
+    temp_path = path + ".tmp"
+    data = job._asdict()
+    del data["shortcut_dir"]
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(temp_path, path)
+
+
+def clear_pending_job(shortcut_dir: str):
+    try:
+        os.remove(_job_file(shortcut_dir))
+    except OSError:
+        pass
+
+
+# ---- 创建 ----
+
+def is_profile_current(job: CreationJob, number: int) -> bool:
+    """缓存目录已存在，且快捷方式指向同一个 Chrome 并带相同的启动参数"""
+    if not os.path.isdir(job.user_data_dir(number)):
+        return False
+    try:
+        lnk = read_lnk(job.shortcut_path(number))
+    except (OSError, LnkParseError):
+        return False
+    return (os.path.normcase(lnk.target_path) == os.path.normcase(job.chrome_path)
+            and lnk.arguments == job.arguments(number))
+
+
+def create_profile(job: CreationJob, number: int, template: Optional[ProfileTemplate] = None,
+                   clone_workers: int = 1):
+    """创建一个分身的缓存目录与快捷方式；指定模板时从模板复制（已有数据的目录保持不变）"""
+    user_data_dir = job.user_data_dir(number)
+    if template is not None and not has_content(user_data_dir):
+        template.clone(user_data_dir, workers=clone_workers)
+    else:
+        os.makedirs(user_data_dir, exist_ok=True)
+    write_lnk(
+        job.shortcut_path(number),
+        target_path=job.chrome_path,
+        arguments=job.arguments(number),
+        working_dir=os.path.dirname(job.chrome_path),
+        icon_location=f"{job.chrome_path},0",
+        description=job.description.format(number=number) if job.description else "",
+    )
+
+
+class ProfileCreator:
+    """并行执行一次批量创建任务
+
+    用法：
+        job = load_pending_job(shortcut_dir) or CreationJob(chrome_path, shortcut_dir, cache_dir, numbers)
+        report = ProfileCreator(job).run(progress_callback=lambda done, total: ...)
+    """
+
+    def __init__(self, job: CreationJob, workers: int = DEFAULT_WORKERS,
+                 progress_interval: float = PROGRESS_INTERVAL):
+        self.job = job
+        self.workers = max(1, workers)
+        self.progress_interval = progress_interval
+        self.logger = logging.getLogger('ProfileCreator')
+        self._cancel = threading.Event()
+        self.template = ProfileTemplate(job.template_dir) if job.template_dir else None
+
+    def cancel(self):
+        """停止提交剩余分身；任务记录保留，下次可以继续"""
+        self._cancel.set()
+
+    def run(self, progress_callback: Optional[Callable[[int, int], None]] = None) -> CreationReport:
+        """执行任务
+
+        Args:
+            progress_callback: (已处理数, 总数)，在调用线程中按 progress_interval 合并调用，结束时必定调用一次
+
+        Raises:
+            TemplateError: 模板目录不可用
+        """
+        job = self.job
+        numbers = list(dict.fromkeys(job.numbers))
+        total = len(numbers)
+        started = time.perf_counter()
+        created, skipped, failed = [], [], {}
+
+        if self.template is not None:
+            self.template.check()
+        # 分身数少于线程数时，把多出的线程用于单个分身内部的文件复制
+        clone_workers = max(1, self.workers // max(1, total))
+
+        os.makedirs(job.shortcut_dir, exist_ok=True)
+        os.makedirs(job.cache_dir, exist_ok=True)
+        try:
+            _save_job(job)
+        except OSError as e:
+            self.logger.warning(f"写入创建任务记录失败: {e}")
+
+        def work(number: int) -> Optional[bool]:
+            if self._cancel.is_set():
+                return None
+            if is_profile_current(job, number):
+                return False
+            create_profile(job, number, self.template, clone_workers)
+            return True
+
+        done = 0
+        last_report = 0.0
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ProfileCreator") as executor:
+            futures = {executor.submit(work, n): n for n in numbers}
+            for future in as_completed(futures):
+                number = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    failed[number] = str(e)
+                    self.logger.error(f"创建分身 {number} 失败: {e}")
+                    result = None
+                if result is True:
+                    created.append(number)
+                elif result is False:
+                    skipped.append(number)
+                done += 1
+                now = time.monotonic()
+                if progress_callback is not None and now - last_report >= self.progress_interval:
+                    last_report = now
+                    progress_callback(done, total)
+
+        if progress_callback is not None:
+            progress_callback(done, total)
+
+        cancelled = self._cancel.is_set() and len(created) + len(skipped) + len(failed) < total
+        if not failed and not cancelled:
+            clear_pending_job(job.shortcut_dir)
+
+        report = CreationReport(sorted(created), sorted(skipped), failed,
+                                time.perf_counter() - started, cancelled)
+        self.logger.info(report.summary())
+        return report
+
+
+def create_profiles(chrome_path: str, shortcut_dir: str, cache_dir: str, numbers: Sequence[int],
+                    description: str = "", forward_slashes: bool = False, template_dir: str = "",
+                    progress_callback: Optional[Callable[[int, int], None]] = None) -> CreationReport:
+    """批量创建分身的便捷入口"""
+    job = CreationJob(chrome_path, shortcut_dir, cache_dir, list(numbers), description, forward_slashes,
+                      template_dir)
+    return ProfileCreator(job).run(progress_callback)
@@ -0,0 +1,255 @@
+"""
+分身磁盘占用 - 并行统计缓存目录下每个分身的占用，按类别清理已停止分身的缓存
+
+核心设计思想：
+- 按分身并行：每个编号目录是一个任务，线程池中用 os.scandir 非递归遍历，stat 信息直接取自目录项
+- 按类别汇总：位于 Cache、Code Cache、GPUCache、Service Worker、IndexedDB 目录下的文件计入对应类别，其余计入"其他"
+- 只清理已停止的分身：清理前用共享进程索引确认分身未运行（编号与用户数据目录都不在运行，
+  包括 缓存目录\\N\\Data 这类子目录布局），逐个分身再确认一次，运行中的直接跳过
+- 只删类别目录：整个类别目录删除后由 Chrome 在下次启动时重建，不触碰书签、Cookie 等其他数据
+"""
+
+import os
+import time
+import shutil
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence
+
+from process_index import ProcessSnapshot, get_process_index
+from profile_resolver import normalize_user_data_dir
+
+DEFAULT_WORKERS = 8
+# 类别目录只在用户数据目录的前两层中查找（<用户数据目录>/<类别> 或 <用户数据目录>/<Default 等>/<类别>）
+CATEGORY_MAX_DEPTH = 2
+CATEGORIES = ("Cache", "Code Cache", "GPUCache", "Service Worker", "IndexedDB")
+OTHER = "其他"
+# 默认清理的类别：纯缓存，删除不影响登录状态与网站数据
+DEFAULT_PURGE_CATEGORIES = ("Cache", "Code Cache", "GPUCache")
+
+_CATEGORY_BY_NAME = {name.lower(): name for name in CATEGORIES}
+
+
+class ProfileUsage(NamedTuple):
+    """一个分身目录的占用"""
+    number: int
+    path: str
+    total: int  # 字节
+    files: int
+    categories: Dict[str, int]  # 类别 → 字节（含"其他"）
+    category_dirs: Dict[str, List[str]]  # 类别 → 找到的类别目录
+    errors: int  # 无法读取的目录数
+
+
+class DiskReport(NamedTuple):
+    """一次统计的结果"""
+    cache_dir: str
+    profiles: List[ProfileUsage]  # 按编号排序
+    elapsed: float
+
+    @property
+    def total(self) -> int:
+        return sum(p.total for p in self.profiles)
+
+    def category_totals(self) -> Dict[str, int]:
+        totals = {name: 0 for name in CATEGORIES + (OTHER,)}
+        for p in self.profiles:
+            for name, size in p.categories.items():
+                totals[name] += size
+        return totals
+
+    def largest(self, count: int = 10) -> List[ProfileUsage]:
+        return sorted(self.profiles, key=lambda p: p.total, reverse=True)[:count]
+
+    def summary(self) -> str:
+        parts = [f"{len(self.profiles)} 个分身共 {format_size(self.total)}"]
+        parts += [f"{name} {format_size(size)}" for name, size in self.category_totals().items() if size]
+        return "，".join(parts) + f"（统计用时 {self.elapsed:.2f}s）"
+
+
+class PurgeReport(NamedTuple):
+    """一次清理的结果"""
+    purged: Dict[int, int]  # 编号 → 释放的字节
+    skipped_running: List[int]
+    errors: Dict[int, str]
+    elapsed: float
+
+    @property
+    def freed(self) -> int:
+        return sum(self.purged.values())
+
+    def summary(self) -> str:
+        text = f"清理 {len(self.purged)} 个分身，释放 {format_size(self.freed)}"
+        if self.skipped_running:
+            text += f"，跳过运行中 {len(self.skipped_running)} 个"
+        if self.errors:
+            text += f"，失败 {len(self.errors)} 个"
+        return text + f"，用时 {self.elapsed:.2f}s"
+
+
+def format_size(size: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f}{unit}" if unit == "B" else f"{size:.1f}{unit}"
+        size /= 1024
+    return f"{size:.1f}GB"
+
+
+def profile_dirs(cache_dir: str) -> Dict[int, str]:
+    """缓存目录下的编号目录：编号 → 路径（忽略非数字目录，例如复制中的 "N.cloning"）"""
+    result = {}
+    try:
+        with os.scandir(cache_dir) as it:
+            for entry in it:
+                if entry.name.isdigit() and entry.is_dir(follow_symlinks=False):
+                    result[int(entry.name)] = entry.path
+    except OSError:
+        pass
+    return result
+
+
+def measure_profile(number: int, path: str) -> ProfileUsage:
+    """遍历一个分身目录，按类别汇总文件大小"""
+    categories = {name: 0 for name in CATEGORIES + (OTHER,)}
+    category_dirs: Dict[str, List[str]] = {}
+    total = files = errors = 0
+    # (目录, 深度, 所属类别)
+    stack = [(path, 0, OTHER)]
+    while stack:
+        current, depth, category = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            child = category
+                            if category == OTHER and depth < CATEGORY_MAX_DEPTH:
+                                matched = _CATEGORY_BY_NAME.get(entry.name.lower())
+                                if matched:
+                                    child = matched
+                                    category_dirs.setdefault(matched, []).append(entry.path)
+                            stack.append((entry.path, depth + 1, child))
+                        elif entry.is_file(follow_symlinks=False):
+                            size = entry.stat(follow_symlinks=False).st_size
+                            categories[category] += size
+                            total += size
+                            files += 1
+                    except OSError:
+                        errors += 1
+        except OSError:
+            errors += 1
+    return ProfileUsage(number, path, total, files, categories, category_dirs, errors)
+
+
+def is_in_use(usage: ProfileUsage, snapshot: ProcessSnapshot) -> bool:
+    """分身目录是否正被浏览器使用：编号在运行，或某个运行中的用户数据目录就是该目录或位于其下
+    （缓存目录\\N\\Data 这类布局中浏览器的用户数据目录是子目录）"""
+    if usage.number in snapshot.pids_by_number:
+        return True
+    root = normalize_user_data_dir(usage.path)
+    prefix = root.rstrip(os.sep) + os.sep
+    return any(udd == root or udd.startswith(prefix) for udd in snapshot.pids_by_user_data_dir)
+
+
+class ProfileDiskAnalyzer:
+    """统计与清理一个缓存目录下的分身
+
+    用法：
+        analyzer = ProfileDiskAnalyzer(cache_dir)
+        report = analyzer.scan()
+        purge = analyzer.purge(report, ["Cache", "GPUCache"])
+    """
+
+    def __init__(self, cache_dir: str, workers: int = DEFAULT_WORKERS):
+        self.cache_dir = cache_dir
+        self.workers = max(1, workers)
+        self.logger = logging.getLogger('ProfileDiskAnalyzer')
+
+    def scan(self, numbers: Optional[Iterable[int]] = None) -> DiskReport:
+        """并行统计所有（或指定编号的）分身目录"""
+        started = time.perf_counter()
+        dirs = profile_dirs(self.cache_dir)
+        if numbers is not None:
+            wanted = set(numbers)
+            dirs = {n: p for n, p in dirs.items() if n in wanted}
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ProfileDisk") as executor:
+            usages = list(executor.map(lambda item: measure_profile(*item), sorted(dirs.items())))
+        report = DiskReport(self.cache_dir, usages, time.perf_counter() - started)
+        self.logger.info(report.summary())
+        return report
+
+    def purge(self, report: DiskReport, categories: Sequence[str] = DEFAULT_PURGE_CATEGORIES,
+              numbers: Optional[Iterable[int]] = None) -> PurgeReport:
+        """删除已停止分身的指定类别目录
+
+        Args:
+            report: scan() 的结果，提供各分身的类别目录与大小
+            categories: 要清理的类别（CATEGORIES 中的名称）
+            numbers: 只清理这些编号，默认为报告中的全部分身
+        """
+        started = time.perf_counter()
+        unknown = [c for c in categories if c not in CATEGORIES]
+        if unknown:
+            raise ValueError(f"未知的类别: {', '.join(unknown)}")
+        wanted = set(numbers) if numbers is not None else None
+        targets = [p for p in report.profiles
+                   if (wanted is None or p.number in wanted) and any(p.category_dirs.get(c) for c in categories)]
+
+        purged: Dict[int, int] = {}
+        errors: Dict[int, str] = {}
+        skipped: List[int] = []
+
+        def purge_one(usage: ProfileUsage):
+            # 清理每个分身前都重新确认（快照有效期很短），避免删除期间刚被启动的分身
+            if is_in_use(usage, get_process_index().snapshot()):
+                return usage.number, None, None
+            failures = []
+
+            def on_error(func, path, exc_info):
+                failures.append(f"{path}: {exc_info[1]}")
+
+            for category in categories:
+                for directory in usage.category_dirs.get(category, []):
+                    shutil.rmtree(directory, onerror=on_error)
+            freed = sum(usage.categories[c] for c in categories)
+            return usage.number, freed, "; ".join(failures[:3]) if failures else None
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ProfileDisk") as executor:
+            for number, freed, error in executor.map(purge_one, targets):
+                if freed is None:
+                    skipped.append(number)
+                    continue
+                if error:
+                    errors[number] = error
+                    self.logger.warning(f"清理分身 {number} 部分失败: {error}")
+                purged[number] = freed
+
+        result = PurgeReport(purged, sorted(skipped), errors, time.perf_counter() - started)
+        self.logger.info(result.summary())
+        return result
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="统计分身磁盘占用并清理已停止分身的缓存")
+    parser.add_argument("cache_dir", help="分身缓存目录（包含以编号命名的用户数据目录）")
+    parser.add_argument("--top", type=int, default=10, help="列出占用最大的分身数")
+    parser.add_argument("--purge", default="", help=f"要清理的类别，逗号分隔，可选: {', '.join(CATEGORIES)}")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="并行线程数")
+    args = parser.parse_args()
+
+    analyzer = ProfileDiskAnalyzer(args.cache_dir, args.workers)
+    report = analyzer.scan()
+    print(report.summary())
+    for usage in report.largest(args.top):
+        detail = "，".join(f"{name} {format_size(size)}" for name, size in usage.categories.items() if size)
+        print(f"  分身 {usage.number}: {format_size(usage.total)}（{detail}）")
+
+    if args.purge:
+        categories = [c.strip() for c in args.purge.split(",") if c.strip()]
+        print(analyzer.purge(report, categories).summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""
+分身编号解析 - 所有扫描器共用的命令行 → 用户数据目录 → 分身编号 规则
+
+核心设计思想：
+- 一次匹配：--user-data-dir 与 --profile-directory 合并为一个预编译正则，每条命令行只扫描一遍
+- 结果缓存：同一条命令行（Chrome的子进程大量重复）只解析一次
+- 统一约定：目录名 N / chromeN / profileN、快捷方式目录反查、路径中的编号、Profile N 依次尝试
+- 上层路径从严：只认缓存目录下的编号目录与 chromeN / profileN 形式的上层目录，
+  D:\\2024\\work 这类普通数字目录不当作分身编号（否则无关的浏览器会被批量关闭等操作波及）
+"""
+
+import os
+import re
+import time
+import threading
+from typing import Any, Dict, List, NamedTuple, Optional, Union
+
+# 单次扫描同时提取 --user-data-dir（支持带引号与不带引号的写法）与 --profile-directory=Profile N
+PROFILE_ARGS_PATTERN = re.compile(
+    r'--user-data-dir=(?:"(?P<path>[^"]+)"|(?P<path_unquoted>[^\s]+(?:\s+[^\s]+)*?(?=\s*--|\s*$)))'
+    r'|--profile-directory=(?:"Profile\s+(?P<profile_quoted>\d+)"|Profile\s*(?P<profile>\d+))',
+    re.IGNORECASE)
+# 仅提取 --user-data-dir（快捷方式参数等只需要目录的场景）
+USER_DATA_DIR_PATTERN = re.compile(r'--user-data-dir=(?:\"(?P<path>[^"]+)\"|(?P<path_unquoted>[^\s]+(?:\s+[^\s]+)*?(?=\s*--|\s*$)))')
+# 从目录名中提取编号：N、chromeN、profileN
+PROFILE_DIR_NAME_PATTERN = re.compile(r'^(?:chrome|profile)?(\d+)$', re.IGNORECASE)
+# 上层目录只认带前缀的 chromeN、profileN；纯数字的上层目录只在缓存目录下才算编号
+PARENT_DIR_NAME_PATTERN = re.compile(r'^(?:chrome|profile)(\d+)$', re.IGNORECASE)
+
+# 命令行缓存上限，超过后整体清空（正在运行的分身进程的命令行种类远小于此值）
+MAX_CACHED_CMDLINES = 8192
+# 快捷方式目录的最短重新扫描间隔（秒）
+CATALOG_REFRESH_INTERVAL = 1.0
+
+# 编号来源
+SOURCE_DIR_NAME = "dir_name"
+SOURCE_SHORTCUT = "shortcut"
+SOURCE_PATH = "path"
+SOURCE_PROFILE_DIRECTORY = "profile_directory"
+
+
+class ProfileIdentity(NamedTuple):
+    """一条命令行的解析结果"""
+    user_data_dir: Optional[str]
+    number: Optional[int]
+    source: Optional[str]  # 编号来源，无法识别时为 None
+
+
+class _ParsedCmdline(NamedTuple):
+    user_data_dir: Optional[str]
+    dir_number: Optional[int]  # 目录名直接给出的编号
+    path_number: Optional[int]  # 路径上层目录中 chromeN / profileN 的编号
+    profile_number: Optional[int]  # --profile-directory=Profile N
+
+
+def normalize_user_data_dir(path: str) -> str:
+    """规范化用户数据目录，用作字典键"""
+    return os.path.normcase(os.path.normpath(path.strip()))
+
+
+def extract_user_data_dir(cmdline_str: str) -> Optional[str]:
+    """从命令行字符串中提取 --user-data-dir 的值"""
+    match = USER_DATA_DIR_PATTERN.search(cmdline_str)
+    if not match:
+        return None
+    raw_udd = match.group('path') or match.group('path_unquoted')
+    if not raw_udd:
+        return None
+    return os.path.normpath(raw_udd.strip())
+
+
+def number_from_user_data_dir(user_data_dir: Optional[str]) -> Optional[int]:
+    """根据用户数据目录名推断分身编号"""
+    if not user_data_dir:
+        return None
+    match = PROFILE_DIR_NAME_PATTERN.match(os.path.basename(user_data_dir))
+    if match:
+        return int(match.group(1))
+    return None
+
+
+def _path_parts(path: str) -> List[str]:
+    """规范化后的路径各部分（同时接受 \\ 与 / 分隔，便于在非Windows环境下处理Windows路径）"""
+    return [part for part in normalize_user_data_dir(path).replace('\\', '/').split('/') if part]
+
+
+def _number_from_parent_dirs(user_data_dir: str) -> Optional[int]:
+    """目录名本身不含编号时，取上层路径中最近的 chromeN / profileN（例如 D:\\Cache\\chrome12\\Data）"""
+    for part in reversed(_path_parts(user_data_dir)[:-1]):
+        match = PARENT_DIR_NAME_PATTERN.match(part)
+        if match:
+            return int(match.group(1))
+    return None
+
+
+def number_under_cache_dir(user_data_dir: str, cache_dir: Optional[str]) -> Optional[int]:
+    """用户数据目录位于缓存目录下的编号目录中时返回编号（例如 缓存目录\\12\\Data）"""
+    if not cache_dir:
+        return None
+    base = _path_parts(cache_dir)
+    parts = _path_parts(user_data_dir)
+    if len(parts) <= len(base) or parts[:len(base)] != base:
+        return None
+    match = PROFILE_DIR_NAME_PATTERN.match(parts[len(base)])
+    return int(match.group(1)) if match else None
+
+
+class ProfileResolver:
+    """分身编号解析器
+
+    快捷方式目录反查需要先调用 set_catalog() 绑定 ShortcutCatalog，缓存目录下的编号识别需要
+    set_cache_dir()；未绑定时只使用命令行本身的信息。
+    """
+
+    def __init__(self, catalog: Any = None, cache_dir: Optional[str] = None):
+        self.catalog = catalog
+        self.cache_dir = cache_dir or None
+        self._cache: Dict[str, _ParsedCmdline] = {}
+        self._lock = threading.Lock()
+        self._catalog_checked_at = 0.0
+
+    def set_catalog(self, catalog: Any):
+        """绑定快捷方式目录缓存（shortcut_catalog.ShortcutCatalog），None 表示解除绑定"""
+        self.catalog = catalog
+        self._catalog_checked_at = 0.0
+
+    def set_cache_dir(self, cache_dir: Optional[str]):
+        """设置分身缓存目录（其下以编号命名的目录属于对应分身），空值表示不使用"""
+        self.cache_dir = cache_dir or None
+
+    def resolve(self, cmdline: Union[str, List[str]]) -> ProfileIdentity:
+        """解析命令行（字符串或参数列表）得到用户数据目录与分身编号"""
+        cmdline_str = cmdline if isinstance(cmdline, str) else " ".join(cmdline)
+        parsed = self._parse(cmdline_str)
+        return self._identify(parsed)
+
+    def number_for_cmdline(self, cmdline: Union[str, List[str]]) -> Optional[int]:
+        return self.resolve(cmdline).number
+
+    def number_for_user_data_dir(self, user_data_dir: Optional[str]) -> Optional[int]:
+        """只根据用户数据目录识别编号（目录名 → 快捷方式反查 → 上层路径）"""
+        if not user_data_dir:
+            return None
+        number = number_from_user_data_dir(user_data_dir)
+        if number is not None:
+            return number
+        number = self._number_from_catalog(user_data_dir)
+        if number is not None:
+            return number
+        return self._number_from_path(user_data_dir, _number_from_parent_dirs(user_data_dir))
+
+    def clear_cache(self):
+        with self._lock:
+            self._cache.clear()
+
+    def _parse(self, cmdline_str: str) -> _ParsedCmdline:
+        with self._lock:
+            cached = self._cache.get(cmdline_str)
+        if cached is not None:
+            return cached
+
+        user_data_dir = None
+        profile_number = None
+        for match in PROFILE_ARGS_PATTERN.finditer(cmdline_str):
+            raw_udd = match.group('path') or match.group('path_unquoted')
+            if raw_udd:
+                if user_data_dir is None:
+                    user_data_dir = os.path.normpath(raw_udd.strip())
+                continue
+            digits = match.group('profile_quoted') or match.group('profile')
+            if digits and profile_number is None:
+                profile_number = int(digits)
+
+        parsed = _ParsedCmdline(
+            user_data_dir=user_data_dir,
+            dir_number=number_from_user_data_dir(user_data_dir),
+            path_number=_number_from_parent_dirs(user_data_dir) if user_data_dir else None,
+            profile_number=profile_number,
+        )
+        with self._lock:
+            if len(self._cache) >= MAX_CACHED_CMDLINES:
+                self._cache.clear()
+            self._cache[cmdline_str] = parsed
+        return parsed
+
+    def _identify(self, parsed: _ParsedCmdline) -> ProfileIdentity:
+        udd = parsed.user_data_dir
+        if parsed.dir_number is not None:
+            return ProfileIdentity(udd, parsed.dir_number, SOURCE_DIR_NAME)
+        if udd:
+            number = self._number_from_catalog(udd)
+            if number is not None:
+                return ProfileIdentity(udd, number, SOURCE_SHORTCUT)
+        path_number = self._number_from_path(udd, parsed.path_number) if udd else None
+        if path_number is not None:
+            return ProfileIdentity(udd, path_number, SOURCE_PATH)
+        if parsed.profile_number is not None:
+            return ProfileIdentity(udd, parsed.profile_number, SOURCE_PROFILE_DIRECTORY)
+        return ProfileIdentity(udd, None, None)
+
+    def _number_from_path(self, user_data_dir: str, parent_number: Optional[int]) -> Optional[int]:
+        """缓存目录下的编号目录优先，其次是上层的 chromeN / profileN（缓存目录可能变化，不随命令行缓存）"""
+        number = number_under_cache_dir(user_data_dir, self.cache_dir)
+        return number if number is not None else parent_number
+
+    def _number_from_catalog(self, user_data_dir: str) -> Optional[int]:
+        catalog = self.catalog
+        if catalog is None:
+            return None
+        # 限制目录重新扫描的频率，间隔内只查反向索引
+        now = time.time()
+        refresh = now - self._catalog_checked_at >= CATALOG_REFRESH_INTERVAL
+        if refresh:
+            self._catalog_checked_at = now
+        try:
+            return catalog.number_for_user_data_dir(user_data_dir, refresh=refresh)
+        except Exception:
+            return None
+
+
+_shared_resolver: Optional[ProfileResolver] = None
+_shared_resolver_lock = threading.Lock()
+
+
+def get_profile_resolver() -> ProfileResolver:
+    """获取进程内共享的解析器实例"""
+    global _shared_resolver
+    with _shared_resolver_lock:
+        if _shared_resolver is None:
+            _shared_resolver = ProfileResolver()
+        return _shared_resolver
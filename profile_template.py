@@ -0,0 +1,265 @@
+"""
+模板分身 - 把一个已初始化的用户数据目录复制到新分身目录，免去首次启动的初始化
+
+核心设计思想：
+- 只扫描一次：模板目录的文件清单在第一次复制时生成，之后每个新分身直接按清单复制
+- 能共享就不复制：组件目录（按版本号整体替换、不会原地修改）使用硬链接；
+  其他文件优先写时复制（reflink），文件系统不支持时回退为普通复制，某种方式失败一次后不再尝试
+- 排除锁与缓存：Singleton*/LOCK 等锁文件与 Cache、GPUCache 等缓存目录不复制
+- 原子落地：先复制到 "<目录>.cloning"，完成后改名，中断时不会留下半个分身
+- 去掉模板身份：复制后的 Local State 删除统计客户端ID，各分身不共用同一个ID
+"""
+
+import os
+import json
+import time
+import shutil
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, NamedTuple, Optional, Tuple
+
+from process_index import get_process_index
+from profile_resolver import normalize_user_data_dir
+
+try:
+    import fcntl
+except ImportError:  # Windows 没有 fcntl，写时复制交给系统复制接口
+    fcntl = None
+
+try:
+    from _winapi import CopyFile2 as _copy_file2  # Python 3.12+，在 ReFS / Dev Drive 上自动块克隆
+except ImportError:
+    _copy_file2 = None
+
+FICLONE = 0x40049409  # Linux ioctl：整文件写时复制
+STAGING_SUFFIX = ".cloning"
+
+# 不复制的锁文件与缓存（按名称匹配任意层级，不区分大小写）
+EXCLUDED_NAMES = frozenset(name.lower() for name in (
+    "SingletonLock", "SingletonCookie", "SingletonSocket", "lockfile", "LOCK",
+    "Cache", "Code Cache", "GPUCache", "ShaderCache", "GrShaderCache", "GraphiteDawnCache",
+    "DawnCache", "DawnGraphiteCache", "DawnWebGPUCache", "CacheStorage", "ScriptCache",
+    "Crashpad", "Crash Reports", "BrowserMetrics",
+))
+EXCLUDED_SUFFIXES = (".tmp", ".pma")
+
+# 组件更新器按版本号整体安装、替换的顶层目录，文件不会被原地修改，可以硬链接共享
+SHARED_COMPONENT_DIRS = frozenset(name.lower() for name in (
+    "WidevineCdm", "hyphen-data", "ZxcvbnData", "OnDeviceHeadSuggestModel", "SafetyTips",
+    "FirstPartySetsPreloaded", "TrustTokenKeyCommitments", "MEIPreload", "CertificateRevocation",
+    "PKIMetadata", "Crowd Deny", "FileTypePolicies", "OriginTrials", "SSLErrorAssistant",
+    "AutofillStates", "CookieReadinessList", "TpcdMetadata", "PrivacySandboxAttestationsPreloaded",
+    "RecoveryImproved", "pnacl", "Filtering Rules", "AmountExtractionHeuristicRegexes",
+    "OpenCookieDatabase", "WasmTtsEngine", "ProbabilisticRevealTokenRegistry",
+))
+
+LOCAL_STATE = "Local State"
+# Local State 中标识模板本身的统计ID
+METRICS_ID_KEYS = ("client_id2", "client_id_timestamp", "low_entropy_source3",
+                   "pseudo_low_entropy_source", "limited_entropy_randomization_source", "session_id")
+
+METHOD_HARDLINK = "hardlink"
+METHOD_REFLINK = "reflink"
+METHOD_COPY = "copy"
+
+
+class TemplateError(Exception):
+    """模板目录不可用（不存在或正在被 Chrome 使用）"""
+
+
+class TemplateFile(NamedTuple):
+    """模板中的一个文件"""
+    relpath: str
+    size: int
+    shared: bool  # 位于组件目录，可以硬链接
+
+
+class CloneStats(NamedTuple):
+    """一次复制的统计"""
+    files: int
+    bytes: int
+    hardlinked: int
+    reflinked: int
+    copied: int
+    elapsed: float
+
+
+def is_excluded(name: str) -> bool:
+    lowered = name.lower()
+    return lowered in EXCLUDED_NAMES or lowered.endswith(EXCLUDED_SUFFIXES)
+
+
+def has_content(path: str) -> bool:
+    """目录存在且非空"""
+    try:
+        with os.scandir(path) as it:
+            return any(True for _ in it)
+    except OSError:
+        return False
+
+
+def _reflink(src: str, dst: str):
+    """写时复制整个文件；不支持时抛出 OSError"""
+    if fcntl is None:
+        raise OSError("reflink unsupported")
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+    shutil.copystat(src, dst)
+
+
+def _copy(src: str, dst: str):
+    if _copy_file2 is not None:
+        _copy_file2(src, dst, 0)
+    else:
+        shutil.copy2(src, dst)
+
+
+class ProfileTemplate:
+    """一个模板用户数据目录，可以复制到任意多个新分身目录（线程安全）"""
+
+    def __init__(self, template_dir: str, share_components: bool = True):
+        """
+        Args:
+            template_dir: 已用 Chrome 启动并正常关闭过的用户数据目录
+            share_components: 组件目录是否使用硬链接
+        """
+        self.template_dir = os.path.abspath(template_dir)
+        self.share_components = share_components
+        self.logger = logging.getLogger('ProfileTemplate')
+        self._lock = threading.Lock()
+        self._manifest: Optional[Tuple[List[str], List[TemplateFile]]] = None
+        # None 表示尚未尝试；失败一次后置为 False，不再对后续文件尝试
+        self._hardlink_ok: Optional[bool] = None
+        self._reflink_ok: Optional[bool] = None
+
+    # ---- 检查 ----
+
+    def check(self):
+        """模板目录必须存在且没有 Chrome 正在使用"""
+        if not os.path.isfile(os.path.join(self.template_dir, LOCAL_STATE)):
+            raise TemplateError(f"模板目录不是已初始化的用户数据目录: {self.template_dir}")
+        snapshot = get_process_index().snapshot(force=True)
+        if normalize_user_data_dir(self.template_dir) in snapshot.pids_by_user_data_dir:
+            raise TemplateError("模板分身正在运行，请先关闭")
+
+    # ---- 清单 ----
+
+    def manifest(self) -> Tuple[List[str], List[TemplateFile]]:
+        """(目录相对路径列表, 文件列表)，第一次调用时扫描模板目录"""
+        with self._lock:
+            if self._manifest is None:
+                self._manifest = self._scan()
+            return self._manifest
+
+    def _scan(self) -> Tuple[List[str], List[TemplateFile]]:
+        dirs, files = [], []
+        stack = [("", False)]
+        while stack:
+            rel_dir, shared = stack.pop()
+            try:
+                with os.scandir(os.path.join(self.template_dir, rel_dir)) as it:
+                    entries = list(it)
+            except OSError as e:
+                self.logger.warning(f"读取模板目录失败: {rel_dir or '.'} - {e}")
+                continue
+            for entry in entries:
+                if is_excluded(entry.name):
+                    continue
+                rel = os.path.join(rel_dir, entry.name) if rel_dir else entry.name
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        dirs.append(rel)
+                        child_shared = shared or (not rel_dir and entry.name.lower() in SHARED_COMPONENT_DIRS)
+                        stack.append((rel, child_shared))
+                    elif entry.is_file(follow_symlinks=False):
+                        files.append(TemplateFile(rel, entry.stat(follow_symlinks=False).st_size, shared))
+                except OSError:
+                    continue
+        dirs.sort()
+        self.logger.info(f"模板清单: {len(dirs)} 个目录，{len(files)} 个文件，"
+                         f"{sum(f.size for f in files) / (1024 * 1024):.1f}MB")
+        return dirs, files
+
+    # ---- 复制 ----
+
+    def clone(self, target_dir: str, workers: int = 1) -> CloneStats:
+        """把模板复制为 target_dir（目标不存在或为空目录）
+
+        Args:
+            workers: 单个目录内并行复制文件的线程数；批量创建时由外层按分身并行，保持为 1
+        """
+        started = time.perf_counter()
+        if has_content(target_dir):
+            raise TemplateError(f"目标目录已有数据: {target_dir}")
+        dirs, files = self.manifest()
+        staging = target_dir.rstrip("\\/") + STAGING_SUFFIX
+        if os.path.exists(staging):
+            shutil.rmtree(staging, ignore_errors=True)  # 上次中断留下的半成品
+        os.makedirs(staging)
+        for rel in dirs:
+            os.makedirs(os.path.join(staging, rel), exist_ok=True)
+
+        def copy_one(f: TemplateFile) -> str:
+            return self._clone_file(os.path.join(self.template_dir, f.relpath), os.path.join(staging, f.relpath),
+                                    f.shared)
+
+        try:
+            if workers > 1 and len(files) > 1:
+                with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ProfileTemplate") as executor:
+                    methods = list(executor.map(copy_one, files))
+            else:
+                methods = [copy_one(f) for f in files]
+            self._scrub_local_state(os.path.join(staging, LOCAL_STATE))
+            if os.path.isdir(target_dir):
+                os.rmdir(target_dir)  # 已确认为空
+            os.replace(staging, target_dir)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        return CloneStats(
+            files=len(files),
+            bytes=sum(f.size for f in files),
+            hardlinked=methods.count(METHOD_HARDLINK),
+            reflinked=methods.count(METHOD_REFLINK),
+            copied=methods.count(METHOD_COPY),
+            elapsed=time.perf_counter() - started,
+        )
+
+    def _clone_file(self, src: str, dst: str, shared: bool) -> str:
+        if shared and self.share_components and self._hardlink_ok is not False:
+            try:
+                os.link(src, dst)
+                self._hardlink_ok = True
+                return METHOD_HARDLINK
+            except OSError as e:
+                if self._hardlink_ok is None:
+                    self.logger.info(f"无法创建硬链接，改为复制: {e}")
+                self._hardlink_ok = False
+        if self._reflink_ok is not False:
+            try:
+                _reflink(src, dst)
+                self._reflink_ok = True
+                return METHOD_REFLINK
+            except OSError:
+                self._reflink_ok = False
+        _copy(src, dst)
+        return METHOD_COPY
+
+    def _scrub_local_state(self, path: str):
+        """删除 Local State 中模板自身的统计ID，Chrome 首次启动时为每个分身重新生成"""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return
+        metrics = state.get("user_experience_metrics")
+        if not isinstance(metrics, dict) or not any(k in metrics for k in METRICS_ID_KEYS):
+            return
+        for key in METRICS_ID_KEYS:
+            metrics.pop(key, None)
+        # 可能是指向模板的硬链接或共享块，先删除再写入新文件
+        os.remove(path)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False, separators=(",", ":"))
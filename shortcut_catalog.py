@@ -0,0 +1,200 @@
+"""
+快捷方式目录缓存 - 解析一次，按文件修改时间复用
+
+核心设计思想：
+- 直接解析：通过 lnk_file 读取 .lnk 二进制内容，不再逐个调用 WScript.Shell
+- 按需失效：缓存键为 (路径, mtime, 大小)，文件未变化时直接返回上次结果
+- 反向索引：用户数据目录 → 分身编号，供进程识别时 O(1) 查询
+- 目录共享：同一目录的所有调用方共用一个缓存实例
+"""
+
+import os
+import threading
+import logging
+from typing import Dict, List, Optional, NamedTuple, Tuple
+
+from lnk_file import LnkParseError, read_lnk
+from profile_resolver import extract_user_data_dir, normalize_user_data_dir
+
+try:
+    import win32com.client
+    import pythoncom
+except ImportError:  # 非Windows环境下只使用纯Python解析
+    win32com = None
+    pythoncom = None
+
+
+class ShortcutInfo(NamedTuple):
+    """单个快捷方式的缓存记录"""
+    path: str
+    number: Optional[int]  # 文件名为纯数字时的分身编号
+    target_path: str
+    arguments: str
+    working_dir: str
+    icon_location: str
+    user_data_dir: Optional[str]  # 参数中的 --user-data-dir，未指定时为 None
+
+
+def _number_from_filename(path: str) -> Optional[int]:
+    stem, ext = os.path.splitext(os.path.basename(path))
+    if ext.lower() == ".lnk" and stem.isdigit():
+        return int(stem)
+    return None
+
+
+class ShortcutCatalog:
+    """某个快捷方式目录的元数据缓存"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._entries: Dict[str, Tuple[Tuple[float, int], ShortcutInfo]] = {}
+        self._udd_index: Dict[str, int] = {}
+        self._udd_index_dirty = True
+        self._lock = threading.RLock()
+        self.logger = logging.getLogger('ShortcutCatalog')
+
+    def path_for_number(self, number: int) -> str:
+        return os.path.join(self.directory, f"{number}.lnk")
+
+    def get(self, path: str) -> Optional[ShortcutInfo]:
+        """读取单个快捷方式；文件不存在或无法解析时返回 None"""
+        try:
+            st = os.stat(path)
+        except OSError:
+            self.invalidate(path)
+            return None
+        return self._get_with_stat(path, (st.st_mtime, st.st_size))
+
+    def get_number(self, number: int) -> Optional[ShortcutInfo]:
+        """读取编号对应的 N.lnk"""
+        return self.get(self.path_for_number(number))
+
+    def refresh(self) -> List[ShortcutInfo]:
+        """扫描整个目录，只重新解析发生变化的文件"""
+        found = []
+        seen = set()
+        try:
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if not entry.name.lower().endswith(".lnk") or not entry.is_file():
+                        continue
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    seen.add(os.path.normcase(entry.path))
+                    info = self._get_with_stat(entry.path, (st.st_mtime, st.st_size))
+                    if info is not None:
+                        found.append(info)
+        except OSError as e:
+            self.logger.error(f"扫描快捷方式目录失败: {self.directory} - {e}")
+            return found
+
+        with self._lock:
+            removed = [key for key in self._entries if key not in seen]
+            for key in removed:
+                del self._entries[key]
+            if removed:
+                self._udd_index_dirty = True
+        return found
+
+    def numbers(self) -> List[int]:
+        """目录中所有编号快捷方式"""
+        return sorted(info.number for info in self.refresh() if info.number is not None)
+
+    def number_for_user_data_dir(self, user_data_dir: str, refresh: bool = True) -> Optional[int]:
+        """根据用户数据目录反查分身编号
+
+        Args:
+            refresh: 先检查目录中的文件变化；False 时直接查询当前的反向索引
+        """
+        if not user_data_dir:
+            return None
+        if refresh or not self._entries:
+            self.refresh()
+        with self._lock:
+            if self._udd_index_dirty:
+                self._rebuild_udd_index()
+            return self._udd_index.get(normalize_user_data_dir(user_data_dir))
+
+    def invalidate(self, path: Optional[str] = None):
+        """丢弃缓存；修改快捷方式文件后调用"""
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(os.path.normcase(path), None)
+            self._udd_index_dirty = True
+
+    def _get_with_stat(self, path: str, stat_key: Tuple[float, int]) -> Optional[ShortcutInfo]:
+        key = os.path.normcase(path)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None and cached[0] == stat_key:
+                return cached[1]
+
+        info = self._parse(path)
+        with self._lock:
+            if info is None:
+                self._entries.pop(key, None)
+            else:
+                self._entries[key] = (stat_key, info)
+            self._udd_index_dirty = True
+        return info
+
+    def _parse(self, path: str) -> Optional[ShortcutInfo]:
+        try:
+            lnk = read_lnk(path)
+            target_path, arguments = lnk.target_path, lnk.arguments
+            working_dir, icon_location = lnk.working_dir, lnk.icon_location
+        except (OSError, LnkParseError) as e:
+            fields = self._parse_with_com(path)
+            if fields is None:
+                self.logger.warning(f"解析快捷方式失败: {path} - {e}")
+                return None
+            target_path, arguments, working_dir, icon_location = fields
+
+        return ShortcutInfo(
+            path=path,
+            number=_number_from_filename(path),
+            target_path=target_path,
+            arguments=arguments,
+            working_dir=working_dir,
+            icon_location=icon_location,
+            user_data_dir=extract_user_data_dir(arguments) if arguments else None,
+        )
+
+    def _parse_with_com(self, path: str) -> Optional[Tuple[str, str, str, str]]:
+        """纯Python解析失败时退回到 WScript.Shell"""
+        if win32com is None:
+            return None
+        try:
+            pythoncom.CoInitialize()
+            shortcut = win32com.client.Dispatch("WScript.Shell").CreateShortCut(path)
+            return shortcut.TargetPath, shortcut.Arguments, shortcut.WorkingDirectory, shortcut.IconLocation
+        except Exception as e:
+            self.logger.debug(f"COM读取快捷方式失败: {path} - {e}")
+            return None
+
+    def _rebuild_udd_index(self):
+        index = {}
+        for _, info in self._entries.values():
+            if info.number is not None and info.user_data_dir:
+                index.setdefault(normalize_user_data_dir(info.user_data_dir), info.number)
+        self._udd_index = index
+        self._udd_index_dirty = False
+
+
+_catalogs: Dict[str, ShortcutCatalog] = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_shortcut_catalog(directory: str) -> ShortcutCatalog:
+    """获取目录对应的共享缓存实例"""
+    key = os.path.normcase(os.path.abspath(directory))
+    with _catalogs_lock:
+        catalog = _catalogs.get(key)
+        if catalog is None:
+            catalog = ShortcutCatalog(directory)
+            _catalogs[key] = catalog
+        return catalog
@@ -0,0 +1,294 @@
+"""
+分身批量关闭引擎 - 先统一请求正常退出，再只对未退出的进程逐级升级
+
+核心设计思想：
+- 同时发起：所有目标的 Browser.close / WM_CLOSE 并发发出，而不是逐个关闭、逐个等待；
+  Browser.close 经共享 DevTools 客户端的事件循环发送，不为每个端口占用一个线程
+- 一次等待：用一次 psutil.wait_procs 等待整个集合，谁先退出先记录
+- 逐级升级：正常关闭超时后才 terminate，再超时才 kill，且只针对仍存活的进程
+- 计时报告：记录每个分身的关闭方式与耗时
+"""
+
+import time
+import logging
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+import psutil
+
+from cdp_session import SessionPool, get_session_pool
+from devtools import DevToolsError, debug_port_from_cmdline
+from process_index import ProcessSnapshot
+
+try:
+    import win32gui
+    import win32con
+    import win32process
+except ImportError:  # 非Windows环境下只使用 CDP 与进程信号
+    win32gui = None
+    win32con = None
+    win32process = None
+
+# 各阶段默认等待时间（秒）
+DEFAULT_GRACEFUL_TIMEOUT = 5.0
+DEFAULT_TERMINATE_TIMEOUT = 3.0
+DEFAULT_KILL_TIMEOUT = 2.0
+
+# 关闭方式
+METHOD_CDP = "cdp"
+METHOD_WM_CLOSE = "wm_close"
+METHOD_TERMINATE = "terminate"
+METHOD_KILL = "kill"
+METHOD_ALREADY_EXITED = "already_exited"
+METHOD_FAILED = "failed"
+
+
+class ShutdownTarget(NamedTuple):
+    """一个待关闭的浏览器主进程"""
+    pid: int
+    number: Optional[int] = None
+    debug_port: Optional[int] = None
+
+
+class ShutdownResult(NamedTuple):
+    """单个目标的关闭结果"""
+    pid: int
+    number: Optional[int]
+    method: str  # 最终生效的关闭方式
+    elapsed: float  # 从开始关闭到检测到进程退出的秒数
+    closed: bool
+
+
+class ShutdownReport:
+    """一次批量关闭的结果汇总"""
+
+    def __init__(self, results: List[ShutdownResult], elapsed: float):
+        self.results = results
+        self.elapsed = elapsed
+
+    def closed_numbers(self) -> List[int]:
+        return sorted(r.number for r in self.results if r.closed and r.number is not None)
+
+    def failed(self) -> List[ShutdownResult]:
+        return [r for r in self.results if not r.closed]
+
+    def count_by_method(self) -> Dict[str, int]:
+        counts = {}
+        for r in self.results:
+            counts[r.method] = counts.get(r.method, 0) + 1
+        return counts
+
+    def summary(self) -> str:
+        closed = [r for r in self.results if r.closed]
+        parts = [f"共 {len(self.results)} 个, 已关闭 {len(closed)} 个, 总耗时 {self.elapsed:.1f}s"]
+        if closed:
+            slowest = max(closed, key=lambda r: r.elapsed)
+            label = f"#{slowest.number}" if slowest.number is not None else f"PID {slowest.pid}"
+            parts.append(f"最慢 {label} {slowest.elapsed:.1f}s")
+        methods = ", ".join(f"{m}={c}" for m, c in sorted(self.count_by_method().items()))
+        if methods:
+            parts.append(methods)
+        return "; ".join(parts)
+
+
+def targets_for_numbers(snapshot: ProcessSnapshot, numbers: List[int],
+                        debug_ports: Optional[Dict[int, int]] = None) -> List[ShutdownTarget]:
+    """根据编号从进程快照中生成关闭目标（每个编号一个浏览器主进程）"""
+    targets = []
+    for number in numbers:
+        pid = snapshot.browser_pid(number)
+        if pid is None:
+            continue
+        proc = snapshot.get(pid)
+        port = debug_port_from_cmdline(proc.cmdline) if proc else None
+        if port is None and debug_ports:
+            port = debug_ports.get(number)
+        targets.append(ShutdownTarget(pid=pid, number=number, debug_port=port))
+    return targets
+
+
+def targets_for_all(snapshot: ProcessSnapshot) -> List[ShutdownTarget]:
+    """快照中所有Chrome浏览器主进程，包括不带 --user-data-dir 的默认Chrome"""
+    targets = []
+    for proc in snapshot.browsers():
+        targets.append(ShutdownTarget(pid=proc.pid, number=proc.number,
+                                      debug_port=debug_port_from_cmdline(proc.cmdline)))
+    chrome_pids = set(snapshot.by_pid)
+    for proc in snapshot.processes():
+        if not proc.user_data_dir and proc.is_browser and proc.ppid not in chrome_pids:
+            targets.append(ShutdownTarget(pid=proc.pid, number=None,
+                                          debug_port=debug_port_from_cmdline(proc.cmdline)))
+    return targets
+
+
+class ShutdownEngine:
+    """分层关闭：CDP/WM_CLOSE → terminate → kill"""
+
+    def __init__(self, graceful_timeout: float = DEFAULT_GRACEFUL_TIMEOUT,
+                 terminate_timeout: float = DEFAULT_TERMINATE_TIMEOUT,
+                 kill_timeout: float = DEFAULT_KILL_TIMEOUT,
+                 use_cdp: bool = True, use_wm_close: bool = True):
+        self.graceful_timeout = graceful_timeout
+        self.terminate_timeout = terminate_timeout
+        self.kill_timeout = kill_timeout
+        self.use_cdp = use_cdp
+        self.use_wm_close = use_wm_close and win32gui is not None
+        self.logger = logging.getLogger('ShutdownEngine')
+
+    def shutdown(self, targets: List[ShutdownTarget],
+                 progress_callback: Optional[Callable[[ShutdownResult, int, int], None]] = None) -> ShutdownReport:
+        """关闭一组浏览器进程
+
+        Args:
+            targets: 关闭目标
+            progress_callback: 每个目标得出结果时调用 (结果, 已完成数, 总数)，在调用线程中执行
+        """
+        started = time.perf_counter()
+        total = len(targets)
+        results: Dict[int, ShutdownResult] = {}
+        method_by_pid: Dict[int, str] = {}
+        procs: Dict[int, psutil.Process] = {}
+        targets_by_pid = {t.pid: t for t in targets}
+
+        def record(pid: int, method: str, closed: bool):
+            if pid in results:
+                return
+            target = targets_by_pid[pid]
+            result = ShutdownResult(pid, target.number, method, time.perf_counter() - started, closed)
+            results[pid] = result
+            if progress_callback:
+                try:
+                    progress_callback(result, len(results), total)
+                except Exception as e:
+                    self.logger.debug(f"关闭进度回调失败: {e}")
+
+        for target in targets_by_pid.values():
+            try:
+                procs[target.pid] = psutil.Process(target.pid)
+            except psutil.NoSuchProcess:
+                record(target.pid, METHOD_ALREADY_EXITED, True)
+            except psutil.AccessDenied:
+                record(target.pid, METHOD_FAILED, False)
+
+        # 第一阶段：同时请求所有浏览器正常退出
+        self._request_graceful_close([targets_by_pid[pid] for pid in procs], method_by_pid)
+        alive = self._wait(procs, method_by_pid, self.graceful_timeout, record)
+
+        # 第二阶段：只对未退出的进程 terminate
+        if alive:
+            self.logger.info(f"{len(alive)} 个进程未在 {self.graceful_timeout}s 内正常退出，发送 terminate")
+            alive = self._escalate(alive, METHOD_TERMINATE, self.terminate_timeout, method_by_pid, record)
+
+        # 第三阶段：仍未退出的进程 kill
+        if alive:
+            self.logger.warning(f"{len(alive)} 个进程 terminate 后仍未退出，强制结束")
+            alive = self._escalate(alive, METHOD_KILL, self.kill_timeout, method_by_pid, record)
+
+        for proc in alive:
+            record(proc.pid, METHOD_FAILED, False)
+
+        report = ShutdownReport([results[t.pid] for t in targets if t.pid in results],
+                                time.perf_counter() - started)
+        self.logger.info(f"批量关闭完成: {report.summary()}")
+        return report
+
+    def _request_graceful_close(self, targets: List[ShutdownTarget], method_by_pid: Dict[int, str]):
+        if not targets:
+            return
+        needs_window_close = []
+        cdp_targets = [t for t in targets if self.use_cdp and t.debug_port]
+        if cdp_targets:
+            pool = get_session_pool()
+            outcomes = pool.client.run(self._close_via_cdp(pool, cdp_targets))
+            for target, ok in zip(cdp_targets, outcomes):
+                if ok:
+                    method_by_pid[target.pid] = METHOD_CDP
+                else:
+                    needs_window_close.append(target)
+        needs_window_close.extend(t for t in targets if not (self.use_cdp and t.debug_port))
+
+        if needs_window_close and self.use_wm_close:
+            hwnds_by_pid = self._top_level_windows({t.pid for t in needs_window_close})
+            for target in needs_window_close:
+                for hwnd in hwnds_by_pid.get(target.pid, []):
+                    try:
+                        win32gui.PostMessage(hwnd, win32con.WM_CLOSE, 0, 0)
+                        method_by_pid[target.pid] = METHOD_WM_CLOSE
+                    except Exception as e:
+                        self.logger.debug(f"发送 WM_CLOSE 失败 (HWND: {hwnd}): {e}")
+
+    async def _close_via_cdp(self, pool: SessionPool, targets: List[ShutdownTarget]) -> List[bool]:
+        """在客户端事件循环中同时向所有目标发送 Browser.close，已有的持久会话直接复用"""
+        async def close_one(target: ShutdownTarget) -> bool:
+            try:
+                await pool.get(target.debug_port).close_browser()
+                return True
+            except DevToolsError as e:
+                self.logger.debug(f"CDP 关闭失败 (PID: {target.pid}, 端口: {target.debug_port}): {e}")
+                return False
+            finally:
+                # 浏览器即将退出，关闭会话以免被当作断线重连
+                await pool.drop(target.debug_port)
+
+        return [ok is True for ok in await pool.client.gather(close_one(t) for t in targets)]
+
+    def _top_level_windows(self, pids) -> Dict[int, List[int]]:
+        """一次枚举得到目标进程的所有可见顶层Chrome窗口"""
+        result: Dict[int, List[int]] = {}
+
+        def callback(hwnd, _):
+            try:
+                if win32gui.IsWindowVisible(hwnd) and win32gui.GetClassName(hwnd) == "Chrome_WidgetWin_1":
+                    _, pid = win32process.GetWindowThreadProcessId(hwnd)
+                    if pid in pids:
+                        result.setdefault(pid, []).append(hwnd)
+            except Exception:
+                pass
+            return True
+
+        try:
+            win32gui.EnumWindows(callback, None)
+        except Exception as e:
+            self.logger.debug(f"枚举窗口失败: {e}")
+        return result
+
+    def _wait(self, procs: Dict[int, psutil.Process], method_by_pid: Dict[int, str], timeout: float,
+              record: Callable[[int, str, bool], None]) -> List[psutil.Process]:
+        pending = [p for pid, p in procs.items() if pid in method_by_pid]
+        # 没有收到任何正常关闭请求的进程直接进入下一阶段
+        skipped = [p for pid, p in procs.items() if pid not in method_by_pid]
+        if not pending:
+            return skipped
+
+        def on_gone(proc):
+            record(proc.pid, method_by_pid[proc.pid], True)
+
+        _, alive = psutil.wait_procs(pending, timeout=timeout, callback=on_gone)
+        return list(alive) + skipped
+
+    def _escalate(self, alive: List[psutil.Process], method: str, timeout: float,
+                  method_by_pid: Dict[int, str], record: Callable[[int, str, bool], None]) -> List[psutil.Process]:
+        signalled = []
+        for proc in alive:
+            try:
+                if method == METHOD_KILL:
+                    proc.kill()
+                else:
+                    proc.terminate()
+                method_by_pid[proc.pid] = method
+                signalled.append(proc)
+            except psutil.NoSuchProcess:
+                record(proc.pid, method_by_pid.get(proc.pid, method), True)
+            except psutil.AccessDenied as e:
+                self.logger.error(f"无权限结束进程 {proc.pid}: {e}")
+                record(proc.pid, METHOD_FAILED, False)
+        return self._wait({p.pid: p for p in signalled}, method_by_pid, timeout, record)
+
+
+def format_timings(report: ShutdownReport, limit: int = 10) -> List[str]:
+    """每个分身一行的计时明细（按耗时从长到短）"""
+    lines = []
+    for r in sorted(report.results, key=lambda r: r.elapsed, reverse=True)[:limit]:
+        label = f"分身 {r.number}" if r.number is not None else f"PID {r.pid}"
+        state = "已关闭" if r.closed else "未关闭"
+        lines.append(f"{label}: {state} ({r.method}, {r.elapsed:.2f}s)")
+    return lines
@@ -0,0 +1,185 @@
+"""
+分身直接启动 - 用快捷方式缓存中的目标、参数、工作目录直接创建 chrome.exe 进程
+
+核心设计思想：
+- 不经过 shell：不再 cmd /c start 快捷方式，省去中间的 cmd/explorer 进程
+- 立即得到PID：Popen 返回的就是 Chrome 浏览器主进程，可直接写入运行记录
+- 参数在内存中组装：按 Windows 命令行规则拆分快捷方式参数，再替换或追加调试端口
+- 可移植：目标程序可以是任意可执行文件，非Windows环境下用桩程序验证
+"""
+
+import os
+import subprocess
+import logging
+from typing import Any, List, NamedTuple, Optional
+
+import psutil
+
+from devtools import REMOTE_DEBUGGING_PORT_PATTERN, debug_port_from_cmdline
+from profile_resolver import extract_user_data_dir
+
+logger = logging.getLogger('Spawner')
+
+# Chrome 是GUI程序：脱离启动器的控制台与进程组，启动器退出不影响分身
+if os.name == "nt":
+    CREATION_FLAGS = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+else:
+    CREATION_FLAGS = 0
+
+
+class SpawnError(Exception):
+    """无法直接启动分身（快捷方式信息不完整或创建进程失败）"""
+
+
+class LaunchSpec(NamedTuple):
+    """一次分身启动所需的全部信息"""
+    number: int
+    executable: str
+    args: List[str]  # 不含可执行文件本身
+    working_dir: Optional[str]
+    user_data_dir: Optional[str]
+    debug_port: Optional[int]
+
+
+class LaunchedProfile(NamedTuple):
+    """已创建的分身进程"""
+    number: int
+    pid: int
+    create_time: Optional[float]
+    user_data_dir: Optional[str]
+    debug_port: Optional[int]
+
+
+def split_command_line(command_line: str) -> List[str]:
+    """按 CommandLineToArgvW 的规则拆分参数字符串
+
+    - 空白分隔参数，双引号内的空白属于参数本身
+    - 2n 个反斜杠 + 引号 → n 个反斜杠，引号切换引用状态
+    - 2n+1 个反斜杠 + 引号 → n 个反斜杠 + 字面引号
+    - 其他位置的反斜杠按原样保留（Windows 路径不受影响）
+    """
+    args = []
+    buf = []
+    in_quotes = False
+    has_arg = False
+    i = 0
+    n = len(command_line)
+    while i < n:
+        c = command_line[i]
+        if c == '\\':
+            j = i
+            while j < n and command_line[j] == '\\':
+                j += 1
+            count = j - i
+            if j < n and command_line[j] == '"':
+                buf.append('\\' * (count // 2))
+                if count % 2:
+                    buf.append('"')
+                    j += 1
+            else:
+                buf.append('\\' * count)
+            has_arg = True
+            i = j
+        elif c == '"':
+            if in_quotes and i + 1 < n and command_line[i + 1] == '"':
+                buf.append('"')  # 引号内连续两个引号表示一个字面引号
+                i += 2
+            else:
+                in_quotes = not in_quotes
+                i += 1
+            has_arg = True
+        elif c in ' \t' and not in_quotes:
+            if has_arg:
+                args.append(''.join(buf))
+                buf = []
+                has_arg = False
+            i += 1
+        else:
+            buf.append(c)
+            has_arg = True
+            i += 1
+    if has_arg:
+        args.append(''.join(buf))
+    return args
+
+
+def with_debug_port(args: List[str], debug_port: int) -> List[str]:
+    """替换已有的 --remote-debugging-port，没有时追加"""
+    option = f"--remote-debugging-port={debug_port}"
+    replaced = False
+    result = []
+    for arg in args:
+        if REMOTE_DEBUGGING_PORT_PATTERN.match(arg):
+            if not replaced:
+                result.append(option)
+                replaced = True
+            continue
+        result.append(arg)
+    if not replaced:
+        result.append(option)
+    return result
+
+
+def build_launch_spec(shortcut_info: Any, number: int, debug_port: Optional[int] = None) -> LaunchSpec:
+    """由快捷方式缓存记录（shortcut_catalog.ShortcutInfo）组装启动参数
+
+    Args:
+        debug_port: 指定时替换/追加 --remote-debugging-port，None 时沿用快捷方式中的设置
+    """
+    if shortcut_info is None or not shortcut_info.target_path:
+        raise SpawnError(f"分身 {number} 的快捷方式没有目标程序")
+    args = split_command_line(shortcut_info.arguments or "")
+    if debug_port is not None:
+        args = with_debug_port(args, debug_port)
+    return LaunchSpec(
+        number=number,
+        executable=shortcut_info.target_path,
+        args=args,
+        working_dir=shortcut_info.working_dir or None,
+        user_data_dir=extract_user_data_dir(" ".join(args)),
+        debug_port=debug_port if debug_port is not None else debug_port_from_cmdline(args),
+    )
+
+
+def spawn(spec: LaunchSpec, registry: Any = None) -> LaunchedProfile:
+    """直接创建分身进程，立即返回其PID
+
+    Args:
+        registry: 分身运行记录（fleet_registry.FleetRegistry），提供时写入新进程；
+            该分身已有存活记录时不覆盖（此时新进程只会把请求转交给已运行的实例后退出）
+    """
+    working_dir = spec.working_dir if spec.working_dir and os.path.isdir(spec.working_dir) else None
+    try:
+        proc = subprocess.Popen(
+            [spec.executable] + list(spec.args),
+            cwd=working_dir,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            close_fds=True,
+            creationflags=CREATION_FLAGS,
+        )
+    except OSError as e:
+        raise SpawnError(f"启动分身 {spec.number} 失败: {e}") from e
+
+    try:
+        create_time = psutil.Process(proc.pid).create_time()
+    except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+        create_time = None
+
+    launched = LaunchedProfile(spec.number, proc.pid, create_time, spec.user_data_dir, spec.debug_port)
+    if registry is not None and create_time is not None:
+        try:
+            existing = registry.get(spec.number)
+            if existing is None or not registry.is_alive(existing):
+                registry.record_launch(spec.number, proc.pid, create_time,
+                                       user_data_dir=spec.user_data_dir, debug_port=spec.debug_port)
+        except Exception as e:
+            logger.warning(f"写入分身 {spec.number} 运行记录失败: {e}")
+    return launched
+
+
+def spawn_from_shortcut(shortcut_info: Any, number: int, debug_port: Optional[int] = None,
+                        registry: Any = None) -> LaunchedProfile:
+    """build_launch_spec + spawn"""
+    return spawn(build_launch_spec(shortcut_info, number, debug_port), registry)
@@ -0,0 +1,319 @@
+"""
+标签页清单 - 订阅 Target.setDiscoverTargets 事件，在内存中维护每个分身的实时标签页列表
+
+核心设计思想：
+- 事件驱动：每个分身的持久会话连接后订阅目标发现，targetCreated/targetDestroyed/targetInfoChanged
+  增量更新清单，不再为每次操作轮询 /json/list
+- 零延迟读取：清单在客户端事件循环中更新，界面与标签页操作随时从任意线程读取不可变快照
+- 过期标记：连接断开时清单保留最后的内容但标记为过期（记录断开时间与原因），调用方据此决定是否回退到 HTTP 查询
+- 自动重连：关注的端口断开后按指数退避重新连接，重连成功时清空并重新订阅，订阅应答到达后恢复为最新
+- 确认归属：关注时提供用户数据目录的端口，每次连接后先确认是该分身的浏览器，其他程序占用时断开并停止关注
+"""
+
+import time
+import asyncio
+import threading
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from cdp_session import CdpSession, SessionPool, get_session_pool
+from devtools import DevToolsError
+from port_allocator import get_port_allocator
+
+RECONNECT_DELAY = 0.5  # 首次重连等待（秒）
+MAX_RECONNECT_DELAY = 30.0
+
+
+class TabEntry(NamedTuple):
+    """一个目标（标签页、扩展后台页、Service Worker 等）"""
+    target_id: str
+    type: str
+    url: str
+    title: str
+    opener_id: Optional[str]
+
+    @classmethod
+    def from_info(cls, info: Dict[str, Any]) -> "TabEntry":
+        return cls(info.get("targetId", ""), info.get("type", ""), info.get("url", ""),
+                   info.get("title", ""), info.get("openerId"))
+
+    def as_json_target(self) -> Dict[str, Any]:
+        """转换为 /json/list 的字段格式，供 tab_ops 的计划函数使用"""
+        return {"id": self.target_id, "type": self.type, "url": self.url, "title": self.title}
+
+
+class ProfileTabs(NamedTuple):
+    """一个分身的标签页清单快照"""
+    port: int
+    targets: Tuple[TabEntry, ...]  # 新建的目标在前
+    synced: bool  # 已订阅且连接未断开
+    updated_at: Optional[float]  # time.monotonic()，最近一次事件或订阅应答
+    stale_since: Optional[float]  # 断开时间，最新时为 None
+    last_error: Optional[str]
+
+    @property
+    def stale(self) -> bool:
+        return not self.synced
+
+    def pages(self) -> List[TabEntry]:
+        return [t for t in self.targets if t.type == "page"]
+
+    def describe(self) -> str:
+        """界面显示用：标签页数量，过期时附加说明"""
+        if self.updated_at is None:
+            return "连接中" if self.last_error is None else "未连接"
+        text = str(len(self.pages()))
+        if self.stale:
+            text += "（已断开）"
+        return text
+
+
+def _cancel_task(task: Optional[asyncio.Task]):
+    """取消后台任务；由任务自身触发时（如订阅中发现端口被占用而停止关注）不取消自己"""
+    if task is not None and not task.done() and task is not asyncio.current_task():
+        task.cancel()
+
+
+class _ProfileState:
+    """事件循环中维护的可变状态"""
+    __slots__ = ("session", "targets", "synced", "updated_at", "stale_since", "last_error", "subscribe_task")
+
+    def __init__(self, session: CdpSession):
+        self.session = session
+        self.targets: "OrderedDict[str, TabEntry]" = OrderedDict()
+        self.synced = False
+        self.updated_at: Optional[float] = None
+        self.stale_since: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.subscribe_task: Optional[asyncio.Task] = None  # 连接后在后台进行的订阅
+
+    def snapshot(self, port: int) -> ProfileTabs:
+        return ProfileTabs(port, tuple(self.targets.values()), self.synced, self.updated_at,
+                           self.stale_since, self.last_error)
+
+
+class TabInventory:
+    """所有分身的标签页清单，挂接在会话池上
+
+    用法：
+        inventory = get_tab_inventory()
+        pool.client.submit(inventory.watch(port))   # 分身启动后
+        tabs = inventory.snapshot(port)             # 任意线程，零延迟
+        if tabs and not tabs.stale: ...
+    """
+
+    def __init__(self, pool: Optional[SessionPool] = None):
+        self.pool = pool or get_session_pool()
+        self.logger = logging.getLogger('TabInventory')
+        self._lock = threading.Lock()  # 保护 _states 的读写（写入只发生在事件循环中）
+        self._states: Dict[int, _ProfileState] = {}
+        self._watched: Dict[int, Optional[asyncio.Task]] = {}  # 端口 → 重连任务，只在事件循环中访问
+        self._owners: Dict[int, str] = {}  # 端口 → 期望的用户数据目录，只在事件循环中访问
+        self.pool.add_created_listener(self._attach)
+
+    # ---- 读取（任意线程） ----
+
+    def snapshot(self, port: int) -> Optional[ProfileTabs]:
+        with self._lock:
+            state = self._states.get(port)
+            return state.snapshot(port) if state is not None else None
+
+    def snapshots(self) -> Dict[int, ProfileTabs]:
+        with self._lock:
+            return {port: state.snapshot(port) for port, state in self._states.items()}
+
+    def fresh_targets(self, session: CdpSession) -> Optional[List[Dict[str, Any]]]:
+        """会话的清单最新时返回 /json/list 格式的目标列表，否则返回 None（调用方应回退到 HTTP 查询）"""
+        with self._lock:
+            state = self._states.get(session.port)
+            if state is None or state.session is not session or not state.synced:
+                return None
+            return [t.as_json_target() for t in state.targets.values()]
+
+    # ---- 关注端口（在事件循环中调用） ----
+
+    async def watch(self, port: int, user_data_dir: Optional[str] = None):
+        """保持端口的会话连接并订阅目标事件；连接失败时在后台重试，直到 unwatch()
+
+        Args:
+            user_data_dir: 提供时每次连接后校验端口归属，不属于该目录的浏览器时停止关注
+        """
+        owner_changed = bool(user_data_dir) and self._owners.get(port) != user_data_dir
+        if user_data_dir:
+            self._owners[port] = user_data_dir
+        if port not in self._watched:
+            self._watched[port] = None
+        session = self.pool.get(port)
+        if self._state_for(session) is None:
+            # 会话在清单创建之前就已存在
+            self._attach(session)
+        if not session.connected:
+            self._schedule_reconnect(port)
+        elif owner_changed or not self._state_for(session).synced:
+            # 已连接的会话不会再触发连接回调，直接校验并订阅
+            await self._subscribe(session)
+
+    async def unwatch(self, port: int):
+        _cancel_task(self._watched.pop(port, None))
+        self._owners.pop(port, None)
+        with self._lock:
+            state = self._states.pop(port, None)
+        if state is not None:
+            _cancel_task(state.subscribe_task)
+
+    def watched_ports(self) -> List[int]:
+        return list(self._watched)
+
+    # ---- 会话回调 ----
+
+    def _attach(self, session: CdpSession):
+        port = session.port
+        with self._lock:
+            self._states[port] = _ProfileState(session)
+
+        def on_event(method: str, params: Dict[str, Any], session_id: Optional[str]):
+            if session_id is None:
+                self._apply_event(session, method, params)
+
+        def on_state(connected: bool):
+            if not connected:
+                self._on_disconnected(session)
+
+        session.add_event_listener(on_event)
+        session.add_state_listener(on_state)
+        session.add_connect_hook(self._on_connected)
+
+    def _state_for(self, session: CdpSession) -> Optional[_ProfileState]:
+        state = self._states.get(session.port)
+        return state if state is not None and state.session is session else None
+
+    async def _on_connected(self, session: CdpSession):
+        # 订阅在后台进行，不推迟触发连接的那条命令
+        state = self._state_for(session)
+        if state is not None:
+            _cancel_task(state.subscribe_task)
+            state.subscribe_task = asyncio.ensure_future(self._subscribe(session))
+
+    async def _subscribe(self, session: CdpSession):
+        """（重新）连接后重建清单：订阅后用 Target.getTargets 补齐已有目标（重复订阅时不会再收到 targetCreated）"""
+        with self._lock:
+            state = self._state_for(session)
+            if state is None:
+                return
+            state.targets.clear()
+            state.synced = False
+        if not session.connected:
+            # 订阅任务开始前连接已断开，等待下一次连接
+            return
+        owner = self._owners.get(session.port)
+        if owner:
+            check = await get_port_allocator().check_async(session.port, owner, session.client)
+            if not check.usable:
+                self.logger.warning(f"端口 {session.port} 不属于 {owner}，停止关注: {check.detail}")
+                await self.unwatch(session.port)
+                await self.pool.drop(session.port)
+                return
+        try:
+            await session.send("Target.setDiscoverTargets", {"discover": True})
+            infos = (await session.send("Target.getTargets")).get("targetInfos", [])
+        except DevToolsError as e:
+            with self._lock:
+                state.last_error = str(e)
+            if session.connected:
+                self.logger.warning(f"端口 {session.port} 订阅目标事件失败: {e}")
+            else:
+                self.logger.debug(f"端口 {session.port} 订阅时连接断开: {e}")
+            return
+        with self._lock:
+            for info in infos:
+                entry = TabEntry.from_info(info)
+                if entry.target_id and entry.target_id not in state.targets:
+                    state.targets[entry.target_id] = entry
+            if session.connected:
+                state.synced = True
+                state.updated_at = time.monotonic()
+                state.stale_since = None
+                state.last_error = None
+
+    def _apply_event(self, session: CdpSession, method: str, params: Dict[str, Any]):
+        if method not in ("Target.targetCreated", "Target.targetDestroyed", "Target.targetInfoChanged"):
+            return
+        with self._lock:
+            state = self._state_for(session)
+            if state is None:
+                return
+            if method == "Target.targetDestroyed":
+                state.targets.pop(params.get("targetId", ""), None)
+            else:
+                entry = TabEntry.from_info(params.get("targetInfo", {}))
+                if not entry.target_id:
+                    return
+                is_new = entry.target_id not in state.targets
+                state.targets[entry.target_id] = entry
+                if method == "Target.targetCreated" and is_new:
+                    state.targets.move_to_end(entry.target_id, last=False)
+            state.updated_at = time.monotonic()
+
+    def _on_disconnected(self, session: CdpSession):
+        port = session.port
+        with self._lock:
+            state = self._state_for(session)
+            if state is None:
+                return
+            _cancel_task(state.subscribe_task)
+            state.subscribe_task = None
+            if session.closed:
+                # 会话被主动关闭（分身已退出），清单不再有意义
+                del self._states[port]
+            else:
+                state.synced = False
+                state.stale_since = session.disconnected_at or time.monotonic()
+                state.last_error = session.last_error
+        if session.closed:
+            _cancel_task(self._watched.pop(port, None))
+            self._owners.pop(port, None)
+        elif port in self._watched:
+            self._schedule_reconnect(port)
+
+    # ---- 重连 ----
+
+    def _schedule_reconnect(self, port: int):
+        task = self._watched.get(port)
+        if task is None or task.done():
+            self._watched[port] = asyncio.ensure_future(self._reconnect(port))
+
+    async def _reconnect(self, port: int):
+        delay = RECONNECT_DELAY
+        first = True
+        while port in self._watched:
+            if not first:
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, MAX_RECONNECT_DELAY)
+            first = False
+            session = self.pool.get(port)
+            if session.connected:
+                return
+            try:
+                await session.connect()
+                return
+            except DevToolsError as e:
+                with self._lock:
+                    state = self._state_for(session)
+                    if state is not None:
+                        state.last_error = str(e)
+                        if state.stale_since is None and state.updated_at is not None:
+                            state.stale_since = time.monotonic()
+
+
+_shared_inventory: Optional[TabInventory] = None
+_shared_inventory_lock = threading.Lock()
+
+
+def get_tab_inventory() -> TabInventory:
+    """获取挂接在共享会话池上的标签页清单"""
+    global _shared_inventory
+    with _shared_inventory_lock:
+        if _shared_inventory is None:
+            _shared_inventory = TabInventory()
+        return _shared_inventory
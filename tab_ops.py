@@ -0,0 +1,120 @@
+"""
+批量标签页操作 - "仅保留当前标签页" / "仅保留新标签页" 等操作的计划与执行
+
+核心设计思想：
+- 计划与执行分离：根据目标列表决定关闭哪些标签页是纯函数，不涉及网络
+- 优先读清单：事件维护的标签页清单最新时直接使用，不再查询 /json/list；清单过期时才回退到 HTTP 查询
+- 一个分身一个协程：所有分身的查询、新建、关闭在共享 DevTools 客户端的事件循环中并发执行
+- 复用持久会话：新建与关闭通过分身的浏览器级 WebSocket 流水线发送，每个操作只需一次往返
+- 确认归属：提供用户数据目录时先确认端口属于该分身，其他程序占用的端口不发送任何命令
+- 逐个报告：每个分身返回关闭数量与错误，调用方决定如何记录
+"""
+
+import asyncio
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from cdp_session import CdpSession, SessionPool, get_session_pool
+from devtools import DevToolsError
+from port_allocator import get_port_allocator
+from tab_inventory import TabInventory, get_tab_inventory
+
+NEW_TAB_URL = "chrome://newtab/"
+
+
+class TabOpResult(NamedTuple):
+    """一个分身的标签页操作结果"""
+    number: int
+    port: int
+    closed: int
+    created: Optional[str]  # 新建标签页的ID
+    error: Optional[str]
+
+
+# ---- 计划（纯函数） ----
+
+def page_targets(targets: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """只保留普通页面（排除扩展后台页、Service Worker 等）"""
+    return [t for t in targets if t.get("type") == "page"]
+
+
+def plan_keep_current(targets: List[Dict[str, Any]]) -> List[str]:
+    """仅保留当前标签页：/json/list 按最近激活排序，保留第一个页面，返回要关闭的ID"""
+    pages = page_targets(targets)
+    return [t["id"] for t in pages[1:] if t.get("id")]
+
+
+def plan_keep_new(targets: List[Dict[str, Any]], new_id: Optional[str]) -> List[str]:
+    """仅保留新标签页：关闭除新建标签页外的所有页面"""
+    return [t["id"] for t in page_targets(targets) if t.get("id") and t.get("id") != new_id]
+
+
+# ---- 执行 ----
+
+async def _close_all(session: CdpSession, target_ids: List[str]) -> List[str]:
+    """在同一条连接上流水线发送所有关闭命令"""
+    errors = []
+    for result in await asyncio.gather(*(session.close_target(tid) for tid in target_ids), return_exceptions=True):
+        if isinstance(result, Exception):
+            errors.append(str(result))
+    return errors
+
+
+async def _list_targets(session: CdpSession, inventory: Optional[TabInventory]) -> List[Dict[str, Any]]:
+    """清单最新时零延迟返回，否则通过 /json/list 查询"""
+    targets = inventory.fresh_targets(session) if inventory is not None else None
+    if targets is None:
+        targets = await session.client.list_targets(session.port)
+    return targets
+
+
+async def keep_only_current(session: CdpSession, number: int,
+                            inventory: Optional[TabInventory] = None) -> TabOpResult:
+    port = session.port
+    inventory = inventory or get_tab_inventory()
+    cached = inventory.fresh_targets(session)
+    if cached is not None and len(page_targets(cached)) <= 1:
+        # 只有一个页面，无需关闭任何标签页，也不必查询激活顺序
+        return TabOpResult(number, port, 0, None, None)
+    try:
+        # 目标事件不包含激活信息，"当前标签页"只能取自按最近激活排序的 /json/list
+        to_close = plan_keep_current(await session.client.list_targets(port))
+    except DevToolsError as e:
+        return TabOpResult(number, port, 0, None, str(e))
+    errors = await _close_all(session, to_close)
+    return TabOpResult(number, port, len(to_close) - len(errors), None, "; ".join(errors) or None)
+
+
+async def keep_only_new(session: CdpSession, number: int, url: str = NEW_TAB_URL,
+                        inventory: Optional[TabInventory] = None) -> TabOpResult:
+    port = session.port
+    try:
+        before = await _list_targets(session, inventory or get_tab_inventory())
+        if not page_targets(before):
+            return TabOpResult(number, port, 0, None, None)
+        new_id = await session.create_target(url)
+    except (DevToolsError, KeyError) as e:
+        # 新标签页创建失败时不关闭任何页面，避免关掉最后一个窗口
+        return TabOpResult(number, port, 0, None, str(e) or "新建标签页未返回ID")
+    to_close = plan_keep_new(before, new_id)
+    errors = await _close_all(session, to_close)
+    return TabOpResult(number, port, len(to_close) - len(errors), new_id, "; ".join(errors) or None)
+
+
+async def run_for_ports(operation, ports: Dict[int, int], pool: Optional[SessionPool] = None,
+                        user_data_dirs: Optional[Dict[int, str]] = None) -> List[TabOpResult]:
+    """对每个分身（编号 → 调试端口）并发执行 operation(会话, 编号)，必须在客户端事件循环中等待
+
+    Args:
+        user_data_dirs: 编号 → 用户数据目录；提供时先校验端口归属，被其他进程占用的分身直接报错
+    """
+    pool = pool or get_session_pool()
+    allocator = get_port_allocator() if user_data_dirs else None
+
+    async def run_one(number: int, port: int) -> TabOpResult:
+        if allocator is not None and number in user_data_dirs:
+            check = await allocator.check_async(port, user_data_dirs[number], pool.client)
+            if not check.usable:
+                return TabOpResult(number, port, 0, None, f"拒绝连接端口 {port}: {check.detail}")
+        return await operation(pool.get(port), number)
+
+    return list(await asyncio.gather(*(run_one(number, port) for number, port in ports.items())))
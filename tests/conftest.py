@@ -0,0 +1,80 @@
+"""测试共用设置：把仓库根目录与 benchmarks 目录加入模块搜索路径（模块平铺在根目录下，模拟调试端口在 benchmarks 中）"""
+
+import os
+import sys
+import time
+import socket
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "benchmarks"))
+sys.path.insert(0, ROOT_DIR)
+
+import port_allocator  # noqa: E402
+from cdp_client import CdpClient  # noqa: E402
+from cdp_session import SessionPool  # noqa: E402
+from fake_devtools import FakeDevToolsServer  # noqa: E402
+
+
+@pytest.fixture
+def fake_devtools():
+    """启动模拟调试端口的工厂（端口由系统分配），测试结束时全部停止
+
+    用法：server = fake_devtools(profiles=2, tabs=3, latency_ms=50)
+    """
+    servers = []
+
+    def start(**options) -> FakeDevToolsServer:
+        options.setdefault("profiles", 2)
+        server = FakeDevToolsServer(base_port=0, **options).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.stop()
+
+
+@pytest.fixture
+def cdp_client():
+    """独立的 DevTools 客户端（不使用进程内共享实例），测试结束时关闭事件循环"""
+    client = CdpClient(timeout=2.0)
+    yield client
+    client.close()
+
+
+@pytest.fixture
+def session_pool(cdp_client):
+    pool = SessionPool(cdp_client)
+    yield pool
+    cdp_client.run(pool.close_all())
+
+
+@pytest.fixture
+def port_table(tmp_path, monkeypatch):
+    """临时数据库中的端口分配表，同时替换 get_port_allocator() 的共享实例"""
+    allocator = port_allocator.PortAllocator(path=str(tmp_path / "fleet.db"))
+    monkeypatch.setattr(port_allocator, "_shared_allocator", allocator)
+    yield allocator
+    allocator.close()
+
+
+@pytest.fixture
+def wait_until():
+    """轮询直到条件成立，超时则测试失败"""
+    def wait(predicate, timeout: float = 3.0, message: str = "条件未在时限内成立"):
+        deadline = time.monotonic() + timeout
+        while not predicate():
+            if time.monotonic() > deadline:
+                pytest.fail(message)
+            time.sleep(0.01)
+    return wait
+
+
+@pytest.fixture
+def unused_port():
+    """一个当前没有进程监听的端口"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
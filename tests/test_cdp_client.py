@@ -0,0 +1,78 @@
+"""cdp_client.CdpClient：长连接复用、超时、每端口连接数上限与响应中途断开"""
+
+import time
+
+import pytest
+
+from cdp_client import CdpClient
+from devtools import DevToolsError
+
+
+def test_version_and_targets(fake_devtools, cdp_client):
+    server = fake_devtools(profiles=1, tabs=2)
+    port = server.ports()[1]
+    assert cdp_client.run(cdp_client.version(port))["webSocketDebuggerUrl"].endswith(server.browsers[1].ws_path)
+    assert len(cdp_client.run(cdp_client.list_targets(port))) == 2
+
+
+def test_keep_alive_reuses_connection(fake_devtools, cdp_client):
+    server = fake_devtools(profiles=1)
+    port = server.ports()[1]
+    for _ in range(5):
+        cdp_client.run(cdp_client.version(port))
+    assert (server.stats.connections, server.stats.http_requests) == (1, 5)
+
+
+def test_timeout_raises_devtools_error(fake_devtools, cdp_client):
+    server = fake_devtools(profiles=1, latency_ms=300)
+    with pytest.raises(DevToolsError, match="超时"):
+        cdp_client.run(cdp_client.version(server.ports()[1], timeout=0.05))
+
+
+def test_connection_refused_raises_devtools_error(cdp_client, unused_port):
+    with pytest.raises(DevToolsError):
+        cdp_client.run(cdp_client.version(unused_port))
+    assert cdp_client.run(cdp_client.is_alive(unused_port)) is False
+
+
+def test_http_error_raises_devtools_error(fake_devtools, cdp_client):
+    server = fake_devtools(profiles=1)
+    with pytest.raises(DevToolsError, match="404"):
+        cdp_client.run(cdp_client.close_target(server.ports()[1], "missing"))
+
+
+def test_per_port_connection_limit(fake_devtools):
+    server = fake_devtools(profiles=1, latency_ms=100)
+    port = server.ports()[1]
+    client = CdpClient(max_connections_per_port=2)
+    try:
+        started = time.perf_counter()
+        results = client.run(client.gather(client.version(port) for _ in range(6)))
+        elapsed = time.perf_counter() - started
+    finally:
+        client.close()
+    assert all(isinstance(r, dict) for r in results)
+    # 同时最多 2 个请求：6 个请求分 3 批完成，只建立 2 条连接
+    assert server.stats.connections == 2
+    assert elapsed >= 0.28
+
+
+def test_reset_mid_response_on_new_connection(fake_devtools, cdp_client):
+    server = fake_devtools(profiles=1)
+    port = server.ports()[1]
+    server.truncate_responses(1)
+    with pytest.raises(DevToolsError):
+        cdp_client.run(cdp_client.version(port))
+    # 下一次请求重新建立连接
+    assert cdp_client.run(cdp_client.version(port))
+    assert server.stats.connections == 2
+
+
+def test_reset_mid_response_on_reused_connection_retries(fake_devtools, cdp_client):
+    server = fake_devtools(profiles=1)
+    port = server.ports()[1]
+    cdp_client.run(cdp_client.version(port))
+    server.truncate_responses(1)
+    # 复用的连接在应答途中被重置：换新连接重试一次，调用方看不到错误
+    assert cdp_client.run(cdp_client.list_targets(port))
+    assert (server.stats.connections, server.stats.http_requests) == (2, 3)
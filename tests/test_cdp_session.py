@@ -0,0 +1,93 @@
+"""cdp_session：WebSocket 帧、按 id 分发乱序应答、错误应答、断线与重连、会话池"""
+
+import asyncio
+
+import pytest
+
+from cdp_session import CdpSession, _encode_frame
+from devtools import DevToolsError
+
+
+def test_encode_frame_lengths():
+    for size in (0, 5, 125, 126, 65535, 65536):
+        frame = _encode_frame(b"x" * size)
+        assert frame[0] == 0x81 and frame[1] & 0x80
+        header = 2 + (2 if 126 <= size < 65536 else 8 if size >= 65536 else 0)
+        mask, payload = frame[header:header + 4], frame[header + 4:]
+        assert bytes(b ^ mask[i % 4] for i, b in enumerate(payload)) == b"x" * size
+
+
+def test_out_of_order_responses(fake_devtools, session_pool):
+    server = fake_devtools(profiles=1, method_latency_ms={"Browser.getVersion": 200})
+    port = server.ports()[1]
+    finished = []
+
+    async def scenario(session: CdpSession):
+        async def send(method):
+            result = await session.send(method)
+            finished.append(method)
+            return result
+        await session.connect()
+        return await asyncio.gather(send("Browser.getVersion"), send("Target.getTargets"), send("Target.getTargets"))
+
+    version, targets, again = session_pool.run(scenario, port)
+    # 后发出的命令先得到应答，结果仍然交给各自的调用方
+    assert finished == ["Target.getTargets", "Target.getTargets", "Browser.getVersion"]
+    assert version["product"] == "Chrome/124.0.0.0"
+    assert len(targets["targetInfos"]) == len(again["targetInfos"]) == 3
+    assert server.stats.ws_connections == 1
+
+
+def test_error_response_raises(fake_devtools, session_pool):
+    server = fake_devtools(profiles=1)
+    port = server.ports()[1]
+    with pytest.raises(DevToolsError, match="wasn't found"):
+        session_pool.run(lambda s: s.send("Nope.missing"), port)
+    with pytest.raises(DevToolsError, match="No target"):
+        session_pool.run(lambda s: s.close_target("missing"), port)
+    # 错误应答不影响连接上的后续命令
+    assert session_pool.run(lambda s: s.get_targets(), port)
+    assert server.stats.ws_connections == 1
+
+
+def test_server_close_fails_pending_and_reconnects(fake_devtools, session_pool, wait_until):
+    server = fake_devtools(profiles=1, method_latency_ms={"Browser.getVersion": 1000})
+    port = server.ports()[1]
+    states = []
+
+    async def connect(session: CdpSession):
+        session.add_state_listener(states.append)
+        await session.connect()
+    session_pool.run(connect, port)
+
+    async def slow_command():
+        return await session_pool.get(port).send("Browser.getVersion")
+
+    pending = session_pool.client.submit(slow_command())
+    wait_until(lambda: server.stats.ws_commands == 1)
+    server.disconnect(1)
+
+    with pytest.raises(DevToolsError, match="连接断开"):
+        pending.result(2)
+    assert states == [True, False]
+    # 下一条命令自动重新连接
+    assert session_pool.run(lambda s: s.get_targets(), port)
+    assert states == [True, False, True]
+    assert server.stats.ws_connections == 2
+
+
+def test_session_pool_reuses_sessions(fake_devtools, session_pool):
+    server = fake_devtools(profiles=2)
+    ports = server.ports()
+
+    async def sessions():
+        return session_pool.get(ports[1]), session_pool.get(ports[1]), session_pool.get(ports[2])
+
+    first, again, other = session_pool.client.run(sessions())
+    assert first is again and first is not other
+    session_pool.run_many(lambda s: s.get_targets(), list(ports.values()))
+    assert server.stats.ws_connections == 2
+
+    session_pool.client.run(session_pool.drop(ports[1]))
+    assert first.closed
+    assert session_pool.client.run(sessions())[0] is not first
@@ -0,0 +1,80 @@
+"""lnk_file 的生成与解析往返，以及 shortcut_catalog 在文件损坏时退回到 COM"""
+
+import pytest
+
+from lnk_file import LNK_HEADER_SIZE, LnkParseError, build_lnk_bytes, parse_lnk_bytes, write_lnk
+from shortcut_catalog import ShortcutCatalog
+
+TARGET = "C:\\Program Files\\Google\\Chrome\\Application\\chrome.exe"
+
+
+@pytest.mark.parametrize("target, arguments, working_dir, icon_location", [
+    (TARGET, '--user-data-dir="D:\\ChromeCache\\12" --remote-debugging-port=9234',
+     "C:\\Program Files\\Google\\Chrome\\Application", "D:\\icons\\12.ico,0"),
+    ("C:\\分身\\chrome.exe", "--user-data-dir=E:\\分身缓存\\3 --no-first-run", "C:\\分身", "C:\\分身\\chrome.exe,-2"),
+    (TARGET, "", "", ""),
+])
+def test_round_trip(target, arguments, working_dir, icon_location):
+    lnk = parse_lnk_bytes(build_lnk_bytes(target, arguments, working_dir, icon_location, description="分身"))
+    assert lnk.target_path == target
+    assert lnk.arguments == arguments
+    assert lnk.working_dir == working_dir
+    assert lnk.icon_location == (icon_location or ",0")
+    assert lnk.description == "分身"
+
+
+def test_truncated_input_raises():
+    data = build_lnk_bytes(TARGET, "--user-data-dir=D:\\ChromeCache\\1", "C:\\", "D:\\icons\\1.ico,0")
+    # 截断在头部、LinkInfo 或字符串区内都要报告格式错误，而不是返回半截字段或抛出其他异常
+    for size in (0, 20, LNK_HEADER_SIZE - 1, LNK_HEADER_SIZE + 2, LNK_HEADER_SIZE + 40, len(data) - 20):
+        with pytest.raises(LnkParseError):
+            parse_lnk_bytes(data[:size])
+
+
+def test_corrupt_header_raises():
+    data = bytearray(build_lnk_bytes(TARGET))
+    data[4:20] = b"\x00" * 16  # CLSID
+    with pytest.raises(LnkParseError):
+        parse_lnk_bytes(bytes(data))
+
+
+def _write_number(tmp_path, number, **fields):
+    path = tmp_path / f"{number}.lnk"
+    write_lnk(str(path), TARGET, **fields)
+    return path
+
+
+def test_catalog_parses_without_com(tmp_path, monkeypatch):
+    def no_com(self, path):
+        raise AssertionError("有效的快捷方式不应使用 COM")
+    monkeypatch.setattr(ShortcutCatalog, "_parse_with_com", no_com)
+    _write_number(tmp_path, 7, arguments='--user-data-dir="D:\\ChromeCache\\7"', icon_location="D:\\icons\\7.ico,0")
+
+    info = ShortcutCatalog(str(tmp_path)).get_number(7)
+    assert (info.number, info.target_path, info.icon_location) == (7, TARGET, "D:\\icons\\7.ico,0")
+    assert info.user_data_dir is not None and info.user_data_dir.endswith("7")
+
+
+@pytest.mark.parametrize("damage", ["truncate", "corrupt"])
+def test_catalog_falls_back_to_com(tmp_path, monkeypatch, damage):
+    path = _write_number(tmp_path, 5, arguments="--user-data-dir=D:\\ChromeCache\\5")
+    data = path.read_bytes()
+    path.write_bytes(data[:LNK_HEADER_SIZE + 10] if damage == "truncate" else b"\x00" * len(data))
+
+    calls = []
+
+    def fake_com(self, lnk_path):
+        calls.append(lnk_path)
+        return TARGET, "--user-data-dir=D:\\ChromeCache\\5", "C:\\", "D:\\icons\\5.ico,0"
+    monkeypatch.setattr(ShortcutCatalog, "_parse_with_com", fake_com)
+
+    info = ShortcutCatalog(str(tmp_path)).get_number(5)
+    assert calls == [str(path)]
+    assert (info.number, info.target_path, info.arguments) == (5, TARGET, "--user-data-dir=D:\\ChromeCache\\5")
+
+
+def test_catalog_skips_unreadable_without_com(tmp_path, monkeypatch):
+    path = _write_number(tmp_path, 9)
+    path.write_bytes(b"not a shortcut")
+    monkeypatch.setattr(ShortcutCatalog, "_parse_with_com", lambda self, lnk_path: None)
+    assert ShortcutCatalog(str(tmp_path)).get_number(9) is None
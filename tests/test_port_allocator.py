@@ -0,0 +1,80 @@
+"""port_allocator 的分配表"""
+
+import pytest
+
+import port_allocator
+from port_allocator import MAX_PORT, MIN_PORT, PORT_FOREIGN, PORT_FREE, PORT_OWNED, PortAllocator
+
+
+@pytest.fixture
+def allocator(tmp_path):
+    allocator = PortAllocator(path=str(tmp_path / "fleet.db"), base=9222)
+    yield allocator
+    allocator.close()
+
+
+def test_port_for_prefers_base_plus_number(allocator):
+    assert allocator.port_for(3) == 9225
+    assert allocator.assigned(3) == 9225
+
+
+def test_port_for_number_beyond_port_range(allocator, tmp_path):
+    number = MAX_PORT - allocator.base + 1
+    assert allocator.preferred_port(number) == 0
+
+    port = allocator.port_for(number)
+    other = allocator.port_for(number + 1)
+    assert MIN_PORT <= port <= MAX_PORT and MIN_PORT <= other <= MAX_PORT
+    assert port != other
+    assert allocator.port_for(number) == port
+
+    # 分配结果落盘，重启后不变
+    allocator.close()
+    reopened = PortAllocator(path=str(tmp_path / "fleet.db"), base=9222)
+    try:
+        assert reopened.assigned(number) == port
+    finally:
+        reopened.close()
+
+
+def test_port_for_skips_ports_assigned_to_other_numbers(allocator):
+    allocator.port_for(70000)  # 超出范围，分配到基准端口 9222
+    assert allocator.assigned(70000) == 9222
+    assert allocator.port_for(0) != 9222
+
+
+
+# ---- 端口归属（模拟调试端口） ----
+
+def check_async(allocator, client, port, user_data_dir):
+    return client.run(allocator.check_async(port, user_data_dir, client, 1.0))
+
+
+def test_check_async_free(port_table, cdp_client, unused_port, tmp_path):
+    assert check_async(port_table, cdp_client, unused_port, str(tmp_path)).status == PORT_FREE
+
+
+def test_check_async_owned(port_table, cdp_client, fake_devtools):
+    server = fake_devtools(profiles=2)
+    result = check_async(port_table, cdp_client, server.ports()[1], server.user_data_dirs()[1])
+    assert (result.status, result.usable) == (PORT_OWNED, True)
+
+
+def test_check_async_foreign(port_table, cdp_client, fake_devtools, tmp_path):
+    server = fake_devtools(profiles=2)
+    port = server.ports()[1]
+    # 另一个分身的浏览器占用了该端口
+    result = check_async(port_table, cdp_client, port, server.user_data_dirs()[2])
+    assert (result.status, result.usable) == (PORT_FOREIGN, False)
+    # 目录中没有 DevToolsActivePort（该分身没有在监听）
+    assert check_async(port_table, cdp_client, port, str(tmp_path)).status == PORT_FOREIGN
+    assert check_async(port_table, cdp_client, port, None).status == PORT_FOREIGN
+
+
+def test_check_sync_matches_async(port_table, fake_devtools, unused_port, monkeypatch, cdp_client):
+    server = fake_devtools(profiles=2)
+    monkeypatch.setattr(port_allocator, "get_cdp_client", lambda: cdp_client)
+    udds = server.user_data_dirs()
+    assert port_table.check(server.ports()[1], udds[1]).status == PORT_OWNED
+    assert port_table.check(server.ports()[1], udds[2]).status == PORT_FOREIGN
+    assert port_table.check(unused_port, udds[1]).status == PORT_FREE
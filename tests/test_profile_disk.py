@@ -0,0 +1,62 @@
+"""profile_disk：统计与清理，运行中的分身（包括 缓存目录/N/Data 布局）不被清理"""
+
+import os
+
+import pytest
+
+import profile_disk
+from process_index import ChromeProcess, ProcessSnapshot
+from profile_disk import ProfileDiskAnalyzer
+
+
+def make_file(path, size):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(b"\0" * size)
+
+
+def browser(pid, user_data_dir, number=None):
+    return ChromeProcess(pid, "chrome", None, ["chrome", f"--user-data-dir={user_data_dir}"],
+                         user_data_dir, number, True)
+
+
+@pytest.fixture
+def running(monkeypatch):
+    """替换共享进程索引：running[:] = [ChromeProcess, ...]"""
+    processes = []
+
+    class FakeIndex:
+        def snapshot(self, *args, **kwargs):
+            return ProcessSnapshot(list(processes), 0.0)
+
+    monkeypatch.setattr(profile_disk, "get_process_index", lambda: FakeIndex())
+    return processes
+
+
+def test_purge_skips_running_profiles(tmp_path, running):
+    cache = tmp_path / "cache"
+    make_file(str(cache / "3" / "Data" / "Cache" / "data_0"), 300)  # 缓存目录/N/Data 布局
+    make_file(str(cache / "4" / "Default" / "Code Cache" / "js"), 400)
+    make_file(str(cache / "5" / "Default" / "GPUCache" / "data_1"), 500)
+    make_file(str(cache / "5" / "Default" / "Bookmarks"), 50)
+    make_file(str(cache / "6" / "Cache" / "data_2"), 600)
+
+    analyzer = ProfileDiskAnalyzer(str(cache), workers=2)
+    report = analyzer.scan()
+    assert {p.number: p.categories["Cache"] + p.categories["Code Cache"] + p.categories["GPUCache"]
+            for p in report.profiles} == {3: 300, 4: 400, 5: 500, 6: 600}
+
+    running[:] = [
+        browser(1, str(cache / "3" / "Data")),  # 编号未能识别，但用户数据目录位于分身 3 的目录下
+        browser(2, str(tmp_path / "elsewhere" / "4"), number=4),  # 编号相同
+        browser(3, str(cache / "60")),  # 名称前缀相同的其他目录不算
+    ]
+    result = analyzer.purge(report)
+
+    assert result.skipped_running == [3, 4]
+    assert result.purged == {5: 500, 6: 600}
+    assert (cache / "3" / "Data" / "Cache").exists()
+    assert (cache / "4" / "Default" / "Code Cache").exists()
+    assert not (cache / "5" / "Default" / "GPUCache").exists()
+    assert (cache / "5" / "Default" / "Bookmarks").exists()
+    assert not (cache / "6" / "Cache").exists()
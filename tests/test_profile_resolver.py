@@ -0,0 +1,46 @@
+"""profile_resolver 的编号识别规则（路径用 / 分隔，在任何平台上含义相同）"""
+
+from profile_resolver import SOURCE_DIR_NAME, SOURCE_PATH, ProfileResolver, number_under_cache_dir
+
+
+def resolve(cmdline, cache_dir=None):
+    return ProfileResolver(cache_dir=cache_dir).resolve(cmdline)
+
+
+def test_dir_name_number():
+    identity = resolve("chrome.exe --user-data-dir=D:/ChromeCache/12")
+    assert (identity.number, identity.source) == (12, SOURCE_DIR_NAME)
+
+
+def test_prefixed_parent_dir():
+    identity = resolve('chrome.exe --user-data-dir="D:/Fleet/chrome7/Data"')
+    assert (identity.number, identity.source) == (7, SOURCE_PATH)
+
+
+def test_numeric_parent_dir_is_not_a_profile():
+    # 路径中普通的数字目录（年份、用户目录下的编号等）不能把无关的浏览器当成分身
+    for udd in ("D:/2024/work", "C:/Users/me/123/Chrome", "E:/Backup/2023/PortableChrome/Data"):
+        identity = resolve(f"chrome.exe --user-data-dir={udd}")
+        assert identity.number is None, udd
+        assert ProfileResolver().number_for_user_data_dir(udd) is None, udd
+
+
+def test_numeric_dir_under_cache_dir():
+    identity = resolve("chrome.exe --user-data-dir=D:/ChromeCache/12/Data", cache_dir="D:/ChromeCache")
+    assert (identity.number, identity.source) == (12, SOURCE_PATH)
+    assert resolve("chrome.exe --user-data-dir=D:/Other/12/Data", cache_dir="D:/ChromeCache").number is None
+
+
+def test_cache_dir_change_applies_to_cached_cmdline():
+    resolver = ProfileResolver()
+    cmdline = "chrome.exe --user-data-dir=D:/ChromeCache/5/Data"
+    assert resolver.resolve(cmdline).number is None
+    resolver.set_cache_dir("D:/ChromeCache")
+    assert resolver.resolve(cmdline).number == 5
+
+
+def test_number_under_cache_dir():
+    assert number_under_cache_dir("D:/ChromeCache/chrome3/Data", "D:/ChromeCache/") == 3
+    assert number_under_cache_dir("D:/ChromeCache", "D:/ChromeCache") is None
+    assert number_under_cache_dir("D:/ChromeCache2/4/Data", "D:/ChromeCache") is None
+    assert number_under_cache_dir("D:/ChromeCache/4/Data", None) is None
@@ -0,0 +1,16 @@
+"""shutdown.ShutdownEngine 的 CDP 阶段（模拟调试端口，不等待真实进程）"""
+
+from shutdown import ShutdownEngine, ShutdownTarget
+
+
+def test_close_via_cdp(fake_devtools, session_pool, wait_until, unused_port):
+    server = fake_devtools(profiles=2)
+    targets = [ShutdownTarget(pid=n, number=n, debug_port=port) for n, port in server.ports().items()]
+    targets.append(ShutdownTarget(pid=3, number=3, debug_port=unused_port))
+
+    outcomes = session_pool.client.run(ShutdownEngine(use_wm_close=False)._close_via_cdp(session_pool, targets))
+
+    assert outcomes == [True, True, False]
+    wait_until(lambda: all(b.closed for b in server.browsers.values()))
+    # 已请求关闭的会话被移出会话池，不会被当作断线重连
+    assert session_pool.sessions() == {}
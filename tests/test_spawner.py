@@ -0,0 +1,124 @@
+"""spawner 的参数拆分、调试端口替换与直接创建进程"""
+
+import os
+import subprocess
+import sys
+
+import psutil
+import pytest
+
+import spawner
+from spawner import LaunchSpec, split_command_line, with_debug_port
+
+
+@pytest.mark.parametrize("command_line, expected", [
+    ("", []),
+    ("  \t ", []),
+    ("--no-first-run --disable-sync", ["--no-first-run", "--disable-sync"]),
+    ("a\tb", ["a", "b"]),
+    ('--user-data-dir="D:\\Chrome Cache\\3" --x', ["--user-data-dir=D:\\Chrome Cache\\3", "--x"]),
+    ('"C:\\Program Files\\app.exe" arg', ["C:\\Program Files\\app.exe", "arg"]),
+    ('""', [""]),
+    ('a "" b', ["a", "", "b"]),
+    ('a\\"b', ['a"b']),  # 奇数个反斜杠 + 引号 → 字面引号
+    ('"a\\\\"b c', ["a\\b", "c"]),  # 偶数个反斜杠 + 引号 → 反斜杠减半，引号结束引用
+    ('a\\\\\\"b', ['a\\"b']),
+    ('"a""b" c', ['a"b', "c"]),  # 引号内连续两个引号 → 一个字面引号
+    ('"D:\\Cache\\\\" --x', ["D:\\Cache\\", "--x"]),  # 引号内以反斜杠结尾的目录
+    ("D:\\Cache\\ --x", ["D:\\Cache\\", "--x"]),  # 不跟引号的反斜杠原样保留
+    ("C:\\a\\\\b", ["C:\\a\\\\b"]),
+    ("--user-data-dir=%LOCALAPPDATA%\\Chrome\\5", ["--user-data-dir=%LOCALAPPDATA%\\Chrome\\5"]),  # 不展开环境变量
+    ('"100%" done', ["100%", "done"]),
+    ('"unterminated arg', ["unterminated arg"]),
+])
+def test_split_command_line(command_line, expected):
+    assert split_command_line(command_line) == expected
+
+
+@pytest.mark.parametrize("args, expected", [
+    ([], ["--remote-debugging-port=9300"]),
+    (["--x"], ["--x", "--remote-debugging-port=9300"]),
+    (["--remote-debugging-port=9222", "--x"], ["--remote-debugging-port=9300", "--x"]),
+    (["--a", "--remote-debugging-port=9222", "--b", "--remote-debugging-port=9223"],
+     ["--a", "--remote-debugging-port=9300", "--b"]),
+    (["--remote-debugging-address=0.0.0.0"], ["--remote-debugging-address=0.0.0.0", "--remote-debugging-port=9300"]),
+])
+def test_with_debug_port(args, expected):
+    original = list(args)
+    assert with_debug_port(args, 9300) == expected
+    assert args == original  # 不修改传入的列表
+
+
+class _FakeProcess:
+    def __init__(self, pid):
+        self.pid = pid
+
+    def create_time(self):
+        return 1700000000.0
+
+
+class _FakeRegistry:
+    def __init__(self, existing=None, alive=False):
+        self.existing = existing
+        self.alive = alive
+        self.recorded = []
+
+    def get(self, number):
+        return self.existing
+
+    def is_alive(self, record):
+        return self.alive
+
+    def record_launch(self, number, pid, create_time, user_data_dir=None, debug_port=None):
+        self.recorded.append((number, pid, create_time, user_data_dir, debug_port))
+
+
+@pytest.fixture
+def popen_calls(monkeypatch):
+    calls = []
+
+    def fake_popen(argv, **kwargs):
+        calls.append((argv, kwargs))
+        return _FakeProcess(4321)
+
+    monkeypatch.setattr(spawner.subprocess, "Popen", fake_popen)
+    monkeypatch.setattr(spawner.psutil, "Process", _FakeProcess)
+    return calls
+
+
+@pytest.mark.parametrize("registry, records", [
+    (_FakeRegistry(), True),
+    (_FakeRegistry(existing=object(), alive=False), True),
+    (_FakeRegistry(existing=object(), alive=True), False),
+])
+def test_spawn(popen_calls, registry, records):
+    spec = LaunchSpec(3, "chrome.exe", ["--user-data-dir=D:\\Cache\\3", "--remote-debugging-port=9300"],
+                      None, "D:\\Cache\\3", 9300)
+    launched = spawner.spawn(spec, registry)
+
+    (argv, kwargs), = popen_calls
+    assert argv == ["chrome.exe", "--user-data-dir=D:\\Cache\\3", "--remote-debugging-port=9300"]
+    assert not kwargs.get("shell")
+    assert kwargs["creationflags"] == spawner.CREATION_FLAGS
+    assert kwargs["stdin"] is kwargs["stdout"] is kwargs["stderr"] is subprocess.DEVNULL
+    assert (launched.pid, launched.create_time, launched.debug_port) == (4321, 1700000000.0, 9300)
+    expected = [(3, 4321, 1700000000.0, "D:\\Cache\\3", 9300)] if records else []
+    assert registry.recorded == expected
+
+
+def test_spawn_stub_executable():
+    """不替换 Popen：直接创建桩进程，PID 与创建时间属于启动器的子进程"""
+    spec = LaunchSpec(4, sys.executable, ["-c", "import time; time.sleep(5)", "--user-data-dir=D:\\Cache\\4"],
+                      None, "D:\\Cache\\4", None)
+    registry = _FakeRegistry()
+    launched = spawner.spawn(spec, registry)
+    proc = psutil.Process(launched.pid)
+    try:
+        assert proc.is_running()
+        assert proc.ppid() == os.getpid()  # 没有经过 cmd / shell
+        assert proc.create_time() == launched.create_time
+        assert proc.cmdline()[1:] == spec.args
+        assert registry.recorded == [(4, launched.pid, launched.create_time, "D:\\Cache\\4", None)]
+    finally:
+        proc.terminate()
+        proc.wait(5)
@@ -0,0 +1,93 @@
+"""tab_inventory：事件更新清单、断开后过期与重连、退避重试、端口归属校验"""
+
+import pytest
+
+import tab_inventory
+from fake_devtools import FakeDevToolsServer
+from tab_inventory import TabInventory
+
+
+@pytest.fixture
+def inventory(session_pool, port_table, monkeypatch):
+    monkeypatch.setattr(tab_inventory, "RECONNECT_DELAY", 0.05)
+    monkeypatch.setattr(tab_inventory, "MAX_RECONNECT_DELAY", 0.2)
+    return TabInventory(session_pool)
+
+
+def watch(inventory, port, user_data_dir=None):
+    inventory.pool.client.run(inventory.watch(port, user_data_dir))
+
+
+async def _get_session(inventory, port):
+    return inventory.pool.get(port)
+
+
+def page_ids(inventory, port):
+    return [t.target_id for t in inventory.snapshot(port).pages()]
+
+
+def test_events_update_inventory(fake_devtools, inventory, wait_until):
+    server = fake_devtools(profiles=1, tabs=3)
+    port = server.ports()[1]
+    client = inventory.pool.client
+    watch(inventory, port, server.user_data_dirs()[1])
+    wait_until(lambda: inventory.snapshot(port).synced)
+    assert len(page_ids(inventory, port)) == 3
+
+    # Target.targetCreated：新建的目标排在最前
+    new_id = client.run(client.new_tab(port, "https://example.org/new"))["id"]
+    wait_until(lambda: page_ids(inventory, port)[:1] == [new_id])
+    assert len(page_ids(inventory, port)) == 4
+
+    # Target.targetDestroyed
+    old_id = page_ids(inventory, port)[-1]
+    client.run(client.close_target(port, old_id))
+    wait_until(lambda: old_id not in page_ids(inventory, port))
+    assert len(page_ids(inventory, port)) == 3
+    assert server.stats.http_requests <= 4  # 清单靠事件更新，不轮询 /json/list
+
+
+def test_disconnect_marks_stale_then_resyncs(fake_devtools, inventory, wait_until):
+    server = fake_devtools(profiles=1, tabs=2)
+    port = server.ports()[1]
+    watch(inventory, port)
+    wait_until(lambda: inventory.snapshot(port).synced)
+    session = inventory.pool.client.run(_get_session(inventory, port))
+
+    server.disconnect(1)
+    wait_until(lambda: inventory.snapshot(port).stale_since is not None)
+    tabs = inventory.snapshot(port)
+    assert tabs.stale and "已断开" in tabs.describe()
+    assert len(tabs.pages()) == 2  # 保留最后的内容
+    assert inventory.fresh_targets(session) is None
+
+    # 按退避自动重连并重新订阅
+    wait_until(lambda: inventory.snapshot(port).synced)
+    assert inventory.snapshot(port).stale_since is None
+    assert len(inventory.fresh_targets(session)) == 2
+    assert server.stats.ws_connections == 2
+
+
+def test_reconnects_when_port_starts_listening(inventory, wait_until, unused_port):
+    watch(inventory, unused_port)
+    wait_until(lambda: inventory.snapshot(unused_port).last_error is not None)
+    assert not inventory.snapshot(unused_port).synced
+    assert inventory.snapshot(unused_port).describe() == "未连接"
+    assert unused_port in inventory.watched_ports()
+
+    # 浏览器稍后才开始监听：后台重试连上后恢复为最新
+    with FakeDevToolsServer(profiles=1, tabs=2, base_port=unused_port - 1):
+        wait_until(lambda: inventory.snapshot(unused_port).synced)
+        assert len(inventory.snapshot(unused_port).pages()) == 2
+        inventory.pool.client.run(inventory.unwatch(unused_port))
+        inventory.pool.client.run(inventory.pool.drop(unused_port))
+
+
+def test_foreign_owner_stops_watching(fake_devtools, inventory, wait_until):
+    server = fake_devtools(profiles=2)
+    port = server.ports()[1]
+    watch(inventory, port, server.user_data_dirs()[2])
+    wait_until(lambda: port not in inventory.watched_ports())
+    assert inventory.snapshot(port) is None
+    assert port not in inventory.pool.sessions()
+    assert server.stats.ws_commands == 0  # 没有向别的浏览器发送任何命令
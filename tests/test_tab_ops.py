@@ -0,0 +1,48 @@
+"""tab_ops 的计划函数与经会话池执行的批量标签页操作"""
+
+from functools import partial
+
+from tab_inventory import TabInventory
+from tab_ops import keep_only_current, keep_only_new, plan_keep_current, plan_keep_new, run_for_ports
+
+TARGETS = [
+    {"id": "A", "type": "page"},
+    {"id": "W", "type": "service_worker"},
+    {"id": "B", "type": "page"},
+    {"id": "C", "type": "page"},
+]
+
+
+def test_plans():
+    assert plan_keep_current(TARGETS) == ["B", "C"]
+    assert plan_keep_current([]) == []
+    assert plan_keep_new(TARGETS, "C") == ["A", "B"]
+
+
+def run(pool, operation, server, user_data_dirs=None):
+    results = pool.client.run(run_for_ports(partial(operation, inventory=TabInventory(pool)),
+                                            server.ports(), pool, user_data_dirs))
+    return {r.number: r for r in results}
+
+
+def test_keep_only_current_closes_other_tabs(fake_devtools, session_pool, port_table):
+    server = fake_devtools(profiles=3, tabs=4)
+    results = run(session_pool, keep_only_current, server, server.user_data_dirs())
+    assert {n: (r.closed, r.error) for n, r in results.items()} == {1: (3, None), 2: (3, None), 3: (3, None)}
+    assert server.tab_counts() == {1: 1, 2: 1, 3: 1}
+
+
+def test_keep_only_new(fake_devtools, session_pool, port_table):
+    server = fake_devtools(profiles=2, tabs=3)
+    results = run(session_pool, keep_only_new, server)
+    assert all(r.closed == 3 and r.created and r.error is None for r in results.values())
+    assert server.tab_counts() == {1: 1, 2: 1}
+
+
+def test_foreign_port_is_left_alone(fake_devtools, session_pool, port_table):
+    server = fake_devtools(profiles=2, tabs=3)
+    udds = server.user_data_dirs()
+    results = run(session_pool, keep_only_current, server, {1: udds[2], 2: udds[2]})
+    assert results[1].closed == 0 and "拒绝连接" in results[1].error
+    assert results[2].closed == 2
+    assert server.tab_counts() == {1: 3, 2: 1}
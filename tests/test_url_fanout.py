@@ -0,0 +1,64 @@
+"""url_fanout.open_url：调试端口成功、端口无响应与端口被占用时的回退"""
+
+import pytest
+
+from url_fanout import METHOD_CDP, METHOD_SPAWN, UrlTarget, open_url
+
+URL = "https://example.org/fanout"
+
+
+@pytest.fixture
+def spawned():
+    """记录回退路径收到的分身，不启动任何进程"""
+    calls = []
+
+    def fallback(target, url):
+        calls.append((target.number, url))
+    fallback.calls = calls
+    return fallback
+
+
+def test_open_url_by_cdp(fake_devtools, cdp_client, port_table, spawned):
+    server = fake_devtools(profiles=3, tabs=2)
+    udds = server.user_data_dirs()
+    targets = [UrlTarget(n, udds[n], None, port) for n, port in server.ports().items()]
+
+    report = open_url(targets, URL, fallback=spawned, client=cdp_client)
+
+    assert [(r.method, r.ok) for r in report.results] == [(METHOD_CDP, True)] * 3
+    assert all(r.target_id for r in report.results)
+    assert spawned.calls == []
+    assert server.tab_counts() == {1: 3, 2: 3, 3: 3}
+
+
+def test_open_url_falls_back_on_dead_port(fake_devtools, cdp_client, port_table, spawned, unused_port):
+    server = fake_devtools(profiles=1)
+    udds = server.user_data_dirs()
+    targets = [UrlTarget(1, udds[1], None, server.ports()[1]),
+               UrlTarget(2, udds[1] + "-dead", None, unused_port),
+               UrlTarget(3, udds[1] + "-none", None, None)]
+
+    report = open_url(targets, URL, fallback=spawned, client=cdp_client)
+
+    assert [(r.target.number, r.method, r.ok) for r in report.results] == [
+        (1, METHOD_CDP, True), (2, METHOD_SPAWN, True), (3, METHOD_SPAWN, True)]
+    assert sorted(spawned.calls) == [(2, URL), (3, URL)]
+
+
+def test_open_url_falls_back_on_foreign_owner(fake_devtools, cdp_client, port_table, spawned):
+    server = fake_devtools(profiles=2, tabs=1)
+    udds = server.user_data_dirs()
+    # 分身 1 记录的端口上运行的是分身 2 的浏览器：不能把网址打开到别的分身里
+    targets = [UrlTarget(1, udds[1], None, server.ports()[2])]
+
+    report = open_url(targets, URL, fallback=spawned, client=cdp_client)
+
+    assert [(r.method, r.ok) for r in report.results] == [(METHOD_SPAWN, True)]
+    assert spawned.calls == [(1, URL)]
+    assert server.tab_counts() == {1: 1, 2: 1}
+
+
+def test_open_url_without_fallback_reports_failure(fake_devtools, cdp_client, port_table, unused_port):
+    report = open_url([UrlTarget(1, "D:/Cache/1", None, unused_port)], URL, fallback=None, client=cdp_client)
+    assert [(r.method, r.ok) for r in report.results] == [(METHOD_CDP, False)]
+    assert report.results[0].error
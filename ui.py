@@ -32,6 +32,9 @@ import win32com.client
 import subprocess
 
 from core import ChromeManager
+from process_watcher import ProfileStarted
+from launch_readiness import get_readiness_tracker
+from profile_creator import CreationJob, ProfileCreator, clear_pending_job, load_pending_job
 from utils import (
     center_window,
     parse_window_numbers,
@@ -45,6 +48,8 @@ from utils import (
 from input_tools import input_random_number, input_text_from_file
 from config import STYLES
 
+TAB_STATUS_REFRESH_MS = 1000  # 标签页数量列的刷新间隔
+
 class ChromeManagerUI:
 
     def __init__(self):
@@ -81,6 +86,7 @@ class ChromeManagerUI:
         
         self.manager = ChromeManager(self)
         self.manager.ui_update_callback = self.update_window_list
+        self.manager.profile_event_callback = self.on_profile_event
         
         self.random_min_value = tk.StringVar(value="1000")
         self.random_max_value = tk.StringVar(value="2000")
@@ -275,7 +281,7 @@ class ChromeManagerUI:
         
         self.window_list = ttk.Treeview(
             list_frame,
-            columns=("select", "number", "title", "master", "hwnd"),
+            columns=("select", "number", "title", "master", "hwnd", "tabs"),
             show="headings",
             height=4,
             style="Accent.Treeview",
@@ -287,12 +293,14 @@ class ChromeManagerUI:
         self.window_list.heading("title", text="页面标题")
         self.window_list.heading("master", text="主控")
         self.window_list.heading("hwnd", text="")
+        self.window_list.heading("tabs", text="标签页")
         
         self.window_list.column("select", width=50, anchor="center")
         self.window_list.column("number", width=60, anchor="center")
         self.window_list.column("title", width=260)
         self.window_list.column("master", width=50, anchor="center")
         self.window_list.column("hwnd", width=0, stretch=False)
+        self.window_list.column("tabs", width=80, anchor="center")
         
         self.window_list.tag_configure("master", background="lightblue")
         
@@ -749,6 +757,8 @@ class ChromeManagerUI:
             except Exception as e:
                 log_error("更新屏幕列表失败", e)
             
+            self.root.after(TAB_STATUS_REFRESH_MS, self.refresh_tab_status)
+            
             print(f"[{time.time() - self.start_time:.3f}s] 延迟初始化完成")
         except Exception as e:
             log_error("延迟初始化失败", e)
@@ -856,6 +866,22 @@ class ChromeManagerUI:
         except Exception as e:
             print(f"切换全选状态失败: {str(e)}")
     
+    def on_profile_event(self, event):
+        """分身退出时直接移除列表中对应的行，不再重新导入整个列表"""
+        if isinstance(event, ProfileStarted) or not self.window_list:
+            return
+        try:
+            removed = False
+            for item in self.window_list.get_children():
+                values = self.window_list.item(item)["values"]
+                if values and str(values[1]) == str(event.number):
+                    self.window_list.delete(item)
+                    removed = True
+            if removed:
+                self.update_select_all_status()
+        except Exception as e:
+            print(f"处理分身退出事件失败: {str(e)}")
+    
     def update_select_all_status(self):
         try:
             items = self.window_list.get_children()
@@ -943,6 +969,21 @@ class ChromeManagerUI:
         except Exception as e:
             log_error("刷新窗口标题失败", e)
     
+    def refresh_tab_status(self):
+        """定时从标签页清单读取各窗口的标签页数量（内存读取，不发起请求）"""
+        try:
+            if self.window_list:
+                for item in self.window_list.get_children():
+                    values = self.window_list.item(item)["values"]
+                    if values and len(values) >= 2:
+                        status = self.manager.tab_status(int(values[1]))
+                        if self.window_list.set(item, "tabs") != status:
+                            self.window_list.set(item, "tabs", status)
+        except Exception as e:
+            log_error("刷新标签页数量失败", e)
+        finally:
+            self.root.after(TAB_STATUS_REFRESH_MS, self.refresh_tab_status)
+    
     def import_windows(self):
         print(f"DEBUG: ChromeManagerUI.import_windows CALLED at {time.time()}")
         try:
@@ -1024,7 +1065,8 @@ class ChromeManagerUI:
 
             for window in windows:
                 item = self.window_list.insert("", "end", values=[
-                    "", window["number"], window["title"], "", window["hwnd"]
+                    "", window["number"], window["title"], "", window["hwnd"],
+                    self.manager.tab_status(window["number"])
                 ])
             
             if self.window_list.get_children():
@@ -1071,22 +1113,21 @@ class ChromeManagerUI:
                                     temp_map[pid] = win_num
                             pid_to_number_map = temp_map
 
-                        update_icon_dialog_progress(10, "正在生成图标...")
-                        self.manager.apply_icons_to_chrome_windows(pid_to_number_map)
+                        # 仍在启动中的分身先等待就绪（窗口出现、调试端口可用），不再按固定时间猜测
+                        self.root.after(0, lambda: update_icon_dialog_progress(10, "正在等待窗口就绪..."))
+                        get_readiness_tracker().wait(pid_to_number_map.values(), timeout=10)
 
-                        if hasattr(self.manager, "auto_modify_shortcut_icon") and self.manager.auto_modify_shortcut_icon:
-                            self.root.after(1000, lambda: update_icon_dialog_progress(50, "正在更新快捷方式图标..."))
-                        else:
-                            self.root.after(1000, lambda: update_icon_dialog_progress(50, "已跳过快捷方式图标更新..."))
-                        
-                        self.root.after(2000, lambda: update_icon_dialog_progress(75, "正在替换任务栏图标..."))
-                        self.root.after(3000, lambda: update_icon_dialog_progress(100, "图标替换完成!"))
+                        # 进度按实际完成的步骤更新（回调在本线程中，切换到界面线程刷新）
+                        self.manager.apply_icons_to_chrome_windows(
+                            pid_to_number_map,
+                            progress_callback=lambda percent, text: self.root.after(
+                                0, lambda: update_icon_dialog_progress(percent, text)),
+                            wait=True)
 
-                        self.root.after(3500, lambda: close_icon_dialog(icon_progress_dialog))
+                        self.root.after(500, lambda: close_icon_dialog(icon_progress_dialog))
                     except Exception as e_icon:
                         log_error("图标替换任务失败", e_icon)
-                        if icon_progress_dialog and icon_progress_dialog.winfo_exists():
-                           icon_progress_label.config(text=f"图标处理失败: {e_icon}")
+                        self.root.after(0, lambda msg=f"图标处理失败: {e_icon}": update_icon_dialog_progress(0, msg))
                         self.root.after(3000, lambda: close_icon_dialog(icon_progress_dialog))
 
                 threading.Thread(target=actual_icon_replacement_task, daemon=True).start()
@@ -1095,7 +1136,7 @@ class ChromeManagerUI:
                 if dialog_to_close and dialog_to_close.winfo_exists():
                     dialog_to_close.destroy()
 
-            self.root.after(300, start_icon_replacement_flow)
+            start_icon_replacement_flow()
 
         except Exception as e:
             log_error("更新窗口列表或启动图标流程失败", e)
@@ -2353,30 +2394,20 @@ class ChromeManagerUI:
                 messagebox.showerror("错误", "未找到Chrome安装路径！")
                 return
 
-            shell = win32com.client.Dispatch("WScript.Shell")
-
             window_numbers = parse_window_numbers(numbers)
 
-            created_count = 0
-            for i in window_numbers:
-                data_dir_name = str(i)  
-
-                data_dir = os.path.join(cache_dir, data_dir_name)
-                data_dir = data_dir.replace("\\", "/")
+            job = CreationJob(chrome_path, shortcut_dir, cache_dir, window_numbers, forward_slashes=True)
+            # 上次创建被中断时询问是否继续
+            pending = load_pending_job(shortcut_dir)
+            if pending is not None and pending.numbers:
+                if messagebox.askyesno("继续创建", f"上次有 {len(pending.numbers)} 个环境的创建未完成，是否继续？"):
+                    job = pending
+                else:
+                    clear_pending_job(shortcut_dir)
 
-                os.makedirs(data_dir, exist_ok=True)
-                
-                shortcut_path = os.path.join(shortcut_dir, f"{i}.lnk")
-                shortcut = shell.CreateShortCut(shortcut_path)
-                shortcut.TargetPath = chrome_path
-                shortcut.Arguments = (
-                    f'--user-data-dir="{data_dir}"'
-                )
-                shortcut.WorkingDirectory = os.path.dirname(chrome_path)
-                shortcut.WindowStyle = 1
-                shortcut.IconLocation = f"{chrome_path},0"
-                shortcut.save()
-                created_count += 1
+            report = ProfileCreator(job).run()
+            print(f"创建环境: {report.summary()}")
+            created_count = report.completed
 
             try:
                 ctypes.windll.shell32.SHChangeNotify(0x08000000, 0, None, None)
@@ -2866,6 +2897,7 @@ class ChromeManagerUI:
             
             self.manager.shortcut_path = shortcut_path
             self.manager.cache_dir = cache_dir
+            self.manager.bind_shortcut_catalog()
             self.manager.screen_selection = screen
             
             self.settings["shortcut_path"] = shortcut_path
@@ -2898,6 +2930,8 @@ class ChromeManagerUI:
                 return values[3]
             elif column == "hwnd":
                 return values[4]
+            elif column == "tabs":
+                return values[5] if len(values) > 5 else ""
             return None
         except Exception as e:
             log_error(f"获取窗口项目值失败: {column}", e)
@@ -0,0 +1,164 @@
+"""
+批量打开网址 - 通过已运行分身的调试端口新建标签页，不再为每个分身启动 chrome.exe
+
+核心设计思想：
+- 走调试端口：分身带 --remote-debugging-port 时直接 PUT /json/new?<网址>，省去进程启动与单例转发
+- 并发：所有分身的请求作为协程在共享 DevTools 客户端的事件循环中同时发出，总耗时接近最慢的一个分身
+- 按需回退：没有调试端口或端口无响应的分身才走启动 chrome.exe 的老路径（由调用方提供）
+- 确认归属：新建标签页前确认端口上是该分身自己的浏览器，被其他程序占用时同样回退，不会把网址打开到别的浏览器里
+- 逐个计时：每个分身记录用时与方式（cdp / spawn），汇总为百分位数
+"""
+
+import time
+import subprocess
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, NamedTuple, Optional, Sequence
+
+from cdp_client import CdpClient, get_cdp_client
+from devtools import DEFAULT_TIMEOUT, DevToolsError, debug_port_from_cmdline
+from launch_readiness import percentile
+from port_allocator import get_port_allocator
+from process_index import ProcessSnapshot, get_process_index
+
+DEFAULT_MAX_WORKERS = 32  # 回退路径（启动进程）的线程数
+
+METHOD_CDP = "cdp"
+METHOD_SPAWN = "spawn"
+
+
+class UrlTarget(NamedTuple):
+    """要打开网址的一个分身"""
+    number: Optional[int]
+    user_data_dir: str
+    chrome_path: Optional[str]
+    debug_port: Optional[int]  # None 表示没有可用的调试端口，直接走回退路径
+
+    @property
+    def label(self) -> str:
+        return str(self.number) if self.number is not None else self.user_data_dir
+
+
+class OpenResult(NamedTuple):
+    """一个分身的打开结果"""
+    target: UrlTarget
+    method: str  # METHOD_CDP / METHOD_SPAWN
+    ok: bool
+    latency: float  # 秒
+    target_id: Optional[str]  # CDP 新建标签页的ID
+    error: Optional[str]
+
+
+class FanoutReport(NamedTuple):
+    """一次批量打开的结果"""
+    url: str
+    results: List[OpenResult]
+    elapsed: float
+
+    def succeeded(self) -> List[OpenResult]:
+        return [r for r in self.results if r.ok]
+
+    def failed(self) -> List[OpenResult]:
+        return [r for r in self.results if not r.ok]
+
+    def summary(self) -> str:
+        ok = self.succeeded()
+        parts = [f"成功 {len(ok)}/{len(self.results)}，总用时 {self.elapsed:.2f}s"]
+        for method, label in ((METHOD_CDP, "调试端口"), (METHOD_SPAWN, "启动进程")):
+            latencies = [r.latency for r in ok if r.method == method]
+            if latencies:
+                parts.append(f"{label} {len(latencies)} 个 p50 {percentile(latencies, 50) * 1000:.0f}ms "
+                             f"p90 {percentile(latencies, 90) * 1000:.0f}ms "
+                             f"max {max(latencies) * 1000:.0f}ms")
+        return "; ".join(parts)
+
+
+def running_targets(snapshot: Optional[ProcessSnapshot] = None) -> List[UrlTarget]:
+    """所有正在运行的分身（每个用户数据目录一个），调试端口取自主进程命令行"""
+    snapshot = snapshot or get_process_index().snapshot()
+    targets = {}
+    for proc in snapshot.browsers():
+        if not proc.user_data_dir or proc.user_data_dir in targets:
+            continue
+        targets[proc.user_data_dir] = UrlTarget(proc.number, proc.user_data_dir, proc.exe,
+                                                debug_port_from_cmdline(proc.cmdline))
+    return sorted(targets.values(), key=lambda t: (t.number is None, t.number or 0, t.user_data_dir))
+
+
+def spawn_url(target: UrlTarget, url: str):
+    """老路径：启动 chrome.exe，由已运行的同目录实例接收网址（未运行时启动新实例）"""
+    if not target.chrome_path:
+        raise ValueError("缺少 chrome.exe 路径")
+    subprocess.Popen([target.chrome_path, f"--user-data-dir={target.user_data_dir}", url])
+
+
+def open_url(targets: Sequence[UrlTarget], url: str,
+             fallback: Optional[Callable[[UrlTarget, str], None]] = spawn_url,
+             max_workers: int = DEFAULT_MAX_WORKERS, timeout: float = DEFAULT_TIMEOUT,
+             on_result: Optional[Callable[[OpenResult], None]] = None,
+             client: Optional[CdpClient] = None, verify_owner: bool = True) -> FanoutReport:
+    """在多个分身中并发打开同一个网址（阻塞直到全部完成，不能在客户端事件循环线程中调用）
+
+    Args:
+        fallback: 没有调试端口或调试端口失败时在线程池中调用；为 None 时这些分身直接记为失败
+        on_result: 每个分身完成后调用（调试端口的结果在客户端事件循环线程中回调）
+        verify_owner: 新建标签页前校验端口属于该分身的用户数据目录
+    """
+    logger = logging.getLogger('UrlFanout')
+    client = client or get_cdp_client()
+    allocator = get_port_allocator() if verify_owner else None
+    started = time.perf_counter()
+
+    def report_result(result: OpenResult) -> OpenResult:
+        if on_result is not None:
+            try:
+                on_result(result)
+            except Exception as e:
+                logger.error(f"结果回调失败: {e}")
+        return result
+
+    async def open_by_cdp(target: UrlTarget):
+        """成功返回结果；失败返回错误信息，交给回退路径"""
+        begin = time.perf_counter()
+        try:
+            if allocator is not None:
+                check = await allocator.check_async(target.debug_port, target.user_data_dir, client, timeout)
+                if not check.usable:
+                    raise DevToolsError(f"端口 {target.debug_port} {check.detail}")
+            tab = await client.new_tab(target.debug_port, url, timeout)
+        except DevToolsError as e:
+            logger.info(f"分身 {target.label} 调试端口不可用，改为启动进程: {e}")
+            if fallback is None:
+                return report_result(OpenResult(target, METHOD_CDP, False, time.perf_counter() - begin, None, str(e)))
+            return str(e)
+        return report_result(OpenResult(target, METHOD_CDP, True, time.perf_counter() - begin, tab.get("id"), None))
+
+    def open_by_spawn(target: UrlTarget) -> OpenResult:
+        begin = time.perf_counter()
+        if fallback is None:
+            return report_result(OpenResult(target, METHOD_SPAWN, False, 0.0, None, "没有调试端口"))
+        try:
+            fallback(target, url)
+            return report_result(OpenResult(target, METHOD_SPAWN, True, time.perf_counter() - begin, None, None))
+        except Exception as e:
+            return report_result(OpenResult(target, METHOD_SPAWN, False, time.perf_counter() - begin, None, str(e)))
+
+    results: List[Optional[OpenResult]] = [None] * len(targets)
+    by_cdp = [i for i, t in enumerate(targets) if t.debug_port]
+    needs_spawn = [i for i, t in enumerate(targets) if not t.debug_port]
+    if by_cdp:
+        outcomes = client.run(client.gather(open_by_cdp(targets[i]) for i in by_cdp))
+        for i, outcome in zip(by_cdp, outcomes):
+            if isinstance(outcome, OpenResult):
+                results[i] = outcome
+            else:
+                needs_spawn.append(i)
+    if needs_spawn:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(needs_spawn))),
+                                thread_name_prefix="UrlFanout") as executor:
+            for i, result in zip(needs_spawn, executor.map(open_by_spawn, [targets[i] for i in needs_spawn])):
+                results[i] = result
+
+    report = FanoutReport(url, results, time.perf_counter() - started)
+    logger.info(report.summary())
+    return report
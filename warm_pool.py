@@ -0,0 +1,319 @@
+"""
+分身预热池 - 预先在后台启动若干可随机选中的分身，随机启动时直接取用
+
+核心设计思想：
+- 提前冷启动：池中分身以最小化方式启动，等到窗口出现、调试端口可用才算预热完成
+- 取用即显示：随机启动从池中取出符合条件的分身，恢复窗口即可使用，无需等待冷启动
+- 后台补充：取用后在后台线程补足池的大小，补充时一次只启动一个，不与用户的启动争抢资源
+- 双重上限：池的大小与池中分身的内存合计都有上限，系统可用内存不足时停止补充
+- 不算作已启动：池中的分身对用户不可见，调用方据 numbers() 把它们排除在已启动列表之外
+"""
+
+import time
+import random
+import threading
+import logging
+from typing import Callable, Iterable, List, NamedTuple, Optional, Set
+
+import psutil
+
+from process_index import get_process_index
+from shortcut_catalog import get_shortcut_catalog
+from spawner import SpawnError, build_launch_spec, spawn
+from launch_readiness import get_readiness_tracker
+from port_allocator import PortAllocationError, get_port_allocator
+from shutdown import ShutdownEngine, ShutdownReport, ShutdownTarget
+
+try:
+    import win32gui
+    import win32con
+except ImportError:  # 非Windows环境下不操作窗口
+    win32gui = None
+    win32con = None
+
+DEFAULT_POOL_SIZE = 0  # 0 表示不预热
+MAX_POOL_SIZE = 20
+DEFAULT_MAX_MEMORY_MB = 4096  # 池中分身进程树的常驻内存合计上限
+DEFAULT_MIN_FREE_MEMORY_MB = 2048  # 系统可用内存低于此值时不再补充
+# 池中分身的额外启动参数：最小化启动，不抢占前台
+WARM_ARGS = ["--start-minimized"]
+# 预热失败（快捷方式缺失、未就绪等）的编号在这段时间内不再尝试（秒）
+RETRY_AFTER = 300.0
+
+
+class WarmProfile(NamedTuple):
+    """池中一个已预热完成的分身"""
+    number: int
+    pid: int
+    create_time: Optional[float]
+    hwnd: Optional[int]
+    debug_port: Optional[int]
+    warm_latency: float  # 启动到就绪用时（秒）
+
+
+class WarmPool:
+    """随机启动用的分身预热池
+
+    用法：
+        pool = WarmPool(folder_path, size=3, registry=registry)
+        pool.set_candidates(numbers)        # 可被随机选中、尚未启动的编号
+        pool.refill()                       # 后台补足
+        taken = pool.take(5, numbers)       # 取出并显示最多 5 个，其余由调用方正常启动
+        pool.drain()                        # 退出时关闭池中未取用的分身
+    """
+
+    def __init__(self, folder_path: str, size: int = DEFAULT_POOL_SIZE,
+                 max_memory_mb: float = DEFAULT_MAX_MEMORY_MB,
+                 min_free_memory_mb: float = DEFAULT_MIN_FREE_MEMORY_MB,
+                 registry=None, on_warmed: Optional[Callable[[WarmProfile], None]] = None):
+        """
+        Args:
+            folder_path: 分身快捷方式目录
+            size: 池中保持的分身数
+            max_memory_mb: 池中分身进程树常驻内存合计上限
+            min_free_memory_mb: 系统可用内存低于此值时停止补充
+            registry: 分身运行记录，写入池中分身的进程信息
+            on_warmed: 分身预热完成、放入池前在补充线程中调用（例如提前应用编号图标）
+        """
+        self.folder_path = folder_path
+        self.size = max(0, min(MAX_POOL_SIZE, int(size)))
+        self.max_memory_mb = max_memory_mb
+        self.min_free_memory_mb = min_free_memory_mb
+        self.registry = registry
+        self.on_warmed = on_warmed
+        self.logger = logging.getLogger('WarmPool')
+
+        self._lock = threading.Lock()
+        self._pool = {}  # 编号 → WarmProfile
+        self._warming: Optional[int] = None
+        self._candidates: List[int] = []
+        self._failed_at = {}  # 编号 → 最近一次预热失败的时间
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+
+    # ---- 状态 ----
+
+    def numbers(self) -> Set[int]:
+        """池中（含正在预热）的编号，调用方应把它们排除在已启动列表之外"""
+        with self._lock:
+            numbers = set(self._pool)
+            if self._warming is not None:
+                numbers.add(self._warming)
+            return numbers
+
+    def profiles(self) -> List[WarmProfile]:
+        with self._lock:
+            return list(self._pool.values())
+
+    def memory_mb(self) -> float:
+        """池中分身进程树的常驻内存合计"""
+        numbers = self.numbers()
+        if not numbers:
+            return 0.0
+        index = get_process_index()
+        stats = index.profile_stats(index.snapshot())
+        return sum(s.rss for s in stats.values() if s.number in numbers) / (1024 * 1024)
+
+    # ---- 配置 ----
+
+    def set_candidates(self, numbers: Iterable[int]):
+        """可被随机选中的编号（在界面线程中调用，后台线程只读取副本）"""
+        with self._lock:
+            self._candidates = list(numbers)
+
+    def set_size(self, size: int) -> Optional[ShutdownReport]:
+        """调整池的大小；缩小时关闭多出的分身"""
+        with self._lock:
+            self.size = max(0, min(MAX_POOL_SIZE, int(size)))
+            extra = list(self._pool.values())[self.size:]
+            for profile in extra:
+                del self._pool[profile.number]
+        report = self._close(extra) if extra else None
+        self.refill()
+        return report
+
+    # ---- 取用 ----
+
+    def take(self, count: int, candidates: Iterable[int]) -> List[WarmProfile]:
+        """从池中随机取出最多 count 个编号在 candidates 中的分身并恢复其窗口
+
+        已退出的池中分身会被丢弃；取用后在后台补足
+        """
+        allowed = set(candidates)
+        taken = []
+        with self._lock:
+            eligible = [p for p in self._pool.values() if p.number in allowed]
+            random.shuffle(eligible)
+            for profile in eligible:
+                if len(taken) >= count:
+                    break
+                del self._pool[profile.number]
+                if self._is_alive(profile):
+                    taken.append(profile)
+            # 取出的分身已在运行，调用方更新候选之前也不能再次预热
+            taken_numbers = {p.number for p in taken}
+            self._candidates = [n for n in self._candidates if n not in taken_numbers]
+        for profile in taken:
+            reveal_window(profile.hwnd)
+        self.refill()
+        return taken
+
+    @staticmethod
+    def _is_alive(profile: WarmProfile) -> bool:
+        try:
+            proc = psutil.Process(profile.pid)
+            return profile.create_time is None or abs(proc.create_time() - profile.create_time) < 0.01
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            return False
+
+    # ---- 补充 ----
+
+    def refill(self):
+        """在后台补足池的大小（已有补充线程时直接返回）"""
+        with self._lock:
+            if self._stopped or self.size <= 0 or not self.folder_path:
+                return
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._fill, name="WarmPool", daemon=True)
+            self._thread.start()
+
+    def _fill(self):
+        while not self._stopped:
+            if not self._has_memory_headroom():
+                return
+            with self._lock:
+                if self._stopped or len(self._pool) >= self.size:
+                    return
+                number = self._pick_candidate()
+                if number is None:
+                    return
+                self._warming = number
+            try:
+                profile = self._warm(number)
+            finally:
+                with self._lock:
+                    self._warming = None
+            if profile is None:
+                with self._lock:
+                    self._failed_at[number] = time.monotonic()
+                continue
+            with self._lock:
+                keep = not self._stopped and len(self._pool) < self.size
+                if keep:
+                    self._pool[number] = profile
+            if not keep:
+                # 预热期间池被缩小或已停止
+                self._close([profile])
+
+    def _pick_candidate(self) -> Optional[int]:
+        """随机挑选一个未运行、不在池中、近期未失败的编号（调用方持有锁）"""
+        now = time.monotonic()
+        try:
+            # 共享索引在有效期内直接返回缓存的快照
+            running = set(get_process_index().snapshot().numbers())
+        except Exception:
+            running = set()
+        choices = [n for n in self._candidates
+                   if n not in self._pool and n not in running
+                   and now - self._failed_at.get(n, -RETRY_AFTER) >= RETRY_AFTER]
+        return random.choice(choices) if choices else None
+
+    def _has_memory_headroom(self) -> bool:
+        available_mb = psutil.virtual_memory().available / (1024 * 1024)
+        if available_mb < self.min_free_memory_mb:
+            self.logger.info(f"可用内存 {available_mb:.0f}MB 不足，暂停预热")
+            return False
+        pooled = self.profiles()
+        if pooled:
+            used_mb = self.memory_mb()
+            # 按池中分身的平均占用估算再预热一个之后的合计
+            if used_mb + used_mb / len(pooled) > self.max_memory_mb:
+                self.logger.info(f"预热池内存 {used_mb:.0f}MB 已接近上限 {self.max_memory_mb:.0f}MB")
+                return False
+        return True
+
+    def _warm(self, number: int) -> Optional[WarmProfile]:
+        catalog = get_shortcut_catalog(self.folder_path)
+        shortcut_info = catalog.get(catalog.path_for_number(number))
+        if shortcut_info is None:
+            return None
+        tracker = get_readiness_tracker()
+        try:
+            debug_port = get_port_allocator().prepare_launch(number, shortcut_info.user_data_dir)
+            spec = build_launch_spec(shortcut_info, number, debug_port=debug_port)
+            spec = spec._replace(args=list(spec.args) + [arg for arg in WARM_ARGS if arg not in spec.args])
+            started = time.monotonic()
+            launched = spawn(spec, self.registry)
+        except (SpawnError, PortAllocationError) as e:
+            self.logger.warning(f"预热分身 {number} 失败: {e}")
+            return None
+
+        tracker.track(number, launched.pid, launched.debug_port, spawned_at=started)
+        timing = tracker.wait([number], timeout=tracker.ready_timeout).get(number)
+        if timing is None or not timing.ready:
+            self.logger.warning(f"预热分身 {number} 未能就绪，关闭")
+            self._close([WarmProfile(number, launched.pid, launched.create_time, None, launched.debug_port, 0.0)])
+            return None
+        # 启动参数被忽略时（例如 Chrome 恢复了上次的窗口状态）补一次最小化
+        minimize_window(timing.hwnd)
+        self.logger.info(f"分身 {number} 预热完成，用时 {timing.elapsed:.2f}s")
+        profile = WarmProfile(number, launched.pid, launched.create_time, timing.hwnd,
+                              launched.debug_port, timing.elapsed)
+        if self.on_warmed is not None:
+            try:
+                self.on_warmed(profile)
+            except Exception as e:
+                self.logger.error(f"预热回调失败: 分身 {number} - {e}")
+        return profile
+
+    # ---- 关闭 ----
+
+    def drain(self) -> Optional[ShutdownReport]:
+        """停止补充并关闭池中所有未取用的分身"""
+        with self._lock:
+            self._stopped = True
+            pooled = list(self._pool.values())
+            self._pool.clear()
+        return self._close(pooled) if pooled else None
+
+    def _close(self, profiles: List[WarmProfile]) -> ShutdownReport:
+        targets = [ShutdownTarget(pid=p.pid, number=p.number, debug_port=p.debug_port) for p in profiles]
+        report = ShutdownEngine().shutdown(targets)
+        if self.registry is not None:
+            for p in profiles:
+                try:
+                    self.registry.record_exit(p.number, p.pid)
+                except Exception:
+                    pass
+        get_process_index().invalidate()
+        return report
+
+
+def minimize_window(hwnd: Optional[int]) -> bool:
+    """最小化且不激活"""
+    if win32gui is None or not hwnd:
+        return False
+    try:
+        if win32gui.IsWindow(hwnd) and not win32gui.IsIconic(hwnd):
+            win32gui.ShowWindow(hwnd, win32con.SW_SHOWMINNOACTIVE)
+        return True
+    except Exception:
+        return False
+
+
+def reveal_window(hwnd: Optional[int]) -> bool:
+    """恢复最小化的池中窗口并置于前台"""
+    if win32gui is None or not hwnd:
+        return False
+    try:
+        if not win32gui.IsWindow(hwnd):
+            return False
+        win32gui.ShowWindow(hwnd, win32con.SW_RESTORE)
+        try:
+            win32gui.SetForegroundWindow(hwnd)
+        except Exception:
+            pass  # 前台锁定时只恢复窗口
+        return True
+    except Exception:
+        return False